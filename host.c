@@ -0,0 +1,183 @@
+#include <stdint.h>
+#include <stdlib.h>
+#include <stdio.h>
+#include <inttypes.h>
+#include <string.h>
+#include <stdatomic.h>
+#include <pthread.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
+#include "ram.h"
+#include "vm.h"
+#include "host.h"
+
+// the queue is the job array itself, threads claim the next job with an atomic
+// fetch-add on next_job so taking a job is one instruction & never blocks.
+typedef struct
+{
+    fvm_host*            host;
+    fvm_job*             jobs;
+    uint32_t             job_count;
+    uint64_t             op_limit;
+    atomic_uint_fast32_t next_job;
+} host_run;
+
+fvm_host*
+fvm_host_create(void)
+{
+	fvm_host* host = calloc(1, sizeof(fvm_host));
+
+	if (host == NULL)
+		perror("Error allocating furst-vm host!");
+
+	return host;
+}
+
+void
+fvm_host_destroy(fvm_host* host)
+{
+	uint32_t i;
+
+	if (host == NULL)
+		return;
+
+	for (i = 0; i < host->program_count; ++i)
+		unmap_ram(host->programs[i].image, host->programs[i].ram_size);
+
+	free(host->programs);
+	free(host);
+}
+
+int
+fvm_host_add_program(fvm_host* host, const char* file_path)
+{
+	// loads a program into an image shared by every thread, returns it's ndx or -1 on error.
+	fvm_program* program;
+	fvm_program* programs;
+	uint32_t     cap;
+
+	if (host->program_count == host->program_cap)
+	{
+		cap      = host->program_cap ? host->program_cap * 2 : 16;
+		programs = realloc(host->programs, cap * sizeof(fvm_program));
+
+		if (programs == NULL)
+		{
+			perror("Error allocating furst-vm host programs!");
+			return -1;
+		}
+
+		host->programs    = programs;
+		host->program_cap = cap;
+	}
+
+	program        = &host->programs[host->program_count];
+	program->image = map_program(file_path, 0, &program->ram_size);
+
+	if (program->image == NULL)
+		return -1;
+
+	// everything past the last non-zero byte is left to the zeroed ram each job gets.
+	program->init_size = program->ram_size;
+
+	while (program->init_size && !program->image[program->init_size - 1])
+		--program->init_size;
+
+	mprotect(program->image, program->ram_size, PROT_READ);
+	return (int) host->program_count++;
+}
+
+static void
+run_job(fvm_host* host, fvm_state* vm, fvm_job* job, uint64_t op_limit)
+{
+	const fvm_program* program;
+
+	job->status = FVM_NO_RAM;
+
+	if (job->program >= host->program_count)
+		return;
+
+	program = &host->programs[job->program];
+
+	// a thread keeps it's ram between jobs running programs of the same size, the pages past
+	// the image are dropped rather than cleared so only pages the last job touched cost anything.
+	if (vm->ram != NULL && vm->ram_size == program->ram_size)
+	{
+#ifdef MADV_DONTNEED
+		size_t page_size = (size_t) sysconf(_SC_PAGESIZE);
+		size_t keep      = (program->init_size + page_size - 1) & ~(page_size - 1);
+
+		if (keep < vm->ram_size)
+			madvise(vm->ram + keep, vm->ram_size - keep, MADV_DONTNEED);
+
+		memset(vm->ram + program->init_size, 0, keep - program->init_size);
+#else
+		memset(vm->ram, 0, vm->ram_size);
+#endif
+	}
+	else if (fvm_alloc_ram(vm, program->ram_size) == NULL)
+		return;
+
+	memcpy(vm->ram, program->image, program->init_size);
+	fvm_reset(vm);
+
+	job->status      = op_limit ? fvm_step(vm, op_limit) : fvm_run(vm);
+	job->retc        = vm->retc;
+	job->stack_depth = fvm_stack_depth(vm);
+	job->top         = job->stack_depth ? *(uint32_t*) vm->sp : 0;
+	job->instr_count = vm->instr_count;
+}
+
+static void*
+host_worker(void* arg)
+{
+	host_run*  run = arg;
+	fvm_state* vm  = fvm_create();
+	uint32_t   ndx;
+
+	if (vm == NULL)
+		return NULL;
+
+	while ((ndx = (uint32_t) atomic_fetch_add(&run->next_job, 1)) < run->job_count)
+		run_job(run->host, vm, &run->jobs[ndx], run->op_limit);
+
+	fvm_destroy(vm);
+	return NULL;
+}
+
+int
+fvm_host_run(fvm_host* host, fvm_job* jobs, uint32_t job_count, uint32_t thread_count, uint64_t op_limit)
+{
+	// runs every job across thread_count threads & returns once they're all done, jobs
+	// stop after op_limit ops when it isn't 0. returns 0, or 1 when no thread started.
+	pthread_t threads[FVM_HOST_MAX_THREADS];
+	host_run  run;
+	uint32_t  started = 0;
+	uint32_t  i;
+
+	run.host      = host;
+	run.jobs      = jobs;
+	run.job_count = job_count;
+	run.op_limit  = op_limit;
+	atomic_init(&run.next_job, 0);
+
+	if (thread_count > FVM_HOST_MAX_THREADS)
+		thread_count = FVM_HOST_MAX_THREADS;
+
+	for (i = 0; i < thread_count; ++i)
+	{
+		if (pthread_create(&threads[started], NULL, host_worker, &run))
+		{
+			perror("Error starting furst-vm host thread");
+			break;
+		}
+
+		++started;
+	}
+
+	for (i = 0; i < started; ++i)
+		pthread_join(threads[i], NULL);
+
+	return started ? 0 : 1;
+}
@@ -0,0 +1,66 @@
+#ifndef HOST_H
+#define HOST_H
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <stdio.h>
+#include <inttypes.h>
+
+#include "vm.h"
+
+// runs batches of programs on a pool of threads, each thread with a vm of it's own.
+// programs are loaded once by fvm_host_add_program() into read-only images every
+// thread copies from, jobs are taken off a lock-free queue so threads never wait on
+// each other. built into libfvm, needs -pthread:
+//     gcc -O2 -shared -fPIC -pthread -DFVM_LIB -o libfvm.so vm.c ram.c host.c
+// yson_dev/fvm.py drives it through FVMHost.
+
+#define FVM_HOST_MAX_THREADS 256
+
+// a job names the program to run, the rest is filled in once it's run.
+typedef struct
+{
+    uint32_t program;     // ndx returned by fvm_host_add_program().
+    int32_t  status;      // FVM_HALTED, FVM_SUSPENDED when op_limit ran out, FVM_NO_RAM when it couldn't run.
+    int32_t  retc;
+    uint32_t top;         // word on top of the work-stack, 0 when it's empty.
+    uint32_t stack_depth;
+    uint32_t pad;
+    uint64_t instr_count;
+} fvm_job;
+
+typedef struct
+{
+    uint8_t* image;       // ram as the loader left it, read-only.
+    size_t   ram_size;
+    size_t   init_size;   // bytes of image up to it's last non-zero byte, the rest starts zeroed.
+} fvm_program;
+
+typedef struct
+{
+    fvm_program* programs;
+    uint32_t     program_count;
+    uint32_t     program_cap;
+} fvm_host;
+
+fvm_host*
+fvm_host_create(void);
+
+void
+fvm_host_destroy(fvm_host* host);
+
+int
+fvm_host_add_program(fvm_host* host, const char* file_path);
+
+int
+fvm_host_run(fvm_host* host, fvm_job* jobs, uint32_t job_count, uint32_t thread_count, uint64_t op_limit);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif // HOST.H
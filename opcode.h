@@ -29,7 +29,7 @@ extern "C" {
 // #define ADDR_CODE       4
 // #define UINT8_CODE      5
 
-#define OPCOUNT 61 
+#define OPCOUNT 87 
 
 #define die_op      0
 #define nop_op      1
@@ -93,8 +93,38 @@ extern "C" {
 #define rrots_op   59
 #define brkp_op    60
 
+// superinstructions, see fused_seq_tbl in opcodes.py.
+#define pshfr_pshfr_op           61
+#define pshfr_pshfr_add_poptr_op 62
+#define psh_je_op                63
+#define psh_jn_op                64
+#define pshfr_inc_poptr_op       65
+#define pshfr_inc_poptr_lcont_op 66
+#define poptr_pop2_op            67
+#define pshfr_psh_op             68
+
+// immediate operand, see imm_op_tbl in opcodes.py.
+#define addi_op    69
+#define subi_op    70
+#define muli_op    71
+#define andi_op    72
+#define ori_op     73
+#define xori_op    74
+#define lshfti_op  75
+#define rshfti_op  76
+#define incr_op    77
+#define decr_op    78
+#define addir_op   79
+#define addrr_op   80
+#define jei_op     81
+#define jni_op     82
+#define jli_op     83
+#define jgi_op     84
+#define jlsi_op    85
+#define jgsi_op    86
+
 #define build_optable()                   \
-    void* optable[OPCOUNT] = {            \
+    static void* const optable[OPCOUNT] = {            \
         &&die,                            \
         &&nop,                            \
         &&nspctr,                         \
@@ -155,7 +185,33 @@ extern "C" {
         &&rshfts,                         \
         &&lrots,                          \
         &&rrots,                          \
-        &&brkp                            \
+        &&brkp,                           \
+        &&pshfr_pshfr,                    \
+        &&pshfr_pshfr_add_poptr,          \
+        &&psh_je,                         \
+        &&psh_jn,                         \
+        &&pshfr_inc_poptr,                \
+        &&pshfr_inc_poptr_lcont,          \
+        &&poptr_pop2,                     \
+        &&pshfr_psh,                      \
+        &&addi,                           \
+        &&subi,                           \
+        &&muli,                           \
+        &&andi,                           \
+        &&ori,                            \
+        &&xori,                           \
+        &&lshfti,                         \
+        &&rshfti,                         \
+        &&incr,                           \
+        &&decr,                           \
+        &&addir,                          \
+        &&addrr,                          \
+        &&jei,                            \
+        &&jni,                            \
+        &&jli,                            \
+        &&jgi,                            \
+        &&jlsi,                           \
+        &&jgsi                            \
     };
 
  const char* mnemonic_strings[] = {
@@ -219,7 +275,33 @@ extern "C" {
     "rshfts",
     "lrots",
     "rrots",
-    "brkp"
+    "brkp",
+    "pshfr_pshfr",
+    "pshfr_pshfr_add_poptr",
+    "psh_je",
+    "psh_jn",
+    "pshfr_inc_poptr",
+    "pshfr_inc_poptr_lcont",
+    "poptr_pop2",
+    "pshfr_psh",
+    "addi",
+    "subi",
+    "muli",
+    "andi",
+    "ori",
+    "xori",
+    "lshfti",
+    "rshfti",
+    "incr",
+    "decr",
+    "addir",
+    "addrr",
+    "jei",
+    "jni",
+    "jli",
+    "jgi",
+    "jlsi",
+    "jgsi"
 };
 
 #ifdef __cplusplus
@@ -4,57 +4,359 @@
 #include <inttypes.h>
 #include <string.h>
 
+#ifndef _WIN32
+#include <sys/mman.h>
+#include <unistd.h>
+#endif
+
 #include "ram.h"
 
-int
-load_program(const char* file_path, uint8_t do_silent, void* ram)
+#ifndef MAP_NORESERVE
+#define MAP_NORESERVE 0
+#endif
+
+static size_t
+page_align(size_t size, size_t page_size)
 {
-    FILE*  file;
-	size_t file_size;
-	size_t bytes_read;
+    return (size + page_size - 1) & ~(page_size - 1);
+}
 
-    file = fopen(file_path, "rb");
-	
-    if (!do_silent)
+static int
+read_image_v1(FILE* file, const char* file_path, uint8_t do_silent, fbin_image* image, const uint8_t* metadata)
+{
+	size_t   load_size;
+	uint32_t prog_size;
+	uint16_t flags;
+
+    (void) file;
+
+    memcpy(&image->start_addr, metadata + IP_START_ADDR_ADDR, sizeof(image->start_addr));
+    memcpy(&prog_size, metadata + PROG_SIZE_ADDR, sizeof(prog_size));
+    memcpy(&flags, metadata + FLAGS_ADDR, sizeof(flags));
+
+    // only the metadata & program are loaded into ram. files with a symtab
+    // that isn't trailing have it before the program and every address
+    // accounts for it, so the whole file is loaded for them.
+    if ((flags & KEEP_SYMBOLS_FLAG) && !(flags & TRAILING_SYMTAB_FLAG))
+        load_size = image->file_size;
+    else
+        load_size = METADATA_SIZE + (size_t) prog_size;
+
+    if (load_size > image->file_size)
     {
-        if (file == NULL)
+        if (!do_silent)
+            fprintf(stderr, "Error reading file: [%s] is truncated\n", file_path);
+
+        return 1;
+    }
+
+    // v1 files are loaded at addr 0 & declare no heap, reserve the default after the program.
+    image->version       = 1;
+    image->section_count = 2;
+    image->sections[0]   = (fbin_section) { SECTION_CODE, SECTION_LOAD_FLAG | SECTION_WRITE_FLAG, 0, (uint32_t) load_size, 0 };
+    image->sections[1]   = (fbin_section) { SECTION_HEAP, SECTION_LOAD_FLAG | SECTION_WRITE_FLAG | SECTION_ZERO_FLAG, 0, DEFAULT_HEAP_SIZE, (uint32_t) load_size };
+    image->ram_size      = load_size + DEFAULT_HEAP_SIZE;
+    return 0;
+}
+
+static int
+read_image_v2(FILE* file, const char* file_path, uint8_t do_silent, fbin_image* image)
+{
+	uint8_t       header[FBIN_HEADER_SIZE];
+	uint8_t       entry[FBIN_SECTION_SIZE];
+	uint16_t      section_count;
+	uint32_t      section_tbl_addr;
+	fbin_section* section;
+	uint16_t      i;
+
+    rewind(file);
+
+    if (fread(header, sizeof(uint8_t), FBIN_HEADER_SIZE, file) != FBIN_HEADER_SIZE)
+        goto truncated;
+
+    memcpy(&image->version, header + FBIN_VERSION_ADDR, sizeof(image->version));
+    memcpy(&image->start_addr, header + FBIN_START_ADDR_ADDR, sizeof(image->start_addr));
+    memcpy(&section_count, header + FBIN_SECTION_COUNT_ADDR, sizeof(section_count));
+    memcpy(&section_tbl_addr, header + FBIN_SECTION_TBL_ADDR, sizeof(section_tbl_addr));
+
+    if (image->version != FBIN_VERSION)
+    {
+        if (!do_silent)
+            fprintf(stderr, "Error reading file: [%s] is .fbin version %u, expected %u\n", file_path, image->version, FBIN_VERSION);
+
+        return 1;
+    }
+
+    if (fseek(file, section_tbl_addr, SEEK_SET))
+        goto truncated;
+
+    // keep only the sections flagged for loading into ram,
+    // the rest(symtab, debug-line, relocs) are only for tools.
+    image->section_count = 0;
+    image->ram_size      = FBIN_PAGE_SIZE;
+
+    for (i = 0; i < section_count; ++i)
+    {
+        if (fread(entry, sizeof(uint8_t), FBIN_SECTION_SIZE, file) != FBIN_SECTION_SIZE)
+            goto truncated;
+
+        section = &image->sections[image->section_count];
+
+        memcpy(&section->type, entry + SECTION_TYPE_ADDR, sizeof(section->type));
+        memcpy(&section->flags, entry + SECTION_FLAGS_ADDR, sizeof(section->flags));
+        memcpy(&section->offset, entry + SECTION_OFFSET_ADDR, sizeof(section->offset));
+        memcpy(&section->size, entry + SECTION_SIZE_ADDR, sizeof(section->size));
+        memcpy(&section->vaddr, entry + SECTION_VADDR_ADDR, sizeof(section->vaddr));
+
+        if (!(section->flags & SECTION_LOAD_FLAG))
+            continue;
+
+        if (!(section->flags & SECTION_ZERO_FLAG) && (size_t) section->offset + section->size > image->file_size)
+            goto truncated;
+
+        if (section->vaddr < FBIN_PAGE_SIZE || (size_t) section->vaddr + section->size > RAMSIZE)
         {
-            perror("Error opening file");
+            if (!do_silent)
+                fprintf(stderr, "Error reading file: [%s] has a section at invalid addr %u\n", file_path, section->vaddr);
+
+            return 1;
+        }
+
+        if (image->section_count == FBIN_MAX_SECTIONS)
+        {
+            if (!do_silent)
+                fprintf(stderr, "Error reading file: [%s] has more than %d loaded sections\n", file_path, FBIN_MAX_SECTIONS);
+
             return 1;
         }
+
+        if ((size_t) section->vaddr + section->size > image->ram_size)
+            image->ram_size = (size_t) section->vaddr + section->size;
+
+        ++image->section_count;
+    }
+
+    return 0;
+
+truncated:
+    if (!do_silent)
+        fprintf(stderr, "Error reading file: [%s] is truncated\n", file_path);
+
+    return 1;
+}
+
+static FILE*
+read_image(const char* file_path, uint8_t do_silent, fbin_image* image)
+{
+    FILE*    file;
+	uint8_t  metadata[METADATA_SIZE];
+	int      err;
+
+    file = fopen(file_path, "rb");
+
+    if (file == NULL)
+    {
+        if (!do_silent)
+            perror("Error opening file");
+
+        return NULL;
     }
 
     // get the file size then rewind file.
     fseek(file, 0, SEEK_END);
-    file_size = ftell(file);
+    image->file_size = ftell(file);
     rewind(file);
 
-	// read file into ram
-    bytes_read = fread(ram, sizeof(uint8_t), file_size, file);
-  	
-    if (!do_silent)
+    // read the start of the file to find out which version of .fbin it is.
+    if (fread(metadata, sizeof(uint8_t), METADATA_SIZE, file) != METADATA_SIZE)
+    {
+        if (!do_silent)
+            fprintf(stderr, "Error reading file: [%s] is too small to be a .fbin\n", file_path);
+
+        fclose(file);
+        return NULL;
+    }
+
+    if (!memcmp(metadata, FBIN_MAGIC, FBIN_MAGIC_SIZE))
+        err = read_image_v2(file, file_path, do_silent, image);
+    else
+        err = read_image_v1(file, file_path, do_silent, image, metadata);
+
+    if (err)
     {
-        if (bytes_read != file_size)
-            perror("Error reading file");
+        fclose(file);
+        return NULL;
     }
 
+    return file;
+}
+
+static int
+read_section(FILE* file, const char* file_path, uint8_t do_silent, const fbin_section* section, uint32_t skip, void* ram)
+{
+    // reads a section's bytes from skip onwards into ram at it's vaddr.
+    if (fseek(file, section->offset + skip, SEEK_SET) ||
+        fread((uint8_t*) ram + section->vaddr + skip, sizeof(uint8_t), section->size - skip, file) != section->size - skip)
+    {
+        if (!do_silent)
+            fprintf(stderr, "Error reading file: [%s] is truncated\n", file_path);
+
+        return 1;
+    }
+
+    return 0;
+}
+
+int
+load_program(const char* file_path, uint8_t do_silent, void* ram)
+{
+    // loads a program into ram the caller allocated, ram must be RAMSIZE bytes.
+    FILE*               file;
+	fbin_image          image;
+	const fbin_section* section;
+	uint16_t            i;
+
+    file = read_image(file_path, do_silent, &image);
+
+    if (file == NULL)
+        return 1;
+
+    for (i = 0; i < image.section_count; ++i)
+    {
+        section = &image.sections[i];
+
+        if (section->flags & SECTION_ZERO_FLAG)
+            memset((uint8_t*) ram + section->vaddr, 0, section->size);
+
+        else if (read_section(file, file_path, do_silent, section, 0, ram))
+        {
+            fclose(file);
+            return 1;
+        }
+    }
+
+    // vm starts executing at the addr held in addr 0 of ram.
+    memcpy((uint8_t*) ram + IP_START_ADDR_ADDR, &image.start_addr, sizeof(image.start_addr));
+
     fclose(file);
     return 0;
 }
 
 void*
-init_ram(uint32_t size, uint8_t do_silent)
+map_program(const char* file_path, uint8_t do_silent, size_t* ram_size)
 {
-	void* ram = malloc(size);
-	
-    if (!do_silent)
+    // loads a program into ram sized for it rather than RAMSIZE, returns NULL on error.
+    // ram is anonymous memory so only the pages the program touches are ever faulted in,
+    // zero-filled sections like the heap cost nothing until they're used. sections that
+    // sit on host pages in the file are mapped straight from the file, private & writable
+    // so they're still faulted in lazily but a write copies the page rather than failing,
+    // ram reads & writes the same however big the code is. the rest of their bytes are
+    // read in. *ram_size is set for unmap_ram().
+    FILE*               file;
+	fbin_image          image;
+	const fbin_section* section;
+	uint8_t*            ram;
+	size_t              page_size;
+	uint32_t            mapped_size;
+	uint16_t            i;
+
+    file = read_image(file_path, do_silent, &image);
+
+    if (file == NULL)
+        return NULL;
+
+    *ram_size = image.ram_size;
+    ram       = alloc_ram(ram_size, do_silent);
+
+    if (ram == NULL)
     {
-        if (ram == NULL)
+        fclose(file);
+        return NULL;
+    }
+
+#ifdef _WIN32
+    page_size = FBIN_PAGE_SIZE;
+#else
+    page_size = (size_t) sysconf(_SC_PAGESIZE);
+#endif
+
+    for (i = 0; i < image.section_count; ++i)
+    {
+        section     = &image.sections[i];
+        mapped_size = 0;
+
+        // anonymous memory is already zeroed.
+        if (section->flags & SECTION_ZERO_FLAG)
+            continue;
+
+#ifndef _WIN32
+        // only whole pages are mapped so the file's bytes past the section never show up in ram.
+        if (!(section->offset % page_size) && !(section->vaddr % page_size))
+        {
+            mapped_size = section->size & ~(page_size - 1);
+
+            if (mapped_size && mmap(ram + section->vaddr, mapped_size, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_FIXED, fileno(file), section->offset) == MAP_FAILED)
+                mapped_size = 0;
+        }
+#endif
+
+        if (mapped_size < section->size && read_section(file, file_path, do_silent, section, mapped_size, ram))
         {
-            perror("Error allocating furst-vm ram memory!");
+            unmap_ram(ram, *ram_size);
+            fclose(file);
             return NULL;
         }
     }
 
-	return ram;
-}
\ No newline at end of file
+    // vm starts executing at the addr held in addr 0 of ram.
+    memcpy(ram + IP_START_ADDR_ADDR, &image.start_addr, sizeof(image.start_addr));
+
+    fclose(file);
+    return ram;
+}
+
+void*
+alloc_ram(size_t* ram_size, uint8_t do_silent)
+{
+    // returns zeroed ram of at least *ram_size bytes, *ram_size is rounded up to a host page
+    // for unmap_ram(). pages are only faulted in once they're touched, returns NULL on error.
+	void* ram;
+
+#ifdef _WIN32
+    *ram_size = page_align(*ram_size, FBIN_PAGE_SIZE);
+    ram       = calloc(*ram_size, sizeof(uint8_t));
+#else
+    *ram_size = page_align(*ram_size, (size_t) sysconf(_SC_PAGESIZE));
+    ram       = mmap(NULL, *ram_size, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS | MAP_NORESERVE, -1, 0);
+
+    if (ram == MAP_FAILED)
+        ram = NULL;
+#endif
+
+    if (ram == NULL && !do_silent)
+        perror("Error allocating furst-vm ram memory!");
+
+    return ram;
+}
+
+void
+unmap_ram(void* ram, size_t ram_size)
+{
+#ifdef _WIN32
+    (void) ram_size;
+    free(ram);
+#else
+    munmap(ram, ram_size);
+#endif
+}
+
+void*
+init_ram(uint32_t size, uint8_t do_silent)
+{
+	void* ram = malloc(size);
+
+    if (ram == NULL && !do_silent)
+        perror("Error allocating furst-vm ram memory!");
+
+    return ram;
+}
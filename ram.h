@@ -15,9 +15,81 @@ extern "C" {
 
 #define IP_START_ADDR_ADDR 0
 
+// .fbin metadata-segment, see build_metadata_bytearray() in yson.py
+#define METADATA_SIZE        12
+#define PROG_SIZE_ADDR       4
+#define FLAGS_ADDR           8
+
+// bits of the metadata FLAGS field.
+#define KEEP_SYMBOLS_FLAG    0x1
+#define TRAILING_SYMTAB_FLAG 0x2 // v1 only, symtab follows the program, it's not loaded into ram.
+
+// .fbin v2 container, see build_metadata_bytearray() in yson.py
+// v1 files have no magic, they start with the 12 byte metadata-segment above.
+#define FBIN_MAGIC           "FBIN"
+#define FBIN_MAGIC_SIZE      4
+#define FBIN_VERSION         2
+#define FBIN_PAGE_SIZE       0x1000 // page 0 of ram is reserved, the start-addr is written to it.
+
+#define FBIN_HEADER_SIZE     20
+#define FBIN_VERSION_ADDR    4
+#define FBIN_START_ADDR_ADDR 8
+#define FBIN_SECTION_COUNT_ADDR 14
+#define FBIN_SECTION_TBL_ADDR   16
+
+#define FBIN_SECTION_SIZE    20
+#define SECTION_TYPE_ADDR    0
+#define SECTION_FLAGS_ADDR   2
+#define SECTION_OFFSET_ADDR  4
+#define SECTION_SIZE_ADDR    8
+#define SECTION_VADDR_ADDR   12
+
+#define FBIN_MAX_SECTIONS    16
+
+// section types the loader cares about.
+#define SECTION_CODE         1
+#define SECTION_HEAP         6
+
+// bits of a section's flags.
+#define SECTION_LOAD_FLAG    0x1 // section is loaded into ram at it's vaddr.
+#define SECTION_WRITE_FLAG   0x4 // section's ram is written by the program.
+#define SECTION_ZERO_FLAG    0x8 // section has no bytes in the file, it's size bytes of zeroed ram.
+
+// heap reserved after the program for v1 files, v2 files declare theirs in a HEAP section.
+#define DEFAULT_HEAP_SIZE    0x100000
+
+typedef struct
+{
+    uint16_t type;
+    uint16_t flags;
+    uint32_t offset;
+    uint32_t size;
+    uint32_t vaddr;
+} fbin_section;
+
+// layout of a .fbin as the loader sees it. v1 files are described as a
+// section holding the metadata & program at addr 0 followed by a heap section.
+typedef struct
+{
+    uint16_t     version;
+    uint32_t     start_addr;
+    size_t       file_size;
+    size_t       ram_size;   // end of the highest loaded section, the ram the program needs.
+    uint16_t     section_count;
+    fbin_section sections[FBIN_MAX_SECTIONS];
+} fbin_image;
+
 int
 load_program(const char* file_path, uint8_t do_silent, void* ram);
 
+void*
+map_program(const char* file_path, uint8_t do_silent, size_t* ram_size);
+
+void*
+alloc_ram(size_t* ram_size, uint8_t do_silent);
+
+void
+unmap_ram(void* ram, size_t ram_size);
 
 void*
 init_ram(uint32_t size, uint8_t do_silent);
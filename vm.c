@@ -11,19 +11,97 @@
 // macros used for extracting values/calculating addrs from specific pointers.
 #define getOpcode()                   (*((uint8_t*) ip))
 #define getOprVal(TYPE)               (*((TYPE*) ip))
-#define getTopStkVal(TYPE)            (*((TYPE*) sp))
 #define getNextOprVal(TYPE)           (*((TYPE*) (ip += WS)))   // NOTE: this macro actually mutates ip directly!
 #define getRamVal(TYPE, ADDR)         (*((TYPE*) (ram + ADDR)))
-#define getStkVal(TYPE, ADDR)         (*((TYPE*) (sp + ADDR)))
-#define getNegTopStkVal(TYPE, OFFSET) (*((TYPE*) sp - OFFSET)) 
+#define getStkVal(TYPE, OFFSET)       (*((TYPE*) (sp - OFFSET)))  // OFFSET bytes below the top word.
 #define calcRelativeRamAddr(POINTER)  ((POINTER) - ram)
 
+// op handlers only touch the work-stack through these. pushStk() evaluates VALUE before
+// moving sp, so VALUE can be worked out from topStk & secondStk.
+#define topStk                        (*((uint32_t*) sp))
+#define secondStk                     (*((uint32_t*) (sp - WS)))
+#define pushStk(VALUE)                do { uint32_t v_ = (VALUE); sp += WS; topStk = v_; } while (0)
+#define dropStk(COUNT)                sp -= (WS * (COUNT))
+
+// rotations with the count taken mod 32 like the shifts, a count of 0 leaves VALUE as it is.
+#define rotl32(VALUE, COUNT)          (((VALUE) << ((COUNT) & 31)) | ((VALUE) >> ((WS_BITS - (COUNT)) & 31)))
+#define rotr32(VALUE, COUNT)          (((VALUE) >> ((COUNT) & 31)) | ((VALUE) << ((WS_BITS - (COUNT)) & 31)))
+
 // address 0 of ram contains the program starting address(main label).
 // so we deref that as a uint32 then add to ram to get a ptr to start instr.
 #define programStart                  (ram + (*(uint32_t*) (ram))); 
 
-// goto for jumping to next program operation.
-#define nextop()                      goto *optable[getOpcode()]
+// gcc merges the identical tails of op handlers, nextop() included, so every handler ends
+// up jumping through one shared indirect jump the branch predictor can't tell apart.
+// turning that off for fvm_exec() keeps a dispatch jump in each handler.
+#if defined(__GNUC__) && !defined(__clang__)
+#define DISPATCH_ATTR                 __attribute__((optimize("no-crossjumping")))
+#else
+#define DISPATCH_ATTR
+#endif
+
+// goto for jumping to next program operation, once op_limit ops have run
+// the vm is suspended instead & the op is left for the next fvm_step().
+#define nextop()                      if (++count > op_limit) goto suspend; goto *optable[getOpcode()]
+
+// records or prints the op about to execute depending on trace_level, see vm.h
+#if TRACE_MAX_LEVEL == TRACE_OFF
+#define traceop(NAME)
+#else
+#define traceop(NAME)                                                                      \
+    if (vm->trace_level) {                                                                 \
+        if (vm->trace_level == TRACE_RING) {                                               \
+            vm->trace_ring[vm->trace_count & (TRACE_RING_SIZE - 1)] = (trace_entry) {      \
+                .ip = (uint32_t) calcRelativeRamAddr(ip), .tos = topStk,                   \
+                .opcode = getOpcode(), .pad = {0}                                          \
+            };                                                                             \
+            ++vm->trace_count;                                                             \
+        }                                                                                  \
+        else printf("\nexecuting-ram-addr[%d] " NAME " op", (int) calcRelativeRamAddr(ip)); \
+    }
+#endif
+
+void
+fvm_set_trace_level(fvm_state* vm, int level)
+{
+	vm->trace_level = level > TRACE_MAX_LEVEL ? TRACE_MAX_LEVEL : level;
+	vm->trace_count = 0;
+}
+
+int
+dump_trace(fvm_state* vm, const char* dump_path)
+{
+	// writes the ring's entries to dump_path oldest first, preceded by the header:
+	// magic, version(u16), entry-size(u16), entry-count(u32), ops-recorded(u32).
+	FILE*    file;
+	uint8_t  header[TRACE_HEADER_SIZE];
+	uint16_t version    = TRACE_VERSION;
+	uint16_t entry_size = TRACE_ENTRY_SIZE;
+	uint32_t count      = vm->trace_count < TRACE_RING_SIZE ? vm->trace_count : TRACE_RING_SIZE;
+	uint32_t first      = vm->trace_count - count;
+	uint32_t i;
+
+	file = fopen(dump_path, "wb");
+
+	if (file == NULL)
+	{
+		perror("Error opening trace dump file");
+		return 1;
+	}
+
+	memcpy(header, TRACE_MAGIC, 4);
+	memcpy(header + 4, &version, sizeof(version));
+	memcpy(header + 6, &entry_size, sizeof(entry_size));
+	memcpy(header + 8, &count, sizeof(count));
+	memcpy(header + 12, &vm->trace_count, sizeof(vm->trace_count));
+	fwrite(header, sizeof(uint8_t), TRACE_HEADER_SIZE, file);
+
+	for (i = first; i != vm->trace_count; ++i)
+		fwrite(&vm->trace_ring[i & (TRACE_RING_SIZE - 1)], TRACE_ENTRY_SIZE, 1, file);
+
+	fclose(file);
+	return 0;
+}
 
 int
 dump_wstk(void* bsp)
@@ -31,42 +109,165 @@ dump_wstk(void* bsp)
 	return 0;
 }
 
+fvm_state*
+fvm_create(void)
+{
+	// returns a vm with no program loaded, NULL on error.
+	fvm_state* vm = calloc(1, sizeof(fvm_state));
+
+	if (vm == NULL)
+		perror("Error allocating furst-vm state!");
+	else
+		vm->status = FVM_NO_RAM;
+
+	return vm;
+}
+
+static void
+release_ram(fvm_state* vm)
+{
+	if (vm->ram != NULL && vm->owns_ram)
+		unmap_ram(vm->ram, vm->ram_size);
+
+	vm->ram      = NULL;
+	vm->ram_size = 0;
+	vm->owns_ram = FALSE;
+	vm->status   = FVM_NO_RAM;
+}
+
+void
+fvm_destroy(fvm_state* vm)
+{
+	if (vm == NULL)
+		return;
+
+	release_ram(vm);
+	free(vm);
+}
+
 int
-eval_process(void* ram) 
+fvm_load(fvm_state* vm, const char* file_path)
+{
+	// maps a program into ram the vm owns & resets the vm ready to run it.
+	size_t ram_size;
+	void*  ram;
+
+	release_ram(vm);
+	ram = map_program(file_path, 0, &ram_size);
+
+	if (ram == NULL)
+		return 1;
+
+	vm->ram      = ram;
+	vm->ram_size = ram_size;
+	vm->owns_ram = TRUE;
+	fvm_reset(vm);
+	return 0;
+}
+
+uint8_t*
+fvm_alloc_ram(fvm_state* vm, size_t ram_size)
 {
+	// gives the vm zeroed ram of at least ram_size bytes for the caller to
+	// load a program into, fvm_reset() once the start-addr is at addr 0.
+	release_ram(vm);
+	vm->ram = alloc_ram(&ram_size, 0);
+
+	if (vm->ram != NULL)
+	{
+		vm->ram_size = ram_size;
+		vm->owns_ram = TRUE;
+	}
+
+	return vm->ram;
+}
+
+void
+fvm_attach_ram(fvm_state* vm, void* ram, size_t ram_size)
+{
+	// runs the program in ram the caller owns & frees, resets the vm.
+	release_ram(vm);
+	vm->ram      = ram;
+	vm->ram_size = ram_size;
+	fvm_reset(vm);
+}
+
+void
+fvm_reset(fvm_state* vm)
+{
+	// points the vm back at the start-addr with empty stacks, ram is left as it is.
+	uint8_t* ram = vm->ram;
+
+	if (ram == NULL)
+		return;
+
+	vm->ip          = programStart
+	vm->sp          = vm->wstk;
+	vm->rp          = vm->rstk;
+	vm->lc          = 0;
+	vm->lb          = NULL;
+	vm->le          = NULL;
+	vm->retc        = 0;
+	vm->instr_count = 0;
+	vm->status      = FVM_READY;
+}
+
+static int DISPATCH_ATTR
+fvm_exec(fvm_state* vm, uint64_t op_limit)
+{
+	// runs the vm until die or until op_limit ops have executed, the registers are
+	// loaded from the vm on entry & stored back on the way out so it can carry on later.
+	//
+	// op semantics, the same as yson_dev/interpreter.py's & pinned by crosscheck_semantics_cases
+	// in yson_dev/crosscheck.py:
+	//     - binary ops push (top OP second) & leave both operands on the stack.
+	//     - je/jn/jl/jg/jls/jgs compare top against second, popping neither.
+	//     - not/nots replace the top with it's complement.
+	//     - popn drops as many words as it's operand says & steps past the operand.
+	//     - shift & rotate counts are taken mod 32.
+	//     - the signed add, sub & mul are done unsigned, the bits are the same.
 	build_optable();
 
-	uint8_t   wstk[STACK_SIZE];   // work-stack.
-	void*     bsp = (void*) wstk; // stack-base-pointer.
-	void*     rstk[RECUR_MAX];    // return-stack.
-    void*     ip = programStart   // instr-pointer.
-    uint32_t  lc = 0;             // loop-counter 
-    void*     lb;                 // loop-base instr-ptr.
-	void*     le;                 // loop-end instr-ptr
-    void*     sp = (void*) wstk;  // stack-pointer.
-    void*     rp = rstk;          // return-pointer.
-	uint32_t* uint32_ptr;         // uint32-arithmetic-pointer.
-	int32_t*  int32_ptr;          // int32-arithmetic-pointer.
-	uint32_t  uint32_buf[2];      // uint32-data-buffers.
-	int32_t   int32_buf[2];       // int32-data-buffers.
-	int       retc = 0;
+	void*     ram = vm->ram;
+	void*     bsp = (void*) vm->wstk; // stack-base-pointer.
+    void*     ip  = vm->ip;           // instr-pointer.
+    uint32_t  lc  = vm->lc;           // loop-counter 
+    void*     lb  = vm->lb;           // loop-base instr-ptr.
+	void*     le  = vm->le;           // loop-end instr-ptr
+    void*     sp  = vm->sp;           // stack-pointer.
+    void**    rp  = vm->rp;           // return-pointer, next free slot in rstk.
+	uint32_t  uint32_buf[2];          // uint32-data-buffers.
+	uint64_t  count = 0;              // ops dispatched, one more than were executed once suspended.
+
+	(void) bsp;
+
+	if (ram == NULL)
+		return FVM_NO_RAM;
+
+	if (vm->status == FVM_HALTED)
+		return FVM_HALTED;
 
 	// program execution begins here.
     nextop();
 
 	// operation handling code.
     die:
-        printf("\nexecuting-ram-addr[%d] die op", calcRelativeRamAddr(ip));
-        free(ram);
-        return retc;
+        traceop("die");
+
+		// die is reached on every error too, so the ring holds the ops leading up to it.
+		if (vm->trace_level == TRACE_RING)
+			dump_trace(vm, TRACE_DUMP_PATH);
+
+		vm->status = FVM_HALTED;
+        goto save;
 
     nop:
-        printf("\nexecuting-ram-addr[%d] nop op", calcRelativeRamAddr(ip));
+        traceop("nop");
         ++ip;
         nextop();
 
     nspctr:
-        printf("\nexecuting-ram-addr[%d] nspct op", calcRelativeRamAddr(ip));
+        traceop("nspct");
 		++ip;
 
 		switch (getOprVal(uint8_t)) {
@@ -94,7 +295,7 @@ eval_process(void* ram)
         nextop();
 
     nspctst:
-        printf("\nexecuting-ram-addr[%d] nspctst op", calcRelativeRamAddr(ip));
+        traceop("nspctst");
 		++ip;
 
 		switch (getOprVal(uint8_t)) {
@@ -122,90 +323,104 @@ eval_process(void* ram)
         nextop();
 
     test_die:
-        printf("\nexecuting-ram-addr[%d] test_die op", calcRelativeRamAddr(ip));
-		return retc;
+        traceop("test_die");
+
+		if (vm->trace_level == TRACE_RING)
+			dump_trace(vm, TRACE_DUMP_PATH);
 
+		vm->status = FVM_HALTED;
+		goto save;
+
+	// the return addr of each call is pushed onto rstk, rp points at the next free slot.
     call:
-        printf("\nexecuting-ram-addr[%d] call op", calcRelativeRamAddr(ip));
-		++rp;
+        traceop("call");
+		if (rp == vm->rstk + RECUR_MAX) {
+			printf(RSTK_OVERFLOW_MSG, RECUR_MAX);
+			goto die;
+		}
+
 		++ip;
-		rp = ip + WS;
+		*rp++ = ip + WS;
 		ip = ram + getOprVal(uint32_t);
         nextop();
 
     ret:
-        printf("\nexecuting-ram-addr[%d] ret op", calcRelativeRamAddr(ip));
-		ip = rp;
-		--rp;
+        traceop("ret");
+		if (rp == vm->rstk) {
+			printf(RSTK_UNDERFLOW_MSG);
+			goto die;
+		}
+
+		ip = *--rp;
         nextop();
 
     swtch:
-        printf("\nexecuting-ram-addr[%d] swtch op", calcRelativeRamAddr(ip));
+        traceop("swtch");
         printf("\nUNIMPLEMNTED OPCODE!");
         nextop();
 
     jmp:
-        printf("\nexecuting-ram-addr[%d] jmp op", calcRelativeRamAddr(ip));
+        traceop("jmp");
 		++ip;
 		ip = ram + getOprVal(uint32_t);
         nextop();
 
     je:
-        printf("\nexecuting-ram-addr[%d] je op", calcRelativeRamAddr(ip));
+        traceop("je");
 		++ip;
-		if (!memcmp(sp, sp + WS, WS)) 
+		if (topStk == secondStk) 
 			ip = ram + getOprVal(uint32_t); 
 		else
 			ip += WS; 
         nextop();
 
     jn:
-        printf("\nexecuting-ram-addr[%d] jn op", calcRelativeRamAddr(ip));
+        traceop("jn");
 		++ip;
-		if (memcmp(sp, sp + WS, WS)) 
+		if (topStk != secondStk) 
 			ip = ram + getOprVal(uint32_t); 
 		else
 			ip += WS;
         nextop();
 
     jl:
-        printf("\nexecuting-ram-addr[%d] jl op", calcRelativeRamAddr(ip));
+        traceop("jl");
 		++ip;
-		if ((*(uint32_t*) sp) < (*(uint32_t*) sp - WS)) 
+		if (topStk < secondStk) 
 			ip = ram + getOprVal(uint32_t); 
 		else
 			ip += WS;
         nextop();
 
     jg:
-        printf("\nexecuting-ram-addr[%d] jg op", calcRelativeRamAddr(ip));
+        traceop("jg");
 		++ip;
-		if ((*(uint32_t*) sp) > (*(uint32_t*) sp - WS)) 
+		if (topStk > secondStk) 
 			ip = ram + getOprVal(uint32_t); 
 		else
 			ip += WS;
         nextop();
 
     jls:
-        printf("\nexecuting-ram-addr[%d] jl op", calcRelativeRamAddr(ip));
+        traceop("jl");
 		++ip;
-		if ((*(int32_t*) sp) < (*(int32_t*) sp - WS)) 
-			ip = ram + getOprVal(int32_t); 
+		if ((int32_t) topStk < (int32_t) secondStk) 
+			ip = ram + getOprVal(uint32_t); 
 		else
 			ip += WS;
         nextop();
 
     jgs:
-        printf("\nexecuting-ram-addr[%d] jg op", calcRelativeRamAddr(ip));
+        traceop("jg");
 		++ip;
-		if ((*(int32_t*) sp) > (*(int32_t*) sp - WS)) 
-			ip = ram + getOprVal(int32_t); 
+		if ((int32_t) topStk > (int32_t) secondStk) 
+			ip = ram + getOprVal(uint32_t); 
 		else
 			ip += WS;
         nextop();
 		
     loop:
-        printf("\nexecuting-ram-addr[%d] loop op", calcRelativeRamAddr(ip));
+        traceop("loop");
 		lc = 0;
 		++ip;
 		lc = getOprVal(uint32_t);
@@ -217,7 +432,7 @@ eval_process(void* ram)
         nextop();
 
     lcont:
-        printf("\nexecuting-ram-addr[%d] lcont op", calcRelativeRamAddr(ip));
+        traceop("lcont");
 		if (lc) {
 			--lc;
 			ip = lb;
@@ -226,349 +441,662 @@ eval_process(void* ram)
 		}
 		nextop();
     lbrk:
-        printf("\nexecuting-ram-addr[%d] lbrk op", calcRelativeRamAddr(ip));
+        traceop("lbrk");
 		ip = le;
         nextop();
 
     psh:
-        printf("\nexecuting-ram-addr[%d] psh op", calcRelativeRamAddr(ip));
+        traceop("psh");
 		++ip;
-		sp += WS;
-		memcpy(sp, ip, WS);
+		pushStk(getOprVal(uint32_t));
 		ip += WS;
         nextop();
 
     pop:
-        printf("\nexecuting-ram-addr[%d] pop op", calcRelativeRamAddr(ip));
+        traceop("pop");
 		++ip;
-		sp -= WS;
+		dropStk(1);
         nextop();
 
     pop2:
-        printf("\nexecuting-ram-addr[%d] pop2 op", calcRelativeRamAddr(ip));
+        traceop("pop2");
 		++ip;
-		sp -= (WS * 2);
+		dropStk(2);
         nextop();
 
     popn:
-        printf("\nexecuting-ram-addr[%d] popn op", calcRelativeRamAddr(ip));
+        traceop("popn");
 		++ip;
-		sp -= (WS * getOprVal(uint32_t));
+		dropStk(getOprVal(uint32_t));
+		ip += WS;
         nextop();
 
     pshfr:
-        printf("\nexecuting-ram-addr[%d] pshfr op", calcRelativeRamAddr(ip));
+        traceop("pshfr");
 		++ip;
-		sp += WS;
-		memcpy(sp, ram + getOprVal(uint32_t), WS);
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		pushStk(uint32_buf[1]);
 		ip += WS;
         nextop();
 
     poptr:
-        printf("\nexecuting-ram-addr[%d] poptr op", calcRelativeRamAddr(ip));
+        traceop("poptr");
 		++ip;
-		memcpy(ram + getOprVal(uint32_t), sp, WS);
+		memcpy(ram + getOprVal(uint32_t), &topStk, WS);
 		ip += WS;
-		sp -= WS;
+		dropStk(1);
         nextop();
 
     movtr:
-        printf("\nexecuting-ram-addr[%d] movtr op", calcRelativeRamAddr(ip));
+        traceop("movtr");
 		++ip;
-		memcpy(ram + getOprVal(uint32_t), sp, WS);
+		memcpy(ram + getOprVal(uint32_t), &topStk, WS);
 		ip += WS;
         nextop();
 
     stktr:
-        printf("\nexecuting-ram-addr[%d] stktr op", calcRelativeRamAddr(ip));
+        traceop("stktr");
         nextop();
 
     cpyr:
-        printf("\nexecuting-ram-addr[%d] cpyr op", calcRelativeRamAddr(ip));
+        traceop("cpyr");
         nextop();
 
     setr:
-        printf("\nexecuting-ram-addr[%d] setr op", calcRelativeRamAddr(ip));
+        traceop("setr");
 		++ip;
-		memcpy(ram + getOprVal(uint32_t), ip += WS, WS);
+		uint32_buf[0] = getOprVal(uint32_t);
+		ip += WS;
+		memcpy(ram + uint32_buf[0], ip, WS);
 		ip += WS;
 		nextop();
 
     pshfrr:
-        printf("\nexecuting-ram-addr[%d] pshfrr op", calcRelativeRamAddr(ip));
+        traceop("pshfrr");
 		++ip;
-		sp += WS;
-		memcpy(sp, ram + getRamVal(uint32_t, getOprVal(uint32_t)), WS); 
+		memcpy(&uint32_buf[1], ram + getRamVal(uint32_t, getOprVal(uint32_t)), WS); 
+		pushStk(uint32_buf[1]);
 		ip += WS;
         nextop();
 
     pshfrs:
-        printf("\nexecuting-ram-addr[%d] pshfrs op", calcRelativeRamAddr(ip));
+        traceop("pshfrs");
 		++ip;
-		memcpy(sp + WS, ram + getTopStkVal(uint32_t), WS); 
-		sp += WS;
+		memcpy(&uint32_buf[1], ram + topStk, WS); 
+		pushStk(uint32_buf[1]);
 		ip += WS;
         nextop();
 
+	// the signed add, sub, mul & lshft are done unsigned, two's complement gives the same
+	// bits without signed overflow being undefined.
     inc:
-        printf("\nexecuting-ram-addr[%d] inc op", calcRelativeRamAddr(ip));
+        traceop("inc");
 		++ip;
-		uint32_ptr = (uint32_t*) sp;
-		(*uint32_ptr)++;
+		++topStk;
         nextop();
 
     dec:
-        printf("\nexecuting-ram-addr[%d] dec op", calcRelativeRamAddr(ip));
+        traceop("dec");
 		++ip;
-		uint32_ptr = (uint32_t*) sp;
-		(*uint32_ptr)--;
+		--topStk;
         nextop();
 
     add:
-        printf("\nexecuting-ram-addr[%d] add op", calcRelativeRamAddr(ip));
+        traceop("add");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) + getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk + secondStk);
         nextop();
 
     sub:
-        printf("\nexecuting-ram-addr[%d] sub op", calcRelativeRamAddr(ip));
+        traceop("sub");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) - getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk - secondStk);
         nextop();
 
     mul:
-        printf("\nexecuting-ram-addr[%d] mul op", calcRelativeRamAddr(ip));
+        traceop("mul");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) * getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk * secondStk);
         nextop();
 
     div:
-        printf("\nexecuting-ram-addr[%d] div op", calcRelativeRamAddr(ip));
+        traceop("div");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) / getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk / secondStk);
         nextop();
 
     mod:
-        printf("\nexecuting-ram-addr[%d] mod op", calcRelativeRamAddr(ip));
+        traceop("mod");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) % getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk % secondStk);
         nextop();
 
     and:
-        printf("\nexecuting-ram-addr[%d] and op", calcRelativeRamAddr(ip));
+        traceop("and");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) & getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk & secondStk);
         nextop();
 
     not:
-        printf("\nexecuting-ram-addr[%d] not op", calcRelativeRamAddr(ip));
+        traceop("not");
 		++ip;
-		uint32_ptr = (uint32_t*) sp;
-		~(*uint32_ptr);
+		topStk = ~topStk;
         nextop();
 
     xor:
-        printf("\nexecuting-ram-addr[%d] xor op", calcRelativeRamAddr(ip));
+        traceop("xor");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) ^ getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk ^ secondStk);
         nextop();
 
     or:
-        printf("\nexecuting-ram-addr[%d] or op", calcRelativeRamAddr(ip));
+        traceop("or");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) | getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk | secondStk);
         nextop();
 
     lshft:
-        printf("\nexecuting-ram-addr[%d] lshft op", calcRelativeRamAddr(ip));
+        traceop("lshft");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) << getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk << (secondStk & 31));
         nextop();
 
     rshft:
-        printf("\nexecuting-ram-addr[%d] rshft op", calcRelativeRamAddr(ip));
+        traceop("rshft");
 		++ip;
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = getNegTopStkVal(uint32_t, WS) >> getNegTopStkVal(uint32_t, DWS);  
+		pushStk(topStk >> (secondStk & 31));
         nextop();
 
     lrot:
-        printf("\nexecuting-ram-addr[%d] lrot op", calcRelativeRamAddr(ip));
+        traceop("lrot");
 		++ip;
-		uint32_buf[0] = getNegTopStkVal(uint32_t, WS) << getNegTopStkVal(uint32_t, DWS);  
-        uint32_buf[1] = getNegTopStkVal(uint32_t, WS) >> (WS_BITS - getNegTopStkVal(uint32_t, DWS));
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = uint32_buf[0] | uint32_buf[1];
+		pushStk(rotl32(topStk, secondStk));
 		nextop();
 
     rrot:
-        printf("\nexecuting-ram-addr[%d] rrot op", calcRelativeRamAddr(ip));
+        traceop("rrot");
 		++ip;
-		uint32_buf[0] = getNegTopStkVal(uint32_t, WS) >> getNegTopStkVal(uint32_t, DWS);  
-        uint32_buf[1] = getNegTopStkVal(uint32_t, WS) << (WS_BITS - getNegTopStkVal(uint32_t, DWS));
-		sp += WS;
-		uint32_ptr = (uint32_t*) sp;
-		*uint32_ptr = uint32_buf[0] | uint32_buf[1];
+		pushStk(rotr32(topStk, secondStk));
 		nextop();
 
     incs:
-        printf("\nexecuting-ram-addr[%d] incs op", calcRelativeRamAddr(ip));
+        traceop("incs");
 		++ip;
-		int32_ptr = (int32_t*) sp;
-		(*int32_ptr)++;
+		++topStk;
         nextop();
 
     decs:
-        printf("\nexecuting-ram-addr[%d] decs op", calcRelativeRamAddr(ip));
+        traceop("decs");
 		++ip;
-		int32_ptr = (int32_t*) sp;
-		(*int32_ptr)--;
+		--topStk;
         nextop();
 
     adds:
-        printf("\nexecuting-ram-addr[%d] adds op", calcRelativeRamAddr(ip));
+        traceop("adds");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) + getNegTopStkVal(int32_t, DWS);  
+		pushStk(topStk + secondStk);
         nextop();
 
     subs:
-        printf("\nexecuting-ram-addr[%d] subs op", calcRelativeRamAddr(ip));
+        traceop("subs");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) - getNegTopStkVal(int32_t, DWS);  
+		pushStk(topStk - secondStk);
         nextop();
 
     muls:
-        printf("\nexecuting-ram-addr[%d] muls op", calcRelativeRamAddr(ip));
+        traceop("muls");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) * getNegTopStkVal(int32_t, DWS);  
+		pushStk(topStk * secondStk);
         nextop();
 
     divs:
-        printf("\nexecuting-ram-addr[%d] divs op", calcRelativeRamAddr(ip));
+        traceop("divs");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) / getNegTopStkVal(int32_t, DWS);  
+		pushStk((uint32_t) ((int32_t) topStk / (int32_t) secondStk));
         nextop();
 
     mods:
-        printf("\nexecuting-ram-addr[%d] mods op", calcRelativeRamAddr(ip));
+        traceop("mods");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) % getNegTopStkVal(int32_t, DWS);  
+		pushStk((uint32_t) ((int32_t) topStk % (int32_t) secondStk));
         nextop();
 
     ands:
-        printf("\nexecuting-ram-addr[%d] and op", calcRelativeRamAddr(ip));
+        traceop("and");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) & getNegTopStkVal(int32_t, DWS);  
+		pushStk(topStk & secondStk);
         nextop();
 
     nots:
-        printf("\nexecuting-ram-addr[%d] not op", calcRelativeRamAddr(ip));
+        traceop("not");
 		++ip;
-		int32_ptr = (int32_t*) sp;
-		~(*int32_ptr);
+		topStk = ~topStk;
         nextop();
 
     xors:
-        printf("\nexecuting-ram-addr[%d] xor op", calcRelativeRamAddr(ip));
+        traceop("xor");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) ^ getNegTopStkVal(int32_t, DWS);  
+		pushStk(topStk ^ secondStk);
         nextop();
 
     ors:
-        printf("\nexecuting-ram-addr[%d] or op", calcRelativeRamAddr(ip));
+        traceop("or");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) | getNegTopStkVal(int32_t, DWS);  
+		pushStk(topStk | secondStk);
         nextop();
 
     lshfts:
-        printf("\nexecuting-ram-addr[%d] lshft op", calcRelativeRamAddr(ip));
+        traceop("lshft");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) << getNegTopStkVal(int32_t, DWS);  
+		pushStk(topStk << (secondStk & 31));
         nextop();
 
     rshfts:
-        printf("\nexecuting-ram-addr[%d] rshft op", calcRelativeRamAddr(ip));
+        traceop("rshft");
 		++ip;
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = getNegTopStkVal(int32_t, WS) >> getNegTopStkVal(int32_t, DWS);  
+		pushStk((uint32_t) ((int32_t) topStk >> (secondStk & 31)));
         nextop();
 
     lrots:
-        printf("\nexecuting-ram-addr[%d] lrot op", calcRelativeRamAddr(ip));
+        traceop("lrot");
 		++ip;
-		int32_buf[0] = getNegTopStkVal(int32_t, WS) << getNegTopStkVal(int32_t, DWS);  
-        int32_buf[1] = getNegTopStkVal(int32_t, WS) >> (WS_BITS - getNegTopStkVal(int32_t, DWS));
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = int32_buf[0] | int32_buf[1];
+		pushStk(rotl32(topStk, secondStk));
 		nextop();
 
     rrots:
-        printf("\nexecuting-ram-addr[%d] rrot op", calcRelativeRamAddr(ip));
+        traceop("rrot");
 		++ip;
-		int32_buf[0] = getNegTopStkVal(int32_t, WS) >> getNegTopStkVal(int32_t, DWS);  
-        int32_buf[1] = getNegTopStkVal(int32_t, WS) << (WS_BITS - getNegTopStkVal(int32_t, DWS));
-		sp += WS;
-		int32_ptr = (int32_t*) sp;
-		*int32_ptr = int32_buf[0] | int32_buf[1];
+		pushStk(rotr32(topStk, secondStk));
 		nextop();
 
 	brkp:
-        printf("\nexecuting-ram-addr[%d] brkp op", calcRelativeRamAddr(ip));
+        traceop("brkp");
 		++ip;
 
 		nextop();
+
+	// superinstructions, each does what the ops it's named after would one after the
+	// other & takes their operands in the same order, see fused_seq_tbl in opcodes.py.
+	// the stack is left as the ops would leave it except for slots above the top.
+    pshfr_pshfr:
+        traceop("pshfr_pshfr");
+		++ip;
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		pushStk(uint32_buf[1]);
+		memcpy(&uint32_buf[1], ram + getNextOprVal(uint32_t), WS);
+		pushStk(uint32_buf[1]);
+		ip += WS;
+        nextop();
+
+    pshfr_pshfr_add_poptr:
+        traceop("pshfr_pshfr_add_poptr");
+		++ip;
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		pushStk(uint32_buf[1]);
+		memcpy(&uint32_buf[1], ram + getNextOprVal(uint32_t), WS);
+		pushStk(uint32_buf[1]);
+		uint32_buf[1] = topStk + secondStk;
+		memcpy(ram + getNextOprVal(uint32_t), &uint32_buf[1], WS);
+		ip += WS;
+        nextop();
+
+    psh_je:
+        traceop("psh_je");
+		++ip;
+		pushStk(getOprVal(uint32_t));
+		ip += WS;
+		if (topStk == secondStk)
+			ip = ram + getOprVal(uint32_t);
+		else
+			ip += WS;
+        nextop();
+
+    psh_jn:
+        traceop("psh_jn");
+		++ip;
+		pushStk(getOprVal(uint32_t));
+		ip += WS;
+		if (topStk != secondStk)
+			ip = ram + getOprVal(uint32_t);
+		else
+			ip += WS;
+        nextop();
+
+    pshfr_inc_poptr:
+        traceop("pshfr_inc_poptr");
+		++ip;
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		++uint32_buf[1];
+		memcpy(ram + getNextOprVal(uint32_t), &uint32_buf[1], WS);
+		ip += WS;
+        nextop();
+
+    pshfr_inc_poptr_lcont:
+        traceop("pshfr_inc_poptr_lcont");
+		++ip;
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		++uint32_buf[1];
+		memcpy(ram + getNextOprVal(uint32_t), &uint32_buf[1], WS);
+		if (lc) {
+			--lc;
+			ip = lb;
+		} else {
+			ip = le;
+		}
+        nextop();
+
+    poptr_pop2:
+        traceop("poptr_pop2");
+		++ip;
+		memcpy(ram + getOprVal(uint32_t), &topStk, WS);
+		ip += WS;
+		dropStk(3);
+        nextop();
+
+    pshfr_psh:
+        traceop("pshfr_psh");
+		++ip;
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		pushStk(uint32_buf[1]);
+		pushStk(getNextOprVal(uint32_t));
+		ip += WS;
+        nextop();
+
+	// immediate operand ops, see imm_op_tbl in opcodes.py. the arithmetic ops replace the
+	// top word in place & the branches compare it against the immediate, neither pops.
+    addi:
+        traceop("addi");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		topStk += uint32_buf[1];
+		ip += WS;
+        nextop();
+
+    subi:
+        traceop("subi");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		topStk -= uint32_buf[1];
+		ip += WS;
+        nextop();
+
+    muli:
+        traceop("muli");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		topStk *= uint32_buf[1];
+		ip += WS;
+        nextop();
+
+    andi:
+        traceop("andi");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		topStk &= uint32_buf[1];
+		ip += WS;
+        nextop();
+
+    ori:
+        traceop("ori");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		topStk |= uint32_buf[1];
+		ip += WS;
+        nextop();
+
+    xori:
+        traceop("xori");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		topStk ^= uint32_buf[1];
+		ip += WS;
+        nextop();
+
+    lshfti:
+        traceop("lshfti");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		topStk <<= (uint32_buf[1] & 31);
+		ip += WS;
+        nextop();
+
+    rshfti:
+        traceop("rshfti");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		topStk >>= (uint32_buf[1] & 31);
+		ip += WS;
+        nextop();
+
+    incr:
+        traceop("incr");
+		++ip;
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		++uint32_buf[1];
+		memcpy(ram + getOprVal(uint32_t), &uint32_buf[1], WS);
+		ip += WS;
+        nextop();
+
+    decr:
+        traceop("decr");
+		++ip;
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		--uint32_buf[1];
+		memcpy(ram + getOprVal(uint32_t), &uint32_buf[1], WS);
+		ip += WS;
+        nextop();
+
+    addir:
+        traceop("addir");
+		++ip;
+		uint32_buf[0] = getOprVal(uint32_t);
+		ip += WS;
+		memcpy(&uint32_buf[1], ram + uint32_buf[0], WS);
+		uint32_buf[1] += getOprVal(uint32_t);
+		memcpy(ram + uint32_buf[0], &uint32_buf[1], WS);
+		ip += WS;
+        nextop();
+
+    addrr:
+        traceop("addrr");
+		++ip;
+		memcpy(&uint32_buf[0], ram + getOprVal(uint32_t), WS);
+		ip += WS;
+		memcpy(&uint32_buf[1], ram + getOprVal(uint32_t), WS);
+		uint32_buf[1] += uint32_buf[0];
+		memcpy(ram + getOprVal(uint32_t), &uint32_buf[1], WS);
+		ip += WS;
+        nextop();
+
+    jei:
+        traceop("jei");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		ip += WS;
+		if (topStk == uint32_buf[1])
+			ip = ram + getOprVal(uint32_t);
+		else
+			ip += WS;
+        nextop();
+
+    jni:
+        traceop("jni");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		ip += WS;
+		if (topStk != uint32_buf[1])
+			ip = ram + getOprVal(uint32_t);
+		else
+			ip += WS;
+        nextop();
+
+    jli:
+        traceop("jli");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		ip += WS;
+		if (topStk < uint32_buf[1])
+			ip = ram + getOprVal(uint32_t);
+		else
+			ip += WS;
+        nextop();
+
+    jgi:
+        traceop("jgi");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		ip += WS;
+		if (topStk > uint32_buf[1])
+			ip = ram + getOprVal(uint32_t);
+		else
+			ip += WS;
+        nextop();
+
+    jlsi:
+        traceop("jlsi");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		ip += WS;
+		if ((int32_t) topStk < (int32_t) uint32_buf[1])
+			ip = ram + getOprVal(uint32_t);
+		else
+			ip += WS;
+        nextop();
+
+    jgsi:
+        traceop("jgsi");
+		++ip;
+		uint32_buf[1] = getOprVal(uint32_t);
+		ip += WS;
+		if ((int32_t) topStk > (int32_t) uint32_buf[1])
+			ip = ram + getOprVal(uint32_t);
+		else
+			ip += WS;
+        nextop();
+
+	suspend:
+		--count;
+		vm->status = FVM_SUSPENDED;
+
+	save:
+		vm->ip           = ip;
+		vm->sp           = sp;
+		vm->rp           = rp;
+		vm->lc           = lc;
+		vm->lb           = lb;
+		vm->le           = le;
+		vm->instr_count += count;
+		return vm->status;
 }
 
 int
-run_fbin(const char* file_path)
+fvm_run(fvm_state* vm)
 {
-	// initialise ram.
-	void* ram = init_ram(RAMSIZE, 0);
-	if (ram == NULL) return 1;
-	load_program(file_path, 0, ram);
-	return eval_process(ram);
+	// runs the vm until die, returns it's status.
+	return fvm_exec(vm, FVM_RUN_UNLIMITED);
 }
 
+int
+fvm_step(fvm_state* vm, uint64_t op_count)
+{
+	// runs at most op_count ops, returns FVM_SUSPENDED if die wasn't reached.
+	return fvm_exec(vm, op_count);
+}
+
+uint8_t*
+fvm_ram(fvm_state* vm)
+{
+	return vm->ram;
+}
+
+size_t
+fvm_ram_size(fvm_state* vm)
+{
+	return vm->ram_size;
+}
+
+uint8_t*
+fvm_stack(fvm_state* vm)
+{
+	return vm->wstk;
+}
+
+uint32_t
+fvm_stack_depth(fvm_state* vm)
+{
+	// words pushed onto the work-stack, the first push goes to wstk[WS].
+	return (uint32_t) ((vm->sp - vm->wstk) / WS);
+}
+
+uint32_t
+fvm_ip(fvm_state* vm)
+{
+	return (uint32_t) (vm->ip - vm->ram);
+}
+
+int
+fvm_status(fvm_state* vm)
+{
+	return vm->status;
+}
+
+int
+fvm_retc(fvm_state* vm)
+{
+	return vm->retc;
+}
+
+uint64_t
+fvm_instr_count(fvm_state* vm)
+{
+	return vm->instr_count;
+}
+
+int
+eval_process(void* ram)
+{
+	// runs the program in ram once, the caller owns ram.
+	fvm_state* vm = fvm_create();
+	int        retc;
+
+	if (vm == NULL)
+		return 1;
+
+	fvm_attach_ram(vm, ram, 0);
+	fvm_run(vm);
+
+	retc = vm->retc;
+	fvm_destroy(vm);
+	return retc;
+}
+
+int
+run_fbin(const char* file_path, int trace_level)
+{
+	// map the program into ram sized for it & run it on a vm of it's own.
+	fvm_state* vm = fvm_create();
+	int        retc;
+
+	if (vm == NULL)
+		return 1;
+
+	fvm_set_trace_level(vm, trace_level);
+
+	if (fvm_load(vm, file_path))
+	{
+		fvm_destroy(vm);
+		return 1;
+	}
+
+	fvm_run(vm);
+
+	retc = vm->retc;
+	fvm_destroy(vm);
+	return retc;
+}
+
+#ifndef FVM_LIB
+
 int
 main(int argc, char* argv[])
 {
@@ -577,9 +1105,14 @@ main(int argc, char* argv[])
 	// 	return 0;
 	// }
 
-	int retval = run_fbin("vmt.fbin");
+	// trace level is picked at run-time through the environment, eg: FVM_TRACE=1 ./fvm
+	// it's capped at TRACE_MAX_LEVEL so fvm needs building with tracing compiled in, see vm.h.
+	char* trace_env = getenv(TRACE_ENV_VAR);
+
+	int retval = run_fbin("vmt.fbin", trace_env != NULL ? atoi(trace_env) : TRACE_OFF);
 	
 	printf("\n furst-vm ran successfully!\nretval: %d", retval);
 	
 	return 0;
-}
\ No newline at end of file
+}
+#endif // FVM_LIB
@@ -45,15 +45,141 @@ extern "C" {
 #define INT8_RAM_NSPCT_MSG   "ram[%u] (uint32) = %d"
 
 #define INTERNAL_ERROR_MSG "fvm: encountered an internal error, shutting down."
+#define RSTK_OVERFLOW_MSG  "fvm: return-stack overflow, calls nested deeper than %d."
+#define RSTK_UNDERFLOW_MSG "fvm: ret with an empty return-stack."
+
+// trace levels, TRACE_MAX_LEVEL is the highest level compiled in & trace_level
+// picks one at run-time. at 0 no trace code is compiled into the op handlers, which
+// is the default so stock builds don't test trace_level on every op. debug builds
+// compile tracing in with eg: gcc -g -DTRACE_MAX_LEVEL=2 -o fvm vm.c ram.c
+#define TRACE_OFF         0
+#define TRACE_RING        1 // last TRACE_RING_SIZE ops are recorded, dumped to TRACE_DUMP_PATH on die.
+#define TRACE_PRINT       2 // every op is printed as it executes.
+
+#ifndef TRACE_MAX_LEVEL
+#define TRACE_MAX_LEVEL   TRACE_OFF
+#endif
+
+#define TRACE_RING_SIZE   0x1000 // must be a power of 2.
+#define TRACE_DUMP_PATH   "fvm.trace"
+#define TRACE_ENV_VAR     "FVM_TRACE"
+
+// trace dump layout, read by yson_dev/trace.py
+#define TRACE_MAGIC       "FVMT"
+#define TRACE_VERSION     1
+#define TRACE_HEADER_SIZE 16
+#define TRACE_ENTRY_SIZE  12
+
+typedef struct
+{
+    uint32_t ip;     // ram addr of the op.
+    uint32_t tos;    // top of work-stack before the op executes.
+    uint8_t  opcode;
+    uint8_t  pad[3];
+} trace_entry;
+
+// fvm is built as a program or, with FVM_LIB defined, as the shared library libfvm
+// which leaves out main() & is driven through the fvm_ functions below & host.h:
+//     gcc -O2 -o fvm vm.c ram.c
+//     gcc -O2 -shared -fPIC -pthread -DFVM_LIB -o libfvm.so vm.c ram.c host.c
+// yson_dev/fvm.py wraps libfvm with ctypes.
+
+// status of a vm, returned by fvm_run() & fvm_step().
+#define FVM_READY       0 // reset & not yet run.
+#define FVM_SUSPENDED   1 // fvm_step() ran it's ops without reaching die, run or step again to carry on.
+#define FVM_HALTED      2 // reached die or test_die, fvm_reset() before running again.
+#define FVM_NO_RAM      3 // no program loaded.
+
+#define FVM_RUN_UNLIMITED UINT64_MAX
+
+// everything a running program needs, nothing is kept in globals so any number
+// of vms can run, one per thread, in the same process. ram is mapped by fvm_load()
+// or fvm_alloc_ram() & owned by the vm, or attached with fvm_attach_ram() & owned by
+// the caller.
+typedef struct
+{
+    uint8_t*    ram;
+    size_t      ram_size;
+    uint8_t     owns_ram;
+    int         status;
+    int         retc;
+    uint64_t    instr_count;                // ops executed since the last fvm_reset().
+    uint8_t*    ip;                         // instr-pointer.
+    uint8_t*    sp;                         // stack-pointer.
+    void**      rp;                         // return-pointer, next free slot in rstk.
+    uint32_t    lc;                         // loop-counter.
+    uint8_t*    lb;                         // loop-base instr-ptr.
+    uint8_t*    le;                         // loop-end instr-ptr.
+    int         trace_level;
+    uint32_t    trace_count;                // ops recorded since the ring was last reset, may exceed TRACE_RING_SIZE.
+    trace_entry trace_ring[TRACE_RING_SIZE];
+    void*       rstk[RECUR_MAX];            // return-stack.
+    uint8_t     wstk[STACK_SIZE];           // work-stack.
+} fvm_state;
+
+fvm_state*
+fvm_create(void);
+
+void
+fvm_destroy(fvm_state* vm);
+
+int
+fvm_load(fvm_state* vm, const char* file_path);
+
+uint8_t*
+fvm_alloc_ram(fvm_state* vm, size_t ram_size);
+
+void
+fvm_attach_ram(fvm_state* vm, void* ram, size_t ram_size);
+
+void
+fvm_reset(fvm_state* vm);
+
+int
+fvm_run(fvm_state* vm);
+
+int
+fvm_step(fvm_state* vm, uint64_t op_count);
+
+// accessors for bindings that don't mirror fvm_state's layout.
+uint8_t*
+fvm_ram(fvm_state* vm);
+
+size_t
+fvm_ram_size(fvm_state* vm);
+
+uint8_t*
+fvm_stack(fvm_state* vm);
+
+uint32_t
+fvm_stack_depth(fvm_state* vm);
+
+uint32_t
+fvm_ip(fvm_state* vm);
+
+int
+fvm_status(fvm_state* vm);
+
+int
+fvm_retc(fvm_state* vm);
+
+uint64_t
+fvm_instr_count(fvm_state* vm);
 
 int
 dump_wstk(void* bsp);
 
+void
+fvm_set_trace_level(fvm_state* vm, int level);
+
+int
+dump_trace(fvm_state* vm, const char* dump_path);
+
 int
 eval_process(void* ram);
 
 int
-run_fbin(const char* file_path);
+run_fbin(const char* file_path, int trace_level);
 
 int main();
 
@@ -728,6 +728,14 @@ class DebugVM
             case lrots_op:    exec_movtr_op();   break;  
             case rrots_op:    exec_movtr_op();   break;  
             case brkp_op:     exec_movtr_op();   break;  
+            case pshfr_pshfr_op:           exec_pshfr_pshfr_op();           break;
+            case pshfr_pshfr_add_poptr_op: exec_pshfr_pshfr_add_poptr_op(); break;
+            case psh_je_op:                exec_psh_je_op();                break;
+            case psh_jn_op:                exec_psh_jn_op();                break;
+            case pshfr_inc_poptr_op:       exec_pshfr_inc_poptr_op();       break;
+            case pshfr_inc_poptr_lcont_op: exec_pshfr_inc_poptr_lcont_op(); break;
+            case poptr_pop2_op:            exec_poptr_pop2_op();            break;
+            case pshfr_psh_op:             exec_pshfr_psh_op();             break;
 
             default:
                 // Handle unknown opcode
@@ -1008,6 +1016,84 @@ class DebugVM
         ram->set_uint(dst_addr, popped_value);
         pc += UINT_SIZE;
     }
+
+    // superinstructions run the handlers of the ops they stand for one after the other, see
+    // fused_seq_tbl in opcodes.py. each handler steps pc over an opcode byte before it's
+    // operands, so pc is stepped back one before each handler after the first, that way it
+    // lands on the next op's operands.
+    void
+    exec_pshfr_pshfr_op()
+    {
+        exec_pshfr_op();
+        pc--;
+        exec_pshfr_op();
+    }
+
+    void
+    exec_pshfr_pshfr_add_poptr_op()
+    {
+        exec_pshfr_op();
+        pc--;
+        exec_pshfr_op();
+        pc--;
+        exec_add_op();
+        pc--;
+        exec_poptr_op();
+    }
+
+    void
+    exec_psh_je_op()
+    {
+        exec_psh_op();
+        pc--;
+        exec_je_op();
+    }
+
+    void
+    exec_psh_jn_op()
+    {
+        exec_psh_op();
+        pc--;
+        exec_jn_op();
+    }
+
+    // ram[dst] = ram[src] + 1 as vm.c does it, the stack is left alone. exec_inc_op() isn't
+    // chained here as it pushes the word it read rather than incrementing the top in place.
+    void
+    exec_pshfr_inc_poptr_op()
+    {
+        uint32_t src_addr;
+        uint32_t dst_addr;
+        pc++;
+        src_addr = ram->get_uint(pc);
+        pc += UINT_SIZE;
+        dst_addr = ram->get_uint(pc);
+        ram->set_uint(dst_addr, ram->get_uint(src_addr) + 1);
+        pc += UINT_SIZE;
+    }
+
+    void
+    exec_pshfr_inc_poptr_lcont_op()
+    {
+        exec_pshfr_inc_poptr_op();
+        exec_lcont_op();
+    }
+
+    void
+    exec_poptr_pop2_op()
+    {
+        exec_poptr_op();
+        pc--;
+        exec_pop2_op();
+    }
+
+    void
+    exec_pshfr_psh_op()
+    {
+        exec_pshfr_op();
+        pc--;
+        exec_psh_op();
+    }
     
     void
     exec_movtr_op()
@@ -1473,6 +1559,12 @@ do_test()
 {
     printf("\nprog start");
     void* master = init_ram(RAMSIZE, TRUE);
+    if (master == NULL)
+    {
+        printf("INTERNAL ERROR IN do_test(), unable to allocate ram");
+        return;
+    }
+
     Ram* ram     = new Ram(RAMSIZE, master);
     DebugVM* dvm = new DebugVM(ram);
     dvm->loadprog("vmt.fbin");
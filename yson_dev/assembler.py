@@ -1,16 +1,26 @@
 import datetime
-import pickle
+import tempfile
+import itertools
 import struct
+import heapq
 import copy
 import sys
 import os
+import re
+
+from array import array
+from functools import lru_cache
 
 from opcodes import *
 
 DEFAULT_OUTPUT_PATH = "yson_output.fbin"
 
-METADATA_SEGMENT_SIZE = 12 # size measured in bytes.
+OOC_FLUSH_SIZE   = 0x100000 # out-of-core mode flushes encoded code to file once this many bytes are buffered.
+OOC_SPOOL_WORDS  = OOC_FLUSH_SIZE // 4 # words a WordSpool holds in memory before spilling them to it's temp file.
+
+METADATA_SEGMENT_SIZE = 12 # size measured in bytes, of a v1 .fbin's metadata-segment.
 METADATA_SEGMENT      = 0 # index within prog-list of metadata-list.
+INSTR_SEGMENT         = 1 # index within prog-list of the InstructionBuffer.
 METADATA_FIELD_COUNT  = 4
 
 # indexes of metadata items within the metadata list.
@@ -19,88 +29,277 @@ PROG_SIZE_NDX         = 1
 FLAGS_NDX             = 2
 CREATION_DATE_NDX     = 3
 
-def isDecInteger(string):
-# returns 0 if not an integer.
-# returns 1 if an unsigned integer.
-# returns 2 if a signed integer.
-# returns 3 if no prefix.
+# bits of the metadata FLAGS field.
+KEEP_SYMBOLS_FLAG     = 0x1
+TRAILING_SYMTAB_FLAG  = 0x2 # v1 files only, symtab follows the code instead of preceding it.
+
+# .fbin v2 container, see Assembler.build_metadata_bytearray() for the layout.
+FBIN_MAGIC   = b'FBIN'
+FBIN_VERSION = 2
+PAGE_SIZE    = 0x1000
+CODE_VADDR   = PAGE_SIZE # code's file offset & it's address in vm ram, page 0 of vm ram holds the start-addr.
+
+DEFAULT_HEAP_SIZE = 0x100000 # size of the heap reservation declared in the HEAP section.
+
+fbin_header_encoder  = struct.Struct('<4sHHIHHI') # magic, version, flags, start-addr, creation-date, section-count, section-table-offset.
+fbin_section_encoder = struct.Struct('<HHIIII')   # type, flags, offset, size, vaddr, align.
+debug_line_encoder   = struct.Struct('<II')       # instr-addr, line-number.
+reloc_encoder        = struct.Struct('<I')        # addr of operand holding an address.
+
+# section types.
+SECTION_CODE       = 1
+SECTION_DATA       = 2
+SECTION_SYMTAB     = 3
+SECTION_DEBUG_LINE = 4
+SECTION_RELOC      = 5
+SECTION_HEAP       = 6
+
+section_type_mnemonic_tbl = { SECTION_CODE       : 'CODE',
+                              SECTION_DATA       : 'DATA',
+                              SECTION_SYMTAB     : 'SYMTAB',
+                              SECTION_DEBUG_LINE : 'DEBUG-LINE',
+                              SECTION_RELOC      : 'RELOC',
+                              SECTION_HEAP       : 'HEAP'
+}
+
+# bits of a section's flags.
+SECTION_LOAD_FLAG  = 0x1 # section is loaded into vm ram at it's vaddr.
+SECTION_EXEC_FLAG  = 0x2
+SECTION_WRITE_FLAG = 0x4
+SECTION_ZERO_FLAG  = 0x8 # section has no bytes in the file, it's size bytes of zeroed vm ram.
+
+# alignment of sections that aren't loaded into vm ram, loaded sections are page aligned.
+SYMTAB_ALIGN     = 8
+DEBUG_LINE_ALIGN = 4
+RELOC_ALIGN      = 4
+
+def align_up(value, align):
+# returns value rounded up to a multiple of align, align must be a power of 2.
+    return (value + align - 1) & ~(align - 1)
+
+WORD_MASK      = 0xFFFFFFFF
+SIGNED_INT_MIN = -0x80000000
+SIGNED_INT_MAX =  0x7FFFFFFF
+
+# signcode stored in an InstructionBuffer for operands that are label or macro
+# identifiers, the operand word then holds the identifier's index in names.
+IDENT_SIGNCODE = 0
+
+# binary symbol-table section, see SymbolTable.build_bytearray() for the layout.
+SYMTAB_MAGIC     = b'ysym'
+SYMTAB_VERSION   = 1
+SYMTAB_SLOT_SIZE = 4 # size of each hash-index slot.
+
+symtab_header_encoder = struct.Struct('<4sHHIIIII') # magic, version, entry-size, total-size, label-count, macro-count, slot-count, pool-size.
+symtab_entry_encoder  = struct.Struct('<IHBxI')     # name-offset, name-length, signcode, value.
+
+FNV_OFFSET_BASIS = 0x811C9DC5
+FNV_PRIME        = 0x01000193
+
+def words_to_bytes(words):
+# returns array('I') words as the little-endian bytes the .fbin sections hold.
+    if sys.byteorder == 'big':
+        words = array('I', words)
+        words.byteswap()
+
+    return words.tobytes()
+
+def word_chunks(words):
+# yields words, an array('I'), a WordSpool or any iterable of words, as little-endian bytes
+# at most OOC_FLUSH_SIZE at a time so a section can be written without building it whole.
+    if isinstance(words, WordSpool):
+        chunks = words.chunks()
+
+    elif isinstance(words, array):
+        chunks = (words,)
+
+    else:
+        words  = iter(words)
+        chunks = iter(lambda: array('I', itertools.islice(words, OOC_SPOOL_WORDS)), array('I'))
 
-    retval = NOSIGN_SIGNCODE
-    s = string
+    for chunk in chunks:
+        yield words_to_bytes(chunk)
 
-    if s[0] == UNSIGNED_INT_PREFIX:
-        retval = UNSIGNED_SIGNCODE
-        s = string[1:]
+def fnv1a_hash(data):
+# returns the 32bit FNV-1a hash of bytes data, used for the symbol-table's hash-index.
 
-    elif s[0] in (SIGNED_INT_PREFIX, '-', '+'):
-        retval = SIGNED_SIGNCODE
-        s = string[1:]
+    h = FNV_OFFSET_BASIS
 
-    elif s[0] == ADDR_INT_PREFIX:
-        retval = ADDR_SIGNCODE
-        s = string[1:]
+    for byte in data:
+        h = ((h ^ byte) * FNV_PRIME) & WORD_MASK
 
-    try:
-        int(s)
-    except ValueError:
+    return h
+
+def symtab_slot_count(entry_count):
+# returns number of hash-index slots for entry_count symbols, a power of 2
+# at least twice entry_count so probe sequences stay short.
+
+    if not entry_count:
         return 0
-    else:
-        return retval
 
-def isHexInteger(string):
-    retval = NOSIGN_SIGNCODE
-    s = string
+    slot_count = 1
 
-    if s[0] == UNSIGNED_INT_PREFIX:
-        retval = UNSIGNED_SIGNCODE
-        s = string[1:]
+    while slot_count < entry_count * 2:
+        slot_count <<= 1
 
-    elif s[0] in (SIGNED_INT_PREFIX, '-', '+'):
-        retval = SIGNED_SIGNCODE
-        s = string[1:]
+    return slot_count
 
-    elif s[0] == ADDR_INT_PREFIX:
-        retval = ADDR_SIGNCODE
-        s = string[1:]
+def build_encoder_tbl():
+# returns dict mapping opcodes to a precompiled struct.Struct that packs the whole
+# instruction, opcode and operands, in one call. the shape of each instruction comes
+# from its size in opsize_tbl. opcodes of the same shape share the same Struct object.
+#
+# every operand is packed as an unsigned word. some operands can hold either signed or
+# unsigned values(see psh & setr in oprtype_tbl) so signed values are converted to their
+# two's complement word by masking with WORD_MASK before being packed.
 
-    elif s[0:2] != '0x':
-        return 0
+    shapes = {}
+    tbl    = {}
 
-    # test whether s is a valid hex value.
-    try:
-        int(s, 16)
-    except ValueError:
-        return 0
-    else:
-        return retval
+    for opcode, size in opsize_tbl.items():
+        fmt = '<B' + ('I' * ((size - OPCODE_SIZE) // WORDSIZE))
+
+        if fmt not in shapes:
+            shapes[fmt] = struct.Struct(fmt)
+
+        tbl[opcode] = shapes[fmt]
+
+    return tbl
+
+# dict mapping opcodes to their instruction encoders.
+encoder_tbl = build_encoder_tbl()
+
+# dict mapping opcodes to their operand count as encoded, used for checking instr-lists.
+encoder_argc_tbl = {opcode : (size - OPCODE_SIZE) // WORDSIZE for opcode, size in opsize_tbl.items()}
+
+# fused_seq_tbl inverted for the peephole pass, sequence of opcodes -> fused opcode, and every
+# proper prefix of a fused sequence, the pass holds instrs while they're still one of these.
+fuse_seq_map    = {seq : opcode for opcode, seq in fused_seq_tbl.items()}
+fuse_prefix_set = set(seq[:seq_len] for seq in fused_seq_tbl.values() for seq_len in range(1, len(seq)))
+
+def int_list_in_range(int_list):
+# returns True if an int_list's (SIGNCODE, VALUE) value fits in an operand word.
+
+    if int_list[0] == SIGNED_SIGNCODE:
+        return SIGNED_INT_MIN <= int_list[1] <= SIGNED_INT_MAX
+
+    return 0 <= int_list[1] <= WORD_MASK
+
+def operand_word(int_list):
+# returns the unsigned word that an int_list (SIGNCODE, VALUE) is encoded as.
+    return int_list[1] & WORD_MASK
 
-def isIdentifier(string):
+# token kinds returned by classify_token().
+TOK_COMMENT       = 0
+TOK_INT           = 1
+TOK_MNEMONIC      = 2
+TOK_MACRO_KEYWORD = 3
+TOK_LABEL_DEF     = 4
+TOK_IDENTIFIER    = 5
+
+TOKEN_CACHE_SIZE = 0x1000 # number of distinct tokens classify_token() remembers.
+
+# maps integer prefixes to the signcode they give the integer.
+int_prefix_signcode_tbl = {
+    None                : UNSIGNED_SIGNCODE, # no prefix defaults to unsigned.
+    UNSIGNED_INT_PREFIX : UNSIGNED_SIGNCODE,
+    SIGNED_INT_PREFIX   : SIGNED_SIGNCODE,
+    ADDR_INT_PREFIX     : ADDR_SIGNCODE,
+    '-'                 : SIGNED_SIGNCODE,
+    '+'                 : SIGNED_SIGNCODE
+}
+
+# master pattern every token is matched against in one pass, the named group
+# that matched gives the token's kind.
+#
+# integers are decimal, or hex when they start with 0x. once an integer has a
+# prefix the 0x is optional so '%ff' or '@1f' are hex but '%10' is decimal.
+# a signed integer can be written '$-5', '-5' or '+5'.
+token_pattern = re.compile(r"""
+      (?P<comment> \#.* )
+    | (?P<int>
+          (?P<prefix> [%s] )?
+          (?P<sign>   [-+] )?
+          (?: (?P<dec> [0-9]+ )
+            | 0[xX](?P<hex> [0-9a-fA-F]+ )
+            | (?<=[%s+-])(?P<hexp> [0-9a-fA-F]+ ) )
+      )
+    | (?P<label> (?P<label_id> [^\s%s]* ) %s )
+    | (?P<word> .+ )
+""" % (re.escape(UNSIGNED_INT_PREFIX + SIGNED_INT_PREFIX + ADDR_INT_PREFIX),
+       re.escape(UNSIGNED_INT_PREFIX + SIGNED_INT_PREFIX + ADDR_INT_PREFIX),
+       re.escape(LABEL_DEF_SUFFIX),
+       re.escape(LABEL_DEF_SUFFIX)), re.VERBOSE | re.DOTALL)
+
+identifier_pattern = re.compile(r'\w+')
+
+def identifier_test(string):
 # returns -1 if too short
 # returns -2 if too long
 # returns -3 if first char is numeric.
 # returns -4 if invalid char in string.
+# returns -5 if string is an instruction mnemonic.
 # returns  1 if string is valid identifier.
 
-    length = len(string)
-
     # check if identifer an invalid length.
-    if length < MIN_ID_LEN: return -1
-    if length > MAX_ID_LEN: return -2
+    if len(string) < MIN_ID_LEN: return -1
+    if len(string) > MAX_ID_LEN: return -2
 
     # check if first char is a number.
     if string[0].isnumeric(): return -3
 
-    # iterate through strings chars and check them one by one.
-    # chars can only be underscores or alphanumeric chars, except
-    # first char can be a dollarsign.
-    for i in range(len(string)):
+    # chars can only be underscores or alphanumeric chars.
+    if not identifier_pattern.fullmatch(string): return -4
 
-        # is char not alphanum and isn't an underscore?
-        if not string[i].isalnum() and string[i] != '_':
-            return -4
+    if string in optbl: return -5
 
     return 1
 
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def classify_token(tok):
+# classifies a token in one match against token_pattern.
+# returns tuple (kind, info) where info depends on kind:
+#
+# TOK_COMMENT       -> None
+# TOK_INT           -> (SIGNCODE, VALUE)
+# TOK_MNEMONIC      -> opcode
+# TOK_MACRO_KEYWORD -> None
+# TOK_LABEL_DEF     -> identifier_test() result of the label's identifier.
+# TOK_IDENTIFIER    -> identifier_test() result of the token.
+#
+# results are cached so they're shared between callers and must not be modified,
+# int_lists are built from TOK_INT's info, see Assembler.build_int_list().
+
+    match = token_pattern.fullmatch(tok)
+    kind  = match.lastgroup
+
+    if kind == 'comment':
+        return (TOK_COMMENT, None)
+
+    if kind == 'int':
+        if match['dec'] is not None:
+            value = int(match['dec'])
+        else:
+            value = int(match['hex'] or match['hexp'], 16)
+
+        if match['sign'] == '-':
+            value = -value
+
+        signcode = int_prefix_signcode_tbl[match['prefix'] or match['sign']]
+
+        return (TOK_INT, (signcode, value))
+
+    if kind == 'label':
+        return (TOK_LABEL_DEF, identifier_test(match['label_id']))
+
+    if tok in optbl:
+        return (TOK_MNEMONIC, optbl[tok])
+
+    if tok == MACRO_KEYWORD:
+        return (TOK_MACRO_KEYWORD, None)
+
+    return (TOK_IDENTIFIER, identifier_test(tok))
+
 class SymbolTable:
 # throughout this class and Assembler() the term 'symtab'/'symbol table'
 # refers to the label-table and macro-table both, together. they make up
@@ -113,33 +312,12 @@ class SymbolTable:
     def __init__(self,
                  keep_symbols = None ):
 
-        self.labels_bytearray = bytearray()
-        self.macros_bytearray = bytearray()
         self.bytearray        = bytearray()
-        self.labels_size      = None
-        self.macros_size      = None
         self.bytearray_size   = None
         self.labels           = {}
         self.macros           = {}
         self.keep_symbols     = keep_symbols
 
-    def calculate_addr_offsets(self):
-    # furst-vm reads the entire .fbin contents into it's RAM.
-    # if symbols have been kept this then includes the entire symtab.
-    # this means all labels and addr macros can only have their values
-    # calculated once the final size of the symtab is known. so this is
-    # done *after* assembly. doing it this way allows macros to be defined
-    # anywhere in the file in future.
-
-        if self.keep_symbols:
-
-            for label_id in self.labels.keys():
-                self.labels[label_id][1] += self.bytearray_size
-
-            for macro_id in self.macros.keys():
-                if self.macros[macro_id][0] == ADDR_SIGNCODE:
-                    self.macros[macro_id][1] += self.bytearray_size
-
     def build_label_tbl_str(self):
         if len(self.labels):
             s = ''
@@ -181,87 +359,94 @@ class SymbolTable:
 
         self.macros[id] = int_list
 
-    def build_label_bytearray(self):
-        try:
-            # first serialise the label dict & grab its size.
-            data = pickle.dumps(self.labels)
+    def build_string_pool(self):
+    # returns (pool, offsets) where pool is the utf-8 bytes of every label id followed
+    # by every macro id and offsets is a list of (name-offset, name-length) for each.
 
-            # set aside size of label table for when we build the symtbl bytearray.
-            self.labels_size = len(data)
+        pool    = bytearray()
+        offsets = []
 
-            # write label table's bytes.
+        for name in list(self.labels.keys()) + list(self.macros.keys()):
+            data = name.encode('utf-8')
+            offsets.append((len(pool), len(data)))
+            pool.extend(data)
 
-            for Byte in data:
-                self.labels_bytearray.append(Byte)
+        return pool, offsets
 
-        except pickle.PicklingError as e:
-            raise Exception("INTERNAL ERROR: Error when building label-table bytearray!\n  More info: %s" % e)
+    def build_hash_index(self, pool, offsets):
+    # returns array of hash-index slots. each slot holds an entry's index + 1, 0 means empty.
+    # slots are found by the FNV-1a hash of the symbol's name, collisions use linear probing.
+    # labels are inserted first so a lookup finds a label before a macro of the same name.
 
-    def build_macro_bytearray(self):
-        try:
-            # first serialise the macro dict & grab its size.
-            data = pickle.dumps(self.macros)
+        slots = array('I', bytes(symtab_slot_count(len(offsets)) * SYMTAB_SLOT_SIZE))
+        mask  = len(slots) - 1
 
-            # set aside size of macro table for when we build the symtbl bytearray.
-            self.macros_size = len(data)
+        for entry_ndx, (name_offset, name_len) in enumerate(offsets):
+            slot_ndx = fnv1a_hash(pool[name_offset : name_offset + name_len]) & mask
 
-            # write label table's bytes.
+            while slots[slot_ndx]:
+                slot_ndx = (slot_ndx + 1) & mask
 
-            for Byte in data:
-                self.macros_bytearray.append(Byte)
+            slots[slot_ndx] = entry_ndx + 1
 
-        except pickle.PicklingError as e:
-            raise Exception("INTERNAL ERROR: Error when building macro-table bytearray!\n  More info: %s" % e)
+        return slots
 
     def build_bytearray(self):
-        # .FBIN MEMORY-MAP
+        # SYMTAB SECTION MEMORY-MAP
         #                                           
-		# 0x00                      METADATA_SEGMENT       
-		# 0x0C                      TOTAL_SYMTAB_SIZE  ------
-        # 0x10                      LABEL_TABLE_SIZE         |
-		# 0x14                      MACRO_TABLE_SIZE         |--> self.bytearray when when in .fbin file.
-		# 0x18                      SERIALISED_LABEL_TABLE   |
-		# 0x18 + LABEL_TABLE_SIZE   SERIALISED_MACRO_TABLE --
-        # 0x0C + TOTAL_SYMTAB_SIZE  FIRST_PROGRAM_INSTRUCTION
+        # 0x00                      SYMTAB_HEADER      ------
+        # 0x1C                      SYMTAB_ENTRIES           |
+        #                           SYMTAB_HASH_INDEX        |--> self.bytearray when when in .fbin file.
+        #                           SYMTAB_STRING_POOL     --
         #
-        # TOTAL_SYMTAB_SIZE refers to the len of self.bytearray, this value can be used
-        # to calculate the address of the first program instruction.
+        # furst-vm doesn't load the symtab into it's RAM, it stays on disk for tools. so labels
+        # & addr macros are the same whether or not symbols are kept. v1 files where 
+        # TRAILING_SYMTAB_FLAG isn't set have the symtab between the metadata & the program
+        # instead, with every address shifted by TOTAL_SYMTAB_SIZE.
         #
-        # NOTE: actual size of symtab is LABEL_TABLE_SIZE + MACRO_TABLE_SIZE
-        #       TOTAL_SYMTAB_SIZE is LABEL_TABLE_SIZE + MACRO_TABLE_SIZE + 12(4*3, 3 size values, TOTAL_SYMTAB_SIZE, LABEL_SYMTAB_SIZE, MACRO_SYMTAB_SIZE)
-
-        try:
-            self.labels_size    = len(pickle.dumps(self.labels))
-            self.macros_size    = len(pickle.dumps(self.macros))
+        # SYMTAB_HEADER:
+        #     magic(4 bytes, 'ysym'), version(2), entry-size(2), total-symtab-size(4),
+        #     label-count(4), macro-count(4), hash-slot-count(4), string-pool-size(4)
+        #
+        # SYMTAB_ENTRIES: one per label followed by one per macro, each entry is
+        #     name-offset(4), name-length(2), signcode(1), padding(1), value(4)
+        #     name-offset is relative to the start of the string-pool. signed values
+        #     are stored as their two's complement word.
+        #
+        # SYMTAB_HASH_INDEX: hash-slot-count slots of 4 bytes, see build_hash_index().
+        #
+        # TOTAL_SYMTAB_SIZE refers to the len of self.bytearray.
+        # see SymbolTableReader() for reading a symtab back.
 
-            # the 12 below refers to the size of the memory for the 3 size values,
-            # TOTAL_SYMTAB_SIZE, LABEL_SYMTAB_SIZE, MACRO_SYMTAB_SIZE
-            self.bytearray_size = 12 + self.labels_size + self.macros_size
+        pool, offsets = self.build_string_pool()
+        slots         = self.build_hash_index(pool, offsets)
 
-        except pickle.PicklingError as e:
-            raise Exception("INTERNAL ERROR: Error when building symbol-table bytearray!\n  More info: %s" % e)
+        self.bytearray_size = (symtab_header_encoder.size
+                               + len(offsets) * symtab_entry_encoder.size
+                               + len(slots) * SYMTAB_SLOT_SIZE
+                               + len(pool))
 
-        # now we calculate addr-offsets and update labels & addr-macros.
-        self.calculate_addr_offsets()
+        # now build the symtab, presized as it's final size is already known.
+        self.bytearray = bytearray(self.bytearray_size)
 
-        # now do the proper final serialisation of the symtab.
         try:
-            # build label & macro bytearrays.
-            self.build_label_bytearray()
-            self.build_macro_bytearray()
+            symtab_header_encoder.pack_into(self.bytearray, 0, SYMTAB_MAGIC, SYMTAB_VERSION, symtab_entry_encoder.size, self.bytearray_size,
+                                            len(self.labels), len(self.macros), len(slots), len(pool))
 
-            # first write sizes to symtab-bytearray.
-            self.bytearray.extend(struct.pack('<I', self.bytearray_size))
-            self.bytearray.extend(struct.pack('<I', self.labels_size))
-            self.bytearray.extend(struct.pack('<I', self.macros_size))
+            offset = symtab_header_encoder.size
 
-            # now copy the labels and macros bytes to the bytearray.
-            self.bytearray.extend(self.labels_bytearray)
-            self.bytearray.extend(self.macros_bytearray)
+            for (name_offset, name_len), int_list in zip(offsets, list(self.labels.values()) + list(self.macros.values())):
+                symtab_entry_encoder.pack_into(self.bytearray, offset, name_offset, name_len, int_list[0], operand_word(int_list))
+                offset += symtab_entry_encoder.size
 
         except struct.error as e:
             raise Exception("INTERNAL ERROR: Error when building symbol-table bytearray!\n  More info: %s" % e)
 
+        self.bytearray[offset : offset + len(slots) * SYMTAB_SLOT_SIZE] = slots.tobytes()
+        offset += len(slots) * SYMTAB_SLOT_SIZE
+
+        self.bytearray[offset:] = pool
+
         # quick check on the bytearray size, not really required but just for safety.
         if len(self.bytearray) != self.bytearray_size:
             s  = "INTERNAL ERROR: error here: [if len(self.bytearray) != self.bytearray_size:] !!!\n"
@@ -270,9 +455,372 @@ class SymbolTable:
 
         return self.bytearray
 
+class SymbolTableReader:
+# reads a symtab built by SymbolTable.build_bytearray() straight out of a buffer, nothing is
+# unpickled or copied. buf is anything supporting the buffer protocol, such as the bytes of a
+# .fbin file or an mmap of one, offset is where the symtab starts within it.
+#
+# lookup() finds a symbol using the hash-index, labels() & macros() iterate over the entries.
+# symbol values are returned as int_lists (SIGNCODE, VALUE).
+
+    def __init__(self, buf, offset=0):
+        self.view = memoryview(buf)[offset:]
+
+        try:
+            (magic, self.version, self.entry_size, self.size, self.label_count,
+             self.macro_count, self.slot_count, self.pool_size) = symtab_header_encoder.unpack_from(self.view, 0)
+
+        except struct.error:
+            raise Exception("yson: Symbol-table is truncated!")
+
+        if magic != SYMTAB_MAGIC:
+            raise Exception("yson: Symbol-table has bad magic: %s" % bytes(magic))
+
+        if self.version != SYMTAB_VERSION:
+            raise Exception("yson: Unsupported symbol-table version: %d, expected: %d" % (self.version, SYMTAB_VERSION))
+
+        if self.entry_size != symtab_entry_encoder.size or self.size > len(self.view):
+            raise Exception("yson: Symbol-table is corrupt or truncated!")
+
+        self.entry_offset = symtab_header_encoder.size
+        self.slot_offset  = self.entry_offset + (self.label_count + self.macro_count) * self.entry_size
+        self.pool_offset  = self.slot_offset + self.slot_count * SYMTAB_SLOT_SIZE
+        self.slots        = self.view[self.slot_offset : self.pool_offset].cast('I')
+        self.pool         = self.view[self.pool_offset : self.pool_offset + self.pool_size]
+
+    def __len__(self):
+        return self.label_count + self.macro_count
+
+    def read_entry(self, entry_ndx):
+    # returns (name-bytes, int_list) of the entry at entry_ndx, name-bytes is a memoryview into the pool.
+
+        name_offset, name_len, signcode, value = symtab_entry_encoder.unpack_from(self.view, self.entry_offset + entry_ndx * self.entry_size)
+
+        if signcode == SIGNED_SIGNCODE and value > SIGNED_INT_MAX:
+            value -= WORD_MASK + 1
+
+        return self.pool[name_offset : name_offset + name_len], [signcode, value]
+
+    def lookup(self, name):
+    # returns int_list of the symbol named name, or None if there isn't one.
+
+        if not self.slot_count:
+            return None
+
+        data     = name.encode('utf-8')
+        mask     = self.slot_count - 1
+        slot_ndx = fnv1a_hash(data) & mask
+
+        # probe until an empty slot, the index is never full so this always ends.
+        while self.slots[slot_ndx]:
+            entry_name, int_list = self.read_entry(self.slots[slot_ndx] - 1)
+
+            if entry_name == data:
+                return int_list
+
+            slot_ndx = (slot_ndx + 1) & mask
+
+        return None
+
+    def labels(self):
+    # yields (label-id, int_list) for every label.
+        for entry_ndx in range(self.label_count):
+            name, int_list = self.read_entry(entry_ndx)
+            yield str(name, 'utf-8'), int_list
+
+    def macros(self):
+    # yields (macro-id, int_list) for every macro.
+        for entry_ndx in range(self.label_count, self.label_count + self.macro_count):
+            name, int_list = self.read_entry(entry_ndx)
+            yield str(name, 'utf-8'), int_list
+
+class FixupTable:
+# used by the streaming assembly mode. instead of holding every instruction in
+# a list until the end of assembly, instructions are encoded to bytes as each
+# line is read. any operand that is a label or macro identifier whose value is
+# not yet final gets a 4 byte placeholder written in its place and an entry made
+# in this table. once assembly is complete patch() resolves every entry against
+# the symbol-table and writes the values over their placeholders in one pass.
+#
+# entries are kept in two parallel arrays rather than a list of lists:
+# offsets   -> byte offset of the placeholder within the code bytearray.
+# name_ndxs -> index of the identifier within self.names.
+# each identifier string is only stored once no matter how often it's referenced.
+#
+# spill -> flag keeping offsets & name_ndxs in WordSpools, for tables that grow with the
+#          program in out-of-core mode. only the names are held in memory then.
+
+    def __init__(self, spill=False):
+        self.offsets   = WordSpool() if spill else array('I')
+        self.name_ndxs = WordSpool() if spill else array('I')
+        self.names     = []
+        self.name_map  = {} # maps identifier to its index in self.names.
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def add(self, offset, name):
+        name_ndx = self.name_map.get(name)
+
+        if name_ndx is None:
+            name_ndx = len(self.names)
+            self.name_map[name] = name_ndx
+            self.names.append(name)
+
+        self.offsets.append(offset)
+        self.name_ndxs.append(name_ndx)
+
+    def close(self):
+    # removes the spill files of a spilled table, it's entries can't be read after.
+        if isinstance(self.offsets, WordSpool):
+            self.offsets.close()
+            self.name_ndxs.close()
+
+    def resolve_names(self, symtbl):
+    # returns list of int_lists, one for each name in self.names.
+    # raises exception if a name is neither a label or macro.
+
+        resolved = []
+
+        for name in self.names:
+
+            if name in symtbl.labels:
+                resolved.append(symtbl.labels[name])
+
+            elif name in symtbl.macros:
+                resolved.append(symtbl.macros[name])
+
+            else:
+                raise Exception("yson: Invalid instruction operand, string: [%s] does not match any identifiers in the symbol-table" % name)
+
+        return resolved
+
+    def patch(self, buf, symtbl):
+    # writes the final value of every fixup entry into buf.
+    # buf is anything supporting the buffer protocol, normally the code bytearray.
+
+        resolved = self.resolve_names(symtbl)
+
+        words = [operand_word(int_list) for int_list in resolved]
+
+        try:
+            for offset, name_ndx in zip(self.offsets, self.name_ndxs):
+                struct.pack_into('<I', buf, offset, words[name_ndx])
+
+        except struct.error as e:
+            s  = '\nINTERNAL ERROR: Error when patching fixup into program bytearray!'
+            s += '\n    more info: %s' % e
+            raise Exception(s)
+
+    def __str__(self):
+        s = 'fixup-table: %d entries, %d identifiers' % (len(self.offsets), len(self.names))
+
+        for offset, name_ndx in zip(self.offsets, self.name_ndxs):
+            s += '\n[%s] @ code-offset %d' % (self.names[name_ndx], offset)
+
+        return s
+
+class WordSpool:
+# used by the out-of-core assembly mode for the tables that grow with the program, the
+# debug-line entries & relocs, so they don't undo it's flat memory use. words are appended
+# to an array('I') as they would be anyway, but every OOC_SPOOL_WORDS of them are spilled
+# to an anonymous temp file, only the words since the last spill are ever held in memory.
+# chunks() reads them back in order an array at a time.
+
+    def __init__(self):
+        self.buf        = array('I')
+        self.spill_file = None
+        self.spilled    = 0 # count of words in spill_file.
+
+    def __len__(self):
+        return self.spilled + len(self.buf)
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def append(self, word):
+        self.buf.append(word)
+
+        if len(self.buf) >= OOC_SPOOL_WORDS:
+            self.spill()
+
+    def spill(self):
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile()
+
+        # the spill file is only read back by chunks() so native byte order is fine.
+        self.spill_file.seek(0, os.SEEK_END)
+        self.buf.tofile(self.spill_file)
+        self.spilled += len(self.buf)
+        self.buf      = array('I')
+
+    def chunks(self):
+    # yields the words as arrays of at most OOC_SPOOL_WORDS words, oldest first.
+        if self.spill_file is not None:
+            self.spill_file.seek(0)
+            remaining = self.spilled
+
+            while remaining:
+                chunk = array('I')
+                chunk.fromfile(self.spill_file, min(remaining, OOC_SPOOL_WORDS))
+                remaining -= len(chunk)
+                yield chunk
+
+        if self.buf:
+            yield self.buf
+
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+
+class InstructionBuffer:
+# holds the assembled instructions of a program until they're packed into the prog-bytearray.
+# every instruction used to be it's own list with each operand another [SIGNCODE, VALUE] list,
+# costing hundreds of bytes per instruction. instead everything is kept in flat arrays:
+#
+# opcodes     -> one byte per instruction.
+# opr_offsets -> per instruction, index of it's first operand within operands & signcodes.
+# operands    -> one word per operand. signed values are stored as their two's complement word.
+# signcodes   -> one byte per operand, the operand's signcode or IDENT_SIGNCODE.
+#
+# operands that are label or macro identifiers hold the identifier's index within self.names
+# until resolve_names() replaces them with their values. ident_ndxs holds the operand index
+# of each of these so resolving doesn't need to scan every operand.
+
+    def __init__(self):
+        self.opcodes     = array('B')
+        self.opr_offsets = array('I')
+        self.operands    = array('I')
+        self.signcodes   = array('B')
+        self.ident_ndxs  = array('I')
+        self.names       = []
+        self.name_map    = {} # maps identifier to its index in self.names.
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def append(self, instr):
+    # appends an instr-list (opcode followed by int_lists or identifiers) onto the buffer.
+
+        self.opcodes.append(instr[0])
+        self.opr_offsets.append(len(self.operands))
+
+        for operand in instr[1:]:
+
+            if isinstance(operand, str):
+                name_ndx = self.name_map.get(operand)
+
+                if name_ndx is None:
+                    name_ndx = len(self.names)
+                    self.name_map[operand] = name_ndx
+                    self.names.append(operand)
+
+                self.ident_ndxs.append(len(self.operands))
+                self.operands.append(name_ndx)
+                self.signcodes.append(IDENT_SIGNCODE)
+
+            else:
+                self.operands.append(operand[1] & WORD_MASK)
+                self.signcodes.append(operand[0])
+
+    def operand_count(self, instr_ndx):
+        return encoder_argc_tbl[self.opcodes[instr_ndx]]
+
+    def get_operand(self, opr_ndx):
+    # returns operand as an int_list (SIGNCODE, VALUE) or the identifier if it's unresolved.
+
+        signcode = self.signcodes[opr_ndx]
+        value    = self.operands[opr_ndx]
+
+        if signcode == IDENT_SIGNCODE:
+            return self.names[value]
+
+        if signcode == SIGNED_SIGNCODE and value > SIGNED_INT_MAX:
+            value -= WORD_MASK + 1
+
+        return [signcode, value]
+
+    def get_instr(self, instr_ndx):
+    # returns instruction as an instr-list, only used for printing & debugging.
+
+        opr_offset = self.opr_offsets[instr_ndx]
+        instr      = [self.opcodes[instr_ndx]]
+
+        for opr_ndx in range(opr_offset, opr_offset + self.operand_count(instr_ndx)):
+            instr.append(self.get_operand(opr_ndx))
+
+        return instr
+
+    def resolve_names(self, symtbl):
+    # replaces every identifier operand with it's value from the symbol-table.
+    # raises exception if an identifier is neither a label or macro.
+
+        resolved = []
+
+        for name in self.names:
+
+            if name in symtbl.labels:
+                resolved.append(symtbl.labels[name])
+
+            elif name in symtbl.macros:
+                resolved.append(symtbl.macros[name])
+
+            else:
+                raise Exception("yson: Invalid instruction operand, string: [%s] does not match any identifiers in the symbol-table" % name)
+
+        for opr_ndx in self.ident_ndxs:
+            int_list = resolved[self.operands[opr_ndx]]
+            self.operands[opr_ndx]  = int_list[1] & WORD_MASK
+            self.signcodes[opr_ndx] = int_list[0]
+
+        self.ident_ndxs = array('I')
+
+    def pack_into(self, buf, offset):
+    # packs every instruction into buf starting at offset, returns offset past the last instruction.
+    # each instr is packed in one pack_into() call by it's opcode's encoder from encoder_tbl.
+    # identifiers must have been resolved by resolve_names() first.
+    #
+    # this is the assembler's hot loop so everything it touches is bound to a local first.
+
+        if self.ident_ndxs:
+            raise Exception("INTERNAL ERROR: Instruction buffer packed before identifiers were resolved!")
+
+        operands = self.operands
+        opr_ndx  = 0
+
+        for opcode in self.opcodes:
+            encoder = encoder_tbl[opcode]
+            argc    = encoder_argc_tbl[opcode]
+
+            if argc == 0:
+                encoder.pack_into(buf, offset, opcode)
+
+            elif argc == 1:
+                encoder.pack_into(buf, offset, opcode, operands[opr_ndx])
+
+            elif argc == 2:
+                encoder.pack_into(buf, offset, opcode, operands[opr_ndx], operands[opr_ndx + 1])
+
+            else:
+                encoder.pack_into(buf, offset, opcode, *operands[opr_ndx:opr_ndx + argc])
+
+            opr_ndx += argc
+            offset  += encoder.size
+
+        return offset
+
+    def __str__(self):
+        s  = 'instruction-buffer: %d instructions, %d operands, %d identifiers\n' % (len(self.opcodes), len(self.operands), len(self.names))
+        s += 'opcodes: %d bytes, operands: %d bytes' % (len(self.opcodes) + len(self.opr_offsets) * self.opr_offsets.itemsize,
+                                                        len(self.operands) * self.operands.itemsize + len(self.signcodes))
+        return s
+
 class Assembler:
-# Input file is assembled into a list of instruction lists.
-# The first list contains the address of the first instruction
+# Input file is assembled into a program-list holding the metadata list followed by
+# an InstructionBuffer() holding the instructions.
+# The metadata list contains the address of the first instruction
 # to be executed. Hence why self.prog is initialised to [[0]].
 # once the main label is declared 0 is overwritten with the 
 # corresponding address of the main label.
@@ -285,21 +833,53 @@ class Assembler:
 # output_path  -> .fbin file produced by assembling input .frt file.
 # keep_symbols -> flag determining whether or not symbols are kept in output-file.
 # show_all_ds  -> flag used for printing out all data structures and other data used for debugging ect.
+# streaming    -> flag selecting the streaming assembly mode. instructions are encoded straight into
+#                 self.code_bytearray as each line is read instead of being collected in self.prog_list,
+#                 identifiers whose values aren't final yet are recorded in self.fixups. see FixupTable().
+# out_of_core  -> flag selecting the out-of-core assembly mode, streaming mode except the encoded code is
+#                 flushed to file as it's produced rather than held in memory, see write_prog_out_of_core().
+# heap_size    -> size of vm ram reserved after the code for the program's data, the vm sizes it's ram
+#                 from this and the program's size rather than allocating it's maximum ram.
+# fuse         -> flag turning on the peephole pass, sequences of instrs in fused_seq_tbl are emitted
+#                 as the one superinstruction standing for them. see fuse_instrs().
 
     def __init__(self,
                  input_path   = None,
                  output_path  = None,
                  keep_symbols = True,
-                 show_all_ds  = True ):
+                 show_all_ds  = True,
+                 streaming    = False,
+                 out_of_core  = False,
+                 heap_size    = DEFAULT_HEAP_SIZE,
+                 fuse         = False ):
 
         self.input_path         = input_path
         self.output_path        = output_path
         self.keep_symbols       = keep_symbols # symbols kept on by default.
         self.show_all_ds        = show_all_ds # show-all-data-structures
+        self.out_of_core        = out_of_core
+        self.streaming          = streaming or out_of_core # out-of-core is built on streaming mode.
+        self.heap_size          = heap_size
+        self.fuse               = fuse
+        self.fuse_window        = [] # (instr-list, line-number) of instrs held by fuse_instrs().
         self.symtbl             = SymbolTable(keep_symbols) # holds labels & macros.
         self.prog_list          = self.init_prog_list()
         self.prog_bytearray     = bytearray()
-        self.metadata_bytearray = bytearray()
+        self.pack_offset        = 0 # offset in prog-bytearray pack_prog_list() packs the next instr at.
+        self.metadata_bytearray = bytearray() # header & section-table page.
+        self.trailer_bytearray  = bytearray() # sections following the code, see build_metadata_bytearray().
+        self.section_tbl        = []
+        self.trailer_size       = 0 # bytes of sections following the code.
+        self.line_tbl           = WordSpool() if out_of_core else array('I') # (instr-addr, line-number) pairs, only kept with symbols.
+        self.relocs             = WordSpool() if out_of_core else array('I') # addrs of operands holding addresses, only kept with symbols.
+        self.ident_relocs       = FixupTable(out_of_core) # operands holding identifiers, relocs once resolved.
+        self.code_bytearray     = bytearray() # only used in streaming mode.
+        self.fixups             = FixupTable(out_of_core) # only used in streaming mode.
+        self.code_file          = None # only used in out-of-core mode, file code_bytearray is flushed to.
+        self.code_file_path     = None
+        self.code_file_base     = 0 # offset within code_file of the first code byte.
+        self.code_flushed       = 0 # count of code bytes already flushed to code_file.
+        self.bytes_written      = 0
         self.input_file         = None
         self.output_file        = None
         self.in_comment         = False
@@ -307,25 +887,34 @@ class Assembler:
         self.prog_instr_count   = 0
         self.line_tokens        = None
         self.tokndx             = -1
-        self.next_addr          = METADATA_SEGMENT_SIZE
+        self.next_addr          = CODE_VADDR
         self.linenum            = 0
 
     def print_prog_list(self):
-        print("program-list: \n%s" % self.prog_list)
+        # in streaming mode there's no instr-lists, only the metadata list and the fixup-table.
+        if self.streaming:
+            print("metadata list: %s" % self.prog_list[METADATA_SEGMENT])
+            print("\n%s" % self.fixups)
+            return
+
+        instr_buf = self.prog_list[INSTR_SEGMENT]
+
+        print("metadata list: %s" % self.prog_list[METADATA_SEGMENT])
+        print("\n%s" % instr_buf)
         print("\nprogram-list breakdown:")
-        for i in range(len(self.prog_list)):
+        for i in range(len(instr_buf)):
+            instr = instr_buf.get_instr(i)
 
-            if i == 0:
-                print("metadata list: %s" % self.prog_list[i])
-                continue
+            print("\nopcode: %d(%s)" % (instr[0], mnemonic_tbl[instr[0]]))
 
-            for x in range(len(self.prog_list[i])):
+            for x in range(1, len(instr)):
 
-                if x == 0:
-                    print("\nopcode: %d(%s)" % (self.prog_list[i][x], mnemonic_tbl[self.prog_list[i][x]]))
+                # identifiers are only left unresolved if assembly failed.
+                if isinstance(instr[x], str):
+                    print("arg%d: [%s](IDENTIFIER)" % (x, instr[x]))
                     continue
 
-                print("arg%d: %d(%s)" % (x, self.prog_list[i][x][1], signcode_mnemonic_tbl[self.prog_list[i][x][0]]))
+                print("arg%d: %d(%s)" % (x, instr[x][1], signcode_mnemonic_tbl[instr[x][0]]))
 
     def get_creation_date(self):
     # returns integer where bits are representing the current datestamp.
@@ -339,10 +928,13 @@ class Assembler:
 
     def get_flags(self):
     # returns integer holding the flags, may be expanded in future this why it has it's own function.
-        return int(self.keep_symbols)
+        if self.keep_symbols:
+            return KEEP_SYMBOLS_FLAG
+
+        return 0
 
     def init_prog_list(self):
-    # initialises the program-list which will hold the metadata and instruction lists.
+    # initialises the program-list which will hold the metadata list and instruction-buffer.
     # this program-list will be used to build the final bytearray of the program.
 
         # build metadata list then set flags and creation date.
@@ -350,43 +942,117 @@ class Assembler:
 
         # only flags & creation-date are written now, rest of metadata 
         # is written after program assembly has been performed.
-        metadata[FLAGS_NDX]         = self.keep_symbols
+        metadata[FLAGS_NDX]         = self.get_flags()
         metadata[CREATION_DATE_NDX] = self.get_creation_date()
 
-        # return program_list with first item being metadata list.
-        return [metadata]
+        # return program_list with first item being metadata list, second the instruction-buffer.
+        return [metadata, InstructionBuffer()]
+
+    def build_relocs(self):
+    # yields every operand addr that holds an address in order. operands that were identifiers
+    # are only relocs if they resolved to a label or addr macro. both tables are recorded in
+    # addr order so they're merged rather than sorted.
+
+        resolved     = self.ident_relocs.resolve_names(self.symtbl)
+        ident_relocs = (addr for addr, name_ndx in zip(self.ident_relocs.offsets, self.ident_relocs.name_ndxs)
+                        if resolved[name_ndx][0] == ADDR_SIGNCODE)
+
+        return heapq.merge(self.relocs, ident_relocs)
+
+    def build_sections(self):
+    # returns list of (type, chunks, align) of the sections following the code, chunks yields
+    # the section's bytes a piece at a time. in out-of-core mode the debug-line & reloc
+    # sections are read back out of their WordSpools as they're written.
+    # there's no data directives in .frt yet so a DATA section is never made.
+
+        sections = []
 
-    def build_metadata_bytearray(self):
-        # if symbols are kept build it's bytearray.
         if self.keep_symbols:
-            self.symtbl.build_bytearray()
+            sections.append((SECTION_SYMTAB, (self.symtbl.build_bytearray(),), SYMTAB_ALIGN))
+            sections.append((SECTION_DEBUG_LINE, word_chunks(self.line_tbl), DEBUG_LINE_ALIGN))
+            sections.append((SECTION_RELOC, word_chunks(self.build_relocs()), RELOC_ALIGN))
+
+        return sections
+
+    def build_metadata_bytearray(self, write=None):
+        # .FBIN V2 MEMORY-MAP
+        #
+        # 0x00                 HEADER
+        #                      magic(4 bytes, 'FBIN'), version(2), flags(2), start-addr(4),
+        #                      creation-date(2), section-count(2), section-table-offset(4)
+        # 0x14                 SECTION_TABLE
+        #                      one entry per section, type(2), flags(2), offset(4), size(4),
+        #                      vaddr(4), align(4)
+        # 0x1000               CODE_SECTION, vaddr 0x1000
+        # 0x1000 + CODE_SIZE   SYMTAB, DEBUG-LINE & RELOC sections, only when symbols are kept.
+        #
+        # the HEAP section has no bytes in the file, it declares heap_size bytes of zeroed vm ram
+        # starting at the first page after the code.
+        #
+        # the header & section-table are padded out to a full page so the code is page aligned
+        # and can be mapped straight into vm ram, at the same address as it's file offset. only
+        # sections with SECTION_LOAD_FLAG are loaded, the vm writes the start-addr into addr 0.
+        # the symtab, debug-line & reloc sections stay on disk for tools. see FbinReader().
+        #
+        # self.metadata_bytearray is the header page, self.trailer_bytearray the sections after the code.
+        # write is called with each piece of the sections after the code in turn instead of them
+        # being kept in self.trailer_bytearray, out-of-core mode writes them straight to file.
 
         # update the metadata-segment list.
         self.prog_list[METADATA_SEGMENT][START_ADDR_NDX] = self.symtbl.labels[START_LABEL_IDENTIFIER][1]
 
+        code_size = self.prog_list[METADATA_SEGMENT][PROG_SIZE_NDX]
+
+        self.section_tbl = [(SECTION_CODE, SECTION_LOAD_FLAG | SECTION_EXEC_FLAG, CODE_VADDR, code_size, CODE_VADDR, PAGE_SIZE)]
+        self.trailer_bytearray = bytearray()
+
+        if self.heap_size:
+            heap_flags = SECTION_LOAD_FLAG | SECTION_WRITE_FLAG | SECTION_ZERO_FLAG
+            self.section_tbl.append((SECTION_HEAP, heap_flags, 0, self.heap_size, align_up(CODE_VADDR + code_size, PAGE_SIZE), PAGE_SIZE))
+
+        if write is None:
+            write = self.trailer_bytearray.extend
+
+        offset = CODE_VADDR + code_size
+
+        for section_type, chunks, align in self.build_sections():
+            padding = align_up(offset, align) - offset
+            write(bytes(padding))
+            offset += padding
+            size    = 0
+
+            for chunk in chunks:
+                write(chunk)
+                size += len(chunk)
+
+            self.section_tbl.append((section_type, 0, offset, size, 0, align))
+            offset += size
+
+        self.trailer_size = offset - (CODE_VADDR + code_size)
+
+        self.metadata_bytearray = bytearray(CODE_VADDR)
+
         try:
-            # now we can build the metadata-segment bytearray.
-            self.metadata_bytearray.extend(struct.pack('<I', self.prog_list[METADATA_SEGMENT][START_ADDR_NDX]))
-            self.metadata_bytearray.extend(struct.pack('<I', self.prog_list[METADATA_SEGMENT][PROG_SIZE_NDX]))
-            self.metadata_bytearray.extend(struct.pack('<H', self.prog_list[METADATA_SEGMENT][FLAGS_NDX]))
-            self.metadata_bytearray.extend(struct.pack('<H', self.prog_list[METADATA_SEGMENT][CREATION_DATE_NDX]))
+            # now we can build the header & section-table.
+            fbin_header_encoder.pack_into(self.metadata_bytearray, 0, FBIN_MAGIC, FBIN_VERSION,
+                                          self.prog_list[METADATA_SEGMENT][FLAGS_NDX],
+                                          self.prog_list[METADATA_SEGMENT][START_ADDR_NDX],
+                                          self.prog_list[METADATA_SEGMENT][CREATION_DATE_NDX],
+                                          len(self.section_tbl), fbin_header_encoder.size)
+
+            for ndx, section in enumerate(self.section_tbl):
+                fbin_section_encoder.pack_into(self.metadata_bytearray, fbin_header_encoder.size + ndx * fbin_section_encoder.size, *section)
 
         except struct.error:
             print('\nINTERNAL ERROR: Error when packing bytes into metadata bytearray!')
             sys.exit()
 
-        # append on the symtab bytearray if we need to.
-        if self.keep_symbols:
-            self.metadata_bytearray.extend(self.symtbl.bytearray)
-
     def build_prog_bytearray(self):
     # takes the completed program-list(self.prog_list) and builds a bytearray from it.
     # this bytearray is exactly what will be written to the output file and executed by vm.
 
         # confirm there's actually program data.
-        # test is < 2 because first item in program-list is metadata list.
-        # so an empty program-list has at least one item in it.
-        if len(self.prog_list) < 2:
+        if not len(self.prog_list[INSTR_SEGMENT]) and not self.prog_instr_count:
             raise Exception("yson: No program data to assemble!")
 
         # all furst programs must have a main label 
@@ -395,74 +1061,43 @@ class Assembler:
 
         # first build then append metadata bytearray to prog-bytearray which is empty bytearray right now.
         self.build_metadata_bytearray()
-        self.prog_bytearray.extend(self.metadata_bytearray)
-
-        # iterate through prog-list, then iterate through the instr-lists within prog-list.
-        # any instr's operands that are a string are label or macro id's. these need to be
-        # replaced with their respective values stored in the symbol-table. 
-        #
-        # label/macros are stored in the instr-lists as the id's not their values because the
-        # actual values sometimes arent accurate until after the metadata bytearray has been
-        # built. see functions calculate_addr_offsets() & build_bytearray() in SymbolTable()
-        # for further information.
-        for instr_ndx in range(len(self.prog_list)):
 
-            if not instr_ndx: continue # skip first item in prog-list, the metadata list.
+        # in streaming mode the instructions are already encoded, all that's
+        # left to do is patch the fixups now that the symtab values are final.
+        if self.streaming:
+            self.prog_bytearray.extend(self.metadata_bytearray)
+            self.fixups.patch(self.code_bytearray, self.symtbl)
+            self.prog_bytearray.extend(self.code_bytearray)
+            self.prog_bytearray.extend(self.trailer_bytearray)
+            return
 
-            for arg_ndx in range(len(self.prog_list[instr_ndx])):
+        # the final size is known up front so prog-bytearray is presized and
+        # the instructions are packed straight into it by pack_prog_list().
+        self.prog_bytearray = bytearray(len(self.metadata_bytearray) + self.prog_list[METADATA_SEGMENT][PROG_SIZE_NDX])
+        self.prog_bytearray[:len(self.metadata_bytearray)] = self.metadata_bytearray
+        self.pack_offset = len(self.metadata_bytearray)
 
-                if not arg_ndx: continue # ignore first item in instr list as its the opcode.
+        self.pack_prog_list()
 
-                # check if instr-arg is a str if so it is a macro or label id.
-                if isinstance(self.prog_list[instr_ndx][arg_ndx], str):
+        # symtab & debug sections go after the program so they aren't loaded into vm's RAM.
+        self.prog_bytearray.extend(self.trailer_bytearray)
 
-                    # replace all macros & labels with their values.
-                    if self.prog_list[instr_ndx][arg_ndx] in self.symtbl.labels:
-                        self.prog_list[instr_ndx][arg_ndx] = self.symtbl.labels[self.prog_list[instr_ndx][arg_ndx]]
-
-                    elif self.prog_list[instr_ndx][arg_ndx] in self.symtbl.macros:
-                        self.prog_list[instr_ndx][arg_ndx] = self.symtbl.macros[self.prog_list[instr_ndx][arg_ndx]]
-
-                    # if an operand is a string but isn't a macro/label id then we have an error.
-                    else:
-                        raise Exception("yson: Invalid instruction operand, string: [%s] does not match any identifiers in the symbol-table" % self.prog_list[instr_ndx][arg_ndx])
-
-            # instr-lists are now fully accurate and ready to be packed and appended onto the prog-bytearray.
-            self.pack_instr_bytes(self.prog_list[instr_ndx])
+    def pack_prog_list(self):
+    # packs the instruction-buffer into the presized prog-bytearray, starting at self.pack_offset.
+    #
+    # any instr's operands that are label or macro id's need to be replaced with their 
+    # respective values stored in the symbol-table first.
+    #
+    # label/macros are stored in the instruction-buffer as the id's not their values because
+    # labels can be used before they're declared.
+        instr_buf = self.prog_list[INSTR_SEGMENT]
+        instr_buf.resolve_names(self.symtbl)
 
-    def pack_instr_bytes(self, instr):
         try:
-            # write the opcode to prog-bytearray.
-            # opcodes are literal int, NOT an int_list.
-
-            if not isinstance(instr[0], int):
-                raise Exception("INTERNAL ERROR: Instruction opcode is not int literal!\ninstr: %s" % instr)
-
-            self.prog_bytearray.extend(struct.pack('<B', instr[0]))
-
-            # are there any operands?
-            if len(instr) > 1:
-
-                # iterate through operands, they are in int_tupe format at this stage.
-                # int_list = (SIGNCODE, VALUE)
-                for operand in instr[1:]: # skip first item in instr because it's the opcode.
-
-                    if isinstance(operand, list):
-
-                        # operand is list so inspect it to see whether its signed or unsigned.
-                        # operand[0] is the sign-code, operand[1] is the integer value.
-                        if operand[0] == UNSIGNED_SIGNCODE or operand[0] == ADDR_SIGNCODE:
-                            self.prog_bytearray.extend(struct.pack('<I', operand[1]))
-
-                        elif operand[0] == SIGNED_SIGNCODE:
-                            self.prog_bytearray.extend(struct.pack('<i', operand[1]))
-
-                    # if this message does run it means an operand wasnt a proper int_list.
-                    else:
-                        raise Exception("INTERNAL ERROR: Instruction operand is not int-list or int-literal!\ninstr: %s" % instr)
+            self.pack_offset = instr_buf.pack_into(self.prog_bytearray, self.pack_offset)
 
         except struct.error as e:
-            s  = '\nINTERNAL ERROR: Error when packing bytes from instr-list into program bytearray!'
+            s  = '\nINTERNAL ERROR: Error when packing bytes from instruction-buffer into program bytearray!'
             s += '\n    more info: %s' % e
             raise Exception(s)
 
@@ -484,23 +1119,183 @@ class Assembler:
             print("yson: An I/O error occurred while attempting to open input-file: [%s] \n    more info: %s" % (self.input_path, e))
 
     def append_instr(self):
-        # append completed instr-list onto program-list and increment instr counter.
-        self.prog_list.append(copy.deepcopy(self.curr_instr))
+        # confirm the instr has the right number of operands for its encoder.
+        if len(self.curr_instr) - 1 != encoder_argc_tbl[self.curr_instr[0]]:
+            s  = "yson: Instruction [%s] takes %d operand(s), " % (mnemonic_tbl[self.curr_instr[0]], encoder_argc_tbl[self.curr_instr[0]])
+            s += "%d given, on line %d" % (len(self.curr_instr) - 1, self.linenum)
+            raise Exception(s)
+
+        if self.fuse:
+            self.fuse_window.append((self.curr_instr, self.linenum))
+            self.fuse_instrs()
+        else:
+            self.emit_instr(self.curr_instr, self.linenum)
+
+    def emit_instr(self, instr, linenum):
+        # append completed instr-list onto instruction-buffer and increment instr counter.
+        # in streaming mode the instr-list is encoded straight away instead.
+        if self.streaming:
+            self.encode_instr(instr)
+        else:
+            self.prog_list[INSTR_SEGMENT].append(instr)
+
         self.prog_instr_count += 1
 
+        if self.keep_symbols:
+            self.record_debug_info(instr, linenum)
+
         # instr size is (instr-list len - 1) * 4 + 1
         # because the operands are always 4 bytes each
         # and the opcode itself is 1 byte. this is used
         # to keep track of total program size and to calculate
         # he next address which is used by label declarations.
-        instr_len = ((len(self.curr_instr) - 1) * WORDSIZE) + OPCODE_SIZE
+        instr_len = ((len(instr) - 1) * WORDSIZE) + OPCODE_SIZE
         self.prog_list[METADATA_SEGMENT][PROG_SIZE_NDX] += instr_len
-        self.next_addr += opsize_tbl[self.curr_instr[0]]
+        self.next_addr += opsize_tbl[instr[0]]
+
+    def fuse_instrs(self):
+    # peephole pass, called each time an instr is appended onto self.fuse_window. instrs are
+    # held in the window while they could still be the start of a sequence in fused_seq_tbl,
+    # once they can't the longest sequence the window starts with is emitted fused.
+    #
+    # a label can't point into the middle of a fused instr so the window is flushed before
+    # each label declaration, see label_dec_check().
+        while self.fuse_window and tuple(instr[0] for instr, linenum in self.fuse_window) not in fuse_prefix_set:
+            self.emit_fused_prefix()
+
+    def emit_fused_prefix(self):
+    # emits the longest fused sequence the window starts with as one instr, it's operands
+    # are each component instr's operands in turn. emits the first instr as is if none match.
+        window  = self.fuse_window
+        opcodes = tuple(instr[0] for instr, linenum in window)
+
+        for seq_len in range(len(window), 1, -1):
+            fused_opcode = fuse_seq_map.get(opcodes[:seq_len])
+
+            if fused_opcode is not None:
+                fused_instr = [fused_opcode]
+
+                for instr, linenum in window[:seq_len]:
+                    fused_instr.extend(instr[1:])
+
+                # debug-line entry points at the first instr's line.
+                self.emit_instr(fused_instr, window[0][1])
+                del window[:seq_len]
+                return
+
+        self.emit_instr(*window.pop(0))
+
+    def flush_fuse_window(self):
+        while self.fuse_window:
+            self.emit_fused_prefix()
+
+    def record_debug_info(self, instr, linenum):
+    # records instr's line-number and any of it's operands holding
+    # addresses for the debug-line & reloc sections.
+
+        self.line_tbl.append(self.next_addr)
+        self.line_tbl.append(linenum)
+
+        opr_addr = self.next_addr + OPCODE_SIZE
+
+        for operand in instr[1:]:
+
+            # identifiers aren't known to be addresses until they're resolved.
+            if isinstance(operand, str):
+                self.ident_relocs.add(opr_addr, operand)
+
+            elif operand[0] == ADDR_SIGNCODE:
+                self.relocs.append(opr_addr)
+
+            opr_addr += WORDSIZE
+
+    def encode_instr(self, instr):
+    # streaming mode version of pack_prog_list(), encodes instr onto the end
+    # of self.code_bytearray. identifier operands are written as 4 byte placeholders
+    # and recorded in the fixup-table unless their value is already final.
+    #
+    # labels & macros are final as soon as they're declared, so only labels used before
+    # their declaration need a fixup.
+
+        code  = self.code_bytearray
+        words = []
+
+        # offset of first operand within code, used for fixup entries.
+        opr_offset = self.code_flushed + len(code) + OPCODE_SIZE
+
+        try:
+            for operand in instr[1:]:
+
+                if isinstance(operand, str):
+
+                    int_list = self.symtbl.labels.get(operand)
+
+                    if int_list is None:
+                        int_list = self.symtbl.macros.get(operand)
+
+                    # value not final yet, write placeholder and make fixup entry.
+                    # offsets are relative to the first code byte so we add on whatever's been flushed.
+                    if int_list is None:
+                        self.fixups.add(opr_offset + (len(words) * WORDSIZE), operand)
+                        words.append(0)
+                        continue
+
+                    operand = int_list
+
+                words.append(operand_word(operand))
+
+            code += encoder_tbl[instr[0]].pack(instr[0], *words)
+
+        except struct.error as e:
+            s  = '\nINTERNAL ERROR: Error when encoding instr-list into code bytearray!'
+            s += '\n    more info: %s' % e
+            raise Exception(s)
+
+        if self.out_of_core and len(code) >= OOC_FLUSH_SIZE:
+            self.flush_code()
+
+    def open_code_file(self):
+    # opens the file out-of-core mode streams the encoded code into. the header page is a
+    # fixed size and the other sections go after the code, so the code is written straight
+    # into the output file after a reserved page, the header is written into it last.
+
+        self.code_file_path = self.output_path
+        self.code_file_base = CODE_VADDR
+
+        try:
+            self.code_file = open(self.code_file_path, 'w+b')
+            self.code_file.write(bytes(self.code_file_base))
+
+        except OSError as e:
+            raise Exception("yson: An I/O error occurred while attempting to open file: [%s] \n    more info: %s" % (self.code_file_path, e))
+
+    def flush_code(self):
+        self.code_file.write(self.code_bytearray)
+        self.code_flushed += len(self.code_bytearray)
+        self.code_bytearray.clear()
+
+    def patch_code_file(self):
+    # out-of-core version of FixupTable.patch(), instead of writing into a bytearray
+    # we seek to each fixup's offset within code_file and write the value there.
+
+        resolved = self.fixups.resolve_names(self.symtbl)
+        words    = [struct.pack('<I', operand_word(int_list)) for int_list in resolved]
+
+        try:
+            for offset, name_ndx in zip(self.fixups.offsets, self.fixups.name_ndxs):
+                self.code_file.seek(self.code_file_base + offset)
+                self.code_file.write(words[name_ndx])
+
+        except struct.error as e:
+            s  = '\nINTERNAL ERROR: Error when patching fixup into code file!'
+            s += '\n    more info: %s' % e
+            raise Exception(s)
 
     def advance_tok(self):
         try:
             self.tokndx += 1
             self.tok = self.line_tokens[self.tokndx]
+            self.tok_kind, self.tok_info = classify_token(self.tok)
 
         # this should NEVER run but just in case..
         except IndexError:
@@ -508,19 +1303,14 @@ class Assembler:
             s += "self.tokndx = %d, len(self.line_tokens)\" = %d" % (self.tokndx, len(self.line_tokens))
             raise Exception(s)
 
-    def check_identifier(self,
-                         ignore_last_char  = False,
-                         ignore_first_char = False ):
-
-        test_str = self.tok
+    def check_identifier(self):
+    # raises exception if self.tok or, if it's a label declaration, it's label identifier is invalid.
+    # the identifier was already tested when self.tok was classified, see classify_token().
 
-        if ignore_last_char:
-            test_str = test_str[:-1]
+        test_result = self.tok_info
 
-        if ignore_first_char:
-            test_str = test_str[-1:]
-
-        test_result = isIdentifier(test_str)
+        if test_result == -5:
+            raise Exception('yson: Invalid identifier [%s], is an instruction mnemonic, on line: %d' % (self.tok, self.linenum))
 
         if test_result == -4:
             raise Exception('yson: Invalid identifier [%s], invalid char in string, on line: %d' % (self.tok, self.linenum))
@@ -534,8 +1324,8 @@ class Assembler:
         if test_result == -1:
             raise Exception('yson: Invalid identifier [%s], too short, min length: %d, on line: %d' % (self.tok, MIN_ID_LEN, self.linenum))
 
-        if test_str in optbl:
-            raise Exception('yson: Invalid identifier [%s], is an instruction mnemonic, on line: %d' % (self.tok, self.linenum))
+        if self.tok_kind not in (TOK_IDENTIFIER, TOK_LABEL_DEF):
+            raise Exception('yson: Invalid identifier [%s], on line: %d' % (self.tok, self.linenum))
 
     def macro_dec_check(self):
         # macros are stored in symbol table in a dict where the identifier string
@@ -543,7 +1333,7 @@ class Assembler:
         # this tells the sign information and the value itself.
 
         # is token a macro declaration?
-        if self.tok == MACRO_KEYWORD:
+        if self.tok_kind == TOK_MACRO_KEYWORD:
 
             # advance to next token which is the macro identifier.
             self.advance_tok()
@@ -566,6 +1356,9 @@ class Assembler:
             if int_list is None:
                 raise Exception('yson: Invalid macro value: [%s], not integer, on line: %d' % (self.tok, self.linenum))
 
+            if not int_list_in_range(int_list):
+                raise Exception('yson: Macro value: [%s] out of range, on line: %d' % (self.tok, self.linenum))
+
             # everything's good, create macro entry into symbol-table.
             self.symtbl.new_macro(macro_id, int_list)
             return True
@@ -573,8 +1366,8 @@ class Assembler:
         return False
 
     def label_dec_check(self):
-        if self.tok[-1] == LABEL_DEF_SUFFIX:
-            self.check_identifier(ignore_last_char=True)
+        if self.tok_kind == TOK_LABEL_DEF:
+            self.check_identifier()
 
             label_id = copy.copy(self.tok[:-1])
 
@@ -582,7 +1375,9 @@ class Assembler:
             if label_id in self.symtbl.labels:
                 raise Exception('yson: Invalid label identifier: [%s], already in-use as a label identifier, on line: %d' % (self.tok, self.linenum))
 
-            # all is well, create new label entry in symbol-table.
+            # all is well, create new label entry in symbol-table. any instrs held for
+            # fusing go before the label.
+            self.flush_fuse_window()
             self.symtbl.new_label(label_id, [ADDR_SIGNCODE, self.next_addr])
             return True
 
@@ -606,6 +1401,9 @@ class Assembler:
 
         self.open_input_file()
 
+        if self.out_of_core:
+            self.open_code_file()
+
         for self.line_text in self.input_file:
 
             self.in_comment = False
@@ -622,6 +1420,9 @@ class Assembler:
                 if self.curr_instr:
                     self.append_instr()
 
+        # instrs still held for fusing end the program.
+        self.flush_fuse_window()
+
         # token processing complete, close file.
         self.input_file.close()
 
@@ -629,47 +1430,14 @@ class Assembler:
     # NOTE: integers with no prefix default to unsigned.
     # attempts to build an int-list (SIGNCODE, VALUE) from self.tok
     # returns None if it fails and the list if it succeeds.
+    #
+    # a new list is built each time because classify_token()'s results are
+    # shared between every occurrence of the token.
 
-        # test if self.tok is a decimal integer.
-        int_test = isDecInteger(self.tok)
-
-        # if int_test is 0 then self.tok isn't a decimal integer.
-        if int_test == 0:
-
-            # self.tok is not a decimal integer so test if it's a hex.
-            int_test = isHexInteger(self.tok)
-
-            # self.tok is neither a decimal or hex integer so return None.
-            if int_test == 0:
-                return None
-
-            # self.tok is a hex integer so build it's int_list.
-            elif int_test == SIGNED_SIGNCODE:
-                return [SIGNED_SIGNCODE, int(self.tok[-1:], 16)]
-
-            elif int_test == UNSIGNED_SIGNCODE:
-                return [UNSIGNED_SIGNCODE, int(self.tok[-1:], 16)]
-
-            elif int_test == ADDR_SIGNCODE:
-                return [ADDR_SIGNCODE, int(self.tok[-1:], 16)]
-
-            # no sign on integer defaults to unsigned value.
-            elif int_test == NOSIGN_SIGNCODE:
-                return [UNSIGNED_SIGNCODE, int(self.tok, 16)]
-
-        # self.tok was a decimal integer, so build it's int_list.
-        elif int_test == SIGNED_SIGNCODE:
-            return [SIGNED_SIGNCODE, int(self.tok[-1:])]
-
-        elif int_test == UNSIGNED_SIGNCODE:
-            return [UNSIGNED_SIGNCODE, int(self.tok[-1:])]
-
-        elif int_test == ADDR_SIGNCODE:
-            return [ADDR_SIGNCODE, int(self.tok[-1:])]
+        if self.tok_kind != TOK_INT:
+            return None
 
-        # no sign on integer defaults to unsigned value.
-        elif int_test == NOSIGN_SIGNCODE:
-            return [UNSIGNED_SIGNCODE, int(self.tok)]
+        return [self.tok_info[0], self.tok_info[1]]
 
     def assemble_line(self):
         # flag used to tell whether or not opcode has been found on this line, if so 
@@ -690,7 +1458,7 @@ class Assembler:
             self.advance_tok()
 
             # deal with comments, if '#' is encountered ignore remainder of line.
-            if self.tok == '#' or self.tok[0] == '#':
+            if self.tok_kind == TOK_COMMENT:
                 return
 
             # deal with label & macro declarations.
@@ -702,7 +1470,7 @@ class Assembler:
             elif self.is_valid_token():
 
                 # is token an instruction mnemonic?
-                if self.tok in optbl:
+                if self.tok_kind == TOK_MNEMONIC:
 
                     # confirm that it is the first mnemonic of the line, if not we have
                     # an error. because cannot have two mnemonic on the same line.
@@ -712,7 +1480,7 @@ class Assembler:
                     # first mnemonic of this line has been found, use optbl to look up it's opcode
                     # then append it to self.curr_instr, set mnemonic_found flag to true so that
                     # if any other mnemonics are on this line they will be caught as error.
-                    self.curr_instr.append(optbl[self.tok])
+                    self.curr_instr.append(self.tok_info)
                     mnemonic_found = True
                     continue
 
@@ -721,6 +1489,9 @@ class Assembler:
 
                 if int_list is not None:
 
+                    if not int_list_in_range(int_list):
+                        raise Exception("yson: Integer value [%s] out of range, on line %d" % (self.tok, self.linenum))
+
                     # self.tok is indeed an integer, check that we have found
                     # an instr-mnemonic before appending the int_list to self.curr_instr.
                     if mnemonic_found:
@@ -735,7 +1506,7 @@ class Assembler:
                 
                 # check for macro declaration which is an error because they cannot be within instructions
                 # and must be up at the top of the file before the first instruction or label.
-                elif self.tok == MACRO_KEYWORD:
+                elif self.tok_kind == TOK_MACRO_KEYWORD:
                     raise Exception("yson: Illegal macro declaration: [%s], must be at top of file before instructions, on line %d" % (self.tok, self.linenum))
                 
                 # is token a label or macro identifier? possibly one that isn't declared yet?
@@ -756,12 +1527,12 @@ class Assembler:
     def is_valid_token(self):
     # tests whether self.tok is a valid token.
 
-        # is token a valid integer?
-        if isDecInteger(self.tok) or isHexInteger(self.tok):
+        # is token a valid integer or instruction mnemonic?
+        if self.tok_kind == TOK_INT or self.tok_kind == TOK_MNEMONIC:
             return True
 
-        # is token a instruction mnemonic?
-        if self.tok in optbl:
+        # 'macro' is only valid in a macro declaration, see assemble_line().
+        if self.tok_kind == TOK_MACRO_KEYWORD:
             return True
 
         # check if tok is valid identifier.
@@ -782,6 +1553,8 @@ class Assembler:
 
                 self.output_file.write(self.prog_bytearray)
 
+            self.bytes_written = len(self.prog_bytearray)
+
         except IOError:
             print("yson: I/O error occurred! when writing to: [%s]" % self.output_path)
         except PermissionError:
@@ -791,6 +1564,41 @@ class Assembler:
         except OSError as e:
             print("yson: An I/O error occurred while attempting to write to file: [%s] \n    more info: %s" % (self.output_path, e))
 
+    def write_prog_out_of_core(self):
+    # out-of-core version of write_prog(). by the time this is called all the code has been
+    # encoded by process_input() so at most OOC_FLUSH_SIZE bytes of it are still in memory.
+
+        if not self.prog_instr_count:
+            raise Exception("yson: No program data to assemble!")
+
+        self.confirm_main_label_exists()
+
+        try:
+            self.flush_code()
+
+            # now the symtab is final we can backpatch the code.
+            self.patch_code_file()
+
+            # code is already in output file, the other sections are streamed in after it as the
+            # metadata is built, then the reserved header page is filled in.
+            self.code_file.seek(self.code_file_base + self.code_flushed)
+            self.build_metadata_bytearray(self.code_file.write)
+            self.code_file.seek(0)
+            self.code_file.write(self.metadata_bytearray)
+            self.code_file.close()
+
+        except OSError as e:
+            raise Exception("yson: An I/O error occurred while attempting to write to file: [%s] \n    more info: %s" % (self.output_path, e))
+
+        finally:
+            for spool in (self.line_tbl, self.relocs):
+                spool.close()
+
+            self.ident_relocs.close()
+            self.fixups.close()
+
+        self.bytes_written = len(self.metadata_bytearray) + self.code_flushed + self.trailer_size
+
     def build_success_message(self):
             ks = 'yes\n' if self.keep_symbols else 'no\n'
             s  = '\nAssembly Successful!\n----------------------\n'
@@ -799,7 +1607,9 @@ class Assembler:
             s += 'output-path: %s\n' % self.output_path
             s += 'program-bytes-written: %d\n' % self.prog_list[METADATA_SEGMENT][PROG_SIZE_NDX]
             s += 'metadata-bytes-written: %d\n' % len(self.metadata_bytearray)
-            s += 'total-bytes-written-to-file: %d\n' % len(self.prog_bytearray)
+            s += 'symtab-bytes-written: %d\n' % len(self.symtbl.bytearray)
+            s += 'sections-written: %d\n' % len(self.section_tbl)
+            s += 'total-bytes-written-to-file: %d\n' % self.bytes_written
             s += 'instructions-written: %d\n' % self.prog_instr_count
 
             return s
@@ -808,145 +1618,212 @@ class Assembler:
                  doSilent = False):
 
         self.process_input()
-        self.write_prog()
+
+        if self.out_of_core:
+            self.write_prog_out_of_core()
+        else:
+            self.write_prog()
 
         # assembly successful! print to the console if we need to.
         if not doSilent:
             print(self.build_success_message())
 
-def disfbin(fbin_file_path):
-# crude disassembler function for debugging assembler.
+class FbinReader:
+# reads a .fbin file of either version straight out of a buffer, nothing is copied. buf is
+# anything supporting the buffer protocol, such as the bytes of a .fbin file or an mmap of one.
+#
+# v1 -> 12 byte metadata-segment(start-addr, program-size, flags, creation-date) then the
+#       program. a symtab follows the program if TRAILING_SYMTAB_FLAG is set otherwise
+#       it sits between the metadata & the program. addresses are file offsets.
+# v2 -> header, section-table & page aligned sections. see Assembler.build_metadata_bytearray().
+#
+# code is a memoryview of the program's bytes and code_addr the address of it's first byte.
+# symtab is a SymbolTableReader() or None if symbols weren't kept.
+
+    def __init__(self, buf):
+        self.view          = memoryview(buf)
+        self.sections      = [] # (type, flags, offset, size, vaddr, align), v1 files have none.
+        self.symtab        = None
+
+        if len(self.view) < METADATA_SEGMENT_SIZE:
+            raise Exception("yson: File is too small to be a .fbin!")
+
+        if bytes(self.view[:len(FBIN_MAGIC)]) == FBIN_MAGIC:
+            self.read_v2()
+        else:
+            self.read_v1()
+
+    def read_v1(self):
+        self.version = 1
+        self.start_addr, self.prog_size, self.flags, self.creation_date = struct.unpack_from('<IIHH', self.view, 0)
+
+        symbols_kept = self.flags & KEEP_SYMBOLS_FLAG
+        self.code_addr = METADATA_SEGMENT_SIZE
+
+        if symbols_kept and not self.flags & TRAILING_SYMTAB_FLAG:
+            self.symtab     = SymbolTableReader(self.view, METADATA_SEGMENT_SIZE)
+            self.code_addr += self.symtab.size
+
+        self.code = self.view[self.code_addr : self.code_addr + self.prog_size]
+
+        if symbols_kept and self.flags & TRAILING_SYMTAB_FLAG:
+            self.symtab = SymbolTableReader(self.view, self.code_addr + self.prog_size)
+
+        if len(self.code) != self.prog_size:
+            raise Exception("yson: .fbin program is truncated!")
+
+    def read_v2(self):
+        try:
+            (magic, self.version, self.flags, self.start_addr, self.creation_date,
+             section_count, section_tbl_offset) = fbin_header_encoder.unpack_from(self.view, 0)
+
+            if self.version != FBIN_VERSION:
+                raise Exception("yson: Unsupported .fbin version: %d, expected: %d" % (self.version, FBIN_VERSION))
+
+            for ndx in range(section_count):
+                section = fbin_section_encoder.unpack_from(self.view, section_tbl_offset + ndx * fbin_section_encoder.size)
+
+                if not section[1] & SECTION_ZERO_FLAG and section[2] + section[3] > len(self.view):
+                    raise Exception("yson: .fbin %s section is truncated!" % section_type_mnemonic_tbl.get(section[0], 'UNKNOWN'))
+
+                self.sections.append(section)
+
+        except struct.error:
+            raise Exception("yson: .fbin header is truncated!")
+
+        code_section = self.find_section(SECTION_CODE)
+
+        if code_section is None:
+            raise Exception("yson: .fbin has no code section!")
+
+        self.code      = self.section_bytes(code_section)
+        self.code_addr = code_section[4]
+        self.prog_size = code_section[3]
+
+        symtab_section = self.find_section(SECTION_SYMTAB)
+
+        if symtab_section is not None:
+            self.symtab = SymbolTableReader(self.section_bytes(symtab_section))
+
+    def find_section(self, section_type):
+    # returns first section of section_type or None if there isn't one.
+        for section in self.sections:
+            if section[0] == section_type:
+                return section
+
+        return None
+
+    def section_bytes(self, section):
+    # returns memoryview of a section's bytes in the file, zero-filled sections have none.
+        if section[1] & SECTION_ZERO_FLAG:
+            return self.view[:0]
+
+        return self.view[section[2] : section[2] + section[3]]
+
+    def ram_size(self):
+    # returns the size of vm ram the program needs, the end of the highest loaded section.
+    # v1 files have no sections so it's what the vm loads from the file plus DEFAULT_HEAP_SIZE.
+        if self.version == 1:
+            return self.code_addr + self.prog_size + DEFAULT_HEAP_SIZE
+
+        return max([section[4] + section[3] for section in self.sections if section[1] & SECTION_LOAD_FLAG] + [PAGE_SIZE])
+
+    def lines(self):
+    # yields (instr-addr, line-number) from the debug-line section.
+        section = self.find_section(SECTION_DEBUG_LINE)
+
+        if section is not None:
+            yield from debug_line_encoder.iter_unpack(self.section_bytes(section))
+
+    def relocs(self):
+    # yields the addr of every operand holding an address from the reloc section.
+        section = self.find_section(SECTION_RELOC)
+
+        if section is not None:
+            for (addr,) in reloc_encoder.iter_unpack(self.section_bytes(section)):
+                yield addr
+
+def decode_instrs(code, code_addr):
+# yields an instr list per instruction in code: [(addr, opcode), (addr, operand-value), ...].
+# operand counts come from encoder_argc_tbl, unknown opcodes are taken to have none. an
+# instruction running off the end of code is yielded with the operands that are there.
 
-    metadata = []
-    program = []
-    symbols_kept = None
     byte_count = 0
-    raw_lable_tbl = bytearray()
-    raw_macro_tbl = bytearray()
-    symtab_size = None
-
-    file = open(fbin_file_path, 'rb')
-
-    # read metadata bytes:
-    # read starting addr.
-    bytes_read = file.read(WORDSIZE)
-    metadata.append((byte_count, struct.unpack('<I', bytes_read)[0]))
-    byte_count += WORDSIZE
-
-    # read program-size.
-    bytes_read = file.read(WORDSIZE)
-    metadata.append((byte_count, struct.unpack('<I', bytes_read)[0]))
-    byte_count += WORDSIZE
-
-    # read FLAGS.
-    bytes_read = file.read(2)
-    metadata.append((byte_count, struct.unpack('<H', bytes_read)[0]))
-    byte_count += 2
-    symbols_kept = metadata[2][1]
-
-    # read creation datestamp.
-    bytes_read = file.read(2)
-    #print("read %d bytes(date)" % len(bytes_read))
-    metadata.append((byte_count, struct.unpack('<H', bytes_read)[0]))
-    byte_count += 2
-
-    # check if we have a symbol table.
-    if symbols_kept:
-
-        #read total symtab size.
-        bytes_read = file.read(WORDSIZE)
-        symtab_size = struct.unpack('<I', bytes_read)[0]
-        metadata.append((byte_count, symtab_size))
-        byte_count += WORDSIZE
-
-        # read label tbl size.
-        bytes_read = file.read(WORDSIZE)
-        lable_tbl_size = struct.unpack('<I', bytes_read)[0]
-        metadata.append((byte_count, lable_tbl_size))
-        byte_count += WORDSIZE
-
-        # read macro tbl size.
-        bytes_read = file.read(WORDSIZE)
-        macro_tbl_size = struct.unpack('<I', bytes_read)[0]
-        metadata.append((byte_count, macro_tbl_size))
-        byte_count += WORDSIZE
-
-        # read the symbol table and deserialise it.
-        raw_lable_tbl.extend(file.read(lable_tbl_size))
-        byte_count += lable_tbl_size
-
-        raw_macro_tbl.extend(file.read(macro_tbl_size))
-        byte_count += macro_tbl_size
-
-        label_tbl = pickle.loads(raw_lable_tbl)
-        macro_tbl = pickle.loads(raw_macro_tbl)
-
-    # bytes from this point onwards are the actual program.
-    while True:
-        bytes_read = file.read(OPCODE_SIZE)
-
-        # check if EOF has been reached.
-        if not bytes_read: break
+
+    while byte_count < len(code):
 
         # unpack opcode & make instr list.
-        opcode = struct.unpack('<B', bytes_read)[0]
-        instr = [(byte_count, opcode)]
+        opcode = code[byte_count]
+        instr = [(code_addr + byte_count, opcode)]
         byte_count += 1
 
         # iterate through the intr's operands by looking
-        # up its operand count in the opsize_tbl.
-        for i in range(opargc_tbl[opcode]):
-            bytes_read = file.read(WORDSIZE)
+        # up its operand count in the encoder_argc_tbl.
+        for i in range(encoder_argc_tbl.get(opcode, 0)):
 
-            if len(bytes_read) != WORDSIZE:
+            if byte_count + WORDSIZE > len(code):
                 break
 
-            operand_value = struct.unpack('<I', bytes_read)[0]
+            operand_value = struct.unpack_from('<I', code, byte_count)[0]
 
-            instr.append((byte_count, operand_value))
+            instr.append((code_addr + byte_count, operand_value))
             byte_count += WORDSIZE
 
-        program.append(copy.deepcopy(instr))
+        yield instr
 
-    file.close()
+def disfbin(fbin_file_path):
+# crude disassembler function for debugging assembler.
+
+    with open(fbin_file_path, 'rb') as file:
+        reader = FbinReader(file.read())
+
+    # bytes of the code are the actual program.
+    program = list(decode_instrs(reader.code, reader.code_addr))
+
+    lines = dict(reader.lines())
 
     # print out everything.
 
-    if symbols_kept:
+    if reader.symtab is not None:
+        symtab = reader.symtab
         print("----------------------------------------------------", end="")
+
+        print("\nSYMTAB: version: %d, size: %d, labels: %d, macros: %d" % (symtab.version, symtab.size,
+                                                                          symtab.label_count, symtab.macro_count))
         
-        if label_tbl:
+        if symtab.label_count:
             print("\nLABEL TABLE:")
-            for i in label_tbl.keys():
-                print("id: [%s] = %d" % (i, label_tbl[i][1]) )
+            for label_id, int_list in symtab.labels():
+                print("id: [%s] = %d" % (label_id, int_list[1]) )
 
-        if macro_tbl:
+        if symtab.macro_count:
             print("\nMACRO TABLE:")
-            for i in macro_tbl.keys():
-                print("id: [%s] = %d" % (i, macro_tbl[i][1]))
+            for macro_id, int_list in symtab.macros():
+                print("id: [%s] = %d" % (macro_id, int_list[1]))
+
+    y, m, d = decode_datestamp(reader.creation_date)
 
     print("\n\nMETADATA:\n")
-    for i in metadata:
-        if i[0] == 12:
-            print("addr: %d :: value: %d (total-symtab-size)" % (i[0], i[1]))
-        elif i[0] == 16:
-            print("addr: %d :: value: %d (total-labeltab-size)" % (i[0], i[1]))
-        elif i[0] == 20:
-            print("addr: %d :: value: %d (total-macrotab-size)" % (i[0], i[1]))
-        elif i[0] == 0:
-            print("addr: %d :: value: %d (start-addr)" % (i[0], i[1]))
-        elif i[0] == 4:
-            print("addr: %d :: value: %d (total-program-size)" % (i[0], i[1]))
-        elif i[0] == 8:
-            print("addr: %d :: value: %d (keep-symbols-flag)" % (i[0], i[1]))
-        elif i[0] == 10:
-            y, m, d = decode_datestamp(metadata[3][1])
-            print("addr: %d :: value: %d (creation-date) %d / %d / %d " % (i[0], i[1], d, m, y))
+    print("version: %d" % reader.version)
+    print("start-addr: %d" % reader.start_addr)
+    print("total-program-size: %d" % reader.prog_size)
+    print("flags: %d" % reader.flags)
+    print("creation-date: %d (%d / %d / %d)" % (reader.creation_date, d, m, y))
+
+    if reader.sections:
+        print("\n\nSECTIONS:\n")
+
+        for section_type, flags, offset, size, vaddr, align in reader.sections:
+            print("%-10s offset: %d :: size: %d :: vaddr: %d :: align: %d :: flags: %d" % (section_type_mnemonic_tbl.get(section_type, 'UNKNOWN'),
+                                                                                        offset, size, vaddr, align, flags))
 
     print("\n\nPROGRAM: ")
 
     for instr in program:
-            print("\naddr: %d :: op: %d (%s) " % (instr[0][0], instr[0][1], mnemonic_tbl[instr[0][1]]))
+            if instr[0][0] in lines:
+                print("\nline: %d" % lines[instr[0][0]], end="")
+
+            print("\naddr: %d :: op: %d (%s) " % (instr[0][0], instr[0][1], mnemonic_tbl.get(instr[0][1], 'UNKNOWN')))
 
             for operand in instr[1:]:
                 print("addr: %d :: value: %d" % (operand[0], operand[1]))
@@ -968,15 +1845,32 @@ def decode_datestamp(bitstring):
 
     return year, month, day
 
+def run_batch_command():
+    # yson run-batch is runbatch.py in yson_dev, it needs interpreter.py alongside it.
+    try:
+        import runbatch
+    except ImportError:
+        print("\nyson: run-batch needs runbatch.py & interpreter.py from yson_dev, run it from there.")
+        sys.exit()
+
+    runbatch.main(sys.argv[2:])
+
+# commands taking the place of the input path, eg python yson.py run-batch manifest results.csv
+command_map = {"run-batch" : run_batch_command}
+
 def main():
     # yson usage:
     # navigate terminal to yson directory, type python yson.py input_path output_path -options.
+    # or python yson.py command args, see command_map.
     # 
     # options:
     # -sdb : show-disassembled-binary, prints out the produced binary in a disassembled state.
     # -sfb : show-final-binary, prints out the raw bytes in hex format of the final binary.
     # -ns  : no-symbols-in-binary, excludes all symbols from the final binary.
     # -sds : show-assembler-datastructures, prints out data-structures used by assembler after assembly.
+    # -st  : stream-assembly, encodes instructions as each line is read, see Assembler() streaming flag.
+    # -ooc : out-of-core-assembly, streams encoded instructions straight to file, see Assembler() out_of_core flag.
+    # -fuse: fuse-instructions, emits superinstructions for sequences in fused_seq_tbl, see Assembler() fuse flag.
     #
     # inputi-path argument is a argument. if no output-path is supplied yson's default output path
     # will be used instead, see DEFAULT_OUTPUT_PATH varible top of this file. 
@@ -989,6 +1883,9 @@ def main():
     show_dis_bin = False
     show_ds      = False
     do_silent    = False
+    stream_asm   = False
+    ooc_asm      = False
+    fuse_asm     = False
 
     def do_sdb():
         nonlocal show_dis_bin
@@ -1025,16 +1922,44 @@ def main():
             sys.exit()
         do_silent = True
 
+    def do_st():
+        nonlocal stream_asm
+        if stream_asm:
+            print("\nyson: '-st' option given twice.")
+            sys.exit()
+        stream_asm = True
+
+    def do_ooc():
+        nonlocal ooc_asm
+        if ooc_asm:
+            print("\nyson: '-ooc' option given twice.")
+            sys.exit()
+        ooc_asm = True
+
+    def do_fuse():
+        nonlocal fuse_asm
+        if fuse_asm:
+            print("\nyson: '-fuse' option given twice.")
+            sys.exit()
+        fuse_asm = True
+
     option_map = {"-sdb" : do_sdb,
                   "-sfb" : do_sfb,
                   "-ns"  : do_ns,
                   "-sds" : do_sds,
-                  "-ds"  : do_ds}
+                  "-ds"  : do_ds,
+                  "-st"  : do_st,
+                  "-ooc" : do_ooc,
+                  "-fuse": do_fuse}
 
     if len(sys.argv) == 1:
         print("\nyson: no input file.")
         sys.exit()
 
+    if sys.argv[1] in command_map:
+        command_map[sys.argv[1]]()
+        return
+
     if len(sys.argv) == 2:
         if not os.path.exists(sys.argv[1]):
             print("\nyson: input file path invalid.")
@@ -1188,7 +2113,7 @@ def main():
         sys.exit()
 
     try:
-        asm = Assembler(input_path, output_path, keep_symbols)
+        asm = Assembler(input_path, output_path, keep_symbols, streaming=stream_asm, out_of_core=ooc_asm, fuse=fuse_asm)
         asm.assemble(doSilent=do_silent)
     except Exception as e:
         print('\n%s\n' % e)
@@ -0,0 +1,712 @@
+import time
+import sys
+
+from interpreter import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# lane-batched execution of one .fbin over many inputs, run from the yson_dev directory:
+#     python batch.py prog.fbin [lane_count]
+#
+# BatchInterpreter runs the same program once per lane with every lane's state held
+# in numpy arrays shaped (lanes, words), ram as uint32 words, the work-stack as uint32
+# words & the return-stack as code ndxs. each op executes as one vectorised operation
+# over the lanes currently sharing it's pc, words wrap at 32 bits like vm.c & signed
+# ops view the same words as int32. semantics are Interpreter's, see interpreter.py.
+#
+# lanes diverge when a je/jn/jl/jg/jls/jgs or it's immediate form, ret, lcont or lbrk sends them to different
+# targets. divergence is handled with a stack of (pc, reconverge-pc, lane-ndxs) entries
+# like SIMT hardware: the entry on top runs, a divergent op replaces it's pc with the
+# immediate post-dominator of it's basic block & pushes one entry per target, an entry
+# whose pc reaches it's reconverge-pc is popped which merges it's lanes back into the
+# entry below. every lane keeps it's own sp, return-stack & loop registers so lanes
+# merging with different histories stay correct, reconverging only affects speed.
+#
+# numpy is optional for the rest of yson_dev, only this module needs it.
+
+BATCH_STACK_WORDS = 0x100 # work-stack depth of each lane, vm.h's STACK_SIZE in every lane would be far too big.
+BATCH_RSTK_DEPTH  = 0x40  # return-stack depth of each lane.
+
+EXIT_BLOCK = -1 # virtual block every ret, die & error op flows to when finding post-dominators.
+
+# dict mapping opcodes to the ndxs of their operands that are ram addrs.
+ram_addr_operand_tbl = {
+    optbl['nspct']  : (0,),
+    optbl['pshfr']  : (0,),
+    optbl['poptr']  : (0,),
+    optbl['movtr']  : (0,),
+    optbl['stktr']  : (1,),
+    optbl['cpyr']   : (0, 1),
+    optbl['setr']   : (0,),
+    optbl['pshfrr'] : (0,),
+    optbl['incr']   : (0,),
+    optbl['decr']   : (0,),
+    optbl['addir']  : (0,),
+    optbl['addrr']  : (0, 1)
+}
+
+branch_opcodes = set(optbl[mnemonic] for mnemonic in ('je', 'jn', 'jl', 'jg', 'jls', 'jgs', 'jei', 'jni', 'jli', 'jgi', 'jlsi', 'jgsi'))
+
+# ops with no successor in the cfg, their blocks flow to EXIT_BLOCK.
+exit_opcodes = set([optbl['die'], optbl['test_die'], optbl['ret'], optbl['swtch'], END_OPCODE, BAD_JUMP_OPCODE, NO_LOOP_OPCODE])
+
+def find_post_dominators(code, blocks):
+# returns dict mapping the start ndx of each block to the start ndx of it's immediate
+# post-dominator, None when that's EXIT_BLOCK or the block never reaches it. calls are
+# assumed to return so a call's block flows to the instr after it. lcont & lbrk flow
+# to every loop body & end in the program since their targets are only known at run-time.
+    loop_bodies = set()
+    loop_ends   = set()
+    last_ndx    = {}
+
+    for start, (end, count) in blocks.items():
+        ndx = start
+
+        for i in range(count):
+            last_ndx[start] = ndx
+
+            if code[ndx] == optbl['loop']:
+                loop_bodies.add(code[ndx + 2])
+                loop_ends.add(code[ndx + 3])
+
+            ndx += 1 + decoded_argc(code[ndx])
+
+    succ_map = {}
+
+    for start, (end, count) in blocks.items():
+        ndx    = last_ndx[start]
+        opcode = code[ndx]
+
+        if opcode in exit_opcodes:
+            succs = [EXIT_BLOCK]
+        elif opcode == optbl['jmp']:
+            succs = [code[ndx + 1]]
+        elif opcode in branch_opcodes:
+            succs = [code[ndx + 1 + code_addr_operand_tbl[opcode][0]], end]
+        elif opcode == optbl['lcont']:
+            succs = list(loop_bodies | loop_ends)
+        elif opcode == optbl['lbrk']:
+            succs = list(loop_ends)
+        else:
+            succs = [end]
+
+        succ_map[start] = [succ for succ in succs if succ == EXIT_BLOCK or succ in blocks] or [EXIT_BLOCK]
+
+    # pdom_map[b] is the set of blocks post-dominating b, None until a path to EXIT_BLOCK is found.
+    pdom_map = dict.fromkeys(blocks)
+    pdom_map[EXIT_BLOCK] = frozenset([EXIT_BLOCK])
+    changed  = True
+
+    while changed:
+        changed = False
+
+        for start in blocks:
+            succ_pdoms = [pdom_map[succ] for succ in succ_map[start] if pdom_map[succ] is not None]
+
+            if not succ_pdoms:
+                continue
+
+            pdoms = frozenset.intersection(*succ_pdoms) | frozenset([start])
+
+            if pdoms != pdom_map[start]:
+                pdom_map[start] = pdoms
+                changed = True
+
+    ipdom_map = {}
+
+    for start in blocks:
+        ipdom_map[start] = None
+
+        if pdom_map[start] is None:
+            continue
+
+        strict = pdom_map[start] - frozenset([start])
+
+        for pdom in strict:
+            if len(pdom_map[pdom]) == len(strict):
+                ipdom_map[start] = pdom if pdom != EXIT_BLOCK else None
+                break
+
+    return ipdom_map, last_ndx
+
+def batch_trunc_div(left, right):
+# vectorised trunc_div(), left & right are int64 arrays.
+    quotient = np.abs(left) // np.abs(right)
+    return np.where((left < 0) != (right < 0), -quotient, quotient)
+
+def batch_check_divisor(right):
+    if not right.all():
+        raise Exception("yson: division by zero")
+
+def batch_divide(left, right):
+    batch_check_divisor(right)
+    return batch_trunc_div(left, right)
+
+def batch_modulo(left, right):
+    batch_check_divisor(right)
+    return left - right * batch_trunc_div(left, right)
+
+def batch_unsigned_divide(left, right):
+    batch_check_divisor(right)
+    return left // right
+
+def batch_unsigned_modulo(left, right):
+    batch_check_divisor(right)
+    return left % right
+
+def batch_rotate_left(left, right):
+    right = right & 31
+    return (left << right) | np.where(right != 0, left >> ((32 - right) & 31), np.uint32(0))
+
+def batch_rotate_right(left, right):
+    right = right & 31
+    return (left >> right) | np.where(right != 0, left << ((32 - right) & 31), np.uint32(0))
+
+def batch_signed_rshift(left, right):
+    return left >> (right & 31)
+
+def split_lanes(lanes, targets):
+# returns the single target when every lane goes to the same one,
+# otherwise a list of (target, lane-ndxs) one per distinct target.
+    first = targets[0]
+
+    if (targets == first).all():
+        return int(first)
+
+    return [(int(target), lanes[targets == target]) for target in np.unique(targets)]
+
+class BatchInterpreter(Interpreter):
+# takes the bytes of a .fbin & the number of lanes to run it over. self.ram is (lanes, ram_words)
+# uint32 holding the first ram_words words of each lane's ram, by default enough for
+# every ram addr the program names as an operand. addrs only known at run-time, those
+# read by pshfrr & pshfrs, must fall inside it too so pass a bigger ram_words for
+# programs using them. ram accesses must be word aligned. set each lane's inputs with
+# write_lanes() before run() & read results back with read_lanes().
+
+    def __init__(self, buf, lane_count, ram_words=None, stack_words=BATCH_STACK_WORDS, rstk_depth=BATCH_RSTK_DEPTH):
+        if np is None:
+            raise Exception("yson: the batch interpreter needs numpy, install it with pip install numpy")
+
+        Interpreter.__init__(self, buf)
+
+        operand_words = self.find_ram_words()
+
+        if ram_words is None:
+            ram_words = operand_words
+
+        image = np.frombuffer(self.ram, dtype='<u4')[: ram_words]
+
+        self.lane_count   = lane_count
+        self.ram_words    = ram_words
+        self.ram          = np.zeros((lane_count, ram_words), dtype=np.uint32)
+        self.ram[:, : len(image)] = image
+        self.stack        = np.zeros((lane_count, stack_words), dtype=np.uint32)
+        self.sp           = np.zeros(lane_count, dtype=np.int64)
+        self.rstk         = np.zeros((lane_count, rstk_depth), dtype=np.int64)
+        self.rsp          = np.zeros(lane_count, dtype=np.int64)
+        self.halted       = np.zeros(lane_count, dtype=bool)
+        self.output       = [] # (lane-ndxs, addr or offset, values, fmt) for each nspct & nspctst executed.
+        self.step_count   = 0  # vectorised ops executed, each runs one instr on every lane in it's entry.
+
+        blocks = find_basic_blocks(self.code, self.start_ndx)
+        ipdom_map, last_ndx = find_post_dominators(self.code, blocks)
+
+        # dict mapping the ndx of each block's last instr to where lanes diverging there reconverge.
+        self.reconverge_tbl = dict((last_ndx[start], ipdom_map[start]) for start in blocks)
+
+    def find_ram_words(self):
+    # returns how many words of ram cover every ram addr operand in the program.
+        code     = self.code
+        max_addr = 0
+        ndx      = 1
+
+        while ndx < len(code):
+            opcode = code[ndx]
+
+            for operand_ndx in ram_addr_operand_tbl.get(opcode, ()):
+                addr = code[ndx + 1 + operand_ndx]
+
+                if addr & 3:
+                    raise Exception("yson: the batch interpreter needs word aligned ram addrs, %s uses addr %d" % (mnemonic_tbl[opcode], addr))
+
+                max_addr = max(max_addr, addr)
+
+            ndx += 1 + decoded_argc(opcode)
+
+        return (max_addr >> 2) + 1
+
+    def write_lanes(self, addr, values):
+    # writes values into ram at addr, one row per lane. values is either a word per lane
+    # or (lanes, n) words written to n consecutive words from addr.
+        values = np.asarray(values, dtype=np.uint32)
+
+        if addr & 3:
+            raise Exception("yson: the batch interpreter needs word aligned ram addrs, got %d" % addr)
+
+        if values.ndim == 1:
+            values = values[:, None]
+
+        self.ram[:, addr >> 2 : (addr >> 2) + values.shape[1]] = values
+
+    def read_lanes(self, addr, count=1):
+    # returns the word at addr in each lane's ram, (lanes, count) words when count > 1.
+        if count == 1:
+            return self.ram[:, addr >> 2].copy()
+
+        return self.ram[:, addr >> 2 : (addr >> 2) + count].copy()
+
+    def build_batch_handler_tbl(self):
+    # returns the handler table. a handler takes the ndx of it's opcode in self.code & the
+    # ndxs of the lanes executing it, returns the ndx of the next op when every lane goes
+    # to the same place, HALT_NDX when they halt or a list from split_lanes() when they diverge.
+        code        = self.code
+        ram         = self.ram
+        stack       = self.stack
+        sp          = self.sp
+        rstk        = self.rstk
+        rsp         = self.rsp
+        output      = self.output
+        rstk_depth  = rstk.shape[1]
+        lc          = np.zeros(self.lane_count, dtype=np.int64)
+        lb          = np.full(self.lane_count, self.no_loop_ndx, dtype=np.int64)
+        le          = np.full(self.lane_count, self.no_loop_ndx, dtype=np.int64)
+        one         = np.uint32(1)
+
+        def word_ndxs(addrs):
+            if (addrs & 3).any():
+                raise Exception("yson: the batch interpreter needs word aligned ram addrs, unaligned addr read by pshfrr or pshfrs")
+
+            return (addrs >> 2).astype(np.int64)
+
+        def check_pop(lanes, count):
+            if (sp[lanes] < count).any():
+                raise Exception("yson: work-stack underflow")
+
+        def push(lanes, values):
+            top = sp[lanes] + 1
+            stack[lanes, top] = values
+            sp[lanes] = top
+
+        def op_die(pc, lanes):
+            return HALT_NDX
+
+        def op_nop(pc, lanes):
+            return pc + 1
+
+        def op_nspct(pc, lanes):
+            output.append((lanes, code[pc + 1], ram[lanes, code[pc + 1] >> 2], "ram[%u] (uint32) = %u"))
+            return pc + 2
+
+        def op_nspctst(pc, lanes):
+            output.append((lanes, code[pc + 1], stack[lanes, sp[lanes] - (code[pc + 1] >> 2)], "wstk[%u] (uint32) = %u"))
+            return pc + 2
+
+        def op_call(pc, lanes):
+            depth = rsp[lanes]
+
+            if (depth == rstk_depth).any():
+                raise Exception("yson: return-stack overflow, calls nested deeper than %d" % rstk_depth)
+
+            rstk[lanes, depth] = pc + 2
+            rsp[lanes] = depth + 1
+            return code[pc + 1]
+
+        def op_ret(pc, lanes):
+            depth = rsp[lanes] - 1
+
+            if (depth < 0).any():
+                raise Exception("yson: ret with an empty return-stack")
+
+            rsp[lanes] = depth
+            return split_lanes(lanes, rstk[lanes, depth])
+
+        def op_swtch(pc, lanes):
+            raise Exception("yson: swtch is unimplemented")
+
+        def op_jmp(pc, lanes):
+            return code[pc + 1]
+
+        def branch_op(func):
+        # returns handler jumping the lanes where func(top, second) holds.
+            def handler(pc, lanes):
+                top   = sp[lanes]
+                taken = func(stack[lanes, top], stack[lanes, top - 1])
+
+                if taken.all():
+                    return code[pc + 1]
+
+                if not taken.any():
+                    return pc + 2
+
+                return [(code[pc + 1], lanes[taken]), (pc + 2, lanes[~taken])]
+
+            return handler
+
+        def op_loop(pc, lanes):
+            lc[lanes] = code[pc + 1]
+            lb[lanes] = code[pc + 2]
+            le[lanes] = code[pc + 3]
+            return pc + 4
+
+        def op_lcont(pc, lanes):
+            counts = lc[lanes]
+            cont   = counts != 0
+            lc[lanes] = counts - cont
+            return split_lanes(lanes, np.where(cont, lb[lanes], le[lanes]))
+
+        def op_lbrk(pc, lanes):
+            return split_lanes(lanes, le[lanes])
+
+        def op_psh(pc, lanes):
+            push(lanes, code[pc + 1])
+            return pc + 2
+
+        def op_pop(pc, lanes):
+            check_pop(lanes, 1)
+            sp[lanes] -= 1
+            return pc + 1
+
+        def op_pop2(pc, lanes):
+            check_pop(lanes, 2)
+            sp[lanes] -= 2
+            return pc + 1
+
+        def op_popn(pc, lanes):
+            check_pop(lanes, code[pc + 1])
+            sp[lanes] -= code[pc + 1]
+            return pc + 2
+
+        def op_pshfr(pc, lanes):
+            push(lanes, ram[lanes, code[pc + 1] >> 2])
+            return pc + 2
+
+        def op_poptr(pc, lanes):
+            check_pop(lanes, 1)
+            top = sp[lanes]
+            ram[lanes, code[pc + 1] >> 2] = stack[lanes, top]
+            sp[lanes] = top - 1
+            return pc + 2
+
+        def op_movtr(pc, lanes):
+            ram[lanes, code[pc + 1] >> 2] = stack[lanes, sp[lanes]]
+            return pc + 2
+
+        def op_stktr(pc, lanes):
+            ram[lanes, code[pc + 2] >> 2] = stack[lanes, code[pc + 1] >> 2]
+            return pc + 3
+
+        def op_cpyr(pc, lanes):
+            ram[lanes, code[pc + 2] >> 2] = ram[lanes, code[pc + 1] >> 2]
+            return pc + 3
+
+        def op_setr(pc, lanes):
+            ram[lanes, code[pc + 1] >> 2] = code[pc + 2]
+            return pc + 3
+
+        def op_pshfrr(pc, lanes):
+            push(lanes, ram[lanes, word_ndxs(ram[lanes, code[pc + 1] >> 2])])
+            return pc + 2
+
+        def op_pshfrs(pc, lanes):
+            push(lanes, ram[lanes, word_ndxs(stack[lanes, sp[lanes]])])
+            return pc + 2
+
+        def op_inc(pc, lanes):
+            top = sp[lanes]
+            stack[lanes, top] = stack[lanes, top] + one
+            return pc + 1
+
+        def op_dec(pc, lanes):
+            top = sp[lanes]
+            stack[lanes, top] = stack[lanes, top] - one
+            return pc + 1
+
+        def op_not(pc, lanes):
+            top = sp[lanes]
+            stack[lanes, top] = ~stack[lanes, top]
+            return pc + 1
+
+        def binary_op(func):
+        # returns handler pushing func(top, second) as uint32 arrays, results wrap at 32 bits.
+            def handler(pc, lanes):
+                top = sp[lanes]
+                push(lanes, func(stack[lanes, top], stack[lanes, top - 1]))
+                return pc + 1
+
+            return handler
+
+        def signed_binary_op(func):
+        # returns handler pushing func(top, second) with both widened from int32 to int64,
+        # the result is cut back to a word.
+            def handler(pc, lanes):
+                top = sp[lanes]
+                push(lanes, func(stack[lanes, top].view(np.int32).astype(np.int64),
+                                 stack[lanes, top - 1].view(np.int32).astype(np.int64)).astype(np.uint32))
+                return pc + 1
+
+            return handler
+
+        def int32_op(func):
+        # returns handler pushing func(top, second) as int32 arrays.
+            def handler(pc, lanes):
+                top = sp[lanes]
+                push(lanes, func(stack[lanes, top].view(np.int32), stack[lanes, top - 1].view(np.int32)).view(np.uint32))
+                return pc + 1
+
+            return handler
+
+        def imm_op(func):
+        # returns handler replacing top with func(top, immediate), the immediate as a uint32.
+            def handler(pc, lanes):
+                top = sp[lanes]
+                stack[lanes, top] = func(stack[lanes, top], np.array(code[pc + 1], dtype=np.uint32))
+                return pc + 2
+
+            return handler
+
+        def imm_branch_op(func):
+        # returns handler jumping the lanes where func(top, immediate) holds.
+            def handler(pc, lanes):
+                taken = func(stack[lanes, sp[lanes]], np.array(code[pc + 1], dtype=np.uint32))
+
+                if taken.all():
+                    return code[pc + 2]
+
+                if not taken.any():
+                    return pc + 3
+
+                return [(code[pc + 2], lanes[taken]), (pc + 3, lanes[~taken])]
+
+            return handler
+
+        def op_addir(pc, lanes):
+            ndx = code[pc + 1] >> 2
+            ram[lanes, ndx] = ram[lanes, ndx] + np.uint32(code[pc + 2])
+            return pc + 3
+
+        def op_addrr(pc, lanes):
+            ndx = code[pc + 2] >> 2
+            ram[lanes, ndx] = ram[lanes, ndx] + ram[lanes, code[pc + 1] >> 2]
+            return pc + 3
+
+        def op_incr(pc, lanes):
+            ndx = code[pc + 1] >> 2
+            ram[lanes, ndx] = ram[lanes, ndx] + one
+            return pc + 2
+
+        def op_decr(pc, lanes):
+            ndx = code[pc + 1] >> 2
+            ram[lanes, ndx] = ram[lanes, ndx] - one
+            return pc + 2
+
+        def op_end(pc, lanes):
+            raise Exception("yson: program ran off the end of it's code without a die op")
+
+        def op_bad_jump(pc, lanes):
+            raise Exception("yson: jump to addr %d which is not the start of an instruction" % code[pc + 1])
+
+        def op_no_loop(pc, lanes):
+            raise Exception("yson: lcont or lbrk executed before any loop op")
+
+        def op_unknown(pc, lanes):
+            raise Exception("INTERNAL ERROR: no handler for opcode %d!" % code[pc])
+
+        handler_tbl = [op_unknown] * 0x100
+
+        for mnemonic, handler in (('die',      op_die),
+                                  ('nop',      op_nop),
+                                  ('nspct',    op_nspct),
+                                  ('nspctst',  op_nspctst),
+                                  ('test_die', op_die),
+                                  ('call',     op_call),
+                                  ('ret',      op_ret),
+                                  ('swtch',    op_swtch),
+                                  ('jmp',      op_jmp),
+                                  ('je',       branch_op(lambda l, r: l == r)),
+                                  ('jn',       branch_op(lambda l, r: l != r)),
+                                  ('jl',       branch_op(lambda l, r: l < r)),
+                                  ('jg',       branch_op(lambda l, r: l > r)),
+                                  ('jls',      branch_op(lambda l, r: l.view(np.int32) < r.view(np.int32))),
+                                  ('jgs',      branch_op(lambda l, r: l.view(np.int32) > r.view(np.int32))),
+                                  ('loop',     op_loop),
+                                  ('lcont',    op_lcont),
+                                  ('lbrk',     op_lbrk),
+                                  ('psh',      op_psh),
+                                  ('pop',      op_pop),
+                                  ('pop2',     op_pop2),
+                                  ('popn',     op_popn),
+                                  ('pshfr',    op_pshfr),
+                                  ('poptr',    op_poptr),
+                                  ('movtr',    op_movtr),
+                                  ('stktr',    op_stktr),
+                                  ('cpyr',     op_cpyr),
+                                  ('setr',     op_setr),
+                                  ('pshfrr',   op_pshfrr),
+                                  ('pshfrs',   op_pshfrs),
+                                  ('inc',      op_inc),
+                                  ('dec',      op_dec),
+                                  ('add',      binary_op(lambda l, r: l + r)),
+                                  ('sub',      binary_op(lambda l, r: l - r)),
+                                  ('mul',      binary_op(lambda l, r: l * r)),
+                                  ('div',      binary_op(batch_unsigned_divide)),
+                                  ('mod',      binary_op(batch_unsigned_modulo)),
+                                  ('incs',     op_inc),
+                                  ('decs',     op_dec),
+                                  ('adds',     binary_op(lambda l, r: l + r)),
+                                  ('subs',     binary_op(lambda l, r: l - r)),
+                                  ('muls',     binary_op(lambda l, r: l * r)),
+                                  ('divs',     signed_binary_op(batch_divide)),
+                                  ('mods',     signed_binary_op(batch_modulo)),
+                                  ('and',      binary_op(lambda l, r: l & r)),
+                                  ('not',      op_not),
+                                  ('xor',      binary_op(lambda l, r: l ^ r)),
+                                  ('or',       binary_op(lambda l, r: l | r)),
+                                  ('lshft',    binary_op(lambda l, r: l << (r & 31))),
+                                  ('rshft',    binary_op(lambda l, r: l >> (r & 31))),
+                                  ('lrot',     binary_op(batch_rotate_left)),
+                                  ('rrot',     binary_op(batch_rotate_right)),
+                                  ('ands',     binary_op(lambda l, r: l & r)),
+                                  ('nots',     op_not),
+                                  ('xors',     binary_op(lambda l, r: l ^ r)),
+                                  ('ors',      binary_op(lambda l, r: l | r)),
+                                  ('lshfts',   binary_op(lambda l, r: l << (r & 31))),
+                                  ('rshfts',   int32_op(batch_signed_rshift)),
+                                  ('lrots',    binary_op(batch_rotate_left)),
+                                  ('rrots',    binary_op(batch_rotate_right)),
+                                  ('addi',     imm_op(lambda l, r: l + r)),
+                                  ('subi',     imm_op(lambda l, r: l - r)),
+                                  ('muli',     imm_op(lambda l, r: l * r)),
+                                  ('andi',     imm_op(lambda l, r: l & r)),
+                                  ('ori',      imm_op(lambda l, r: l | r)),
+                                  ('xori',     imm_op(lambda l, r: l ^ r)),
+                                  ('lshfti',   imm_op(lambda l, r: l << (r & 31))),
+                                  ('rshfti',   imm_op(lambda l, r: l >> (r & 31))),
+                                  ('incr',     op_incr),
+                                  ('decr',     op_decr),
+                                  ('addir',    op_addir),
+                                  ('addrr',    op_addrr),
+                                  ('jei',      imm_branch_op(lambda l, r: l == r)),
+                                  ('jni',      imm_branch_op(lambda l, r: l != r)),
+                                  ('jli',      imm_branch_op(lambda l, r: l < r)),
+                                  ('jgi',      imm_branch_op(lambda l, r: l > r)),
+                                  ('jlsi',     imm_branch_op(lambda l, r: l.view(np.int32) < r.view(np.int32))),
+                                  ('jgsi',     imm_branch_op(lambda l, r: l.view(np.int32) > r.view(np.int32)))):
+            handler_tbl[optbl[mnemonic]] = handler
+
+        handler_tbl[END_OPCODE]      = op_end
+        handler_tbl[BAD_JUMP_OPCODE] = op_bad_jump
+        handler_tbl[NO_LOOP_OPCODE]  = op_no_loop
+
+        return handler_tbl
+
+    def halt(self, entry_stack, lanes):
+    # drops halted lanes from every entry left on the stack.
+        self.halted[lanes] = True
+
+        for entry in entry_stack:
+            entry[2] = entry[2][~self.halted[entry[2]]]
+
+    def diverge(self, entry_stack, pc, targets):
+    # lanes of the entry on top went to different targets at pc. they reconverge at the
+    # post-dominator of pc's block, when that's the exit or where the entry already
+    # reconverges the entry is replaced outright rather than waiting there.
+        entry      = entry_stack[-1]
+        reconverge = self.reconverge_tbl.get(pc)
+
+        if reconverge is None or reconverge == entry[1]:
+            entry_stack.pop()
+            reconverge = entry[1]
+        else:
+            entry[0] = reconverge
+
+        for target, lanes in targets:
+            entry_stack.append([target, reconverge, lanes])
+
+    def run(self):
+    # runs every lane from the start-addr until they've all halted, returns the number
+    # of instructions executed summed over the lanes.
+        code        = self.code
+        handler_tbl = self.build_batch_handler_tbl()
+        entry_stack = [[self.start_ndx, None, np.arange(self.lane_count)]]
+        pc          = self.start_ndx
+        steps       = 0
+        count       = 0
+        start       = time.perf_counter()
+
+        try:
+            while entry_stack:
+                entry = entry_stack[-1]
+                pc, reconverge, lanes = entry
+
+                if pc == reconverge or not len(lanes):
+                    entry_stack.pop()
+                    continue
+
+                nxt    = handler_tbl[code[pc]](pc, lanes)
+                steps += 1
+                count += len(lanes)
+
+                if isinstance(nxt, list):
+                    self.diverge(entry_stack, pc, nxt)
+                elif nxt:
+                    entry[0] = nxt
+                else:
+                    entry_stack.pop()
+                    self.halt(entry_stack, lanes)
+
+        except IndexError:
+            raise Exception("yson: out of range ram, work-stack or return-stack access by %s at step %d, see BatchInterpreter's ram_words, stack_words & rstk_depth" % (mnemonic_tbl.get(code[pc], 'UNKNOWN'), steps))
+
+        finally:
+            self.elapsed     = time.perf_counter() - start
+            self.step_count  = steps
+            self.instr_count = count
+
+        return count
+
+    def top(self, lane=0):
+    # returns the word on top of a lane's work-stack, None if it's empty.
+        return int(self.stack[lane, self.sp[lane]]) if self.sp[lane] else None
+
+    def lane_output(self, lane):
+    # returns the lines nspct & nspctst printed for one lane, as Interpreter.output holds them.
+        lines = []
+
+        for lanes, operand, values, fmt in self.output:
+            hits = np.flatnonzero(lanes == lane)
+
+            if len(hits):
+                lines.append(fmt % (operand, values[hits[0]]))
+
+        return lines
+
+def main():
+    if len(sys.argv) < 2:
+        print("\nyson: usage: python batch.py prog.fbin [lane_count]")
+        sys.exit()
+
+    try:
+        with open(sys.argv[1], 'rb') as fbin_file:
+            buf = fbin_file.read()
+
+    except FileNotFoundError:
+        print("\nError: Unable to open input-file: [%s], file does not exist!\n" % sys.argv[1])
+        sys.exit()
+    except OSError as e:
+        print("Error: An I/O error occurred while attempting to read input-file: [%s]\n    more info: %s" % (sys.argv[1], e))
+        sys.exit()
+
+    interp = BatchInterpreter(buf, int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+    interp.run()
+
+    for line in interp.lane_output(0):
+        print(line)
+
+    print("\nlane 0 stack[top] = %s" % interp.top(0))
+    print("lanes: %d, steps: %d, lane instructions: %d, %.3f sec, %.0f lane instr/sec" % (interp.lane_count, interp.step_count, interp.instr_count, interp.elapsed, interp.instr_count / interp.elapsed if interp.elapsed else 0))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1602 @@
+import tracemalloc
+import resource
+import contextlib
+import tempfile
+import struct
+import copy
+import random
+import time
+import sys
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from assembler import *
+from interpreter import *
+from batch import *
+from fvm import *
+from crosscheck import *
+from parser import *
+from ir_tree import *
+import ir_tree
+
+# benchmarks for the assembler & friends, run from the yson_dev directory:
+#     python bench.py encoders [instr_count]
+#     python bench.py instrbuf [instr_count]
+#     python bench.py interp [loop_count]
+#     python bench.py batch [lane_count]
+#     python bench.py host [job_count]
+#     python bench.py stack [loop_count]
+#     python bench.py fuse [loop_count]
+#     python bench.py imm [loop_count]
+#     python bench.py lexer [line_count]
+#     python bench.py toklist [line_count]
+#     python bench.py stream [line_count]
+#     python bench.py ooc [line_count]
+#     python bench.py parse [line_count]
+#     python bench.py exprs [line_count]
+#
+# each benchmark prints its timings and confirms the paths being
+# compared produce identical output before reporting any speedup.
+
+BENCH_INSTR_COUNT = 1000000
+BENCH_LOOP_COUNT  = 100000
+BENCH_LANE_COUNT  = 100000
+BENCH_BATCH_STEPS = 64
+BENCH_REF_LANES   = 64 # lanes also run on Interpreter, to check the batch & estimate running every lane one by one.
+BENCH_JOB_COUNT   = 20000
+BENCH_JOB_LOOPS   = 1000
+BENCH_HOST_THREAD_COUNTS = (1, 2, 4, 8)
+BENCH_STACK_LOOPS = 2000000
+BENCH_LIB_REPEATS = 9
+BENCH_LIB_REF_LOOPS = 1000 # loops also run on Interpreter to check libfvm.
+BENCH_FUSE_LOOPS  = 2000000
+BENCH_IMM_LOOPS   = 2000000
+BENCH_LEXER_LINES = 50000
+BENCH_LEXER_REPEATS = 3
+BENCH_OOC_LINES   = 500000
+BENCH_OOC_RSS_SLACK = 0x800000 # peak RSS the larger source may add, the code buffer & WordSpool tails are ~5MB at most.
+
+# loop body mixes stack, ram & arithmetic ops, it leaves the stack as it found it.
+bench_interp_src = """macro N %d
+main:
+    setr @64 0
+    setr @68 7
+    loop N body done
+body:
+    pshfr @64
+    psh 3
+    add
+    pshfr @68
+    xor
+    mul
+    poptr @64
+    pop2
+    popn 3
+    pshfr @64
+    inc
+    movtr @72
+    pop
+    lcont
+done:
+    pshfr @64
+    die
+"""
+
+# collatz steps on the input at @64, lanes branch apart on odd & even
+# & reconverge after. @68 counts the steps taken.
+bench_batch_src = """macro N %d
+main:
+    loop N body done
+body:
+    pshfr @64
+    psh 1
+    and
+    psh 0
+    je even
+    popn 4
+    pshfr @64
+    psh 3
+    mul
+    inc
+    poptr @64
+    pop2
+    jmp next
+even:
+    popn 4
+    psh 1
+    pshfr @64
+    rshft
+    poptr @64
+    pop2
+next:
+    pshfr @68
+    inc
+    poptr @68
+    lcont
+done:
+    pshfr @64
+    die
+"""
+
+# counts @64 up in a loop, sticks to ops fvm's vm.c gets right.
+bench_host_src = """macro N %d
+main:
+    setr @64 0
+    loop N body done
+body:
+    pshfr @64
+    inc
+    poptr @64
+    lcont
+done:
+    pshfr @64
+    die
+"""
+
+# nearly every op works on the top two words of the stack, the result of each
+# loop is carried into the next through @64 & the stack is left as it was found.
+bench_stack_src = """macro N %d
+main:
+    psh 7
+    psh 3
+    loop N body done
+body:
+    add
+    xor
+    inc
+    mul
+    rshft
+    or
+    not
+    sub
+    jg skip
+    dec
+skip:
+    poptr @64
+    popn 5
+    pop
+    pshfr @64
+    lcont
+done:
+    die
+"""
+
+# a chain of binary ops each reading the word the one before pushed, the cost of the
+# work-stack itself rather than of dispatch is what this loop mostly measures.
+bench_arith_src = """macro N %d
+main:
+    psh 7
+    psh 3
+    loop N body done
+body:
+    add
+    xor
+    add
+    mul
+    sub
+    or
+    add
+    xor
+    poptr @64
+    popn 7
+    lcont
+done:
+    die
+"""
+
+# loop body made of the sequences fused into superinstructions, see fused_seq_tbl. the
+# counter at @76 is left on top so each run's result can be checked.
+bench_fuse_src = """macro N %d
+main:
+    setr @64 1
+    setr @68 2
+    psh 0
+    loop N body done
+body:
+    pshfr @64
+    pshfr @68
+    add
+    poptr @72
+    pshfr @72
+    psh 3
+    xor
+    poptr @68
+    pop2
+    pop2
+    psh 5
+    jn skip
+    inc
+skip:
+    pop
+    pshfr @76
+    inc
+    poptr @76
+    lcont
+done:
+    pshfr @76
+    die
+"""
+
+# the same loop written with stack ops & with immediate operand ops, see imm_op_tbl. both
+# add 5 to @64 wrapping it back to 0 past 1000 & count loops in @68, left on top at the end.
+bench_stack_ops_src = """macro N %d
+main:
+    loop N body done
+body:
+    pshfr @64
+    psh 5
+    add
+    poptr @64
+    pop2
+    pshfr @68
+    psh 1
+    add
+    poptr @68
+    pop2
+    pshfr @64
+    psh 1000
+    jg skip
+    setr @64 0
+skip:
+    pop2
+    lcont
+done:
+    pshfr @68
+    die
+"""
+
+bench_imm_ops_src = """macro N %d
+main:
+    loop N body done
+body:
+    addir @64 5
+    incr @68
+    pshfr @64
+    jli 1000 skip
+    setr @64 0
+skip:
+    pop
+    lcont
+done:
+    pshfr @68
+    die
+"""
+
+def build_bench_prog_list(instr_count):
+# returns list of instr-lists like the ones Assembler() builds, operands are int_lists
+# or label/macro id's. cycles through a mix of instruction shapes found in typical
+# generated programs. the lists are built fresh each call because packing resolves
+# identifier operands in-place.
+
+    shapes = [
+        [optbl['psh'], [UNSIGNED_SIGNCODE, 5]],
+        [optbl['pshfr'], [ADDR_SIGNCODE, 64]],
+        [optbl['add']],
+        [optbl['poptr'], [ADDR_SIGNCODE, 64]],
+        [optbl['setr'], [ADDR_SIGNCODE, 68], [SIGNED_SIGNCODE, -3]],
+        [optbl['loop'], [UNSIGNED_SIGNCODE, 10], 'bench_loop', [ADDR_SIGNCODE, 40]],
+        [optbl['jmp'], 'main'],
+        [optbl['die']]
+    ]
+
+    return [[operand for operand in shapes[i % len(shapes)]] for i in range(instr_count)]
+
+def build_bench_assembler(instr_count, legacy=False):
+# returns Assembler() with a prog-list & symbol-table ready for build_prog_bytearray().
+# when legacy is set the prog-list holds instr-lists like it did before InstructionBuffer.
+
+    asm = Assembler(keep_symbols=False)
+    asm.symtbl.labels['main']       = [ADDR_SIGNCODE, CODE_VADDR]
+    asm.symtbl.labels['bench_loop'] = [ADDR_SIGNCODE, CODE_VADDR + 12]
+
+    prog_list = build_bench_prog_list(instr_count)
+    asm.prog_list[METADATA_SEGMENT][PROG_SIZE_NDX] = sum(opsize_tbl[instr[0]] for instr in prog_list)
+
+    if legacy:
+        asm.prog_list[INSTR_SEGMENT:] = prog_list
+    else:
+        for instr in prog_list:
+            asm.prog_list[INSTR_SEGMENT].append(instr)
+
+    return asm
+
+def legacy_pack_instr_bytes(asm, instr):
+# Assembler.pack_instr_bytes() as it was before encoder_tbl, one struct.pack()
+# for the opcode and one per operand, each extended onto the bytearray.
+
+    if not isinstance(instr[0], int):
+        raise Exception("INTERNAL ERROR: Instruction opcode is not int literal!\ninstr: %s" % instr)
+
+    asm.prog_bytearray.extend(struct.pack('<B', instr[0]))
+
+    if len(instr) > 1:
+        for operand in instr[1:]:
+
+            if isinstance(operand, list):
+
+                if operand[0] == UNSIGNED_SIGNCODE or operand[0] == ADDR_SIGNCODE:
+                    asm.prog_bytearray.extend(struct.pack('<I', operand[1]))
+
+                elif operand[0] == SIGNED_SIGNCODE:
+                    asm.prog_bytearray.extend(struct.pack('<i', operand[1]))
+
+            else:
+                raise Exception("INTERNAL ERROR: Instruction operand is not int-list or int-literal!\ninstr: %s" % instr)
+
+def legacy_build_prog(asm):
+# the instr loop of Assembler.build_prog_bytearray() as it was before encoder_tbl.
+
+    asm.build_metadata_bytearray()
+    asm.prog_bytearray.extend(asm.metadata_bytearray)
+
+    for instr_ndx in range(len(asm.prog_list)):
+
+        if not instr_ndx: continue
+
+        for arg_ndx in range(len(asm.prog_list[instr_ndx])):
+
+            if not arg_ndx: continue
+
+            if isinstance(asm.prog_list[instr_ndx][arg_ndx], str):
+
+                if asm.prog_list[instr_ndx][arg_ndx] in asm.symtbl.labels:
+                    asm.prog_list[instr_ndx][arg_ndx] = asm.symtbl.labels[asm.prog_list[instr_ndx][arg_ndx]]
+
+                elif asm.prog_list[instr_ndx][arg_ndx] in asm.symtbl.macros:
+                    asm.prog_list[instr_ndx][arg_ndx] = asm.symtbl.macros[asm.prog_list[instr_ndx][arg_ndx]]
+
+        legacy_pack_instr_bytes(asm, asm.prog_list[instr_ndx])
+
+    return asm.prog_bytearray
+
+def encoder_build_prog(asm):
+# the current path, see Assembler.build_prog_bytearray() & Assembler.pack_prog_list().
+
+    asm.build_prog_bytearray()
+    return asm.prog_bytearray
+
+def bench_encoders(instr_count=BENCH_INSTR_COUNT):
+    legacy_asm  = build_bench_assembler(instr_count, legacy=True)
+    encoder_asm = build_bench_assembler(instr_count)
+
+    start      = time.perf_counter()
+    legacy     = legacy_build_prog(legacy_asm)
+    legacy_sec = time.perf_counter() - start
+
+    start       = time.perf_counter()
+    encoded     = encoder_build_prog(encoder_asm)
+    encoder_sec = time.perf_counter() - start
+
+    if legacy != encoded:
+        raise Exception("bench: encoder_tbl output does not match legacy output!")
+
+    print("instructions: %d, bytes: %d" % (instr_count, len(encoded)))
+    print("legacy struct.pack path:    %.3f sec" % legacy_sec)
+    print("encoder_tbl pack_into path: %.3f sec" % encoder_sec)
+    print("speedup: %.2fx" % (legacy_sec / encoder_sec))
+
+def bench_instr_buffer(instr_count=BENCH_INSTR_COUNT):
+# compares memory held by instr-lists, deep-copied like Assembler.append_instr() used
+# to do, against the same instructions held in an InstructionBuffer().
+
+    prog_list = build_bench_prog_list(instr_count)
+
+    tracemalloc.start()
+    legacy       = [copy.deepcopy(instr) for instr in prog_list]
+    legacy_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del legacy
+
+    tracemalloc.start()
+    instr_buf = InstructionBuffer()
+    for instr in prog_list:
+        instr_buf.append(instr)
+    buf_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print("instructions: %d" % instr_count)
+    print("instr-lists:        %d bytes, %.1f per instr" % (legacy_bytes, legacy_bytes / instr_count))
+    print("instruction-buffer: %d bytes, %.1f per instr" % (buf_bytes, buf_bytes / instr_count))
+    print("reduction: %.1fx" % (legacy_bytes / buf_bytes))
+
+def assemble_bench_src(src, fuse=False):
+# returns the bytes of src assembled into a .fbin, assembled through temp files.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frt_path  = os.path.join(tmp_dir, 'bench.frt')
+        fbin_path = os.path.join(tmp_dir, 'bench.fbin')
+
+        with open(frt_path, 'w') as frt_file:
+            frt_file.write(src)
+
+        Assembler(frt_path, fbin_path, keep_symbols=False, show_all_ds=False, fuse=fuse).assemble(doSilent=True)
+
+        with open(fbin_path, 'rb') as fbin_file:
+            return fbin_file.read()
+
+def interpreter_state(interp):
+# the state run() leaves behind, compared across execution modes.
+    return (interp.instr_count, interp.sp, interp.stack[: interp.sp + 1].tobytes(), bytes(interp.ram), interp.output)
+
+def bench_interpreters(loop_count=BENCH_LOOP_COUNT):
+    buf = assemble_bench_src(bench_interp_src % loop_count)
+
+    ref = Interpreter(buf)
+    ref.run()
+
+    closure = ClosureInterpreter(buf)
+    closure.run()
+
+    jit = JitInterpreter(buf)
+    jit.run()
+
+    if interpreter_state(ref) != interpreter_state(closure):
+        raise Exception("bench: closure mode state does not match reference interpreter state!")
+
+    if interpreter_state(ref) != interpreter_state(jit):
+        raise Exception("bench: jit mode state does not match reference interpreter state!")
+
+    print("instructions: %d, result: %d" % (ref.instr_count, ref.top()))
+    print("reference handler table: %.3f sec, %.0f instr/sec" % (ref.elapsed, ref.instr_count / ref.elapsed))
+    print("closure compiled:        %.3f sec, %.0f instr/sec" % (closure.elapsed, closure.instr_count / closure.elapsed))
+    print("block jit:               %.3f sec, %.0f instr/sec, %d blocks compiled" % (jit.elapsed, jit.instr_count / jit.elapsed, len(jit.block_cache)))
+    print("speedup: closure %.2fx, jit %.2fx" % (ref.elapsed / closure.elapsed, ref.elapsed / jit.elapsed))
+
+def bench_batch(lane_count=BENCH_LANE_COUNT):
+    buf    = assemble_bench_src(bench_batch_src % BENCH_BATCH_STEPS)
+    inputs = [random.randrange(1, 1 << 20) for i in range(lane_count)]
+
+    batch = BatchInterpreter(buf, lane_count)
+    batch.write_lanes(64, inputs)
+    batch.run()
+
+    ref_sec = 0.0
+
+    for lane in random.sample(range(lane_count), min(lane_count, BENCH_REF_LANES)):
+        ref = Interpreter(buf)
+        ref.ram_words[64 >> 2] = inputs[lane]
+        ref.run()
+        ref_sec += ref.elapsed
+
+        if (ref.sp, ref.stack[: ref.sp + 1].tolist(), ref.ram_words[: batch.ram_words].tolist()) != (int(batch.sp[lane]), batch.stack[lane, : batch.sp[lane] + 1].tolist(), batch.ram[lane].tolist()):
+            raise Exception("bench: batch lane %d state does not match reference interpreter state!" % lane)
+
+    ref_sec *= lane_count / min(lane_count, BENCH_REF_LANES)
+
+    print("lanes: %d, lane instructions: %d, vectorised steps: %d" % (lane_count, batch.instr_count, batch.step_count))
+    print("reference, estimated:  %.3f sec, %.0f instr/sec" % (ref_sec, batch.instr_count / ref_sec))
+    print("lane batched:          %.3f sec, %.0f lane instr/sec" % (batch.elapsed, batch.instr_count / batch.elapsed))
+    print("speedup: %.2fx" % (ref_sec / batch.elapsed))
+
+def bench_host(job_count=BENCH_JOB_COUNT):
+# runs job_count programs on libfvm's threaded host at each of BENCH_HOST_THREAD_COUNTS,
+# cycling through a few programs so threads share images. needs libfvm built, see fvm.py.
+    srcs = [bench_host_src % (BENCH_JOB_LOOPS * (i + 1)) for i in range(3)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir, FVMHost() as host:
+        programs = []
+
+        for i, src in enumerate(srcs):
+            fbin_path = os.path.join(tmp_dir, 'bench%d.fbin' % i)
+
+            with open(fbin_path, 'wb') as fbin_file:
+                fbin_file.write(assemble_bench_src(src))
+
+            programs.append(host.add_program(fbin_path))
+
+        job_programs = [programs[i % len(programs)] for i in range(job_count)]
+        baseline     = None
+
+        print("jobs: %d, programs: %d, cores: %d" % (job_count, len(programs), os.cpu_count() or 1))
+
+        for thread_count in BENCH_HOST_THREAD_COUNTS:
+            start   = time.perf_counter()
+            jobs    = host.run(job_programs, thread_count)
+            elapsed = time.perf_counter() - start
+            results = [(job.status, job.top, job.instr_count) for job in jobs]
+
+            if any(job.status != FVM_HALTED or job.top != (job.instr_count - 4) // 4 for job in jobs):
+                raise Exception("bench: a host job didn't halt with the count it looped to on top!")
+
+            if baseline is None:
+                baseline = results
+            elif results != baseline:
+                raise Exception("bench: %d thread results do not match 1 thread results!" % thread_count)
+
+            print("threads: %d, %.3f sec, %.0f programs/sec, %.0f instr/sec" % (thread_count, elapsed, job_count / elapsed, sum(job.instr_count for job in jobs) / elapsed))
+
+def time_fvm_lib(lib_path, buf, repeats):
+# returns (best run time, status, top, instr_count, ram word @64) of buf run repeats times on lib_path.
+    with FVM(lib_path) as vm:
+        vm.load_bytes(buf)
+        best = None
+
+        for i in range(repeats):
+            vm.reset()
+            start   = time.perf_counter()
+            status  = vm.run()
+            elapsed = time.perf_counter() - start
+            best    = elapsed if best is None else min(best, elapsed)
+
+        return (best, status, vm.top(), vm.instr_count(), vm.ram_words[64 // WORDSIZE])
+
+def bench_stack(loop_count=BENCH_STACK_LOOPS):
+# runs bench_stack_src & bench_arith_src on libfvm, each is checked against Interpreter on
+# a short run first.
+    lib_path = os.environ.get(FVM_LIB_ENV_VAR, default_lib_path())
+
+    for src_name, src in (("stack", bench_stack_src), ("arith", bench_arith_src)):
+        ref_buf = assemble_bench_src(src % BENCH_LIB_REF_LOOPS)
+        interp  = Interpreter(ref_buf)
+        interp.run()
+
+        best, status, top, instr_count, result = time_fvm_lib(lib_path, ref_buf, 1)
+
+        if (status, top, instr_count, result) != (FVM_HALTED, interp.top(), interp.instr_count, interp.ram_words[64 // WORDSIZE]):
+            raise Exception("bench: %s does not match Interpreter!" % lib_path)
+
+        best, status, top, instr_count, result = time_fvm_lib(lib_path, assemble_bench_src(src % loop_count), BENCH_LIB_REPEATS)
+
+        print("%s loop: %d loops, instructions: %d, best of %d  (%s)" % (src_name, loop_count, instr_count, BENCH_LIB_REPEATS, lib_path))
+        print("%.3f sec, %.0f instr/sec" % (best, instr_count / best))
+
+def bench_fuse(loop_count=BENCH_FUSE_LOOPS):
+# runs bench_fuse_src on libfvm assembled as is & with superinstructions fused, see
+# Assembler() fuse flag. both are checked against Interpreter on a short run first.
+    lib_path = os.environ.get(FVM_LIB_ENV_VAR, default_lib_path())
+
+    for fuse in (False, True):
+        ref_buf = assemble_bench_src(bench_fuse_src % BENCH_LIB_REF_LOOPS, fuse)
+        interp  = Interpreter(ref_buf)
+        interp.run()
+
+        best, status, top, instr_count, result = time_fvm_lib(lib_path, ref_buf, 1)
+
+        if (status, top) != (FVM_HALTED, interp.top()) or top != BENCH_LIB_REF_LOOPS + 1:
+            raise Exception("bench: %s program does not match Interpreter!" % ('fused' if fuse else 'unfused'))
+
+    results = [time_fvm_lib(lib_path, assemble_bench_src(bench_fuse_src % loop_count, fuse), BENCH_LIB_REPEATS) for fuse in (False, True)]
+
+    if results[0][1:3] != results[1][1:3]:
+        raise Exception("bench: fused program results do not match the unfused program!")
+
+    # the unfused program's instrs are the useful ops both programs do.
+    op_count = results[0][3]
+
+    print("loops: %d, ops: %d, best of %d  (%s)" % (loop_count, op_count, BENCH_LIB_REPEATS, lib_path))
+
+    for name, result in zip(("unfused", "fused"), results):
+        print("%-9s %.3f sec, %d dispatches, %.2f dispatches/op, %.0f ops/sec" % (name + ':', result[0], result[3], result[3] / op_count, op_count / result[0]))
+
+    print("speedup: %.2fx" % (results[0][0] / results[1][0]))
+
+def bench_imm(loop_count=BENCH_IMM_LOOPS):
+# runs bench_stack_ops_src & bench_imm_ops_src on libfvm, both are checked against
+# Interpreter & each other on a short run first.
+    lib_path = os.environ.get(FVM_LIB_ENV_VAR, default_lib_path())
+    srcs     = (bench_stack_ops_src, bench_imm_ops_src)
+
+    for src in srcs:
+        ref_buf = assemble_bench_src(src % BENCH_LIB_REF_LOOPS)
+        interp  = Interpreter(ref_buf)
+        interp.run()
+
+        best, status, top, instr_count, result = time_fvm_lib(lib_path, ref_buf, 1)
+
+        if (status, top, instr_count, result) != (FVM_HALTED, interp.top(), interp.instr_count, interp.ram_words[64 // WORDSIZE]) or top != BENCH_LIB_REF_LOOPS + 1:
+            raise Exception("bench: libfvm does not match Interpreter!")
+
+    results = [time_fvm_lib(lib_path, assemble_bench_src(src % loop_count), BENCH_LIB_REPEATS) for src in srcs]
+
+    if [result[1:3] + result[4:] for result in results[1:]] != [results[0][1:3] + results[0][4:]]:
+        raise Exception("bench: immediate op results do not match the stack op results!")
+
+    print("loops: %d, best of %d  (%s)" % (loop_count, BENCH_LIB_REPEATS, lib_path))
+
+    for name, result in zip(("stack ops", "imm ops"), results):
+        print("%-10s %.3f sec, %d dispatches, %.1f dispatches/loop" % (name + ':', result[0], result[3], result[3] / (loop_count + 1)))
+
+    print("dispatches: %.2fx fewer, speedup: %.2fx" % (results[0][3] / results[1][3], results[0][0] / results[1][0]))
+
+class LegacyLexer(Lexer):
+# Lexer.tokenize() as it was before pys_token_pattern, walking each line a char
+# at a time & building integers & identifiers by concatenation.
+
+    def __init__(self):
+        super().__init__()
+        self.col_num  = 0
+        self.line_len = 0
+        self.line_ndx = -1
+
+    def is_operator(self, char):
+        # list of operators 1st chars, used by is_operator() for detecting operators.
+        op1stchars = ['(', 
+                      ')', 
+                    '{', 
+                    '}', 
+                    '[', 
+                    ']', 
+                    '!', 
+                    '&', 
+                    '+', 
+                    '-', 
+                    '*', 
+                    '/', 
+                    '%', 
+                    '=', 
+                    '<', 
+                    '>', 
+                    ',']
+        return char in op1stchars
+
+    # Determines if the passed char is an identifier or integer string delimiter.
+    def delimiter_reached(self, char):
+        if self.line_ndx > self.line_len: return 1 # EOL.
+        if char == '\n':                  return 1 # EOL.
+        if char == ' ':                   return 2 # whitespace.
+        if char == '#':                   return 3 # comment.
+        if self.is_operator(char):        return 4 # operator.
+        return 0 # no delimiter.
+
+    def next_char_is_delim(self):
+        # check if current char is last char of the line.
+        if (self.line_ndx + 1) == self.line_len: 
+            return 1 # EOL or EOF.
+
+        next_char = self.line[self.line_ndx + 1]
+
+        if next_char == '\n':            return 1 # EOL.
+        if next_char == ' ':             return 2 # whitespace.
+        if next_char == '#':             return 3 # comment.
+        if self.is_operator(next_char):  return 4 # operator.
+
+        return 0 # no delimiter.
+
+    def valid_id_char(self, char):
+        return char.isalnum() or char == '_'
+
+    def tokenize(self, pys_file_path):
+        str_start_col = 0
+        skip_line = False
+
+        try:
+            file = open(pys_file_path, 'r')
+        except FileNotFoundError:
+            print("The file \"%s\" does not exist." % pys_file_path)
+
+        # iterate through source file lines one by one.
+        for self.line in file:
+            # skip empty lines.
+            if len(self.line) == 0: continue
+
+            self.line_len = len(self.line)
+            self.line_num += 1
+            self.line_ndx = -1
+
+            # skip empty lines.
+            #if self.line_len == 0: continue
+
+            # char processing loop.
+            # iterate through line's chars one by one, using while stmt because at times we must
+            # look one or more chars ahead ect. to process next char just continue this while stmt.
+            # when we are done with the line we just break from this while loop and the next cycle
+            # of <for line in file> executes.
+            while True:
+                self.line_ndx += 1
+
+                # for some mysterious reason this is how we must detect
+                # the EOL of the last line in the file.
+                # print(self.line_len)
+                if self.line_ndx == self.line_len: 
+                    break
+
+                # assign char we're processing to char variable.
+                char = self.line[self.line_ndx]
+
+                # deal with end of line, no idea why sometimes it's dealt with by the code below
+                # yet sometimes dealt with <if col_num > line_len: break> code above.
+                if char == '\n': break
+
+                # handle our whitespace and comments. if char is whitespace process next char.
+                if char == ' ': continue
+
+                # if char is comment the entire line is just skipped.
+                if char == '#': break
+
+                # are we dealing with an integer value?
+                if char.isdigit():
+                    num_str = char # buffer used to build multi-digit numbers(integers).
+                    str_start_col = self.line_ndx + 1 # hold the col of mumber.
+
+                    # is it a single digit number? check if next char is a delimiter.
+                    # check if we've reached end of the integer by finding a
+                    # delimiter at the next char after this current one being processed.
+                    if self.next_char_is_delim():
+                        # we have single digit int, create token then continue to next char.
+                        self.toklist.create(502, 502, self.line_num, str_start_col, char, int(num_str))
+                        continue
+
+                    # no delimiter found so we have multi-digit number, build it's string.
+                    while True:
+                        self.line_ndx += 1
+                        char = self.line[self.line_ndx]
+
+                        # check if we have an invalid char for an integer value.
+                        if not char.isdigit():
+                            raise Exception('invalid integer [%s] on line: %d col: %d' % (num_str + char, self.line_num, self.line_ndx + 1))
+
+                        # append to num string and continue building.
+                        num_str += char
+
+                        # check if we've reached end of the integer by finding a delimiter at the next 
+                        # char after this current one.
+                        if self.next_char_is_delim():
+                            # integer complete, tokenize that slut.
+                            self.toklist.create(502, 502, self.line_num, str_start_col, num_str, int(num_str))
+                            break
+
+                    # finished processing integer, so continue next iteration of char processing loop.
+                    continue
+
+                # check for all possible single char tokens before processing identifers & keywords.
+                # if found, create token and continue processing next char.
+                if char == '(':
+                    self.toklist.create(503, 11, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == ')':
+                    self.toklist.create(503, 12, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == '{':
+                    self.toklist.create(503, 13, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == '}':
+                    self.toklist.create(503, 14, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                # '!' char could be not operator or first char of not-equal operator.
+                # so we look ahead at next char to determine.
+                elif char == '!':
+                    # determine if we have not-equal operator by looking ahead to next char
+                    # and checking if it is a '=' character.
+                    if self.line[self.line_ndx + 1] == '=':
+                        self.toklist.create(503, 31, self.line_num, self.line_ndx + 1, '!=')
+                        # advance col_num past 2nd char of '!=' operator. so that next iteration of char 
+                        # processing loop is looking at the correct char.
+                        self.line_ndx += 1
+                        continue
+                    else:
+                        self.toklist.create(503, 17, self.line_num, self.line_ndx + 1, char)
+                        continue
+
+                elif char == '&':
+                    self.toklist.create(503, 18, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == '*':
+                    self.toklist.create(503, 21, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == '-':
+                    self.toklist.create(503, 20, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == '+':
+                    self.toklist.create(503, 19, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == '%':
+                    self.toklist.create(503, 23, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == "/":
+                    self.toklist.create(503, 22, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == '=':
+                    # determine if we have equal operator by looking ahead to next char
+                    # and checking if it is a '=' character.
+                    if self.line[self.line_ndx + 1] == '=':
+                        self.toklist.create(503, 30, self.line_num, self.line_ndx + 1, '==')
+                        # advance col_num past 2nd char of '==' operator. so that next iteration of char 
+                        # processing loop is looking at the correct char.
+                        self.line_ndx += 1
+                        continue
+                    else:
+                        self.toklist.create(503, 24, self.line_num, self.line_ndx + 1, char)
+                        continue
+
+                elif char == '<':
+                    # determine if we have less-than-or-equal operator by looking ahead to next char
+                    # and checking if it is a '=' character.
+                    if self.line[self.line_ndx + 1] == '=':
+                        self.toklist.create(503, 32, self.line_num, self.line_ndx + 1, '<=')
+                        # advance col_num past 2nd char of '<=' operator. so that next iteration of char 
+                        # processing loop is looking at the correct char.
+                        self.line_ndx += 1
+                        continue
+                    else:
+                        self.toklist.create(503, 27, self.line_num, self.line_ndx + 1, char)
+                        continue
+
+                elif char == '>':
+                    # determine if we have greater-than-or-equal operator by looking ahead to next char
+                    # and checking if it is a '=' character.
+                    if self.line[self.line_ndx + 1] == '=':
+                        self.toklist.create(503, 33, self.line_num, self.line_ndx + 1, '>=')
+                        # advance col_num past 2nd char of '>=' operator. so that next iteration of char 
+                        # processing loop is looking at the correct char.
+                        self.line_ndx += 1
+                        continue
+                    else:
+                        self.toklist.create(503, 28, self.line_num, self.line_ndx + 1, char)
+                        continue
+
+                elif char == '[':
+                    self.toklist.create(503, 15, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == ']':
+                    self.toklist.create(503, 16, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                elif char == ',':
+                    self.toklist.create(503, 29, self.line_num, self.line_ndx + 1, char)
+                    continue
+
+                # handle identifiers & keywords, check if char is valid starting character.
+                if self.valid_id_char(char):
+                    # we have valid start to our identifier or keyword so lets build the string.
+                    str_start_col = self.line_ndx + 1
+                    string = char
+
+                    # check if string is only one char long, no need to enter string building loop below.
+                    if self.next_char_is_delim():
+                        self.toklist.create(501, 501, self.line_num, str_start_col, string)
+                        continue # continue next iteration of char processing loop.
+                    
+                    # string building loop.
+                    while True:
+                        self.line_ndx += 1
+                        char = self.line[self.line_ndx]
+
+                        # check if char is identifier delimiter of some kind.
+                        # if so break out of string building loop and tokenize it.
+                        if self.next_char_is_delim():
+                            string += char
+                            break
+
+                        # check if char is valid identifer char then add to string
+                        if self.valid_id_char(char):
+                            string += char
+                        else:
+                            print('invalid identifier char [%s] on line: %d col: %d' % (char, self.line_num, self.line_ndx + 1))
+                            #raise Exception(s)
+
+                    # confirm the string is valid identifier or keyword before tokenization.
+                    # check if it exceeds the maximum identifier length.
+                    if len(string) > self.ID_MAXLEN:
+                        raise Exception('invalid identifier [%s] exceeds maximum length on line: %d col: %d' % (string, self.line_num, self.line_ndx + 1))
+
+                    # is the string a keyword?
+                    if string in keyword_list.keys():
+                        self.toklist.create(500, keyword_list[string], self.line_num, str_start_col, string)
+                        continue
+
+                    # string is valid identifier, tokenize it. then
+                    # continue processing next char in line
+                    self.toklist.create(501, 501, self.line_num, str_start_col, string)
+                    continue
+
+        file.close() # close .pys file we just tokenized.
+
+        # append TOKEN_STREAM_END token to signify the end of the stream.
+        # we add two of these tokens due to weirdness in the verifier design....
+        self.toklist.create(999, 999, 0, 0, '') # 999: tokstream end type+subtype code.
+        self.toklist.create(999, 999, 0, 0, '')
+
+        # Tokenization complete.
+
+# lines of .pys source cycled through by build_bench_pys_src(), %d is the line's number
+# so identifiers & integers vary. adjacent ++ & -- are left out since the legacy
+# lexer splits them in two.
+bench_pys_lines = [
+    "const LIMIT%d = 1000 # upper bound",
+    "var total%d = (count + 12) * step - 7",
+    "sub accumulate%d(x, y) {",
+    "    if (x <= y) {",
+    "        return x + y * %d",
+    "    } elif (x != y) {",
+    "        print table[%d] %% 4",
+    "    } else {",
+    "        x = -y + &slot",
+    "    }",
+    "    while (!done) {",
+    "        count = count + 1",
+    "        if (count >= LIMIT) { break }",
+    "    }",
+    "    return x / 2 == y",
+    "}"
+]
+
+class LegacyToken:
+# Token as it was before TokenList went column by column, an object per token
+# with print_str formatted as it's made.
+    def __init__(self, 
+                 _type, 
+                 subtype, 
+                 line, 
+                 col, 
+                 rawstr, 
+                 ndx, 
+                 value=None):
+        
+        self.type      = _type # master token type code.
+        self.subtype   = subtype # specifies what op, keyword ect token is.
+        self.type_set  = ((_type, subtype))
+        self.line      = line # line token is on source file.
+        self.col       = col # col token is on source file.
+        self.rawstr    = rawstr # raw string from source file, '+', 'sub', 'var_name' ect.
+        self.value     = value # used by integer tokens.
+        self.mnemonic  = token_mnemonic[subtype]
+        self.ndx       = ndx # position within token list.
+        self.print_str = self.build_print_str()
+        #self.oprcount  = operand_count_map[subtype] if _type == 503 else None
+
+    def modify(self, 
+               _type, 
+               subtype, 
+               value=None):
+        
+        self.mnemonic  = token_mnemonic[subtype]
+        self.type      = _type
+        self.subtype   = subtype
+        self.oprcount  = operand_count_map[subtype]
+        self.print_str = self.build_print_str()
+
+    def build_print_str(self):
+        if self.type == 502: # 502 = integer token code.
+            vs = 'value: <%d>' % self.value
+        else:
+            vs = ''
+
+        return '<%s> @ col %d line %d raw-string: [%s] %s index: %d | TC: %d STC: %d' % (self.mnemonic, self.col, self.line, self.rawstr, vs, self.ndx, self.type, self.subtype)
+
+    def __str__(self):
+        return self.print_str
+
+class LegacyTokenList:
+# TokenList as it was before it went column by column.
+    def __init__(self):
+        self.list = []
+        self.code_list = [] # list of tuples pairs of each token's type and subtype.
+        self.tokcount = 0
+
+    def print_token(self, ndx):
+        print(self.list[ndx])
+
+    def create(self, _type, subtype, line, col, rawstr, value=None):
+        self.list.append(LegacyToken(_type, subtype, line, col, rawstr, len(self.list), value))
+        self.code_list.append((_type, subtype))
+        self.tokcount += 1
+
+    def __str__(self):
+        string = ''
+
+        for token in self.list:
+            string += '\n\n'
+            string += token.__str__()
+
+        return string
+    
+    def __len__(self):
+        # check if last token is end of stream token, if so chop it off the len.
+        if self.list[self.tokcount - 1].type == 999:
+            return self.tokcount - 1
+        else:
+            return self.tokcount
+
+# lines of .pys source the verifier accepts, cycled through by build_bench_pys_src().
+bench_verify_lines = [
+    "const LIMIT%d = 1000 # upper bound",
+    "var total%d = (count + 12) * step - 7",
+    "sub accumulate%d(x, y) {",
+    "    x = y * %d",
+    "    if (x <= y) {",
+    "        print total + table[%d]",
+    "        while (!done) {",
+    "            if (x > 2) {",
+    "                x = -y + 2",
+    "            }",
+    "        }",
+    "    } elif (x != y) {",
+    "        x = x / 2",
+    "    } else {",
+    "        x = -y + slot",
+    "    }",
+    "    return x / 2 == y",
+    "}"
+]
+
+def build_bench_pys_src(line_count, pys_lines=bench_pys_lines):
+    lines = []
+
+    for i in range(line_count):
+        line = pys_lines[i % len(pys_lines)]
+        lines.append(line % i if '%d' in line else line.replace('%%', '%'))
+
+    return '\n'.join(lines) + '\n'
+
+class TupleTokenList(TokenList):
+# keeps each token as a tuple rather than in columns, timing a lexer with it
+# measures the lexer's own scan.
+
+    def __init__(self):
+        self.list     = []
+        self.tokcount = 0
+
+    def create(self, _type, subtype, line, col, rawstr, value=None):
+        self.list.append((_type, subtype, line, col, rawstr, value))
+        self.tokcount += 1
+
+def lexer_token_tuples(lexer):
+    toklist = lexer.toklist
+
+    if isinstance(toklist, (TupleTokenList, LegacyTokenList)):
+        return [tok if isinstance(tok, tuple) else (tok.type, tok.subtype, tok.line, tok.col, tok.rawstr, tok.value) for tok in toklist.list]
+
+    return [(toklist.types[ndx], toklist.subtypes[ndx], toklist.lines[ndx], toklist.cols[ndx], toklist.rawstr(ndx), toklist.value(ndx))
+            for ndx in range(toklist.tokcount)]
+
+def time_lexer(lexer_class, pys_path, repeats, toklist_class=TokenList):
+# returns (best sec, lexer) tokenizing pys_path with a fresh lexer_class each repeat.
+    best = None
+
+    for i in range(repeats):
+        lexer         = lexer_class()
+        lexer.toklist = toklist_class()
+        start = time.perf_counter()
+        lexer.tokenize(pys_path)
+        sec   = time.perf_counter() - start
+        best  = sec if best is None else min(best, sec)
+
+    return best, lexer
+
+def bench_lexer(line_count=BENCH_LEXER_LINES):
+# tokenizes the same .pys source with LegacyLexer & Lexer, into Token()s & then into
+# tuples to time the scan alone. the token streams must match.
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pys_path = os.path.join(tmp_dir, 'bench.pys')
+
+        with open(pys_path, 'w') as pys_file:
+            pys_file.write(build_bench_pys_src(line_count))
+
+        for toklist_class in (TokenList, TupleTokenList):
+            legacy_sec, legacy = time_lexer(LegacyLexer, pys_path, BENCH_LEXER_REPEATS, toklist_class)
+            regex_sec, lexer   = time_lexer(Lexer, pys_path, BENCH_LEXER_REPEATS, toklist_class)
+
+            if lexer_token_tuples(legacy) != lexer_token_tuples(lexer):
+                raise Exception("bench: Lexer token stream does not match LegacyLexer's!")
+
+            results.append((legacy_sec, regex_sec))
+
+    tok_count = lexer.toklist.tokcount
+
+    print("lines: %d, tokens: %d, best of %d" % (line_count, tok_count, BENCH_LEXER_REPEATS))
+
+    for name, (legacy_sec, regex_sec) in zip(("TokenList", "scan only"), results):
+        print("\n%s:" % name)
+        print("legacy char loop:  %.3f sec, %.0f tokens/sec" % (legacy_sec, tok_count / legacy_sec))
+        print("pys_token_pattern: %.3f sec, %.0f tokens/sec" % (regex_sec, tok_count / regex_sec))
+        print("speedup: %.2fx" % (legacy_sec / regex_sec))
+
+def bench_toklist(line_count=BENCH_LEXER_LINES):
+# tokenizes the same .pys source into a LegacyTokenList & a TokenList, comparing
+# time taken & memory held. the token streams must match.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pys_path = os.path.join(tmp_dir, 'bench.pys')
+
+        with open(pys_path, 'w') as pys_file:
+            pys_file.write(build_bench_pys_src(line_count))
+
+        legacy_sec, legacy = time_lexer(Lexer, pys_path, BENCH_LEXER_REPEATS, LegacyTokenList)
+        column_sec, lexer  = time_lexer(Lexer, pys_path, BENCH_LEXER_REPEATS, TokenList)
+
+        sizes = []
+
+        for toklist_class in (LegacyTokenList, TokenList):
+            tracemalloc.start()
+            sized         = Lexer()
+            sized.toklist = toklist_class()
+            sized.tokenize(pys_path)
+            sizes.append(tracemalloc.get_traced_memory()[0])
+            tracemalloc.stop()
+            del sized
+
+    if lexer_token_tuples(legacy) != lexer_token_tuples(lexer):
+        raise Exception("bench: TokenList does not match LegacyTokenList!")
+
+    tok_count = lexer.toklist.tokcount
+
+    print("lines: %d, tokens: %d, best of %d" % (line_count, tok_count, BENCH_LEXER_REPEATS))
+    print("legacy token objects: %.3f sec, %d bytes, %.1f per token" % (legacy_sec, sizes[0], sizes[0] / tok_count))
+    print("token columns:        %.3f sec, %d bytes, %.1f per token" % (column_sec, sizes[1], sizes[1] / tok_count))
+    print("speedup: %.2fx, reduction: %.1fx" % (legacy_sec / column_sec, sizes[0] / sizes[1]))
+
+
+def time_verify(pys_path, stream, trace=False):
+# returns (sec, peak bytes traced, result) lexing & verifying pys_path, read from a
+# TokenStream when stream is set & tokenized into a TokenList first when it isn't.
+# memory is only traced when trace is set since tracing slows everything down.
+    if trace:
+        tracemalloc.start()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        lexer = Lexer()
+
+        if stream:
+            toklist = lexer.stream(pys_path)
+        else:
+            lexer.tokenize(pys_path)
+            toklist = lexer.toklist
+
+        result = TokenListVerifier(toklist).verify_tokens(do_silent=True)
+        sec    = time.perf_counter() - start
+
+    peak = 0
+
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return sec, peak, result
+
+def bench_stream(line_count=BENCH_LEXER_LINES):
+# verifies sources of line_count & 4x line_count lines read from a TokenList & from a
+# TokenStream. the list's peak memory grows with the source, the stream's shouldn't.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in (line_count, line_count * 4):
+            count   -= count % len(bench_verify_lines) # whole subs only.
+            pys_path = os.path.join(tmp_dir, 'bench%d.pys' % count)
+
+            with open(pys_path, 'w') as pys_file:
+                pys_file.write(build_bench_pys_src(count, bench_verify_lines))
+
+            print("\nlines: %d" % count)
+
+            for name, stream in (("TokenList", False), ("TokenStream", True)):
+                sec, peak, result = time_verify(pys_path, stream)
+                peak              = time_verify(pys_path, stream, trace=True)[1]
+
+                if not result:
+                    raise Exception("bench: %s failed verification!" % name)
+
+                print("%-12s %.3f sec, peak %d bytes" % (name + ':', sec, peak))
+
+# repeated for the out-of-core bench, addrs, an addr macro & a forward reference so every
+# line makes debug-line entries, relocs & fixups but only two labels, the symtab stays in memory.
+bench_ooc_header = """macro A @64
+macro B 5
+main:
+"""
+
+bench_ooc_lines = """    pshfr @64
+    pshfr A
+    psh B
+    add
+    poptr @68
+    jmp end
+"""
+
+def build_bench_frt_src(line_count):
+# returns .frt source of about line_count lines made of bench_ooc_lines repeated.
+    repeats = max(1, line_count // bench_ooc_lines.count('\n'))
+    return bench_ooc_header + bench_ooc_lines * repeats + "end:\n    die\n"
+
+def assemble_peak_rss(frt_path, fbin_path, keep_symbols, out_of_core):
+# assembles frt_path & returns the peak RSS in bytes of the process, run in a worker of it's
+# own so each assembly's peak is measured apart from the others. frt_path of None assembles nothing.
+    if frt_path is not None:
+        Assembler(frt_path, fbin_path, keep_symbols=keep_symbols, show_all_ds=False, streaming=True, out_of_core=out_of_core).assemble(doSilent=True)
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # ru_maxrss is in KB on linux.
+
+def run_peak_rss(*args):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(assemble_peak_rss, *args).result()
+
+def bench_ooc(line_count=BENCH_OOC_LINES):
+# assembles sources of line_count & 4x line_count lines in out-of-core mode, with & without
+# symbols, comparing peak RSS. out-of-core mode's peak shouldn't grow with the source, with
+# symbols kept the debug-line & reloc sections are spooled rather than held. the smaller
+# source is also assembled in streaming mode, the two outputs must match.
+    base = run_peak_rss(None, None, False, False)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        peaks = {}
+
+        for count in (line_count, line_count * 4):
+            frt_path  = os.path.join(tmp_dir, 'bench%d.frt' % count)
+            fbin_path = os.path.join(tmp_dir, 'bench%d.fbin' % count)
+
+            with open(frt_path, 'w') as frt_file:
+                frt_file.write(build_bench_frt_src(count))
+
+            # symbols last so fbin_path holds the output compared against streaming mode.
+            for keep_symbols in (False, True):
+                peaks[(count, keep_symbols)] = run_peak_rss(frt_path, fbin_path, keep_symbols, True)
+
+            if count == line_count:
+                stream_path = os.path.join(tmp_dir, 'stream.fbin')
+                peaks[(count, 'stream')] = run_peak_rss(frt_path, stream_path, True, False)
+
+                with open(fbin_path, 'rb') as ooc_file, open(stream_path, 'rb') as stream_file:
+                    if ooc_file.read() != stream_file.read():
+                        raise Exception("bench: out-of-core output does not match streaming output!")
+
+    print("peak RSS above a worker that assembles nothing (%d bytes)" % base)
+    print("streaming, symbols, %d lines: %d bytes" % (line_count, peaks[(line_count, 'stream')] - base))
+
+    for keep_symbols in (True, False):
+        small = peaks[(line_count, keep_symbols)] - base
+        large = peaks[(line_count * 4, keep_symbols)] - base
+        name  = "symbols" if keep_symbols else "no symbols"
+
+        print("out-of-core, %-10s %d lines: %d bytes, %d lines: %d bytes" % (name + ',', line_count, small, line_count * 4, large))
+
+        if large - small > BENCH_OOC_RSS_SLACK:
+            raise Exception("bench: out-of-core peak RSS with %s grew %d bytes with the source!" % (name, large - small))
+
+class LegacyAstGenerator(AstGenerator):
+# AstGenerator with the shunting-yard expr builder it had before the pratt parser, which
+# copies every node it pushes onto it's operand stack & deep copies each id & int node.
+
+    def build_id_node(self, idstr):
+        id_node = ExprNode(2002)
+        id_node.val = idstr
+        return copy.deepcopy(id_node)
+
+    def build_int_node(self, intval):
+        int_node = ExprNode(2001)
+        int_node.val = intval
+        return copy.deepcopy(int_node)
+
+    def reduce_op(self, op_stack, opr_stack):
+        # pops the operator off op_stack & it's operands off opr_stack, pushing it's node back
+        # onto opr_stack. unary operators have their operand as the left node.
+        op_node_from_stack = op_stack.pop()
+
+        if op_node_from_stack.oprcount == 2:
+            op_node_from_stack.r_oprnd = opr_stack.pop()
+
+        op_node_from_stack.l_oprnd = opr_stack.pop()
+        opr_stack.append(copy.copy(op_node_from_stack))
+
+    def build_expr_node(self, expr_line, is_test_expr=False, closer=None):
+        # ARRAYS: arrays are represented by a [ op expr node, left node is identifier, right node is the index expr.
+        # builds & verifies the expr starting at the current tok, which must be on expr_line.
+        # is_test_expr: if/elif/while test exprs, which can use ! but not &.
+        # closer: set to the r-paren or r-bracket ending a sub call arg or array index expr.
+        # returns the expr's node with the current tok at the expr's last tok.
+
+        op_stack = deque() # operator stack.
+        opr_stack = deque() # operand stack.
+        expect_oprnd = True # False once an operand's been found & an operator must come next.
+        paren_depth = 0
+        assign_count = 0
+        test_expr_errmsg = 'test' if is_test_expr else ''
+
+        while True:
+            # integers & identifiers are operands, so can't follow another operand.
+            if self.tok_type == 502 or self.tok_type == 501:
+                if not expect_oprnd:
+                    raise Exception('%s %s misplaced in %s expr.' % (self.linecol_str(), 'integer' if self.tok_type == 502 else 'identifier', test_expr_errmsg))
+
+                if self.tok_type == 502:
+                    opr_stack.append(self.build_int_node(self.toklist.value(self.tokndx)))
+                else:
+                    opr_stack.append(self.build_id_expr(expr_line, is_test_expr))
+
+                expect_oprnd = False
+
+            elif self.tok_type != 503:
+                raise Exception('%s misplaced %s keyword in %s expr.' % (self.linecol_str(), rev_kw_list.get(self.tok_subtype, ''), test_expr_errmsg))
+
+            # l-paren, pushed onto the operator stack until it's r-paren is found.
+            elif self.tok_subtype == 11:
+                if not expect_oprnd:
+                    raise Exception('%s misplaced l-paren in %s expr.' % (self.linecol_str(), test_expr_errmsg))
+
+                op_stack.append(self.build_op_node(11))
+                paren_depth += 1
+
+            # r-paren, process the operator stack until reaching it's l-paren.
+            elif self.tok_subtype == 12:
+                if not paren_depth:
+                    raise Exception('%s r paren misplaced in %s expr.' % (self.linecol_str(), test_expr_errmsg))
+
+                if expect_oprnd:
+                    raise Exception('%s operand missing in %s expr.' % (self.linecol_str(), test_expr_errmsg))
+
+                while op_stack[-1].op != 11:
+                    self.reduce_op(op_stack, opr_stack)
+
+                op_stack.pop()
+                paren_depth -= 1
+
+            # operators where an operand should be are unary, + & - become unary add/sub,
+            # ! is only valid in test exprs & & isn't valid in them. unary add/sub tokens
+            # come from a toklist TokenListVerifier has already rewritten.
+            elif expect_oprnd:
+                if self.tok_subtype == 19 or self.tok_subtype == 20:
+                    op_stack.append(self.build_op_node(36 if self.tok_subtype == 19 else 37))
+
+                elif self.tok_subtype == 36 or self.tok_subtype == 37:
+                    op_stack.append(self.build_op_node(self.tok_subtype))
+
+                elif (self.tok_subtype == 17 and is_test_expr) or (self.tok_subtype == 18 and not is_test_expr):
+                    op_stack.append(self.build_op_node(self.tok_subtype))
+
+                else:
+                    raise Exception('%s misplaced %s operator in %s expr.' % (self.linecol_str(), rev_op_list[self.tok_subtype], test_expr_errmsg))
+
+            # ++ & -- apply to the operand just before them.
+            elif self.tok_subtype == 34 or self.tok_subtype == 35:
+                op_node = self.build_op_node(self.tok_subtype)
+                op_node.l_oprnd = opr_stack.pop()
+                opr_stack.append(op_node)
+
+            # binary operators, operators of higher precedence on the stack are processed first.
+            # = is right associative & can only be used once, the rest are left associative.
+            elif operand_count_map.get(self.tok_subtype) == 2 and self.tok_subtype in op_precedence:
+                if self.tok_subtype == 24:
+                    assign_count += 1
+
+                    if assign_count > 1:
+                        raise Exception('%s misplaced assignment operator' % self.linecol_str())
+
+                tok_prec = op_precedence[self.tok_subtype]
+
+                while op_stack and op_stack[-1].op != 11:
+                    stk_prec = op_precedence[op_stack[-1].op]
+
+                    if stk_prec < tok_prec or (stk_prec == tok_prec and self.tok_subtype == 24):
+                        break
+
+                    self.reduce_op(op_stack, opr_stack)
+
+                op_stack.append(self.build_op_node(self.tok_subtype))
+                expect_oprnd = True
+
+            else:
+                raise Exception('%s misplaced %s operator in %s expr.' % (self.linecol_str(), rev_op_list[self.tok_subtype], test_expr_errmsg))
+
+            if not self.next_in_expr(expr_line, None if paren_depth else closer):
+                break
+
+            self.advance_tok()
+
+        if expect_oprnd:
+            raise Exception('%s operand missing in %s expr.' % (self.linecol_str(), test_expr_errmsg))
+
+        # expr tokens have been processed into operator and operand stacks.
+        # now we will process them into nodes.
+        while op_stack:
+            if op_stack[-1].op == 11:
+                raise Exception("misplaced l-paren or missing r-paren")
+
+            self.reduce_op(op_stack, opr_stack)
+
+        # expr node has been built.
+        return opr_stack.pop()
+
+def ast_tuple(node):
+# returns node & every node under it as nested tuples, to compare asts built apart.
+    if node is None:
+        return None
+
+    if isinstance(node, StmtNode):
+        return (node.type, ast_tuple(node.id), ast_tuple(node.expr), tuple(ast_tuple(arg) for arg in node.args),
+                tuple(ast_tuple(child) for child in node.body), tuple(ast_tuple(child) for child in node.children))
+
+    return (node.type, node.op, node.oprcount, node.val, ast_tuple(node.l_oprnd), ast_tuple(node.r_oprnd),
+            tuple(ast_tuple(arg) for arg in node.args) if node.args is not None else None)
+
+def time_parse(pys_path, passes):
+# returns (sec, globlist) lexing & parsing pys_path the way passes names:
+# "verify": TokenListVerifier over a TokenList with it's debug prints, as it used to run.
+# "verify+build": TokenListVerifier then AstGenerator over the same TokenList.
+# "fused": AstGenerator alone over a TokenList.
+# "fused stream": AstGenerator alone reading a TokenStream.
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        lexer = Lexer()
+
+        if passes == "fused stream":
+            generator = AstGenerator()
+            generator.build_toklist(pys_path)
+            result = generator.build_ast(do_silent=True)
+        else:
+            lexer.tokenize(pys_path)
+            generator = AstGenerator(lexer.toklist)
+
+            if passes == "fused":
+                result = generator.build_ast(do_silent=True)
+            else:
+                result = TokenListVerifier(lexer.toklist, debug=passes == "verify").verify_tokens(do_silent=True)
+
+            if passes == "verify+build":
+                result = result and generator.build_ast(do_silent=True)
+
+        sec = time.perf_counter() - start
+
+    if not result:
+        raise Exception("bench: %s failed on the bench source!" % passes)
+
+    return sec, generator.globlist
+
+def bench_parse(line_count=BENCH_LEXER_LINES):
+# parses the same .pys source in separate verify & build passes & in AstGenerator's single
+# fused pass. the asts both build must match.
+    line_count -= line_count % len(bench_verify_lines) # whole subs only.
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pys_path = os.path.join(tmp_dir, 'bench.pys')
+
+        with open(pys_path, 'w') as pys_file:
+            pys_file.write(build_bench_pys_src(line_count, bench_verify_lines))
+
+        results = {}
+
+        for passes in ("verify", "verify+build", "fused", "fused stream"):
+            best = None
+
+            for i in range(BENCH_LEXER_REPEATS):
+                sec, globlist = time_parse(pys_path, passes)
+                best          = sec if best is None else min(best, sec)
+
+            results[passes] = (best, globlist)
+
+    two_pass_ast = [ast_tuple(node) for node in results["verify+build"][1]]
+
+    for passes in ("fused", "fused stream"):
+        if [ast_tuple(node) for node in results[passes][1]] != two_pass_ast:
+            raise Exception("bench: %s AstGenerator ast does not match the two pass ast!" % passes)
+
+    print("lines: %d, global nodes: %d, best of %d" % (line_count, len(results["fused"][1]), BENCH_LEXER_REPEATS))
+    print("tokenize + verify, debug prints: %.3f sec" % results["verify"][0])
+    print("tokenize + verify + build:       %.3f sec" % results["verify+build"][0])
+    print("fused, over TokenList:           %.3f sec" % results["fused"][0])
+    print("fused, read from TokenStream:    %.3f sec" % results["fused stream"][0])
+    print("speedup over verify + build: %.2fx TokenList, %.2fx TokenStream" % (results["verify+build"][0] / results["fused"][0],
+                                                                              results["verify+build"][0] / results["fused stream"][0]))
+
+
+# expr heavy lines of .pys source, cycled through by build_bench_pys_src().
+bench_expr_lines = [
+    "var total%d = -count + step * (limit - 2) %% table[ndx + 1]",
+    "x = f(a, b + 1, -c) < g(d) == h(e) >= %d",
+    "print a < b < c != (d == e) + %d",
+    "table[ndx * 2 + %d] = -(a - -b) / (c + table[d]) - f()",
+    "y = &slots[g(a, -1) + b] + x * y * z - %d"
+]
+
+def count_expr_nodes(node):
+# returns the number of ExprNodes in node's tree.
+    if node is None:
+        return 0
+
+    if isinstance(node, StmtNode):
+        return count_expr_nodes(node.id) + count_expr_nodes(node.expr) + sum(count_expr_nodes(child) for child in node.args) + \
+               sum(count_expr_nodes(child) for child in node.body) + sum(count_expr_nodes(child) for child in node.children)
+
+    return 1 + count_expr_nodes(node.l_oprnd) + count_expr_nodes(node.r_oprnd) + sum(count_expr_nodes(arg) for arg in node.args or ())
+
+class CountedExprNode(ExprNode):
+# ExprNode counting each one allocated, by ExprNode() or by copy/deepcopy, which both
+# make the copy through it's class's __new__.
+    alloc_count = 0
+
+    def __new__(cls, *args):
+        CountedExprNode.alloc_count += 1
+        return object.__new__(cls)
+
+def parse_allocs(generator_class, pys_path):
+# returns (ExprNodes allocated, peak bytes traced, globlist) parsing pys_path. both the
+# generators make their ExprNodes through the ExprNode global of their module, so it's
+# swapped for CountedExprNode while parsing.
+    global ExprNode
+
+    generator = generator_class()
+    generator.build_toklist(pys_path)
+
+    CountedExprNode.alloc_count = 0
+    ir_tree.ExprNode = ExprNode = CountedExprNode
+    tracemalloc.start()
+
+    try:
+        result = generator.build_ast(do_silent=True)
+        peak   = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        ir_tree.ExprNode = ExprNode = CountedExprNode.__base__
+
+    if not result:
+        raise Exception("bench: %s failed on the bench source!" % generator_class.__name__)
+
+    return CountedExprNode.alloc_count, peak, generator.globlist
+
+def bench_exprs(line_count=BENCH_LEXER_LINES):
+# parses the same expr heavy .pys source with the legacy shunting-yard expr builder & the
+# pratt parser, comparing time & ExprNodes allocated. the asts must match & the pratt
+# parser must allocate exactly the ExprNodes in it's ast.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pys_path = os.path.join(tmp_dir, 'bench.pys')
+
+        with open(pys_path, 'w') as pys_file:
+            pys_file.write(build_bench_pys_src(line_count, bench_expr_lines))
+
+        results = {}
+
+        for generator_class in (LegacyAstGenerator, AstGenerator):
+            best = None
+
+            for i in range(BENCH_LEXER_REPEATS):
+                generator = generator_class()
+                generator.build_toklist(pys_path)
+
+                start = time.perf_counter()
+                generator.build_ast(do_silent=True)
+                sec   = time.perf_counter() - start
+                best  = sec if best is None else min(best, sec)
+
+            results[generator_class] = (best,) + parse_allocs(generator_class, pys_path)
+
+    legacy_sec, legacy_allocs, legacy_peak, legacy_ast = results[LegacyAstGenerator]
+    pratt_sec, pratt_allocs, pratt_peak, pratt_ast     = results[AstGenerator]
+
+    if [ast_tuple(node) for node in legacy_ast] != [ast_tuple(node) for node in pratt_ast]:
+        raise Exception("bench: pratt parser ast does not match the shunting-yard ast!")
+
+    node_count = sum(count_expr_nodes(node) for node in pratt_ast)
+
+    if pratt_allocs != node_count:
+        raise Exception("bench: pratt parser allocated %d ExprNodes for an ast of %d!" % (pratt_allocs, node_count))
+
+    print("lines: %d, ExprNodes in ast: %d, best of %d" % (line_count, node_count, BENCH_LEXER_REPEATS))
+    print("shunting-yard: %.3f sec, %d ExprNodes allocated (%.2f per node), peak %d bytes" % (legacy_sec, legacy_allocs, legacy_allocs / node_count, legacy_peak))
+    print("pratt:         %.3f sec, %d ExprNodes allocated (%.2f per node), peak %d bytes" % (pratt_sec, pratt_allocs, pratt_allocs / node_count, pratt_peak))
+    print("speedup: %.2fx, allocations: %.2fx fewer" % (legacy_sec / pratt_sec, legacy_allocs / pratt_allocs))
+
+bench_map = {"encoders" : bench_encoders,
+             "instrbuf" : bench_instr_buffer,
+             "interp"   : bench_interpreters,
+             "batch"    : bench_batch,
+             "host"     : bench_host,
+             "stack"    : bench_stack,
+             "fuse"     : bench_fuse,
+             "imm"      : bench_imm,
+             "lexer"    : bench_lexer,
+             "toklist"  : bench_toklist,
+             "stream"   : bench_stream,
+             "ooc"      : bench_ooc,
+             "parse"    : bench_parse,
+             "exprs"    : bench_exprs}
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in bench_map:
+        print("\nbench: usage: python bench.py <%s> [count]" % '|'.join(bench_map.keys()))
+        sys.exit()
+
+    if len(sys.argv) > 2:
+        bench_map[sys.argv[1]](int(sys.argv[2]))
+    else:
+        bench_map[sys.argv[1]]()
+
+if __name__ == "__main__":
+    main()
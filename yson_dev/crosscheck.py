@@ -0,0 +1,350 @@
+import tempfile
+import random
+import sys
+import os
+
+from assembler import *
+from interpreter import *
+from fvm import *
+
+# cross-checks libfvm against Interpreter, run from the yson_dev directory:
+#     python crosscheck.py [program_count] [seed]
+#
+# libfvm is libfvm.so in the directory above yson_dev or $FVM_LIB, see fvm.py.
+#
+# the op semantics vm.c & Interpreter share are first pinned by crosscheck_semantics_cases,
+# small programs with a known result.
+#
+# each program is random & stack heavy, built from the ops vm.c & Interpreter agree on.
+# libfvm runs it once straight through & once in random sized fvm_step()s so the vm is
+# saved & reloaded between ops. status, instr_count, the work-stack & ram must match on every run, the
+# source of the first program that doesn't is written to CROSSCHECK_FAIL_PATH.
+#
+# each program is also assembled with superinstructions fused, see Assembler() fuse flag,
+# & run the same way. their code differs so only ram below it is compared, & a fused op
+# counts as one instr in vm.c so it's instr_count is left out too. Interpreter decodes
+# fused ops back into the ops they stand for so it's instr_count must still match.
+
+CROSSCHECK_PROGRAM_COUNT = 200
+CROSSCHECK_FAIL_PATH     = 'crosscheck_fail.frt'
+CROSSCHECK_MAX_DEPTH     = 48
+CROSSCHECK_MAX_STEP      = 16
+CROSSCHECK_MAX_CALL_DEPTH = 3
+
+crosscheck_ram_addrs = (64, 68, 72, 76)
+
+crosscheck_unary_ops  = ('inc', 'dec', 'incs', 'decs', 'not', 'nots')
+crosscheck_binary_ops = ('add', 'sub', 'mul', 'and', 'xor', 'or', 'lshft', 'rshft', 'lrot', 'rrot',
+                         'adds', 'subs', 'muls', 'ands', 'xors', 'ors', 'lshfts', 'rshfts', 'lrots', 'rrots')
+crosscheck_jump_ops   = ('je', 'jn', 'jl', 'jg', 'jls', 'jgs')
+crosscheck_imm_ops    = ('addi', 'subi', 'muli', 'andi', 'ori', 'xori', 'lshfti', 'rshfti')
+crosscheck_imm_jump_ops = ('jei', 'jni', 'jli', 'jgi', 'jlsi', 'jgsi')
+
+# (name, src, stack after die) pinning the op semantics listed at the top of fvm_exec() in
+# vm.c, each is run on libfvm & Interpreter before the random programs.
+crosscheck_semantics_cases = (
+    ('sub pushes top - second',   'main:\n    psh 3\n    psh 10\n    sub\n    die\n', [3, 10, 7]),
+    ('jg compares top to second', 'main:\n    psh 5\n    psh 9\n    jg l1\n    psh 0\n    die\nl1:\n    psh 1\n    die\n', [5, 9, 1]),
+    ('jl compares top to second', 'main:\n    psh 9\n    psh 5\n    jl l1\n    psh 0\n    die\nl1:\n    psh 1\n    die\n', [9, 5, 1]),
+    ('not stores its result',     'main:\n    psh 0\n    not\n    die\n', [0xFFFFFFFF]),
+    ('nots stores its result',    'main:\n    psh 5\n    nots\n    die\n', [0xFFFFFFFA]),
+    ('popn skips its operand',    'main:\n    psh 1\n    psh 2\n    psh 3\n    popn 2\n    psh 4\n    die\n', [1, 4]),
+    ('lshft count mod 32',        'main:\n    psh 33\n    psh 1\n    lshft\n    die\n', [33, 1, 2]),
+    ('rrot count mod 32',         'main:\n    psh 32\n    psh 2147483649\n    rrot\n    die\n', [32, 0x80000001, 0x80000001]),
+    ('lrot count mod 32',         'main:\n    psh 33\n    psh 2147483649\n    lrot\n    die\n', [33, 0x80000001, 3]),
+    ('muls wraps like mul',       'main:\n    psh 2\n    psh 2147483647\n    muls\n    die\n', [2, 0x7FFFFFFF, 0xFFFFFFFE]))
+
+class ProgramGen:
+# builds the source of a random program, keeping track of the stack's depth so nothing
+# pops an empty stack & each branch or loop body leaves the stack as deep as it found it.
+
+    def __init__(self, rng):
+        self.rng       = rng
+        self.lines     = []
+        self.depth     = 0
+        self.label_num  = 0
+        self.in_loop    = False
+        self.call_depth = 0
+        self.sub_lines  = [] # subroutines, put after main's die.
+
+    def new_label(self):
+        self.label_num += 1
+        return 'l%d' % self.label_num
+
+    def emit(self, line):
+        self.lines.append('    ' + line)
+
+    def gen_value(self):
+        return self.rng.choice([0, 1, 2, 7, 31, 32, 33, 0x7FFFFFFF, 0x80000000, 0xFFFFFFFF, self.rng.randrange(1 << 32)])
+
+    def gen_op(self):
+        rng  = self.rng
+        roll = rng.random()
+
+        if self.depth < 2 or (roll < 0.2 and self.depth < CROSSCHECK_MAX_DEPTH):
+            if rng.random() < 0.6:
+                self.emit('psh %d' % self.gen_value())
+            else:
+                self.emit('pshfr @%d' % rng.choice(crosscheck_ram_addrs))
+
+            self.depth += 1
+
+        elif roll < 0.55 and self.depth < CROSSCHECK_MAX_DEPTH:
+            self.emit(rng.choice(crosscheck_binary_ops))
+            self.depth += 1
+
+        elif roll < 0.65:
+            if rng.random() < 0.5:
+                self.emit(rng.choice(crosscheck_unary_ops))
+            else:
+                self.emit('%s %d' % (rng.choice(crosscheck_imm_ops), self.gen_value()))
+
+        elif roll < 0.72:
+            self.emit('poptr @%d' % rng.choice(crosscheck_ram_addrs))
+            self.depth -= 1
+
+        elif roll < 0.76:
+            self.emit('movtr @%d' % rng.choice(crosscheck_ram_addrs))
+
+        elif roll < 0.78:
+            addr = rng.choice(crosscheck_ram_addrs)
+            self.emit(rng.choice(['setr @%d %d' % (addr, self.gen_value()),
+                                  'incr @%d' % addr,
+                                  'decr @%d' % addr,
+                                  'addir @%d %d' % (addr, self.gen_value()),
+                                  'addrr @%d @%d' % (rng.choice(crosscheck_ram_addrs), addr)]))
+
+        elif roll < 0.80:
+            self.gen_counter_bump()
+
+        elif roll < 0.84:
+            count = rng.randrange(1, min(self.depth, 3) + 1)
+            self.emit(('pop', 'pop2', 'popn 3')[count - 1])
+            self.depth -= count
+
+        elif roll < 0.90:
+            self.gen_branch()
+
+        elif roll < 0.93:
+            if self.call_depth < CROSSCHECK_MAX_CALL_DEPTH:
+                self.gen_call()
+
+        elif not self.in_loop:
+            self.gen_loop()
+
+    def gen_counter_bump(self):
+    # ram[dst] = ram[src] + 1, the sequence fused into pshfr_inc_poptr.
+        self.emit('pshfr @%d' % self.rng.choice(crosscheck_ram_addrs))
+        self.emit('inc')
+        self.emit('poptr @%d' % self.rng.choice(crosscheck_ram_addrs))
+
+    def gen_block(self, op_count):
+    # ops leaving the stack as deep as it was.
+        depth = self.depth
+
+        for i in range(op_count):
+            self.gen_op()
+
+        if self.depth < depth:
+            for i in range(depth - self.depth):
+                self.emit('psh %d' % self.gen_value())
+
+        elif self.depth > depth:
+            self.emit('popn %d' % (self.depth - depth))
+
+        self.depth = depth
+
+    def gen_branch(self):
+        skip_label = self.new_label()
+
+        if self.rng.random() < 0.5:
+            self.emit('%s %s' % (self.rng.choice(crosscheck_jump_ops), skip_label))
+        else:
+            self.emit('%s %d %s' % (self.rng.choice(crosscheck_imm_jump_ops), self.gen_value(), skip_label))
+
+        self.gen_block(self.rng.randrange(1, 6))
+
+        if self.rng.random() < 0.5:
+            end_label = self.new_label()
+            self.emit('jmp %s' % end_label)
+            self.lines.append(skip_label + ':')
+            self.gen_block(self.rng.randrange(1, 6))
+            self.lines.append(end_label + ':')
+        else:
+            self.lines.append(skip_label + ':')
+
+    def gen_call(self):
+    # calls a new subroutine, each is only called from here so it's body is generated at the
+    # caller's stack depth & leaves the stack as deep. subroutines can call others in turn.
+        sub_label = self.new_label()
+        self.emit('call %s' % sub_label)
+
+        lines, in_loop = self.lines, self.in_loop
+        self.lines     = [sub_label + ':']
+        self.in_loop   = True # loop registers aren't saved across a call, so no loops in subroutines.
+        self.call_depth += 1
+
+        self.gen_block(self.rng.randrange(1, 6))
+        self.emit('ret')
+        self.sub_lines.extend(self.lines)
+
+        self.call_depth -= 1
+        self.lines, self.in_loop = lines, in_loop
+
+    def gen_loop(self):
+        body_label = self.new_label()
+        end_label  = self.new_label()
+
+        self.in_loop = True
+        self.emit('loop %d %s %s' % (self.rng.randrange(0, 20), body_label, end_label))
+        self.lines.append(body_label + ':')
+        self.gen_block(self.rng.randrange(2, 12))
+
+        if self.rng.random() < 0.2 and self.depth >= 2:
+            cont_label = self.new_label()
+            self.emit('jn %s' % cont_label)
+            self.emit('lbrk')
+            self.lines.append(cont_label + ':')
+
+        if self.rng.random() < 0.5:
+            self.gen_counter_bump()
+
+        self.emit('lcont')
+        self.lines.append(end_label + ':')
+        self.in_loop = False
+
+    def gen_program(self, op_count):
+        self.lines.append('main:')
+
+        for i in range(op_count):
+            self.gen_op()
+
+        self.emit('die')
+        return '\n'.join(self.lines + self.sub_lines) + '\n'
+
+def assemble_src(src, fuse=False):
+# returns the bytes of src assembled into a .fbin, assembled through temp files.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frt_path  = os.path.join(tmp_dir, 'crosscheck.frt')
+        fbin_path = os.path.join(tmp_dir, 'crosscheck.fbin')
+
+        with open(frt_path, 'w') as frt_file:
+            frt_file.write(src)
+
+        Assembler(frt_path, fbin_path, keep_symbols=False, show_all_ds=False, fuse=fuse).assemble(doSilent=True)
+
+        with open(fbin_path, 'rb') as fbin_file:
+            return fbin_file.read()
+
+def fvm_result(lib_path, buf, step_rng=None):
+# returns (status, instr_count, stack words, ram) after running buf on the libfvm at lib_path,
+# in random sized steps when step_rng is given.
+    with FVM(lib_path) as vm:
+        vm.load_bytes(buf)
+
+        if step_rng is None:
+            status = vm.run()
+        else:
+            status = FVM_SUSPENDED
+
+            while status in (FVM_READY, FVM_SUSPENDED):
+                status = vm.step(step_rng.randrange(1, CROSSCHECK_MAX_STEP + 1))
+
+        return (status, vm.instr_count(), list(vm.stack_words[1 : vm.sp() + 1]), bytes(vm.ram))
+
+def interpreter_result(buf):
+    interp = Interpreter(buf)
+    interp.run()
+
+    return (FVM_HALTED, interp.instr_count, list(interp.stack[1 : interp.sp + 1]), bytes(interp.ram))
+
+def check_semantics(lib_paths):
+# runs crosscheck_semantics_cases on each lib & Interpreter, returns the number of runs
+# that left the wrong stack.
+    fail_count = 0
+
+    for name, src, stack in crosscheck_semantics_cases:
+        buf     = assemble_src(src)
+        results = {lib_path: fvm_result(lib_path, buf) for lib_path in lib_paths}
+        results['Interpreter'] = interpreter_result(buf)
+
+        for runner, (status, instr_count, got, ram) in results.items():
+            if (status, got) != (FVM_HALTED, stack):
+                print("semantics: %s: %s left %s, expected %s" % (name, runner, got, stack))
+                fail_count += 1
+
+    return fail_count
+
+def crosscheck(program_count=CROSSCHECK_PROGRAM_COUNT, seed=0, lib_path=None):
+# runs program_count random programs on libfvm & Interpreter, returns the number that
+# didn't match.
+    lib_path    = lib_path or os.environ.get(FVM_LIB_ENV_VAR, default_lib_path())
+    rng         = random.Random(seed)
+    fail_count  = 0
+    instr_count = 0
+    fused_count = 0 # instrs vm.c ran of the fused programs.
+
+    semantics_fail_count = check_semantics((lib_path,))
+    print("semantics cases: %d, mismatches: %d" % (len(crosscheck_semantics_cases), semantics_fail_count))
+
+    for i in range(program_count):
+        src       = ProgramGen(rng).gen_program(rng.randrange(8, 60))
+        buf       = assemble_src(src)
+        fused_buf = assemble_src(src, fuse=True)
+
+        results = {'Interpreter'             : interpreter_result(buf),
+                   lib_path                  : fvm_result(lib_path, buf),
+                   lib_path + ' -step'       : fvm_result(lib_path, buf, rng),
+                   'Interpreter -fuse'       : interpreter_result(fused_buf),
+                   lib_path + ' -fuse'       : fvm_result(lib_path, fused_buf),
+                   lib_path + ' -step -fuse' : fvm_result(lib_path, fused_buf, rng)}
+
+        expected = results['Interpreter']
+        instr_count += expected[1]
+        fused_count += results[lib_path + ' -fuse'][1]
+
+        for name, result in results.items():
+            want = expected
+
+            if name.endswith(' -fuse'):
+                instr_count_got = result[1] if name == 'Interpreter -fuse' else expected[1]
+                result = (result[0], instr_count_got, result[2], result[3][: CODE_VADDR])
+                want   = expected[: 3] + (expected[3][: CODE_VADDR],)
+
+            if result != want:
+                fields = [field for field, got, want in zip(('status', 'instr_count', 'stack', 'ram'), result, want) if got != want]
+                print("program %d: %s differs from Interpreter in %s" % (i, name, ', '.join(fields)))
+
+                if not fail_count:
+                    with open(CROSSCHECK_FAIL_PATH, 'w') as fail_file:
+                        fail_file.write(src)
+
+                fail_count += 1
+                break
+
+    print("programs: %d, instructions: %d, mismatches: %d" % (program_count, instr_count, fail_count))
+    print("instructions run with superinstructions fused: %d (%.1f%%)" % (fused_count, 100.0 * fused_count / instr_count if instr_count else 0))
+
+    if fail_count:
+        print("first mismatching program written to %s" % CROSSCHECK_FAIL_PATH)
+
+    return fail_count + semantics_fail_count
+
+def main():
+    try:
+        program_count = int(sys.argv[1]) if len(sys.argv) > 1 else CROSSCHECK_PROGRAM_COUNT
+        seed          = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    except ValueError:
+        print("\nyson: usage: python crosscheck.py [program_count] [seed]")
+        sys.exit()
+
+    try:
+        fail_count = crosscheck(program_count, seed)
+    except Exception as e:
+        print('\n%s\n' % e)
+        sys.exit(1)
+
+    sys.exit(1 if fail_count else 0)
+
+if __name__ == "__main__":
+    main()
@@ -82,44 +82,44 @@ class Disassembler:
 
 
     def read_input_file(self):
-        read_buffer = None
+    # reads the whole input-file then walks the program's instructions using FbinReader(),
+    # so either version of .fbin can be read. the program's integers, opcodes & operands,
+    # are appended onto self.prog_list as we go.
 
-        # first read 2 bytes which should be the program starting address.
-        read_buffer = self.input_file.read(2)
-        self.bytes_read_count += 2
-
-        # attempt to write starting address to self.prog_list[0].
         try:
-            self.prog_list.append(struct.unpack('h', read_buffer)[0])
-        except struct.error:
-            print('\nError: Error when unpacking bytes from file: %s\n' % self.input_path)
+            self.bytearray = self.input_file.read()
+            self.bytes_read_count = len(self.bytearray)
 
-        # read 2 bytes(one furst-vm integer, int16_t) at a time
-        # then append them to self.prog_list as we go.
-        try:
-            while True:
-                self.bytes_read_count += 2
+        except OSError as e:
+            print("Error: An I/O error occurred while attempting to read input-file: [%s]\n    more info: %s" % (self.input_path, e))
 
-                # read 2 bytes from input file.
-                read_buffer = self.input_file.read(2)
+        # finished reading bytes from the input-file, close the file.
+        self.input_file.close()
 
-                # if read_buffer is empty break from loop.
-                if not read_buffer: break
+        reader = FbinReader(self.bytearray)
+        self.metadata.unpack_reader(reader)
 
-                # Unpack the bytes into an int16_t value
-                value = struct.unpack('h', read_buffer)[0]
+        code   = reader.code
+        offset = 0
 
-                # append value to program list.
-                self.prog_list.append(value)
+        while offset < len(code):
+            opcode = code[offset]
 
-                # build then append integer's report string to report-list.
-                self.prog_report.append("\nBytes: %d :: Addr: %d :: Value: %d" % (self.bytes_read_count, self.bytes_read_count//2-1, value))
-                
-        except struct.error:
-            print('\nError: Error when unpacking bytes from file: %s\n' % self.input_path)
+            # append opcode to program list then build & append it's report string to report-list.
+            self.prog_list.append(opcode)
+            self.prog_report.append("\nBytes: %d :: Addr: %d :: Opcode: %d (%s)" % (offset, reader.code_addr + offset, opcode, mnemonic_tbl.get(opcode, 'UNKNOWN')))
+            offset += OPCODE_SIZE
 
-        # finished reading bytes from the input-file, close the file.
-        self.input_file.close()
+            for i in range(encoder_argc_tbl.get(opcode, 0)):
+
+                if offset + WORDSIZE > len(code):
+                    raise Exception("Error: Instruction at addr: %d is truncated in file: [%s]" % (reader.code_addr + offset, self.input_path))
+
+                value = struct.unpack_from('<I', code, offset)[0]
+
+                self.prog_list.append(value)
+                self.prog_report.append("\nBytes: %d :: Addr: %d :: Value: %d" % (offset, reader.code_addr + offset, value))
+                offset += WORDSIZE
 
     def write_report(self, 
                     report_output_path=None):
@@ -157,11 +157,21 @@ class Disassembler:
         
         # iterate through prog-list interpreting each integer into it's
         # string form as they come, append each string onto self.disassembly_text
+        ndx = 0
+
+        while ndx < len(self.prog_list):
+            opcode = self.prog_list[ndx]
+            argc   = encoder_argc_tbl.get(opcode, 0)
+
+            self.disassembly_text.append(' '.join([mnemonic_tbl.get(opcode, 'UNKNOWN')] + [str(value) for value in self.prog_list[ndx + 1 : ndx + 1 + argc]]))
+            ndx += 1 + argc
 
-        class MetadataDisassembler:
+class MetadataDisassembler:
     def __init__(self, input_path=None):
         self.input_path        = input_path
+        self.version           = None
         self.start_addr        = None
+        self.prog_size         = None
         self.keep_symbols_flag = None
         self.creation_date_str = None
         self.first_instr_addr  = None
@@ -190,63 +200,20 @@ class Disassembler:
     def unpack_raw_creation_date(self):
         pass
 
-    def unpack_bytes(self, byteArray):
-    # takes a bytearray of metadata and splits it up into its parts,
-    # assigning it to this classes member attributes.
-
-        try:
-            # first 2 bytes is the start-address.
-            self.start_addr = struct.unpack(FURST_DATAFORMAT, byteArray[:2])[0]
-            self.bytes_read_count += 2
-
-            # Next 2 bytes is the FLAGS, then unpack them.
-            self.raw_flags = struct.unpack(FURST_DATAFORMAT, byteArray[2:4])[0]
-            self.bytes_read_count += 2
-            self.unpack_raw_flags()
-
-            # Next 2 bytes is the creation datestamp, then unpack it.
-            self.raw_creation_date = struct.unpack(FURST_DATAFORMAT, byteArray[4:6])[0]
-            self.bytes_read_count += 2
-            self.unpack_raw_creation_date()
-
-            # Next 2 bytes is the address of the first program instruction(not starting instruction).
-            self.first_instr_addr = struct.unpack(FURST_DATAFORMAT, byteArray[6:8])[0]
-            self.bytes_read_count += 2
-
-            # check if we have a symbol-table, if so read it.
-            if self.keep_symbols_flag:
-                # Next 2 bytes is the label-table size
-                self.label_tbl_size = struct.unpack(FURST_DATAFORMAT, byteArray[8:10])[0]
-                self.bytes_read_count += 2
-
-                # Next 2 bytes is the macro-table size
-                self.macro_tbl_size = struct.unpack(FURST_DATAFORMAT, byteArray[10:12])[0]
-                self.bytes_read_count += 2
-
-
-                # calculate total symbol-table size & instruction starting byte.
-                self.symtbl_size     = self.label_tbl_size + self.macro_tbl_size
-                self.prog_start_byte = self.symtbl_size + 12 # 12 is the metadata before symtbl.
-
-                # now use symtbl-size to create a new bytearray of just the raw symbol-table:
-                self.raw_symtbl = bytearray(byteArray[12 : self.prog_start_byte])
-                
-            # no symbol-table. so program-starting-byte is first byte
-            # after first-instr-addr metadata field.
-            else:
-                self.prog_start_byte = 8
-
-        except struct.error:
-            print('\nError: Error when unpacking bytes from file: [%s]\n' % self.input_path) 
-
-        # check the calculated program-start-byte against the first-instr-addr in file's
-        # metadata(multiplied by 2 because each addr is 2 bytes). If these do not match
-        # then the file's first-instr-addr metadata field is incorrect.
-        if (self.prog_start_byte // 2) != self.first_instr_addr:
-            raise Exception("Error: First instruction address metadata field does not line up with calculated program starting byte! in file: [%s]" % self.input_path)
-
-        # check program-start-byte against count of bytes the function just read.
-        if self.prog_start_byte != self.bytes_read_count:
-            raise Exception("Error: File's Program start byte metadata field does not match dissasembler's bytes-read-count in file: [%s]" % self.input_path)
-
-        # metadata(except raw-symtbl) dissasembly complete.
\ No newline at end of file
+    def unpack_reader(self, reader):
+    # takes a FbinReader() of the input-file and assigns it's metadata to this classes member attributes.
+
+        self.version           = reader.version
+        self.start_addr        = reader.start_addr
+        self.raw_flags         = reader.flags
+        self.raw_creation_date = reader.creation_date
+        self.first_instr_addr  = reader.code_addr
+        self.prog_size         = reader.prog_size
+        self.unpack_raw_flags()
+        self.unpack_raw_creation_date()
+
+        if reader.symtab is not None:
+            self.label_tbl_size = reader.symtab.label_count
+            self.macro_tbl_size = reader.symtab.macro_count
+            self.symtbl_size    = reader.symtab.size
+            self.raw_symtbl     = reader.symtab.view[:reader.symtab.size]
@@ -0,0 +1,285 @@
+import ctypes
+import struct
+import sys
+import os
+
+from assembler import *
+
+# ctypes binding for libfvm, the furst-vm built as a shared library, see vm.h. run from the yson_dev directory:
+#     python fvm.py prog.fbin
+#
+# build libfvm in the directory above yson_dev or point FVM_LIB_ENV_VAR at it:
+#     gcc -O2 -shared -fPIC -pthread -DFVM_LIB -o libfvm.so vm.c ram.c host.c
+#
+# FVM.ram & FVM.ram_words are memoryviews straight onto the vm's ram & FVM.stack_words
+# onto it's work-stack, nothing is copied in either direction. they're only valid until
+# the vm loads another program or is closed.
+
+FVM_LIB_NAME    = 'libfvm.so'
+FVM_LIB_ENV_VAR = 'FVM_LIB'
+
+# vm statuses, see vm.h
+FVM_READY     = 0
+FVM_SUSPENDED = 1
+FVM_HALTED    = 2
+FVM_NO_RAM    = 3
+
+fvm_status_names = {FVM_READY     : 'ready',
+                    FVM_SUSPENDED : 'suspended',
+                    FVM_HALTED    : 'halted',
+                    FVM_NO_RAM    : 'no ram'}
+
+# argtypes & restype of each libfvm function used.
+fvm_prototype_tbl = {
+    'fvm_create'           : ([], ctypes.c_void_p),
+    'fvm_destroy'          : ([ctypes.c_void_p], None),
+    'fvm_load'             : ([ctypes.c_void_p, ctypes.c_char_p], ctypes.c_int),
+    'fvm_alloc_ram'        : ([ctypes.c_void_p, ctypes.c_size_t], ctypes.c_void_p),
+    'fvm_reset'            : ([ctypes.c_void_p], None),
+    'fvm_run'              : ([ctypes.c_void_p], ctypes.c_int),
+    'fvm_step'             : ([ctypes.c_void_p, ctypes.c_uint64], ctypes.c_int),
+    'fvm_ram'              : ([ctypes.c_void_p], ctypes.c_void_p),
+    'fvm_ram_size'         : ([ctypes.c_void_p], ctypes.c_size_t),
+    'fvm_stack'            : ([ctypes.c_void_p], ctypes.c_void_p),
+    'fvm_stack_depth'      : ([ctypes.c_void_p], ctypes.c_uint32),
+    'fvm_ip'               : ([ctypes.c_void_p], ctypes.c_uint32),
+    'fvm_status'           : ([ctypes.c_void_p], ctypes.c_int),
+    'fvm_retc'             : ([ctypes.c_void_p], ctypes.c_int),
+    'fvm_instr_count'      : ([ctypes.c_void_p], ctypes.c_uint64),
+    'fvm_set_trace_level'  : ([ctypes.c_void_p, ctypes.c_int], None),
+    'fvm_host_create'      : ([], ctypes.c_void_p),
+    'fvm_host_destroy'     : ([ctypes.c_void_p], None),
+    'fvm_host_add_program' : ([ctypes.c_void_p, ctypes.c_char_p], ctypes.c_int),
+    'fvm_host_run'         : ([ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_uint64], ctypes.c_int)
+}
+
+class FvmJob(ctypes.Structure):
+# fvm_job in host.h
+    _fields_ = [('program',     ctypes.c_uint32),
+                ('status',      ctypes.c_int32),
+                ('retc',        ctypes.c_int32),
+                ('top',         ctypes.c_uint32),
+                ('stack_depth', ctypes.c_uint32),
+                ('pad',         ctypes.c_uint32),
+                ('instr_count', ctypes.c_uint64)]
+
+STACK_SIZE = 100000 # bytes, same as vm.h
+
+fvm_libs = {} # lib path -> libfvm loaded from it.
+
+def default_lib_path(lib_name=FVM_LIB_NAME):
+# returns the path of lib_name in the directory above yson_dev.
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), lib_name)
+
+def load_fvm_lib(lib_path=None):
+# returns libfvm loaded with ctypes, each lib_path is loaded once per process so builds
+# from different paths can be used side by side.
+# lib_path defaults to $FVM_LIB or libfvm.so in the directory above yson_dev.
+    if lib_path is None:
+        lib_path = os.environ.get(FVM_LIB_ENV_VAR, default_lib_path())
+
+    if lib_path in fvm_libs:
+        return fvm_libs[lib_path]
+
+    try:
+        lib = ctypes.CDLL(lib_path)
+    except OSError as e:
+        raise Exception("yson: unable to load libfvm from [%s], build it with: gcc -O2 -shared -fPIC -pthread -DFVM_LIB -o libfvm.so vm.c ram.c host.c\n    more info: %s" % (lib_path, e))
+
+    for name, (argtypes, restype) in fvm_prototype_tbl.items():
+        func          = getattr(lib, name)
+        func.argtypes = argtypes
+        func.restype  = restype
+
+    fvm_libs[lib_path] = lib
+    return lib
+
+class FVM:
+# a furst-vm of it's own inside libfvm. load a .fbin from disk with load() or from bytes,
+# eg straight from Assembler, with load_bytes(), then run() or step(). several FVMs can
+# exist at once, each is only to be used by one thread at a time.
+
+    def __init__(self, lib_path=None):
+        self.vm  = None # set first so __del__ has nothing to close if libfvm fails to load.
+        self.lib = load_fvm_lib(lib_path)
+        self.vm  = self.lib.fvm_create()
+
+        if not self.vm:
+            raise Exception("yson: fvm_create() failed to allocate a vm")
+
+        self.ram         = None
+        self.ram_words   = None
+        self.stack_words = None
+
+    def close(self):
+    # frees the vm & it's ram, views of them must not be used after.
+        if self.vm:
+            self.release_views()
+            self.lib.fvm_destroy(self.vm)
+            self.vm = None
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def release_views(self):
+        self.ram         = None
+        self.ram_words   = None
+        self.stack_words = None
+
+    def map_views(self):
+    # wraps the vm's ram & work-stack in memoryviews without copying them.
+        ram_size = self.lib.fvm_ram_size(self.vm)
+
+        self.ram         = memoryview((ctypes.c_uint8 * ram_size).from_address(self.lib.fvm_ram(self.vm))).cast('B')
+        self.ram_words   = self.ram[: ram_size & ~3].cast('I')
+        self.stack_words = memoryview((ctypes.c_uint8 * STACK_SIZE).from_address(self.lib.fvm_stack(self.vm))).cast('B').cast('I')
+
+    def load(self, fbin_path):
+    # maps a .fbin into the vm's ram with the C loader.
+        self.release_views()
+
+        if self.lib.fvm_load(self.vm, os.fsencode(fbin_path)):
+            raise Exception("yson: libfvm failed to load [%s]" % fbin_path)
+
+        self.map_views()
+
+    def load_bytes(self, buf):
+    # loads the bytes of a .fbin into fresh vm ram, laid out as the C loader would.
+        reader = FbinReader(buf)
+        self.release_views()
+
+        if not self.lib.fvm_alloc_ram(self.vm, reader.ram_size()):
+            raise Exception("yson: libfvm failed to allocate %d bytes of ram" % reader.ram_size())
+
+        self.map_views()
+
+        if reader.version == 1:
+            self.ram[: reader.code_addr + reader.prog_size] = reader.view[: reader.code_addr + reader.prog_size]
+        else:
+            self.ram[reader.code_addr : reader.code_addr + reader.prog_size] = reader.code
+            struct.pack_into('<I', self.ram, 0, reader.start_addr)
+
+        self.lib.fvm_reset(self.vm)
+
+    def reset(self):
+        self.lib.fvm_reset(self.vm)
+
+    def run(self):
+    # runs until die, returns the vm's status.
+        return self.lib.fvm_run(self.vm)
+
+    def step(self, op_count=1):
+    # runs at most op_count ops, returns FVM_SUSPENDED when die wasn't reached.
+        return self.lib.fvm_step(self.vm, op_count)
+
+    def set_trace_level(self, level):
+    # level is capped at the TRACE_MAX_LEVEL libfvm was built with, 0 unless built for tracing.
+        self.lib.fvm_set_trace_level(self.vm, level)
+
+    def status(self):
+        return self.lib.fvm_status(self.vm)
+
+    def retc(self):
+        return self.lib.fvm_retc(self.vm)
+
+    def instr_count(self):
+        return self.lib.fvm_instr_count(self.vm)
+
+    def ip(self):
+    # ram addr of the next op to execute.
+        return self.lib.fvm_ip(self.vm)
+
+    def sp(self):
+    # ndx into stack_words of the top word, 0 when the stack is empty.
+        return self.lib.fvm_stack_depth(self.vm)
+
+    def top(self):
+    # returns the word on top of the work-stack, None if it's empty.
+        sp = self.sp()
+        return self.stack_words[sp] if sp else None
+
+    def ram_array(self):
+    # returns ram as a numpy uint32 array sharing the vm's memory, needs numpy.
+        try:
+            import numpy as np
+        except ImportError:
+            raise Exception("yson: FVM.ram_array() needs numpy, install it with pip install numpy")
+
+        return np.frombuffer(self.ram_words, dtype=np.uint32)
+
+class FVMHost:
+# runs batches of programs on a pool of C threads, each with a vm of it's own, see host.h.
+# add each program once with add_program() then run() any number of jobs naming them.
+
+    def __init__(self, lib_path=None):
+        self.host          = None # set first so __del__ has nothing to close if libfvm fails to load.
+        self.lib           = load_fvm_lib(lib_path)
+        self.host          = self.lib.fvm_host_create()
+        self.program_paths = []
+
+        if not self.host:
+            raise Exception("yson: fvm_host_create() failed to allocate a host")
+
+    def close(self):
+        if self.host:
+            self.lib.fvm_host_destroy(self.host)
+            self.host = None
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_program(self, fbin_path):
+    # loads a .fbin into an image shared by every thread, returns the ndx jobs name it by.
+        program = self.lib.fvm_host_add_program(self.host, os.fsencode(fbin_path))
+
+        if program < 0:
+            raise Exception("yson: libfvm host failed to load [%s]" % fbin_path)
+
+        self.program_paths.append(fbin_path)
+        return program
+
+    def run(self, programs, thread_count=None, op_limit=0):
+    # runs a job for each program ndx in programs across thread_count threads, the number of
+    # cores by default. jobs stop after op_limit ops unless it's 0. returns the FvmJob array.
+        jobs = (FvmJob * len(programs))()
+
+        for job, program in zip(jobs, programs):
+            job.program = program
+
+        if self.lib.fvm_host_run(self.host, jobs, len(jobs), thread_count or os.cpu_count() or 1, op_limit):
+            raise Exception("yson: libfvm host failed to start any threads")
+
+        return jobs
+
+def main():
+    if len(sys.argv) < 2:
+        print("\nyson: usage: python fvm.py prog.fbin")
+        sys.exit()
+
+    with FVM() as vm:
+        try:
+            vm.load(sys.argv[1])
+        except Exception as e:
+            print('\n%s\n' % e)
+            sys.exit()
+
+        status = vm.run()
+
+        print("\nstatus: %s, retc: %d" % (fvm_status_names.get(status, status), vm.retc()))
+        print("stack[top] = %s" % vm.top())
+        print("instructions: %d" % vm.instr_count())
+
+if __name__ == "__main__":
+    main()
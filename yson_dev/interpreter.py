@@ -0,0 +1,1546 @@
+from array import array
+import itertools
+import struct
+import time
+import sys
+
+from assembler import *
+
+# pure-python reference interpreter for .fbin programs, run from the yson_dev directory:
+#     python interpreter.py prog.fbin [-ref|-closure|-jit]
+#
+# -ref runs Interpreter, -closure runs ClosureInterpreter which compiles each
+# instruction into a closure before running & -jit runs JitInterpreter which
+# compiles hot basic blocks into python source, see those classes.
+#
+# the program's code is decoded once into self.code, a flat array of opcodes each
+# followed by it's operands. addr operands naming code(jump, call & loop targets)
+# are rewritten to indexes into self.code as it's decoded so executing never has
+# to map ram addrs back to instructions. each op has a handler in the handler
+# table built by run(), a handler takes the index of it's opcode in self.code and
+# returns the index of the next op to execute.
+#
+# semantics follow eval_process() in vm.c as it's meant to work:
+#     - binary ops push (top OP second) without popping either.
+#     - inc/dec/not act on the top of the stack in place.
+#     - je/jn/jl/jg/jls/jgs compare top against second, neither is popped.
+#     - call/ret use a return stack RECUR_MAX deep.
+#     - stktr copies the stack word at byte offset src from the stack base to ram[dst],
+#       cpyr copies ram[src] to ram[dst], both as wasp.cpp does.
+#     - pshfrs pushes ram[top].
+#     - swtch is unimplemented & is an error, as is dividing by zero.
+#     - immediate ops, see imm_op_tbl, act on the top of the stack in place & their
+#       branches compare top against the immediate. incr, decr, addir & addrr only
+#       touch ram.
+#     - fused ops, see fused_seq_tbl, are decoded as the ops they stand for so
+#       instr_count counts each of those rather than the fused op.
+# test_die stops the program like die does.
+
+STACK_SIZE = 100000 # bytes, same as vm.h
+RECUR_MAX  = 0x3E8
+
+HALT_NDX  = 0 # index of the placeholder at the start of self.code, handlers return it to stop run().
+
+# opcodes the decoder appends after the program, never produced by the assembler.
+END_OPCODE      = 0xFF # executed when the program runs off the end of it's code.
+BAD_JUMP_OPCODE = 0xFE # target of jumps to addrs that aren't the start of an instruction, operand is the addr.
+NO_LOOP_OPCODE  = 0xFD # where lcont & lbrk go when no loop op has run.
+
+# dict mapping opcodes to the ndxs of their operands that are code addrs.
+code_addr_operand_tbl = {
+    optbl['call'] : (0,),
+    optbl['jmp']  : (0,),
+    optbl['je']   : (0,),
+    optbl['jn']   : (0,),
+    optbl['jl']   : (0,),
+    optbl['jg']   : (0,),
+    optbl['jls']  : (0,),
+    optbl['jgs']  : (0,),
+    optbl['loop'] : (1, 2),
+    optbl['jei']  : (1,),
+    optbl['jni']  : (1,),
+    optbl['jli']  : (1,),
+    optbl['jgi']  : (1,),
+    optbl['jlsi'] : (1,),
+    optbl['jgsi'] : (1,)
+}
+
+def decoded_argc(opcode):
+# returns the operand count of an opcode in decoded code, including the decoder's own opcodes.
+    if opcode == BAD_JUMP_OPCODE:
+        return 1
+
+    return encoder_argc_tbl.get(opcode, 0)
+
+SIGN_BIT = 0x80000000
+WORD_MOD = 0x100000000
+
+def to_signed(value):
+    return value - WORD_MOD if value & SIGN_BIT else value
+
+def trunc_div(left, right):
+# integer division truncated toward zero like C, python's // floors.
+    quotient = abs(left) // abs(right)
+    return -quotient if (left < 0) != (right < 0) else quotient
+
+def divide(left, right):
+    if not right:
+        raise Exception("yson: division by zero")
+
+    return trunc_div(left, right)
+
+def modulo(left, right):
+    if not right:
+        raise Exception("yson: division by zero")
+
+    return left - right * trunc_div(left, right)
+
+def rotate_left(left, right):
+    right &= 31
+    return (left << right) | (left >> (32 - right)) if right else left
+
+def rotate_right(left, right):
+    right &= 31
+    return (left >> right) | (left << (32 - right)) if right else left
+
+class HaltSignal(Exception):
+# raised by ClosureInterpreter's die closure to leave the main loop, that way the loop
+# doesn't have to test for halting on every instruction.
+    pass
+
+class Interpreter:
+# takes the bytes of a .fbin, loads it into ram & decodes it's code ready for run().
+# self.ram is a bytearray the size of ram the program needs rounded up to a page, see FbinReader.ram_size(),
+# self.ram_words is a memoryview of it as words for aligned accesses. self.stack is
+# the work-stack as an array of words, self.sp is the ndx of the top word. as in vm.c
+# the first push goes to ndx 1 so stack byte offsets match wstk's.
+
+    def __init__(self, buf):
+        if sys.byteorder != 'little':
+            raise Exception("yson: the interpreter's ram word view needs a little-endian host!")
+
+        self.reader       = FbinReader(buf)
+        self.ram          = bytearray(align_up(self.reader.ram_size(), PAGE_SIZE))
+        self.ram_words    = memoryview(self.ram).cast('I')
+        self.stack        = array('I', bytes(STACK_SIZE))
+        self.sp           = 0
+        self.rstk         = []
+        self.code         = array('I', [END_OPCODE])
+        self.addr_map     = {} # ram addr of each instruction -> ndx of it's opcode in self.code.
+        self.start_ndx    = None
+        self.no_loop_ndx  = None
+        self.output       = [] # lines printed by nspct & nspctst.
+        self.instr_count  = 0
+        self.elapsed      = 0.0
+
+        self.load_ram()
+        self.decode()
+
+        self.ram_image = bytes(self.ram) # ram as loaded, for reset().
+
+    def load_ram(self):
+    # v1 programs are loaded at addr 0 metadata & all, v2 programs have their code
+    # at it's vaddr and the start-addr written to addr 0, the same as the C loader.
+        reader = self.reader
+
+        if reader.version == 1:
+            self.ram[: reader.code_addr + reader.prog_size] = reader.view[: reader.code_addr + reader.prog_size]
+        else:
+            self.ram[reader.code_addr : reader.code_addr + reader.prog_size] = reader.code
+            struct.pack_into('<I', self.ram, 0, reader.start_addr)
+
+    def decode(self):
+    # walks the program's code once appending each opcode & it's operands onto self.code.
+        code      = self.code
+        view      = self.reader.code
+        code_addr = self.reader.code_addr
+        fixups    = [] # ndxs in self.code of operands holding code addrs.
+        offset    = 0
+
+        while offset < len(view):
+            opcode = view[offset]
+
+            if opcode not in opsize_tbl:
+                raise Exception("yson: unknown opcode %d at addr %d" % (opcode, code_addr + offset))
+
+            if offset + opsize_tbl[opcode] > len(view):
+                raise Exception("yson: instruction at addr %d is truncated" % (code_addr + offset))
+
+            self.addr_map[code_addr + offset] = len(code)
+            operands = struct.unpack_from('<%dI' % encoder_argc_tbl[opcode], view, offset + OPCODE_SIZE)
+
+            # fused ops are decoded as the ops they stand for, each taking it's share of the operands.
+            for component in fused_seq_tbl.get(opcode, (opcode,)):
+                argc = encoder_argc_tbl[component]
+
+                code.append(component)
+                code.extend(operands[:argc])
+                operands = operands[argc:]
+
+                for operand_ndx in code_addr_operand_tbl.get(component, ()):
+                    fixups.append(len(code) - argc + operand_ndx)
+
+            offset += opsize_tbl[opcode]
+
+        # falling off the end of the code runs into END_OPCODE.
+        self.addr_map[code_addr + offset] = len(code)
+        code.append(END_OPCODE)
+
+        self.no_loop_ndx = len(code)
+        code.append(NO_LOOP_OPCODE)
+
+        for ndx in fixups:
+            if code[ndx] not in self.addr_map:
+                self.addr_map[code[ndx]] = len(code)
+                code.extend((BAD_JUMP_OPCODE, code[ndx]))
+
+            code[ndx] = self.addr_map[code[ndx]]
+
+        start_addr = self.ram_words[0]
+
+        if start_addr not in self.addr_map:
+            raise Exception("yson: start-addr %d is not the start of an instruction" % start_addr)
+
+        self.start_ndx = self.addr_map[start_addr]
+
+    def build_handler_tbl(self):
+    # returns the handler table along with load_regs() & store_regs(). the handlers share
+    # the registers sp, lc(loop-counter), lb(loop-body) & le(loop-end) as closure variables,
+    # load_regs() returns them as a tuple & store_regs() overwrites them.
+        code      = self.code
+        stack     = self.stack
+        ram       = self.ram
+        ram_words = self.ram_words
+        rstk      = self.rstk
+        output    = self.output
+        sp        = self.sp
+        lc        = 0
+        lb        = self.no_loop_ndx
+        le        = self.no_loop_ndx
+
+        def read_word(addr):
+            return ram_words[addr >> 2] if not addr & 3 else struct.unpack_from('<I', ram, addr)[0]
+
+        def write_word(addr, value):
+            if addr & 3:
+                struct.pack_into('<I', ram, addr, value)
+            else:
+                ram_words[addr >> 2] = value
+
+        def check_pop(count):
+            if count > sp:
+                raise Exception("yson: work-stack underflow")
+
+        def op_die(pc):
+            return HALT_NDX
+
+        def op_nop(pc):
+            return pc + 1
+
+        def op_nspct(pc):
+            addr = code[pc + 1]
+            output.append("ram[%u] (uint32) = %u" % (addr, read_word(addr)))
+            return pc + 2
+
+        def op_nspctst(pc):
+            offset = code[pc + 1] >> 2
+            output.append("wstk[%u] (uint32) = %u" % (code[pc + 1], stack[sp - offset]))
+            return pc + 2
+
+        def op_call(pc):
+            if len(rstk) == RECUR_MAX:
+                raise Exception("yson: return-stack overflow, calls nested deeper than %d" % RECUR_MAX)
+
+            rstk.append(pc + 2)
+            return code[pc + 1]
+
+        def op_ret(pc):
+            if not rstk:
+                raise Exception("yson: ret with an empty return-stack")
+
+            return rstk.pop()
+
+        def op_swtch(pc):
+            raise Exception("yson: swtch is unimplemented")
+
+        def op_jmp(pc):
+            return code[pc + 1]
+
+        def op_je(pc):
+            return code[pc + 1] if stack[sp] == stack[sp - 1] else pc + 2
+
+        def op_jn(pc):
+            return code[pc + 1] if stack[sp] != stack[sp - 1] else pc + 2
+
+        def op_jl(pc):
+            return code[pc + 1] if stack[sp] < stack[sp - 1] else pc + 2
+
+        def op_jg(pc):
+            return code[pc + 1] if stack[sp] > stack[sp - 1] else pc + 2
+
+        def op_jls(pc):
+            return code[pc + 1] if to_signed(stack[sp]) < to_signed(stack[sp - 1]) else pc + 2
+
+        def op_jgs(pc):
+            return code[pc + 1] if to_signed(stack[sp]) > to_signed(stack[sp - 1]) else pc + 2
+
+        def op_loop(pc):
+            nonlocal lc, lb, le
+            lc = code[pc + 1]
+            lb = code[pc + 2]
+            le = code[pc + 3]
+            return pc + 4
+
+        def op_lcont(pc):
+            nonlocal lc
+
+            if lc:
+                lc -= 1
+                return lb
+
+            return le
+
+        def op_lbrk(pc):
+            return le
+
+        def op_psh(pc):
+            nonlocal sp
+            sp += 1
+            stack[sp] = code[pc + 1]
+            return pc + 2
+
+        def op_pop(pc):
+            nonlocal sp
+            check_pop(1)
+            sp -= 1
+            return pc + 1
+
+        def op_pop2(pc):
+            nonlocal sp
+            check_pop(2)
+            sp -= 2
+            return pc + 1
+
+        def op_popn(pc):
+            nonlocal sp
+            check_pop(code[pc + 1])
+            sp -= code[pc + 1]
+            return pc + 2
+
+        def op_pshfr(pc):
+            nonlocal sp
+            sp += 1
+            stack[sp] = read_word(code[pc + 1])
+            return pc + 2
+
+        def op_poptr(pc):
+            nonlocal sp
+            check_pop(1)
+            write_word(code[pc + 1], stack[sp])
+            sp -= 1
+            return pc + 2
+
+        def op_movtr(pc):
+            write_word(code[pc + 1], stack[sp])
+            return pc + 2
+
+        def op_stktr(pc):
+            write_word(code[pc + 2], stack[code[pc + 1] >> 2])
+            return pc + 3
+
+        def op_cpyr(pc):
+            write_word(code[pc + 2], read_word(code[pc + 1]))
+            return pc + 3
+
+        def op_setr(pc):
+            write_word(code[pc + 1], code[pc + 2])
+            return pc + 3
+
+        def op_pshfrr(pc):
+            nonlocal sp
+            sp += 1
+            stack[sp] = read_word(read_word(code[pc + 1]))
+            return pc + 2
+
+        def op_pshfrs(pc):
+            nonlocal sp
+            sp += 1
+            stack[sp] = read_word(stack[sp - 1])
+            return pc + 2
+
+        def op_inc(pc):
+            stack[sp] = (stack[sp] + 1) & WORD_MASK
+            return pc + 1
+
+        def op_dec(pc):
+            stack[sp] = (stack[sp] - 1) & WORD_MASK
+            return pc + 1
+
+        def op_not(pc):
+            stack[sp] = ~stack[sp] & WORD_MASK
+            return pc + 1
+
+        def binary_op(func):
+        # returns handler pushing func(top, second) masked to a word.
+            def handler(pc):
+                nonlocal sp
+                sp += 1
+                stack[sp] = func(stack[sp - 1], stack[sp - 2]) & WORD_MASK
+                return pc + 1
+
+            return handler
+
+        def signed_binary_op(func):
+        # returns handler pushing func(top, second) with both as signed ints.
+            def handler(pc):
+                nonlocal sp
+                sp += 1
+                stack[sp] = func(to_signed(stack[sp - 1]), to_signed(stack[sp - 2])) & WORD_MASK
+                return pc + 1
+
+            return handler
+
+        def imm_op(func):
+        # returns handler replacing top with func(top, immediate) masked to a word.
+            def handler(pc):
+                stack[sp] = func(stack[sp], code[pc + 1]) & WORD_MASK
+                return pc + 2
+
+            return handler
+
+        def imm_branch_op(func):
+        # returns handler jumping to it's second operand when func(top, immediate) holds.
+            def handler(pc):
+                return code[pc + 2] if func(stack[sp], code[pc + 1]) else pc + 3
+
+            return handler
+
+        def op_incr(pc):
+            write_word(code[pc + 1], (read_word(code[pc + 1]) + 1) & WORD_MASK)
+            return pc + 2
+
+        def op_decr(pc):
+            write_word(code[pc + 1], (read_word(code[pc + 1]) - 1) & WORD_MASK)
+            return pc + 2
+
+        def op_addir(pc):
+            write_word(code[pc + 1], (read_word(code[pc + 1]) + code[pc + 2]) & WORD_MASK)
+            return pc + 3
+
+        def op_addrr(pc):
+            write_word(code[pc + 2], (read_word(code[pc + 2]) + read_word(code[pc + 1])) & WORD_MASK)
+            return pc + 3
+
+        def op_end(pc):
+            raise Exception("yson: program ran off the end of it's code without a die op")
+
+        def op_bad_jump(pc):
+            raise Exception("yson: jump to addr %d which is not the start of an instruction" % code[pc + 1])
+
+        def op_no_loop(pc):
+            raise Exception("yson: lcont or lbrk executed before any loop op")
+
+        def op_unknown(pc):
+            raise Exception("INTERNAL ERROR: no handler for opcode %d!" % code[pc])
+
+        handler_tbl = [op_unknown] * 0x100
+
+        for mnemonic, handler in (('die',      op_die),
+                                  ('nop',      op_nop),
+                                  ('nspct',    op_nspct),
+                                  ('nspctst',  op_nspctst),
+                                  ('test_die', op_die),
+                                  ('call',     op_call),
+                                  ('ret',      op_ret),
+                                  ('swtch',    op_swtch),
+                                  ('jmp',      op_jmp),
+                                  ('je',       op_je),
+                                  ('jn',       op_jn),
+                                  ('jl',       op_jl),
+                                  ('jg',       op_jg),
+                                  ('jls',      op_jls),
+                                  ('jgs',      op_jgs),
+                                  ('loop',     op_loop),
+                                  ('lcont',    op_lcont),
+                                  ('lbrk',     op_lbrk),
+                                  ('psh',      op_psh),
+                                  ('pop',      op_pop),
+                                  ('pop2',     op_pop2),
+                                  ('popn',     op_popn),
+                                  ('pshfr',    op_pshfr),
+                                  ('poptr',    op_poptr),
+                                  ('movtr',    op_movtr),
+                                  ('stktr',    op_stktr),
+                                  ('cpyr',     op_cpyr),
+                                  ('setr',     op_setr),
+                                  ('pshfrr',   op_pshfrr),
+                                  ('pshfrs',   op_pshfrs),
+                                  ('inc',      op_inc),
+                                  ('dec',      op_dec),
+                                  ('add',      binary_op(lambda l, r: l + r)),
+                                  ('sub',      binary_op(lambda l, r: l - r)),
+                                  ('mul',      binary_op(lambda l, r: l * r)),
+                                  ('div',      binary_op(divide)),
+                                  ('mod',      binary_op(modulo)),
+                                  ('incs',     op_inc),
+                                  ('decs',     op_dec),
+                                  ('adds',     signed_binary_op(lambda l, r: l + r)),
+                                  ('subs',     signed_binary_op(lambda l, r: l - r)),
+                                  ('muls',     signed_binary_op(lambda l, r: l * r)),
+                                  ('divs',     signed_binary_op(divide)),
+                                  ('mods',     signed_binary_op(modulo)),
+                                  ('and',      binary_op(lambda l, r: l & r)),
+                                  ('not',      op_not),
+                                  ('xor',      binary_op(lambda l, r: l ^ r)),
+                                  ('or',       binary_op(lambda l, r: l | r)),
+                                  ('lshft',    binary_op(lambda l, r: l << (r & 31))),
+                                  ('rshft',    binary_op(lambda l, r: l >> (r & 31))),
+                                  ('lrot',     binary_op(rotate_left)),
+                                  ('rrot',     binary_op(rotate_right)),
+                                  ('ands',     binary_op(lambda l, r: l & r)),
+                                  ('nots',     op_not),
+                                  ('xors',     binary_op(lambda l, r: l ^ r)),
+                                  ('ors',      binary_op(lambda l, r: l | r)),
+                                  ('lshfts',   binary_op(lambda l, r: l << (r & 31))),
+                                  ('rshfts',   signed_binary_op(lambda l, r: l >> (r & 31))),
+                                  ('lrots',    binary_op(rotate_left)),
+                                  ('rrots',    binary_op(rotate_right)),
+                                  ('addi',     imm_op(lambda l, r: l + r)),
+                                  ('subi',     imm_op(lambda l, r: l - r)),
+                                  ('muli',     imm_op(lambda l, r: l * r)),
+                                  ('andi',     imm_op(lambda l, r: l & r)),
+                                  ('ori',      imm_op(lambda l, r: l | r)),
+                                  ('xori',     imm_op(lambda l, r: l ^ r)),
+                                  ('lshfti',   imm_op(lambda l, r: l << (r & 31))),
+                                  ('rshfti',   imm_op(lambda l, r: l >> (r & 31))),
+                                  ('incr',     op_incr),
+                                  ('decr',     op_decr),
+                                  ('addir',    op_addir),
+                                  ('addrr',    op_addrr),
+                                  ('jei',      imm_branch_op(lambda l, r: l == r)),
+                                  ('jni',      imm_branch_op(lambda l, r: l != r)),
+                                  ('jli',      imm_branch_op(lambda l, r: l < r)),
+                                  ('jgi',      imm_branch_op(lambda l, r: l > r)),
+                                  ('jlsi',     imm_branch_op(lambda l, r: to_signed(l) < to_signed(r))),
+                                  ('jgsi',     imm_branch_op(lambda l, r: to_signed(l) > to_signed(r)))):
+            handler_tbl[optbl[mnemonic]] = handler
+
+        handler_tbl[END_OPCODE]      = op_end
+        handler_tbl[BAD_JUMP_OPCODE] = op_bad_jump
+        handler_tbl[NO_LOOP_OPCODE]  = op_no_loop
+
+        def load_regs():
+            return sp, lc, lb, le
+
+        def store_regs(new_sp, new_lc, new_lb, new_le):
+            nonlocal sp, lc, lb, le
+            sp, lc, lb, le = new_sp, new_lc, new_lb, new_le
+
+        return handler_tbl, load_regs, store_regs
+
+    def run(self, max_instrs=None):
+    # runs the program from it's start-addr until die or test_die, returns the number
+    # of instructions executed. errors raise an exception naming the op's addr, as does
+    # running max_instrs instructions without reaching die, see check_instr_limit().
+        code = self.code
+        handler_tbl, load_regs, store_regs = self.build_handler_tbl()
+
+        pc    = self.start_ndx
+        count = 0
+        limit = sys.maxsize if max_instrs is None else max_instrs
+        start = time.perf_counter()
+
+        try:
+            while pc and count < limit:
+                pc = handler_tbl[code[pc]](pc)
+                count += 1
+
+        except (IndexError, struct.error):
+            raise Exception("yson: out of range ram or work-stack access by %s at instr %d" % (mnemonic_tbl.get(code[pc], 'UNKNOWN'), count))
+
+        finally:
+            self.elapsed     = time.perf_counter() - start
+            self.instr_count = count
+            self.sp          = load_regs()[0]
+
+        self.check_instr_limit(pc, max_instrs)
+        return count
+
+    def check_instr_limit(self, pc, max_instrs):
+    # run() stops with pc still pointing at an op only once max_instrs have run.
+        if pc:
+            raise Exception("yson: instruction limit of %d reached without die, stopped at %d instrs" % (max_instrs, self.instr_count))
+
+    def reset(self):
+    # puts ram, the stacks & output back how they were after loading so the program can be
+    # run again without decoding it again. ram & the stacks are reset in place since
+    # handlers & compiled blocks hold on to them.
+        self.ram[:]   = self.ram_image
+        self.stack[:] = array('I', bytes(STACK_SIZE))
+        self.sp       = 0
+
+        del self.rstk[:]
+        del self.output[:]
+
+        self.instr_count = 0
+        self.elapsed     = 0.0
+
+    def top(self):
+    # returns the word on top of the work-stack, None if it's empty.
+        return self.stack[self.sp] if self.sp else None
+
+class ClosureInterpreter(Interpreter):
+# closure-compiled execution mode. run() turns each decoded instruction into a python
+# closure specialised for it, operands & the ndx of it's successor are bound as free
+# variables when it's built so executing an op is a single call returning the ndx of
+# the next op, the main loop is just pc = ops[pc](). ops is indexed like self.code,
+# an op's closure sits at the ndx of it's opcode & the operand slots hold None.
+# semantics are exactly Interpreter's, see the top of this file.
+
+    def run(self, max_instrs=None):
+        code      = self.code
+        stack     = self.stack
+        ram       = self.ram
+        ram_words = self.ram_words
+        rstk      = self.rstk
+        output    = self.output
+        sp        = self.sp
+        lc        = 0
+        lb        = self.no_loop_ndx
+        le        = self.no_loop_ndx
+
+        def read_word(addr):
+            return ram_words[addr >> 2] if not addr & 3 else struct.unpack_from('<I', ram, addr)[0]
+
+        def write_word(addr, value):
+            if addr & 3:
+                struct.pack_into('<I', ram, addr, value)
+            else:
+                ram_words[addr >> 2] = value
+
+        def check_pop(count):
+            if count > sp:
+                raise Exception("yson: work-stack underflow")
+
+        # each make_xx() takes the op's operands & the ndx of the op after it in code order.
+        def make_die(nxt):
+            def op(): raise HaltSignal()
+            return op
+
+        def make_nop(nxt):
+            def op(): return nxt
+            return op
+
+        def make_nspct(addr, nxt):
+            def op():
+                output.append("ram[%u] (uint32) = %u" % (addr, read_word(addr)))
+                return nxt
+            return op
+
+        def make_nspctst(offset, nxt):
+            def op():
+                output.append("wstk[%u] (uint32) = %u" % (offset, stack[sp - (offset >> 2)]))
+                return nxt
+            return op
+
+        def make_call(target, nxt):
+            def op():
+                if len(rstk) == RECUR_MAX:
+                    raise Exception("yson: return-stack overflow, calls nested deeper than %d" % RECUR_MAX)
+
+                rstk.append(nxt)
+                return target
+            return op
+
+        def make_ret(nxt):
+            def op():
+                if not rstk:
+                    raise Exception("yson: ret with an empty return-stack")
+
+                return rstk.pop()
+            return op
+
+        def make_swtch(nxt):
+            def op(): raise Exception("yson: swtch is unimplemented")
+            return op
+
+        def make_jmp(target, nxt):
+            def op(): return target
+            return op
+
+        def make_je(target, nxt):
+            def op(): return target if stack[sp] == stack[sp - 1] else nxt
+            return op
+
+        def make_jn(target, nxt):
+            def op(): return target if stack[sp] != stack[sp - 1] else nxt
+            return op
+
+        def make_jl(target, nxt):
+            def op(): return target if stack[sp] < stack[sp - 1] else nxt
+            return op
+
+        def make_jg(target, nxt):
+            def op(): return target if stack[sp] > stack[sp - 1] else nxt
+            return op
+
+        def make_jls(target, nxt):
+            def op(): return target if to_signed(stack[sp]) < to_signed(stack[sp - 1]) else nxt
+            return op
+
+        def make_jgs(target, nxt):
+            def op(): return target if to_signed(stack[sp]) > to_signed(stack[sp - 1]) else nxt
+            return op
+
+        def make_loop(count, body, end, nxt):
+            def op():
+                nonlocal lc, lb, le
+                lc = count
+                lb = body
+                le = end
+                return nxt
+            return op
+
+        def make_lcont(nxt):
+            def op():
+                nonlocal lc
+
+                if lc:
+                    lc -= 1
+                    return lb
+
+                return le
+            return op
+
+        def make_lbrk(nxt):
+            def op(): return le
+            return op
+
+        def make_psh(value, nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = value
+                return nxt
+            return op
+
+        def make_popn(count, nxt):
+            def op():
+                nonlocal sp
+                check_pop(count)
+                sp -= count
+                return nxt
+            return op
+
+        def make_pshfr(addr, nxt):
+            if addr & 3:
+                def op():
+                    nonlocal sp
+                    sp += 1
+                    stack[sp] = read_word(addr)
+                    return nxt
+            else:
+                word_ndx = addr >> 2
+
+                def op():
+                    nonlocal sp
+                    sp += 1
+                    stack[sp] = ram_words[word_ndx]
+                    return nxt
+            return op
+
+        def make_poptr(addr, nxt):
+            if addr & 3:
+                def op():
+                    nonlocal sp
+                    check_pop(1)
+                    write_word(addr, stack[sp])
+                    sp -= 1
+                    return nxt
+            else:
+                word_ndx = addr >> 2
+
+                def op():
+                    nonlocal sp
+                    check_pop(1)
+                    ram_words[word_ndx] = stack[sp]
+                    sp -= 1
+                    return nxt
+            return op
+
+        def make_movtr(addr, nxt):
+            def op():
+                write_word(addr, stack[sp])
+                return nxt
+            return op
+
+        def make_stktr(src, dst, nxt):
+            def op():
+                write_word(dst, stack[src >> 2])
+                return nxt
+            return op
+
+        def make_cpyr(src, dst, nxt):
+            def op():
+                write_word(dst, read_word(src))
+                return nxt
+            return op
+
+        def make_setr(addr, value, nxt):
+            def op():
+                write_word(addr, value)
+                return nxt
+            return op
+
+        def make_pshfrr(addr, nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = read_word(read_word(addr))
+                return nxt
+            return op
+
+        def make_pshfrs(unused, nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = read_word(stack[sp - 1])
+                return nxt
+            return op
+
+        def make_inc(nxt):
+            def op():
+                stack[sp] = (stack[sp] + 1) & WORD_MASK
+                return nxt
+            return op
+
+        def make_dec(nxt):
+            def op():
+                stack[sp] = (stack[sp] - 1) & WORD_MASK
+                return nxt
+            return op
+
+        def make_not(nxt):
+            def op():
+                stack[sp] = ~stack[sp] & WORD_MASK
+                return nxt
+            return op
+
+        # the common binary ops are written out so they cost a single call.
+        def make_add(nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = (stack[sp - 1] + stack[sp - 2]) & WORD_MASK
+                return nxt
+            return op
+
+        def make_sub(nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = (stack[sp - 1] - stack[sp - 2]) & WORD_MASK
+                return nxt
+            return op
+
+        def make_mul(nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = (stack[sp - 1] * stack[sp - 2]) & WORD_MASK
+                return nxt
+            return op
+
+        def make_and(nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = stack[sp - 1] & stack[sp - 2]
+                return nxt
+            return op
+
+        def make_xor(nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = stack[sp - 1] ^ stack[sp - 2]
+                return nxt
+            return op
+
+        def make_or(nxt):
+            def op():
+                nonlocal sp
+                sp += 1
+                stack[sp] = stack[sp - 1] | stack[sp - 2]
+                return nxt
+            return op
+
+        def make_binary(func):
+        # returns a make_xx() for the rarer binary ops, they call func(top, second).
+            def make(nxt):
+                def op():
+                    nonlocal sp
+                    sp += 1
+                    stack[sp] = func(stack[sp - 1], stack[sp - 2]) & WORD_MASK
+                    return nxt
+                return op
+            return make
+
+        def make_signed_binary(func):
+            def make(nxt):
+                def op():
+                    nonlocal sp
+                    sp += 1
+                    stack[sp] = func(to_signed(stack[sp - 1]), to_signed(stack[sp - 2])) & WORD_MASK
+                    return nxt
+                return op
+            return make
+
+        def make_imm(func):
+        # returns a make_xx() for the immediate ops, they replace top with func(top, imm).
+            def make(imm, nxt):
+                def op():
+                    stack[sp] = func(stack[sp], imm) & WORD_MASK
+                    return nxt
+                return op
+            return make
+
+        def make_imm_branch(func):
+            def make(imm, target, nxt):
+                def op(): return target if func(stack[sp], imm) else nxt
+                return op
+            return make
+
+        def make_addir(addr, value, nxt):
+            def op():
+                write_word(addr, (read_word(addr) + value) & WORD_MASK)
+                return nxt
+            return op
+
+        def make_addrr(src, dst, nxt):
+            def op():
+                write_word(dst, (read_word(dst) + read_word(src)) & WORD_MASK)
+                return nxt
+            return op
+
+        def make_end(nxt):
+            def op(): raise Exception("yson: program ran off the end of it's code without a die op")
+            return op
+
+        def make_bad_jump(addr, nxt):
+            def op(): raise Exception("yson: jump to addr %d which is not the start of an instruction" % addr)
+            return op
+
+        def make_no_loop(nxt):
+            def op(): raise Exception("yson: lcont or lbrk executed before any loop op")
+            return op
+
+        # adds, subs & muls share the unsigned closures, the low 32 bits of the result are the same either way.
+        make_tbl = {
+            optbl['die']      : make_die,
+            optbl['nop']      : make_nop,
+            optbl['nspct']    : make_nspct,
+            optbl['nspctst']  : make_nspctst,
+            optbl['test_die'] : make_die,
+            optbl['call']     : make_call,
+            optbl['ret']      : make_ret,
+            optbl['swtch']    : make_swtch,
+            optbl['jmp']      : make_jmp,
+            optbl['je']       : make_je,
+            optbl['jn']       : make_jn,
+            optbl['jl']       : make_jl,
+            optbl['jg']       : make_jg,
+            optbl['jls']      : make_jls,
+            optbl['jgs']      : make_jgs,
+            optbl['loop']     : make_loop,
+            optbl['lcont']    : make_lcont,
+            optbl['lbrk']     : make_lbrk,
+            optbl['psh']      : make_psh,
+            optbl['pop']      : lambda nxt: make_popn(1, nxt),
+            optbl['pop2']     : lambda nxt: make_popn(2, nxt),
+            optbl['popn']     : make_popn,
+            optbl['pshfr']    : make_pshfr,
+            optbl['poptr']    : make_poptr,
+            optbl['movtr']    : make_movtr,
+            optbl['stktr']    : make_stktr,
+            optbl['cpyr']     : make_cpyr,
+            optbl['setr']     : make_setr,
+            optbl['pshfrr']   : make_pshfrr,
+            optbl['pshfrs']   : make_pshfrs,
+            optbl['inc']      : make_inc,
+            optbl['dec']      : make_dec,
+            optbl['add']      : make_add,
+            optbl['sub']      : make_sub,
+            optbl['mul']      : make_mul,
+            optbl['div']      : make_binary(divide),
+            optbl['mod']      : make_binary(modulo),
+            optbl['incs']     : make_inc,
+            optbl['decs']     : make_dec,
+            optbl['adds']     : make_add,
+            optbl['subs']     : make_sub,
+            optbl['muls']     : make_mul,
+            optbl['divs']     : make_signed_binary(divide),
+            optbl['mods']     : make_signed_binary(modulo),
+            optbl['and']      : make_and,
+            optbl['not']      : make_not,
+            optbl['xor']      : make_xor,
+            optbl['or']       : make_or,
+            optbl['lshft']    : make_binary(lambda l, r: l << (r & 31)),
+            optbl['rshft']    : make_binary(lambda l, r: l >> (r & 31)),
+            optbl['lrot']     : make_binary(rotate_left),
+            optbl['rrot']     : make_binary(rotate_right),
+            optbl['ands']     : make_and,
+            optbl['nots']     : make_not,
+            optbl['xors']     : make_xor,
+            optbl['ors']      : make_or,
+            optbl['lshfts']   : make_binary(lambda l, r: l << (r & 31)),
+            optbl['rshfts']   : make_signed_binary(lambda l, r: l >> (r & 31)),
+            optbl['lrots']    : make_binary(rotate_left),
+            optbl['rrots']    : make_binary(rotate_right),
+            optbl['addi']     : make_imm(lambda l, r: l + r),
+            optbl['subi']     : make_imm(lambda l, r: l - r),
+            optbl['muli']     : make_imm(lambda l, r: l * r),
+            optbl['andi']     : make_imm(lambda l, r: l & r),
+            optbl['ori']      : make_imm(lambda l, r: l | r),
+            optbl['xori']     : make_imm(lambda l, r: l ^ r),
+            optbl['lshfti']   : make_imm(lambda l, r: l << (r & 31)),
+            optbl['rshfti']   : make_imm(lambda l, r: l >> (r & 31)),
+            optbl['incr']     : lambda addr, nxt: make_addir(addr, 1, nxt),
+            optbl['decr']     : lambda addr, nxt: make_addir(addr, WORD_MASK, nxt),
+            optbl['addir']    : make_addir,
+            optbl['addrr']    : make_addrr,
+            optbl['jei']      : make_imm_branch(lambda l, r: l == r),
+            optbl['jni']      : make_imm_branch(lambda l, r: l != r),
+            optbl['jli']      : make_imm_branch(lambda l, r: l < r),
+            optbl['jgi']      : make_imm_branch(lambda l, r: l > r),
+            optbl['jlsi']     : make_imm_branch(lambda l, r: to_signed(l) < to_signed(r)),
+            optbl['jgsi']     : make_imm_branch(lambda l, r: to_signed(l) > to_signed(r)),
+            END_OPCODE        : make_end,
+            BAD_JUMP_OPCODE   : make_bad_jump,
+            NO_LOOP_OPCODE    : make_no_loop
+        }
+
+        # compile each instruction into it's closure, ops[0] stays None as HALT_NDX.
+        ops = [None] * len(code)
+        ndx = 1
+
+        while ndx < len(code):
+            opcode   = code[ndx]
+            nxt      = ndx + 1 + decoded_argc(opcode)
+            ops[ndx] = make_tbl[opcode](*code[ndx + 1 : nxt], nxt)
+            ndx      = nxt
+
+        pc    = self.start_ndx
+        count = 0
+        start = time.perf_counter()
+
+        # the loop counts instructions for free, die raises HaltSignal to stop it. when an op
+        # fails count includes it, it's taken off so instr_count matches Interpreter's. the
+        # loop only runs out by itself once max_instrs have run, pc is left on the next op.
+        halted  = False
+        limited = False
+        counter = itertools.count(1) if max_instrs is None else range(1, max_instrs + 1)
+
+        try:
+            for count in counter:
+                pc = ops[pc]()
+
+            limited = True
+
+        except HaltSignal:
+            halted = True
+            pc     = HALT_NDX
+
+        except (IndexError, struct.error):
+            raise Exception("yson: out of range ram or work-stack access by %s at instr %d" % (mnemonic_tbl.get(code[pc], 'UNKNOWN'), count - 1))
+
+        finally:
+            self.elapsed     = time.perf_counter() - start
+            self.instr_count = count if halted or limited else count - 1
+            self.sp          = sp
+
+        self.check_instr_limit(pc, max_instrs)
+        return count
+
+JIT_THRESHOLD = 50 # times a block is entered before JitInterpreter compiles it.
+
+# opcodes ending a basic block, after these control doesn't just fall through to the next
+# instruction. loop only sets the loop registers, it's targets start blocks but it doesn't end one.
+block_end_opcodes = set([optbl[mnemonic] for mnemonic in ('die', 'test_die', 'call', 'ret', 'swtch', 'jmp', 'je', 'jn',
+                                                          'jl', 'jg', 'jls', 'jgs', 'lcont', 'lbrk',
+                                                          'jei', 'jni', 'jli', 'jgi', 'jlsi', 'jgsi')] +
+                        [END_OPCODE, BAD_JUMP_OPCODE, NO_LOOP_OPCODE])
+
+# dicts mapping opcodes to the python expression they translate to, top & second are
+# filled in with the expressions holding the top two work-stack words.
+jit_binary_fmt_tbl = {
+    optbl['add']    : '(%(top)s + %(second)s) & 0xFFFFFFFF',
+    optbl['sub']    : '(%(top)s - %(second)s) & 0xFFFFFFFF',
+    optbl['mul']    : '(%(top)s * %(second)s) & 0xFFFFFFFF',
+    optbl['div']    : 'divide(%(top)s, %(second)s)',
+    optbl['mod']    : 'modulo(%(top)s, %(second)s)',
+    optbl['adds']   : '(%(top)s + %(second)s) & 0xFFFFFFFF',
+    optbl['subs']   : '(%(top)s - %(second)s) & 0xFFFFFFFF',
+    optbl['muls']   : '(%(top)s * %(second)s) & 0xFFFFFFFF',
+    optbl['divs']   : 'divide(to_signed(%(top)s), to_signed(%(second)s)) & 0xFFFFFFFF',
+    optbl['mods']   : 'modulo(to_signed(%(top)s), to_signed(%(second)s)) & 0xFFFFFFFF',
+    optbl['and']    : '%(top)s & %(second)s',
+    optbl['xor']    : '%(top)s ^ %(second)s',
+    optbl['or']     : '%(top)s | %(second)s',
+    optbl['lshft']  : '(%(top)s << (%(second)s & 31)) & 0xFFFFFFFF',
+    optbl['rshft']  : '%(top)s >> (%(second)s & 31)',
+    optbl['lrot']   : 'rotate_left(%(top)s, %(second)s) & 0xFFFFFFFF',
+    optbl['rrot']   : 'rotate_right(%(top)s, %(second)s) & 0xFFFFFFFF',
+    optbl['ands']   : '%(top)s & %(second)s',
+    optbl['xors']   : '%(top)s ^ %(second)s',
+    optbl['ors']    : '%(top)s | %(second)s',
+    optbl['lshfts'] : '(%(top)s << (%(second)s & 31)) & 0xFFFFFFFF',
+    optbl['rshfts'] : '(to_signed(%(top)s) >> (%(second)s & 31)) & 0xFFFFFFFF',
+    optbl['lrots']  : 'rotate_left(%(top)s, %(second)s) & 0xFFFFFFFF',
+    optbl['rrots']  : 'rotate_right(%(top)s, %(second)s) & 0xFFFFFFFF'
+}
+
+jit_unary_fmt_tbl = {
+    optbl['inc']  : '(%(top)s + 1) & 0xFFFFFFFF',
+    optbl['dec']  : '(%(top)s - 1) & 0xFFFFFFFF',
+    optbl['incs'] : '(%(top)s + 1) & 0xFFFFFFFF',
+    optbl['decs'] : '(%(top)s - 1) & 0xFFFFFFFF',
+    optbl['not']  : '~%(top)s & 0xFFFFFFFF',
+    optbl['nots'] : '~%(top)s & 0xFFFFFFFF'
+}
+
+jit_branch_fmt_tbl = {
+    optbl['je']  : '%(top)s == %(second)s',
+    optbl['jn']  : '%(top)s != %(second)s',
+    optbl['jl']  : '%(top)s < %(second)s',
+    optbl['jg']  : '%(top)s > %(second)s',
+    optbl['jls'] : 'to_signed(%(top)s) < to_signed(%(second)s)',
+    optbl['jgs'] : 'to_signed(%(top)s) > to_signed(%(second)s)'
+}
+
+def find_basic_blocks(code, start_ndx):
+# splits decoded code into basic blocks, returns dict mapping the ndx each block starts at
+# to (ndx after it's last instr, instr count). blocks start at the start-addr, at every
+# jump, call & loop target and after every op that ends a block.
+    leaders = set([start_ndx])
+    blocks  = {}
+    ndx     = 1
+
+    while ndx < len(code):
+        opcode = code[ndx]
+
+        for operand_ndx in code_addr_operand_tbl.get(opcode, ()):
+            leaders.add(code[ndx + 1 + operand_ndx])
+
+        ndx += 1 + decoded_argc(opcode)
+
+        if opcode in block_end_opcodes:
+            leaders.add(ndx)
+
+    for start in leaders:
+        if start >= len(code):
+            continue
+
+        ndx   = start
+        count = 0
+
+        while True:
+            opcode = code[ndx]
+            ndx   += 1 + decoded_argc(opcode)
+            count += 1
+
+            if opcode in block_end_opcodes or ndx in leaders or ndx >= len(code):
+                break
+
+        blocks[start] = (ndx, count)
+
+    return blocks
+
+class BlockTranslator:
+# translates the basic block of decoded code from self.start up to self.end into the
+# source of a function taking sp & returning the ndx of the next block & the new sp:
+#     def block_<start>(sp):
+#         ...
+#         return next_ndx, sp + depth
+#
+# work-stack words are held in local variables rather than going through the stack array.
+# slots are numbered relative to sp on entry to the block, self.depth is the current
+# top slot. self.slots maps slots to the expression holding their value, a local or a
+# literal, self.dirty holds the slots whose value hasn't been stored in the stack array.
+# dirty slots are stored before the block leaves, including ones popped since, so the
+# stack array ends up exactly as Interpreter leaves it.
+
+    def __init__(self, code, start, end):
+        self.code       = code
+        self.start      = start
+        self.end        = end
+        self.lines      = []
+        self.depth      = 0
+        self.slots      = {}
+        self.dirty      = {}
+        self.temp_count = 0
+
+    def emit(self, line):
+        self.lines.append('    ' + line)
+
+    def sp_expr(self, slot):
+    # returns the expression for sp plus slot.
+        if slot > 0:
+            return 'sp + %d' % slot
+        elif slot < 0:
+            return 'sp - %d' % -slot
+
+        return 'sp'
+
+    def new_temp(self, expr):
+    # emits an assignment of expr to a new local, returns the local's name.
+        name = 't%d' % self.temp_count
+        self.temp_count += 1
+        self.emit('%s = %s' % (name, expr))
+        return name
+
+    def read(self, slot):
+    # returns an expression holding slot's value, slots from before the block are loaded once.
+        if slot not in self.slots:
+            self.slots[slot] = self.new_temp('stack[%s]' % self.sp_expr(slot))
+
+        return self.slots[slot]
+
+    def write(self, slot, expr):
+        self.slots[slot] = expr
+        self.dirty[slot] = expr
+
+    def push(self, expr):
+        self.depth += 1
+        self.write(self.depth, expr)
+
+    def check_pop(self, count):
+    # popping words pushed by this block can't underflow so only pops below it are checked.
+        if self.depth - count < 0:
+            self.emit('if %s < %d: raise Exception("yson: work-stack underflow")' % (self.sp_expr(self.depth), count))
+
+    def ram_read(self, addr):
+        return 'ram_words[%d]' % (addr >> 2) if not addr & 3 else 'read_word(%d)' % addr
+
+    def ram_write(self, addr, expr):
+        if addr & 3:
+            self.emit('write_word(%d, %s)' % (addr, expr))
+        else:
+            self.emit('ram_words[%d] = %s' % (addr >> 2, expr))
+
+    def flush(self):
+    # stores the dirty slots into the stack array.
+        for slot in sorted(self.dirty):
+            self.emit('stack[%s] = %s' % (self.sp_expr(slot), self.dirty[slot]))
+
+        self.dirty = {}
+
+    def leave(self, next_expr):
+        self.flush()
+        self.emit('return %s, %s' % (next_expr, self.sp_expr(self.depth)))
+
+    def translate(self):
+    # returns the block's source, the function is named block_<start>.
+        code = self.code
+        ndx  = self.start
+
+        while ndx < self.end:
+            opcode = code[ndx]
+            opr    = code[ndx + 1 : ndx + 1 + decoded_argc(opcode)]
+            nxt    = ndx + 1 + len(opr)
+            ndx    = nxt
+
+            if opcode in jit_binary_fmt_tbl:
+                top    = self.read(self.depth)
+                second = self.read(self.depth - 1)
+                self.push(self.new_temp(jit_binary_fmt_tbl[opcode] % {'top' : top, 'second' : second}))
+
+            elif opcode in jit_unary_fmt_tbl:
+                self.write(self.depth, self.new_temp(jit_unary_fmt_tbl[opcode] % {'top' : self.read(self.depth)}))
+
+            elif opcode in jit_branch_fmt_tbl:
+                cond = self.new_temp(jit_branch_fmt_tbl[opcode] % {'top' : self.read(self.depth), 'second' : self.read(self.depth - 1)})
+                self.leave('%d if %s else %d' % (opr[0], cond, nxt))
+
+            # immediate ops translate like the stack op they're paired with, the immediate as second.
+            elif opcode in imm_op_tbl and imm_op_tbl[opcode] in jit_binary_fmt_tbl:
+                fmt = jit_binary_fmt_tbl[imm_op_tbl[opcode]]
+                self.write(self.depth, self.new_temp(fmt % {'top' : self.read(self.depth), 'second' : opr[0]}))
+
+            elif opcode in imm_op_tbl:
+                cond = self.new_temp(jit_branch_fmt_tbl[imm_op_tbl[opcode]] % {'top' : self.read(self.depth), 'second' : opr[0]})
+                self.leave('%d if %s else %d' % (opr[1], cond, nxt))
+
+            elif opcode in (optbl['incr'], optbl['decr'], optbl['addir']):
+                value = 1 if opcode == optbl['incr'] else WORD_MASK if opcode == optbl['decr'] else opr[1]
+                self.ram_write(opr[0], self.new_temp('(%s + %d) & 0xFFFFFFFF' % (self.ram_read(opr[0]), value)))
+
+            elif opcode == optbl['addrr']:
+                self.ram_write(opr[1], self.new_temp('(%s + %s) & 0xFFFFFFFF' % (self.ram_read(opr[1]), self.ram_read(opr[0]))))
+
+            elif opcode == optbl['psh']:
+                self.push(str(opr[0]))
+
+            elif opcode in (optbl['pop'], optbl['pop2'], optbl['popn']):
+                count = opr[0] if opr else (1 if opcode == optbl['pop'] else 2)
+                self.check_pop(count)
+                self.depth -= count
+
+            elif opcode == optbl['pshfr']:
+                self.push(self.new_temp(self.ram_read(opr[0])))
+
+            elif opcode == optbl['poptr']:
+                self.check_pop(1)
+                self.ram_write(opr[0], self.read(self.depth))
+                self.depth -= 1
+
+            elif opcode == optbl['movtr']:
+                self.ram_write(opr[0], self.read(self.depth))
+
+            elif opcode == optbl['setr']:
+                self.ram_write(opr[0], str(opr[1]))
+
+            elif opcode == optbl['cpyr']:
+                self.ram_write(opr[1], self.new_temp(self.ram_read(opr[0])))
+
+            elif opcode == optbl['stktr']:
+                # reads the stack array by absolute ndx so it has to be up to date.
+                self.flush()
+                self.ram_write(opr[1], self.new_temp('stack[%d]' % (opr[0] >> 2)))
+
+            elif opcode == optbl['pshfrr']:
+                self.push(self.new_temp('read_word(%s)' % self.ram_read(opr[0])))
+
+            elif opcode == optbl['pshfrs']:
+                self.push(self.new_temp('read_word(%s)' % self.read(self.depth)))
+
+            elif opcode == optbl['nspct']:
+                self.emit('output.append(%r %% %s)' % ("ram[%u] (uint32) = %%u" % opr[0], self.ram_read(opr[0])))
+
+            elif opcode == optbl['nspctst']:
+                self.emit('output.append(%r %% %s)' % ("wstk[%u] (uint32) = %%u" % opr[0], self.read(self.depth - (opr[0] >> 2))))
+
+            elif opcode == optbl['nop']:
+                pass
+
+            elif opcode == optbl['loop']:
+                self.emit('loop_regs[0] = %d' % opr[0])
+                self.emit('loop_regs[1] = %d' % opr[1])
+                self.emit('loop_regs[2] = %d' % opr[2])
+
+            elif opcode == optbl['lcont']:
+                self.flush()
+                self.emit('if loop_regs[0]:')
+                self.emit('    loop_regs[0] -= 1')
+                self.emit('    return loop_regs[1], %s' % self.sp_expr(self.depth))
+                self.emit('return loop_regs[2], %s' % self.sp_expr(self.depth))
+
+            elif opcode == optbl['lbrk']:
+                self.leave('loop_regs[2]')
+
+            elif opcode == optbl['jmp']:
+                self.leave(str(opr[0]))
+
+            elif opcode == optbl['call']:
+                self.flush()
+                self.emit('if len(rstk) == %d: raise Exception("yson: return-stack overflow, calls nested deeper than %d")' % (RECUR_MAX, RECUR_MAX))
+                self.emit('rstk.append(%d)' % nxt)
+                self.emit('return %d, %s' % (opr[0], self.sp_expr(self.depth)))
+
+            elif opcode == optbl['ret']:
+                self.flush()
+                self.emit('if not rstk: raise Exception("yson: ret with an empty return-stack")')
+                self.emit('return rstk.pop(), %s' % self.sp_expr(self.depth))
+
+            elif opcode in (optbl['die'], optbl['test_die']):
+                self.leave(str(HALT_NDX))
+
+            elif opcode == optbl['swtch']:
+                self.flush()
+                self.emit('raise Exception("yson: swtch is unimplemented")')
+
+            elif opcode == END_OPCODE:
+                self.flush()
+                self.emit('raise Exception("yson: program ran off the end of it\'s code without a die op")')
+
+            elif opcode == BAD_JUMP_OPCODE:
+                self.flush()
+                self.emit('raise Exception("yson: jump to addr %d which is not the start of an instruction")' % opr[0])
+
+            elif opcode == NO_LOOP_OPCODE:
+                self.flush()
+                self.emit('raise Exception("yson: lcont or lbrk executed before any loop op")')
+
+            else:
+                raise Exception("INTERNAL ERROR: BlockTranslator has no translation for opcode %d!" % opcode)
+
+        # the block falls through into the next block.
+        if opcode not in block_end_opcodes:
+            self.leave(str(ndx))
+
+        return '\n'.join(['def block_%d(sp):' % self.start] + self.lines) + '\n'
+
+class JitInterpreter(Interpreter):
+# tiered execution mode. the program starts out running through Interpreter's handler
+# table, each basic block counts how many times it's entered and once that reaches
+# threshold the block is translated into python source by BlockTranslator, compile()d
+# and run as a single call from then on. compiled blocks are cached in self.block_cache
+# keyed by the ram addr the block starts at, their source is kept in self.block_source.
+#
+# compiled blocks take & return sp, the other registers live in self.jit_env which is the
+# globals of every compiled block. the registers are handed between the handlers and
+# compiled blocks with load_regs() & store_regs() when execution moves between the two.
+
+    def __init__(self, buf, threshold=JIT_THRESHOLD):
+        Interpreter.__init__(self, buf)
+
+        self.threshold    = threshold
+        self.ndx_addr_map = {ndx : addr for addr, ndx in self.addr_map.items()}
+        self.block_end    = {} # block's first ndx -> ndx after it's last instr.
+        self.block_len    = [0] * len(self.code) # instr count of the block starting at each ndx.
+        self.block_cache  = {}
+        self.block_source = {}
+        self.jit_env      = self.build_jit_env()
+
+        self.find_blocks()
+
+    def find_blocks(self):
+        for start, (end, count) in find_basic_blocks(self.code, self.start_ndx).items():
+            self.block_end[start] = end
+            self.block_len[start] = count
+
+    def build_jit_env(self):
+    # returns the dict compiled blocks use as their globals.
+        ram       = self.ram
+        ram_words = self.ram_words
+
+        def read_word(addr):
+            return ram_words[addr >> 2] if not addr & 3 else struct.unpack_from('<I', ram, addr)[0]
+
+        def write_word(addr, value):
+            if addr & 3:
+                struct.pack_into('<I', ram, addr, value)
+            else:
+                ram_words[addr >> 2] = value
+
+        return {'stack'        : self.stack,
+                'ram_words'    : ram_words,
+                'rstk'         : self.rstk,
+                'output'       : self.output,
+                'loop_regs'    : [0, self.no_loop_ndx, self.no_loop_ndx],
+                'read_word'    : read_word,
+                'write_word'   : write_word,
+                'to_signed'    : to_signed,
+                'divide'       : divide,
+                'modulo'       : modulo,
+                'rotate_left'  : rotate_left,
+                'rotate_right' : rotate_right}
+
+    def compile_block(self, start):
+    # returns the compiled function for the block starting at start, from the cache if it's there.
+        addr = self.ndx_addr_map.get(start, start)
+
+        if addr not in self.block_cache:
+            source    = BlockTranslator(self.code, start, self.block_end[start]).translate()
+            namespace = {}
+            exec(compile(source, '<yson block @%d>' % addr, 'exec'), self.jit_env, namespace)
+
+            self.block_source[addr] = source
+            self.block_cache[addr]  = namespace['block_%d' % start]
+
+        return self.block_cache[addr]
+
+    def run(self, max_instrs=None):
+        code      = self.code
+        block_len = self.block_len
+        loop_regs = self.jit_env['loop_regs']
+        threshold = self.threshold
+        handler_tbl, load_regs, store_regs = self.build_handler_tbl()
+
+        hot         = [None] * len(code) # compiled block starting at each ndx.
+        entry_count = [0] * len(code)
+        is_leader   = bytearray(len(code))
+
+        for start in self.block_end:
+            is_leader[start] = 1
+
+        pc    = self.start_ndx
+        sp    = self.sp
+        cold  = True # the registers are held by the handlers rather than sp & loop_regs.
+        count = 0
+        limit = sys.maxsize if max_instrs is None else max_instrs # a block can take count past it.
+        start = time.perf_counter()
+
+        try:
+            while pc and count < limit:
+                block = hot[pc]
+
+                if block is not None:
+                    if cold:
+                        sp, loop_regs[0], loop_regs[1], loop_regs[2] = load_regs()
+                        cold = False
+
+                    count  += block_len[pc]
+                    pc, sp  = block(sp)
+                    continue
+
+                if not cold:
+                    store_regs(sp, loop_regs[0], loop_regs[1], loop_regs[2])
+                    cold = True
+
+                if is_leader[pc]:
+                    entry_count[pc] += 1
+
+                    if entry_count[pc] >= threshold:
+                        hot[pc] = self.compile_block(pc)
+                        continue
+
+                pc     = handler_tbl[code[pc]](pc)
+                count += 1
+
+        except (IndexError, struct.error):
+            raise Exception("yson: out of range ram or work-stack access by %s at instr %d" % (mnemonic_tbl.get(code[pc], 'UNKNOWN'), count))
+
+        finally:
+            if not cold:
+                store_regs(sp, loop_regs[0], loop_regs[1], loop_regs[2])
+
+            self.elapsed     = time.perf_counter() - start
+            self.instr_count = count
+            self.sp          = load_regs()[0]
+
+        self.check_instr_limit(pc, max_instrs)
+        return count
+
+# execution modes selectable from the command line.
+interpreter_map = {'-ref'     : Interpreter,
+                   '-closure' : ClosureInterpreter,
+                   '-jit'     : JitInterpreter}
+
+def main():
+    if len(sys.argv) < 2 or (len(sys.argv) > 2 and sys.argv[2] not in interpreter_map):
+        print("\nyson: usage: python interpreter.py prog.fbin [%s]" % '|'.join(interpreter_map.keys()))
+        sys.exit()
+
+    try:
+        with open(sys.argv[1], 'rb') as fbin_file:
+            buf = fbin_file.read()
+
+    except FileNotFoundError:
+        print("\nError: Unable to open input-file: [%s], file does not exist!\n" % sys.argv[1])
+        sys.exit()
+    except OSError as e:
+        print("Error: An I/O error occurred while attempting to read input-file: [%s]\n    more info: %s" % (sys.argv[1], e))
+        sys.exit()
+
+    interp = interpreter_map[sys.argv[2] if len(sys.argv) > 2 else '-ref'](buf)
+    interp.run()
+
+    for line in interp.output:
+        print(line)
+
+    print("\nstack[top] = %s" % interp.top())
+    print("instructions: %d, %.3f sec, %.0f instr/sec" % (interp.instr_count, interp.elapsed, interp.instr_count / interp.elapsed if interp.elapsed else 0))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 from collections import deque
-from copy import deepcopy, copy
 from parser import *
 
 # NOTE: within this file 'cnfrm' is used as an abbreviation for 'confirm'.
@@ -59,6 +58,10 @@ op_precedence = {
     31 :    500, # '!=' 
     32 :    600, # '<='
     33 :    600, # '>=' 
+    34 :   1000, # '++'
+    35 :   1000, # '--'
+    36 :    900, # '$+'
+    37 :    900, # '$-'
 }
 
 
@@ -188,331 +191,564 @@ class StmtNode:
 
         elif self.type == 7:
             s += 'ReturnStmtNode\n'
-            s += 'Expr: %s' % self.expr.__str__()
+
+            if self.expr:
+                s += 'Expr: %s' % self.expr.__str__()
 
         elif self.type == 8:
             s += 'PrintStmtNode\n'
             s += 'Expr: %s' % self.expr.__str__()
 
         elif self.type == 9:
-            s += 'ContinueStmtNode\n'
+            s += 'FileOpenStmtNode\n'
             s += 'Expr: %s' % self.expr.__str__()
 
         elif self.type == 10:
-            s += 'BreakStmtNode\n'
+            s += 'FileCloseStmtNode\n'
             s += 'Expr: %s' % self.expr.__str__()
 
+        elif self.type == 38:
+            s += 'ContinueStmtNode\n'
+
+        elif self.type == 39:
+            s += 'BreakStmtNode\n'
+
         return s
 
 class AstGenerator:
+# Builds the ast of a .pys source in a single pass over it's tokens, verifying them as it
+# goes with the same rules as TokenListVerifier, so no verifier pass is needed first.
+# Blocks and stmts are parsed by recursive descent, exprs by a pratt parser, see parse_expr().
+# Each node is built once, straight into it's place in the tree.
+# Tokens are read by ndx from a TokenStream, see build_toklist(), or a TokenList.
+#
 # self.globlist = deque() = main list of global node objects.
-# self.op_stack = deque() = operator stack used for processing exprs.
-# self.opr_stack = deque() = operand stack used for processing exprs.
-# self.curr_globnode_ndx = -1 = index of current global node.
-# self.curr_body_ndx = -1 = index of current node inside a body list.
-# self.curr_node = None = current node being processed.
-# self.curr_node_ndx = -1 = 
-# self.in_operation = False
-# self.in_subdef = False
+# self.block_checker = BlockChecker() = checks curly braces & if/elif/else stmts.
 # self.tokndx = -1 = index of current token.
-# self.toklist = list of token objects returned from parser tokenizer.
-
-    def __init__(self):
+# self.tok_type, self.tok_subtype, self.tok_line = columns of the current token.
+# self.next_type, self.next_subtype, self.next_line = columns of the token after it, advance_tok()
+# reads each token's columns once, as the next token, then moves them into the current token's.
+# self.toklist = TokenStream of the source file's tokens, or a TokenList.
+# self.assign_count = 0 = assignment operators in the expr being built, only one is allowed.
+# self.debug = False = prints each global node once it's built.
+
+    def __init__(self, toklist=None, debug=False):
         self.globlist = deque()
-        self.op_stack = deque()
-        self.opr_stack = deque()
-
-        self.curr_globnode_ndx = -1
-        self.curr_node_ndx = -1
-        self.curr_body_ndx = -1
-        self.curr_node = None
-        self.curr_parent_node = None
-        self.parent_nodes = deque()
-        self.expr_node_holder = None
+        self.block_checker = BlockChecker()
 
         self.tokndx = -1
-        self.toklist = None
-        self.tok = None
+        self.toklist = toklist
+        self.tok_type = None
+        self.tok_subtype = None
+        self.tok_line = None
+        self.next_type = None
+        self.next_subtype = None
+        self.next_line = None
 
-        self.in_op = False
-        self.in_expr = False
-        self.in_subdef = False
-        self.at_globlvl = False
+        self.assign_count = 0
+        self.debug = debug
 
     def build_toklist(self, input_file_path):
-        # parse source file into token list.
+        # tokens are read from a TokenStream, lexed from the source file as they're needed.
         try:
-            self.toklist  = lexer.tokenize(input_file_path)
+            self.toklist  = Lexer().stream(input_file_path)
         except Exception:
             print('exception thrown from parser.')
 
     def build_id_node(self, idstr):
         id_node = ExprNode(2002)
         id_node.val = idstr
-        return deepcopy(id_node)
+        return id_node
 
     def build_int_node(self, intval):
         int_node = ExprNode(2001)
         int_node.val = intval
-        return deepcopy(int_node)
+        return int_node
+
+    def build_op_node(self, op):
+        op_node = ExprNode(2000)
+        op_node.op = op
+        op_node.oprcount = operand_count_map[op]
+        return op_node
+
+    def read_next_tok(self):
+        self.next_type, self.next_subtype, self.next_line = self.toklist.codes(self.tokndx + 1)
 
     def advance_tok(self):
         self.tokndx += 1
-        self.tok = self.toklist[self.tokndx]
+        self.tok_type = self.next_type
+        self.tok_subtype = self.next_subtype
+        self.tok_line = self.next_line
+
+        # nothing is read past the end of stream token, a TokenList ends with two of them.
+        if self.tok_type != 999:
+            self.read_next_tok()
+
+    def linecol_str(self):
+        return 'line: %d col:%d' % (self.tok_line, self.toklist.cols[self.tokndx])
 
     def assert_curr_tok(self, 
                         toktype, 
                         subtype=None):
         
-        return self.assert_tok(self.tok, toktype, subtype)
+        if self.tok_type != toktype:
+            return False
+        if subtype:
+            if self.tok_subtype != subtype:
+                return False
+
+        return True
 
-    def assert_last_tok(self, 
+    def assert_next_tok(self, 
                         toktype, 
                         subtype=None):
         
-        if self.tokndx == 0:
+        if self.next_type != toktype:
             return False
-        
-        return self.assert_tok(self.toklist.list[self.tokndx - 1], toktype, subtype)
+        if subtype:
+            if self.next_subtype != subtype:
+                return False
+
+        return True
     
     def assert_tok(self, 
-                   tok, 
+                   ndx, 
                    toktype, 
                    subtype=None):
         
-        if tok.type != toktype:
+        # ndx: index of the token within toklist, it's columns are read directly.
+        if self.toklist.types[ndx] != toktype:
             return False
         if subtype:
-            if tok.subtype != subtype:
+            if self.toklist.subtypes[ndx] != subtype:
                 return False
 
         return True
-    
-    def build_expr_node(self):
-    # ARRAYS: arrays are represented by a [ op expr node, left node is identifier, right node is integer.
 
-        expr_node = ExprNode()
+    def assert_toktype(self, toktype, errstr):
+        # raises exception with errstr unless the current tok is of toktype.
+        if self.tok_type != toktype:
+            raise Exception('%s %s' % (self.linecol_str(), errstr))
+
+    def assert_optok(self, subtype, errstr):
+        # raises exception with errstr unless the current tok is the subtype operator.
+        if not self.assert_curr_tok(503, subtype):
+            raise Exception('%s %s' % (self.linecol_str(), errstr))
+
+    def next_in_expr(self, expr_line, closer=None):
+        # returns True if the token after the current one continues the expr on expr_line.
+        # exprs end at the end of their line, a curly brace, the end of the stream or, when
+        # closer is given, at closer or a comma if closer is a r-paren(the end of a sub call arg).
+        if self.next_line != expr_line or self.next_type == 999:
+            return False
+
+        if self.next_type == 503:
+            subtype = self.next_subtype
+
+            if subtype == 13 or subtype == 14:
+                return False
+
+            if closer and (subtype == closer or (closer == 12 and subtype == 29)):
+                return False
+
+        return True
+
+    def advance_in_expr(self, expr_line, errstr):
+        # advances to the next tok, raising exception with errstr if it doesn't continue the expr.
+        if not self.next_in_expr(expr_line):
+            raise Exception('%s %s' % (self.linecol_str(), errstr))
+
+        self.advance_tok()
+
+    def build_id_expr(self, expr_line, is_test_expr):
+        # builds the node of the identifier that's the current tok, which is a sub call if it's
+        # followed by a l-paren or an array element if it's followed by l-brackets.
+        idstr = self.toklist.rawstr(self.tokndx)
+
+        if self.next_in_expr(expr_line) and self.assert_next_tok(503, 11):
+            subc_node = ExprNode(2003)
+            subc_node.val = idstr
+            subc_node.args = deque()
 
-        while True:
             self.advance_tok()
 
-            # check for end of expr.
-            if self.tok.line != self.toklist.list[self.tokndx - 1].line:
-                break
+            if self.next_in_expr(expr_line) and self.assert_next_tok(503, 12):
+                self.advance_tok()
+                return subc_node
 
-            # left curly brace check &
-            elif self.assert_curr_tok(503, 13) or  self.assert_curr_tok(999):
-                break
+            while True:
+                self.advance_in_expr(expr_line, 'missing r-paren in sub call')
+                subc_node.args.append(self.build_expr_node(expr_line, is_test_expr, closer=12))
 
-            # if token is left paren, if so push onto operator stack.
-            if self.assert_curr_tok(503, 11):
-                self.op_stack.append(ExprNode(2000))
-                self.op_stack[-1].op = 11
-                continue
+                if not self.next_in_expr(expr_line, 12):
+                    self.advance_tok()
 
-            # if right paren we will process the operator stack until reaching a l-paren.
-            elif self.assert_curr_tok(503, 12):
-                
-                # until top of op stack isnt l-paren process op stack.
-                while True:
-                    if self.op_stack[-1].op == 11:
+                    if self.assert_curr_tok(503, 12):
                         break
-                
-                    op_node_from_stack = self.op_stack.pop()
-
-                    if self.opr_stack:
-                        op_node_from_stack.r_oprnd = self.opr_stack.pop()
-                    else:
-                        raise Exception("operand missing in expr")
-                    
-                    if op_node_from_stack.opcount == 2:
-                        if self.opr_stack:
-                            op_node_from_stack.l_oprnd = self.opr_stack.pop()
-                        else:
-                            raise Exception("operand missing in expr")
-
-                    self.opr_stack.append(copy(op_node_from_stack))
-                
-                continue                    
-
-            #  Check for r-bracket, should never be one, if so is error.
-            # elif self.assert_curr_tok(503, 16):
-            #     raise Exception("misplaced r-bracket in expr.")
-
-            # process operators. paren and bracket operators are caught in their above if stmts.s
-            elif self.assert_curr_tok(503):
-                # compare top of operator stack with tok operator see whos higher prec.
-
-                # check if operator is r-bracket.
-                if self.assert_curr_tok(503, 16):
 
-                    # if so check if op on stack is l-bracket. if not we have a misplaced r-bracket.
-                    if not self.op_stack or self.op_stack[-1].subtype != 15:
-                        raise Exception("misplaced r-bracket")
+                    if self.assert_curr_tok(503, 29):
+                        continue
 
-                # check if operator stack empty, if so push token operator onto stack.
-                if not self.op_stack:
-                    self.op_stack.append(ExprNode())
-                    self.op_stack[-1].op      = self.tok.subtype
-                    self.op_stack[-1].opcount = operand_count_map[self.tok.subtype]
-                    continue
+                raise Exception('%s missing r-paren in sub call' % self.linecol_str())
+
+            return subc_node
+
+        node = self.build_id_node(idstr)
+
+        # each [ ] pair is a [ op node, left node is the array, right node is the index expr.
+        while self.next_in_expr(expr_line) and self.assert_next_tok(503, 15):
+            self.advance_tok()
+            self.advance_in_expr(expr_line, 'misplaced l-bracket or missing r-bracket')
 
-                # see whos got the higher prec.
-                tok_prec = op_precedence[self.tok.subtype]  # token.
-                stk_prec = op_precedence[self.op_stack[-1].subtype] # operator on top of operator stack.
+            index_node = self.build_op_node(15)
+            index_node.l_oprnd = node
+            index_node.r_oprnd = self.build_expr_node(expr_line, is_test_expr, closer=16)
 
-                # check if tok_prec is higher if so push tok operator onto operator stack.
-                if tok_prec > stk_prec:
-                    self.op_stack.append(self.tok)
+            if not self.next_in_expr(expr_line, 16):
+                self.advance_tok()
+
+                if self.assert_curr_tok(503, 16):
+                    node = index_node
                     continue
 
-                # higher prec. op on stack so we must pop off the operator, make its node,
-                # then we pop operand off stack, put it on right side of op node, pop off
-                # the next operand and put on the left, then we push the op node onto opr stack.
-                # then we can push the tok onto the operator stack.
- 
-                op_node_from_stack = self.op_stack.pop()
-
-                if self.opr_stack:
-                    op_node_from_stack.r_oprnd = self.opr_stack.pop()
-                else:
-                    raise Exception("operand missing in expr")
-                
-                if op_node_from_stack.opcount == 2:
-                    if self.opr_stack:
-                        op_node_from_stack.l_oprnd = self.opr_stack.pop()
-                    else:
-                        raise Exception("operand missing in expr")
-
-                # now push op-node-from-stack onto operand stack.
-                self.opr_stack.append(copy(op_node_from_stack))
-
-                # make new op-node from token then push onto stack.
-                self.op_stack.append(ExprNode(2000))
-                self.op_stack[-1].op      = self.tok.subtype
-                self.op_stack[-1].opcount = operand_count_map[self.tok.subtype]
-                continue
+            raise Exception('%s misplaced l-bracket or missing r-bracket' % self.linecol_str())
+
+        return node
+
+    def build_expr_node(self, expr_line, is_test_expr=False, closer=None):
+        # ARRAYS: arrays are represented by a [ op expr node, left node is identifier, right node is the index expr.
+        # builds & verifies the expr starting at the current tok, which must be on expr_line.
+        # is_test_expr: if/elif/while test exprs, which can use ! but not &.
+        # closer: set to the r-paren or r-bracket ending a sub call arg or array index expr.
+        # returns the expr's node with the current tok at the expr's last tok.
 
-            # check if tok is identifier.
-            elif self.assert_curr_tok(501, 501):
+        # sub call args & array index exprs are exprs of their own, each can have one =.
+        outer_assign_count = self.assign_count
+        self.assign_count = 0
 
-                # check if we have a sub call.
-                if self.is_subcall():
-                    pass
+        expr_node = self.parse_expr(expr_line, is_test_expr, 0)
 
-                # no subcall so we push identifier onto operand stack.
-                self.opr_stack.append(self.build_id_node(self.tok.rawstr))
+        # the expr ends where no operator can continue it, anything left on the line is misplaced.
+        if self.next_in_expr(expr_line, closer):
+            self.advance_tok()
+            self.raise_misplaced(is_test_expr)
+
+        self.assign_count = outer_assign_count
+        return expr_node
+
+    def parse_expr(self, expr_line, is_test_expr, min_prec):
+        # pratt parser, builds the expr starting at the current tok out of it's operand &
+        # the binary & postfix operators following it that bind at least as tightly as min_prec.
+        # precedence is op_precedence's, operators with a higher number bind more tightly.
+        # binary operators are left associative except = which is right associative, so
+        # comparison chains group from the left: a < b < c is (a < b) < c, & as == binds
+        # more loosely than <, a < b == c < d is (a < b) == (c < d).
+        left = self.parse_operand(expr_line, is_test_expr)
+
+        while self.next_in_expr(expr_line) and self.next_type == 503:
+            op = self.next_subtype
+            prec = op_precedence.get(op)
+            oprcount = operand_count_map.get(op)
+
+            # ++ & -- apply to the operand just before them.
+            if op == 34 or op == 35:
+                self.advance_tok()
+                op_node = self.build_op_node(op)
+                op_node.l_oprnd = left
+                left = op_node
                 continue
 
-            elif self.assert_curr_tok(502, 502):
-                self.op_stack.append(self.build_int_node(self.tok.value))
+            if oprcount != 2 or prec is None or prec < min_prec:
+                break
+
+            self.advance_tok()
+
+            if op == 24:
+                self.assign_count += 1
+
+                if self.assign_count > 1:
+                    raise Exception('%s misplaced assignment operator' % self.linecol_str())
+
+            op_node = self.build_op_node(op)
+            op_node.l_oprnd = left
+
+            self.advance_to_operand(expr_line, is_test_expr)
+            op_node.r_oprnd = self.parse_expr(expr_line, is_test_expr, prec if op == 24 else prec + 1)
+            left = op_node
+
+        return left
+
+    def parse_operand(self, expr_line, is_test_expr):
+        # builds the operand that's the current tok: an integer, an identifier with any sub call or
+        # indexing after it, a parenthesized expr or a unary operator & the operand it applies to.
+        if self.tok_type == 502:
+            return self.build_int_node(self.toklist.value(self.tokndx))
+
+        if self.tok_type == 501:
+            return self.build_id_expr(expr_line, is_test_expr)
+
+        if self.tok_type == 503:
+            # l-paren, the expr inside it is parsed as a whole, it's r-paren must follow it.
+            if self.tok_subtype == 11:
+                self.advance_in_expr(expr_line, 'misplaced l-paren or missing r-paren')
+                expr_node = self.parse_expr(expr_line, is_test_expr, 0)
+
+                if not self.next_in_expr(expr_line):
+                    raise Exception('%s misplaced l-paren or missing r-paren' % self.linecol_str())
+
+                self.advance_tok()
+
+                if not self.assert_curr_tok(503, 12):
+                    self.raise_misplaced(is_test_expr)
+
+                return expr_node
+
+            # operators where an operand should be are unary, + & - become unary add/sub,
+            # ! is only valid in test exprs & & isn't valid in them. unary add/sub tokens
+            # come from a toklist TokenListVerifier has already rewritten.
+            op = self.tok_subtype
+
+            if op == 19 or op == 20:
+                op = 36 if op == 19 else 37
+
+            if op == 36 or op == 37 or (op == 17 and is_test_expr) or (op == 18 and not is_test_expr):
+                op_node = self.build_op_node(op)
+
+                self.advance_to_operand(expr_line, is_test_expr)
+                op_node.l_oprnd = self.parse_expr(expr_line, is_test_expr, op_precedence[op])
+                return op_node
+
+        self.raise_misplaced(is_test_expr)
+
+    def advance_to_operand(self, expr_line, is_test_expr):
+        # advances from an operator to it's operand, which can't be a closing paren, bracket or comma.
+        if not self.next_in_expr(expr_line) or (self.next_type == 503 and self.next_subtype in (12, 16, 29)):
+            raise Exception('%s operand missing in %s expr.' % (self.linecol_str(), 'test' if is_test_expr else ''))
+
+        self.advance_tok()
+
+    def raise_misplaced(self, is_test_expr):
+        # raises the exception for the current tok being where it can't be in an expr.
+        test_expr_errmsg = 'test' if is_test_expr else ''
+
+        if self.tok_type == 502 or self.tok_type == 501:
+            raise Exception('%s %s misplaced in %s expr.' % (self.linecol_str(), 'integer' if self.tok_type == 502 else 'identifier', test_expr_errmsg))
+
+        if self.tok_type != 503:
+            raise Exception('%s misplaced %s keyword in %s expr.' % (self.linecol_str(), rev_kw_list.get(self.tok_subtype, ''), test_expr_errmsg))
+
+        if self.tok_subtype == 11:
+            raise Exception('%s misplaced l-paren in %s expr.' % (self.linecol_str(), test_expr_errmsg))
+
+        if self.tok_subtype == 12:
+            raise Exception('%s r paren misplaced in %s expr.' % (self.linecol_str(), test_expr_errmsg))
+
+        raise Exception('%s misplaced %s operator in %s expr.' % (self.linecol_str(), rev_op_list.get(self.tok_subtype, token_mnemonic[self.tok_subtype]), test_expr_errmsg))
+    def check_block_tok(self):
+        # sends the current tok to the block-checker.
+        try:
+            self.block_checker.check(self.toklist[self.tokndx])
+        except Exception as e:
+            raise Exception('%s %s' % (self.linecol_str(), e))
+
+    def proc_block(self, 
+                   body, 
+                   confirm_cbraces=True, 
+                   in_while=False, 
+                   at_global_lvl=False, 
+                   in_subdef=False):
+        
+        # body: deque the block's nodes are appended to.
+        # confirm_cbraces: tells method to check for code-block curly braces.
+        # in_while: tells method to accept continue/break stmt as valid.
+        # at_global_lvl: tells method whether or not to accept subdef+const stmt as valid.
+        # in_while & in_subdef carry into the blocks nested within this one.
+
+        # when this method is called with confirm_cbraces, the current tok is the block's l-cbrace.
+        if confirm_cbraces:
+            self.assert_optok(13, 'left curly brace expected to start block')
+            self.check_block_tok()
 
-         # expr tokens have been processed into operator and operand stacks.
-         # now we will process them into nodes.
         while True:
-            if not self.op_stack: break
+            self.advance_tok()
+
+            if self.tok_type == 999: # check for stream end token.
+                if confirm_cbraces:
+                    raise Exception('%s right curly brace expected to end block' % (self.linecol_str()))
+
+                break
 
-            op_node_from_stack = self.op_stack.pop()
+            if self.assert_curr_tok(503, 14): # 14: r-cbrace op token type code.
+                self.check_block_tok()
 
-            if self.opr_stack:
-                op_node_from_stack.r_oprnd = self.opr_stack.pop()
+                if confirm_cbraces:
+                    break
+
+                raise Exception('%s right curly brace misplaced within block' % (self.linecol_str()))
+
+            if self.tok_type == 500:
+                node = self.proc_stmt(body, in_while, at_global_lvl, in_subdef)
             else:
-                raise Exception("operand missing in expr")
-                
-            if op_node_from_stack.opcount == 2:
-                if self.opr_stack:
-                    op_node_from_stack.l_oprnd = self.opr_stack.pop()
-                else:
-                    raise Exception("operand missing in expr")
-
-            self.opr_stack.append(copy(op_node_from_stack))
-
-        # expr node has been built.
-        return expr_node   
-
-    def proc_ret_stmt(self):
-        # confirm we're within subdef before proceding.
-        if not self.in_subdef:
-            print('return stmt not in subdef')
-            raise Exception
-
-        ret_node = StmtNode(7) # 7: ret stmt type code.
-        ret_node.expr = self.build_expr_node()
-        self.curr_parent_node.body.append(deepcopy(ret_node))
-
-    def proc_print_stmt(self):
-        print_node = StmtNode(8) # 8: print stmt type code.
-        print_node.expr = self.build_expr_node()
-        self.curr_parent_node.body.append(deepcopy(print_node))
-
-    def proc_var_assign(self, id_node):
-        assign_node = ExprNode()
-        assign_node.op = 24 # 24: assignment op type code.
-        assign_node.l_oprnd = deepcopy(id_node)
-        assign_node.r_oprnd = self.build_expr_node()
-
-        if self.at_globlvl:
-            self.globlist.append(deepcopy(assign_node))
-        else:
-            self.curr_parent_node.body.append(deepcopy(assign_node))
+                # if no matches for keywords or stmt only exprs are left.
+                node = self.build_expr_node(self.tok_line)
+
+            # elif & else stmt nodes are children of their if stmt node rather than in body.
+            if node is not None:
+                body.append(node)
 
+                if at_global_lvl and self.debug:
+                    print(node)
 
-    def makenew_parent_node(self, new_parent_node):
-        """ Takes reference to new-parent-node.
-            Appends current parent node to child nodes stack.
-            Sets new parent to self.curr_parent_node.
-        """ 
+    def proc_stmt(self, body, in_while, at_global_lvl, in_subdef):
+        # builds the stmt started by the keyword that's the current tok, returns it's node.
+        if self.tok_subtype == 3: # check for if stmt.
+            return self.proc_if_stmt(in_while, in_subdef)
 
-        if self.curr_parent_node: # if no parent node nothing to append to child-nodes-stack.
-            self.parent_nodes.append(self.curr_parent_node)
-        self.curr_parent_node = new_parent_node
+        elif self.tok_subtype == 4 or self.tok_subtype == 5: # check for elif & else stmts.
+            self.proc_elif_else_stmt(body, in_while, in_subdef)
+            return None
+
+        elif self.tok_subtype == 6: # check for while stmt.
+            return self.proc_while_stmt(in_subdef)
+
+        elif self.tok_subtype == 7: # check for return stmt.
+            # confirm we're actually in a subdef stmt.
+            if not in_subdef:
+                raise Exception('%s return stmt must be within subroutine.' % (self.linecol_str()))
+
+            return self.proc_expr_stmt(7, require_expr=False)
+
+        elif self.tok_subtype in (8, 9, 10): # print, fileopen & fileclose stmts.
+            return self.proc_expr_stmt(self.tok_subtype)
+
+        elif self.tok_subtype == 38 or self.tok_subtype == 39: # 38/39: cont/break kw codes.
+            # if not a while block these keywords are misplaced.
+            if not in_while:
+                raise Exception('%s %s stmt misplaced' % (self.linecol_str(), rev_kw_list[self.tok_subtype]))
+
+            return StmtNode(self.tok_subtype)
+
+        elif self.tok_subtype == 2: # 2: sub kw code.
+            # check if we're at global level, if not then sub stmt is misplaced.
+            if not at_global_lvl:
+                raise Exception('%s sub stmt misplaced' % (self.linecol_str()))
+
+            return self.proc_subdef_stmt()
+
+        elif self.tok_subtype == 100: # 100: const kw code.
+            # check if we're at global level, if not then const stmt is misplaced.
+            if not at_global_lvl:
+                raise Exception('%s const stmt misplaced' % (self.linecol_str()))
+
+            return self.proc_const_dec()
+
+        elif self.tok_subtype == 1: # 1: var kw code.
+            return self.proc_var_dec()
+
+    def proc_expr_stmt(self, stmt_type, require_expr=True):
+        # return, print, fileopen & fileclose stmts: keyword followed by an expr on the same line.
+        stmt_node = StmtNode(stmt_type)
+        stmt_line = self.tok_line
+
+        if self.next_in_expr(stmt_line):
+            self.advance_tok()
+            stmt_node.expr = self.build_expr_node(stmt_line)
+
+        elif require_expr:
+            raise Exception('%s expr required after %s stmt' % (self.linecol_str(), rev_kw_list[stmt_type]))
+
+        return stmt_node
+
+    def proc_if_stmt(self, in_while, in_subdef, is_elif=False):
+        # NOTE: this method handles if AND elif stmts, not else stmts.
+        # when this method is called the current tok is the if or elif token.
+        errstr = 'elif' if is_elif else 'if'
+        if_node = StmtNode(4 if is_elif else 3)
+
+        self.check_block_tok()
+        self.advance_tok()
 
-    def proc_if_stmt(self):
-        if self.at_globlvl:
-            self.globlist[-1].append(StmtNode(3))
-            if_node = self.globlist[-1] # create a ref of if-node for convenience.
+        # check for l-paren of if stmt test expr.
+        self.assert_optok(11, 'l-paren operator must proceed %s stmt.' % errstr)
+
+        try:
+            if_node.expr = self.build_expr_node(self.tok_line, is_test_expr=True)
+            self.advance_tok()
+            self.proc_block(if_node.body, in_while=in_while, in_subdef=in_subdef)
+        except Exception as e:
+            raise Exception('%s in %s stmt.' % (e, errstr))
+
+        return if_node
+
+    def proc_elif_else_stmt(self, body, in_while, in_subdef):
+        # elif & else stmt nodes are added to the children of the if stmt node they follow.
+        if self.tok_subtype == 4:
+            node = self.proc_if_stmt(in_while, in_subdef, is_elif=True)
         else:
-            self.curr_parent_node.body.append(StmtNode(3))
-            if_node = self.curr_parent_node.body[-1] # create a ref of if-node for convenience.
-            self.makenew_parent_node(if_node)
+            node = StmtNode(5)
+            self.check_block_tok()
+            self.advance_tok()
+
+            try:
+                self.proc_block(node.body, in_while=in_while, in_subdef=in_subdef)
+            except Exception as e:
+                raise Exception('%s in else stmt.' % e)
+
+        if not body or body[-1].type != 3:
+            raise Exception('%s misplaced %s stmt, no parent if-stmt' % (self.linecol_str(), 'elif' if node.type == 4 else 'else'))
 
-        # process the if stmt test. next token must be left parent token.
+        body[-1].children.append(node)
+
+    def proc_while_stmt(self, in_subdef):
+        while_node = StmtNode(6)
         self.advance_tok()
-        self.assert_optok(11) # 11: lparen op type code.
-        
-        # left parent found, but we will take tokndx back one because
-        # build_expr_node needs it as it's part of the expr.
-        self.tokndx -= 1
-        if_node.expr = deepcopy(self.build_expr_node())
+        self.assert_optok(11, 'l-paren operator must proceed while stmt.')
 
-        # confirm next tok is left-curly-brace
+        try:
+            while_node.expr = self.build_expr_node(self.tok_line, is_test_expr=True)
+            self.advance_tok()
+            self.proc_block(while_node.body, in_while=True, in_subdef=in_subdef)
+        except Exception as e:
+            raise Exception('%s in while stmt.' % e)
+
+        return while_node
+
+    def proc_subdef_stmt(self):
+        # sub stmt: sub id(arg-id, ...) { block }
+        sub_node = StmtNode(2)
+
+        # confirm we have an identifier for the subroutine def.
         self.advance_tok()
-        self.assert_optok(13) # 13: lcurly brace op type code.
+        self.assert_toktype(501, 'subroutine is missing identifier')
+        sub_node.id = self.build_id_node(self.toklist.rawstr(self.tokndx))
 
-        # first check for simplest stuff, var assignments, simple stmts ect.
-        if self.tok.type == 501: # 501: id tok type code.
-            id_node = self.build_id_node(self.tok.rawstr)
+        # process arg expr, first confirm current tok is a l-paren.
+        self.advance_tok()
+        self.assert_optok(11, 'subroutine has invalid arg expr, missing l-paren')
 
-            # tok was id, advance tok then check for assignment, inc or dec tokens.
+        if self.assert_next_tok(503, 12):
             self.advance_tok()
+        else:
+            while True:
+                self.advance_tok()
+                self.assert_toktype(501, 'identifier expected in subroutine arg expr')
+                sub_node.args.append(self.build_id_node(self.toklist.rawstr(self.tokndx)))
 
-            if self.tok.type == 503: # operator tok type code.
-                # determine if assignment op or inc/dec op.
-                if self.tok.subtype == 24: # assignment op type code.
-                    self.proc_var_assign(id_node)
+                self.advance_tok()
 
-                elif self.tok.subtype == 34 or self.tok.subtype == 35: # 34/35: inc/dec type codes.
-                    pass
+                if self.assert_curr_tok(503, 12):
+                    break
 
-        
-    def proc_elif_stmt(self):
-        pass
+                self.assert_optok(29, 'subroutine has invalid arg expr, missing r-paren')
 
-    def proc_else_stmt(self):
-        pass
+        self.advance_tok()
 
-    def proc_while_stmt(self):
-        pass
+        try:
+            self.proc_block(sub_node.body, in_subdef=True)
+        except Exception as e:
+            raise Exception('%s in subroutine %s.' % (e, sub_node.id.val))
+
+        return sub_node
 
     def proc_const_dec(self):
         """ const dec: const stmt(id-expr, int-expr)
@@ -520,84 +756,74 @@ class AstGenerator:
             as oposed to var decs which can be int
             literals *or* an expression.
         """
-        id_node = None
-        int_node = None
-
-        # confirm const dec is at global level.
-        if not self.at_globlvl:
-            print('const dec not at global level.')
-            raise Exception         
-
-        # confirm const dec isn't within an operator or expression.
-        if self.in_expr:
-            print('const dec within expression')
-            raise Exception
+        const_node = StmtNode(100) # 100: const type code.
 
         # confirm next token is an identifier if so make it's node.
         self.advance_tok()
-        self.assert_toktype(501) # 501: identifier token
-        
-        id_node = self.build_id_node(self.tok.rawstr)
+        self.assert_toktype(501, 'identifier required after const dec')
+        const_node.id = self.build_id_node(self.toklist.rawstr(self.tokndx))
 
-        # confirm next tok is an assignment op if so advance past it.
+        # confirm next tok is an assignment op.
         self.advance_tok()
-        self.assert_optok(24) # 24: assignment op type code.
+        self.assert_optok(24, 'assignment operator required after identifier for const declaration.')
 
         # confirm next tok is an integer tok if so make it's node.
         self.advance_tok()
-        self.assert_toktype(502) # 501: int token
-        int_node = self.build_int_node(self.tok.value)
+        self.assert_toktype(502, 'integer required after identifier for const declaration.')
+        const_node.expr = self.build_int_node(self.toklist.value(self.tokndx))
 
-        # everything's in order so create const node add to globlist.
-        # const StmtNode, body has id node and int node in this order.
-        self.globlist.append(StmtNode(100)) # 0- const type code.
+        if self.next_in_expr(self.tok_line):
+            raise Exception('%s const declaration must be a single integer.' % self.linecol_str())
 
-        # [-1] index is top item of globist stack.
-        self.globlist[-1].id = deepcopy(id_node)
-        self.globlist[-1].expr = deepcopy(int_node)
-
-        # const declaration complete.
+        return const_node
 
     def proc_var_dec(self):
         """ var dec: var stmt(id-expr, expr)
             var dec's are same as const except they can be
             exprs instead of only int literals.
         """
-        id_node = None
-        expr_node = None
-
-        # confirm var dec isn't within an operator or expression.
-        if self.in_expr:
-            print('var dec within expression')
-            raise Exception
+        var_node = StmtNode(1) # 1: var type code.
+        var_line = self.tok_line
 
         # confirm next token is an identifier if so make it's node.
         self.advance_tok()
-        self.assert_toktype(501) # 501: identifier token
-        
-        id_node = self.build_id_node(self.tok.rawstr)
+        self.assert_toktype(501, 'identifier required after var dec')
+        var_node.id = self.build_id_node(self.toklist.rawstr(self.tokndx))
 
-        # confirm next tok is an assignment op if so advance past it.
+        # confirm next tok is an assignment op.
         self.advance_tok()
-        self.assert_optok(24) # 24: assignment op type code.
+        self.assert_optok(24, 'assignment operator required after identifier for var declaration.')
 
         # build var dec expr.
-        expr_node = self.build_expr_node()
+        self.advance_in_expr(var_line, 'expr required after assignment operator within var declaration.')
+        var_node.expr = self.build_expr_node(var_line)
 
-        # since vars can be declared locally, we check where to put the node.
-        if self.at_globlvl:
-            self.globlist[-1].append(StmtNode(1))
-            if_node = self.globlist[-1] # create a ref of if-node for convenience.
-        else:
-            self.curr_parent_node.body.append(StmtNode(1))
-            if_node = self.curr_parent_node.body[-1] # create a ref of if-node for convenience.
-            self.makenew_parent_node(if_node)
+        if var_node.expr.type == 2000 and var_node.expr.op == 24:
+            raise Exception('%s misplaced assignment operator within var declaration.' % self.linecol_str())
 
-        # [-1] index is top item of globist stack.
-        self.globlist[-1].id = deepcopy(id_node)
-        self.globlist[-1].expr = deepcopy(expr_node)
-        
-        # var declaration complete.
+        return var_node
+
+    def build_ast(self, do_silent=False):
+        # builds self.globlist from self.toklist, verifying the tokens as it goes.
+        # returns True if they're valid, otherwise prints why unless do_silent & returns False.
+        try:
+            self.read_next_tok()
+
+            # operators, identifiers & integers are all invalid as the first token.
+            if self.next_type in (501, 502, 503):
+                self.advance_tok()
+
+                if self.tok_type == 503:
+                    raise Exception('%s misplaced %s operator' % (self.linecol_str(), rev_op_list[self.tok_subtype]))
 
+                raise Exception('%s misplaced %s' % (self.linecol_str(), 'identifier' if self.tok_type == 501 else 'integer'))
 
+            self.proc_block(self.globlist, confirm_cbraces=False, at_global_lvl=True)
 
+        except Exception as e: # verification failed.
+            if not do_silent:
+                print('AstGenerator FAILED!\ndetails:\n\n%s\n\n' % (e))
+
+            return False
+
+        return True
@@ -0,0 +1,197 @@
+from collections import Counter
+import sys
+import os
+
+from assembler import *
+from interpreter import code_addr_operand_tbl, block_end_opcodes
+
+# counts opcode n-grams over a corpus of .fbin files to find the sequences worth fusing
+# into superinstructions, run from the yson_dev directory:
+#     python ngrams.py corpus [corpus ...] [-n 2,3,4] [-top 20] [-gen]
+#
+# each corpus arg is a .fbin or a directory searched for them. code is decoded with
+# decode_instrs(), the same opsize aware decoding as disfbin(), & split into basic blocks.
+# an n-gram never spans a jump, call or loop target or follows an op ending a block, those
+# are the sequences the assembler's peephole pass can fuse, see Assembler() fuse flag. ops
+# already fused are counted as the ops they stand for.
+#
+# options:
+# -n lens : comma separated n-gram lengths to count, defaults to NGRAM_LENS.
+# -top k  : number of n-grams listed per length.
+# -gen    : generates fused opcodes for the top sequences that aren't fused yet, printed as
+#           the entries to add to the tables in opcodes.py & to optable in opcode.h.
+
+NGRAM_LENS = (2, 3, 4)
+NGRAM_TOP  = 20
+GEN_COUNT  = 8  # sequences -gen generates fused opcodes for.
+
+def find_fbin_paths(corpus_paths):
+    fbin_paths = []
+
+    for path in corpus_paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                fbin_paths.extend(os.path.join(dir_path, name) for name in sorted(file_names) if name.endswith('.fbin'))
+        else:
+            fbin_paths.append(path)
+
+    return fbin_paths
+
+def split_blocks(reader):
+# returns list of basic blocks, each a list of the opcodes in it with fused opcodes expanded.
+    instrs  = list(decode_instrs(reader.code, reader.code_addr))
+    leaders = set([reader.start_addr])
+
+    for instr in instrs:
+        opcode = instr[0][1]
+
+        for operand_ndx in code_addr_operand_tbl.get(opcode, ()):
+            if operand_ndx + 1 < len(instr):
+                leaders.add(instr[operand_ndx + 1][1])
+
+    blocks = []
+    block  = []
+
+    for instr in instrs:
+        addr, opcode = instr[0]
+
+        if addr in leaders and block:
+            blocks.append(block)
+            block = []
+
+        block.extend(fused_seq_tbl.get(opcode, (opcode,)))
+
+        if opcode in block_end_opcodes or fused_seq_tbl.get(opcode, (opcode,))[-1] in block_end_opcodes:
+            blocks.append(block)
+            block = []
+
+    if block:
+        blocks.append(block)
+
+    return blocks
+
+def count_ngrams(fbin_paths, lens=NGRAM_LENS):
+# returns (Counter of opcode tuples, op count) over every block of every program.
+    counts   = Counter()
+    op_count = 0
+
+    for fbin_path in fbin_paths:
+        with open(fbin_path, 'rb') as fbin_file:
+            reader = FbinReader(fbin_file.read())
+
+        for block in split_blocks(reader):
+            op_count += len(block)
+
+            for n in lens:
+                for i in range(len(block) - n + 1):
+                    counts[tuple(block[i : i + n])] += 1
+
+    return counts, op_count
+
+def fusable(seq):
+# a fused op can end with an op ending a block but can't have one before it's last op.
+    return not any(opcode in block_end_opcodes for opcode in seq[:-1])
+
+def seq_mnemonic(seq):
+    return '_'.join(mnemonic_tbl[opcode] for opcode in seq)
+
+signcode_name_tbl = {SIGNED_SIGNCODE   : 'SIGNED_SIGNCODE',
+                     UNSIGNED_SIGNCODE : 'UNSIGNED_SIGNCODE',
+                     NOSIGN_SIGNCODE   : 'NOSIGN_SIGNCODE',
+                     ADDR_SIGNCODE     : 'ADDR_SIGNCODE'}
+
+def operand_types(opcode):
+# returns tuple of the oprtype_tbl entry for each of opcode's operands.
+    argc = encoder_argc_tbl[opcode]
+
+    if argc == 0:
+        return ()
+
+    return (oprtype_tbl[opcode],) if argc == 1 else tuple(oprtype_tbl[opcode])
+
+def format_types(types):
+    if isinstance(types, tuple):
+        return '(%s)' % ', '.join(format_types(t) for t in types)
+
+    return signcode_name_tbl.get(types, str(types))
+
+def gen_fused_opcodes(seqs):
+# prints the table entries fusing each of seqs, numbered from the first free opcode.
+    opcode = max(max(opsize_tbl), max(fused_seq_tbl, default=0)) + 1
+    opcode = max(opcode, FIRST_FUSED_OPCODE)
+
+    print("\n# generated fused opcodes, add to opcodes.py:")
+
+    for seq in seqs:
+        types = sum((operand_types(op) for op in seq), ())
+        argc  = len(types)
+        name  = seq_mnemonic(seq)
+
+        print("\n# %s" % ' ; '.join(mnemonic_tbl[op] for op in seq))
+        print("optbl         : '%s' : %d," % (name, opcode))
+        print("mnemonic_tbl  : %d : '%s'," % (opcode, name))
+        print("opsize_tbl    : %d : %d," % (opcode, OPCODE_SIZE + argc * WORDSIZE))
+        print("opargc_tbl    : %d : %d," % (opcode, argc))
+        print("oprtype_tbl   : %d : %s," % (opcode, 0 if not argc else format_types(types[0]) if argc == 1 else format_types(types)))
+        print("fused_seq_tbl : %d : (%s)," % (opcode, ', '.join("optbl['%s']" % mnemonic_tbl[op] for op in seq)))
+        print("opcode.h      : #define %s_op %d  &&%s," % (name, opcode, name))
+
+        opcode += 1
+
+def main():
+    lens   = NGRAM_LENS
+    top    = NGRAM_TOP
+    gen    = False
+    paths  = []
+    args   = iter(sys.argv[1:])
+
+    for arg in args:
+        try:
+            if arg == '-n':
+                lens = tuple(int(n) for n in next(args).split(','))
+            elif arg == '-top':
+                top = int(next(args))
+            elif arg == '-gen':
+                gen = True
+            else:
+                paths.append(arg)
+
+        except (StopIteration, ValueError):
+            print("\nyson: '%s' needs a valid value." % arg)
+            sys.exit()
+
+    if not paths:
+        print("\nyson: usage: python ngrams.py corpus [corpus ...] [-n 2,3,4] [-top 20] [-gen]")
+        sys.exit()
+
+    fbin_paths = find_fbin_paths(paths)
+
+    try:
+        counts, op_count = count_ngrams(fbin_paths, lens)
+    except OSError as e:
+        print("Error: An I/O error occurred while attempting to read the corpus\n    more info: %s" % e)
+        sys.exit()
+    except Exception as e:
+        print('\n%s\n' % e)
+        sys.exit()
+
+    fused = set(fused_seq_tbl.values())
+
+    print("programs: %d, ops: %d" % (len(fbin_paths), op_count))
+
+    for n in lens:
+        ngrams = sorted(((count, seq) for seq, count in counts.items() if len(seq) == n and fusable(seq)), reverse=True)
+
+        print("\n%d-grams:" % n)
+
+        for count, seq in ngrams[:top]:
+            print("%8d  %5.1f%%  %-40s%s" % (count, 100.0 * count * n / op_count if op_count else 0, ' '.join(mnemonic_tbl[op] for op in seq),
+                                             '  (fused)' if seq in fused else ''))
+
+    if gen:
+        # longer sequences save more dispatches per occurrence, so rank by dispatches saved.
+        candidates = sorted(((count * (len(seq) - 1), seq) for seq, count in counts.items() if fusable(seq) and seq not in fused), reverse=True)
+        gen_fused_opcodes([seq for saved, seq in candidates[:GEN_COUNT]])
+
+if __name__ == "__main__":
+    main()
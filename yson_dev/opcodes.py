@@ -83,7 +83,37 @@ optbl = {
     'lshfts'  : 56,   # 56
     'rshfts'  : 57,   # 57
     'lrots'   : 58,   # 58
-    'rrots'   : 59    # 59
+    'rrots'   : 59,   # 59
+
+    # fused, see fused_seq_tbl.
+    'pshfr_pshfr'           : 61,
+    'pshfr_pshfr_add_poptr' : 62,
+    'psh_je'                : 63,
+    'psh_jn'                : 64,
+    'pshfr_inc_poptr'       : 65,
+    'pshfr_inc_poptr_lcont' : 66,
+    'poptr_pop2'            : 67,
+    'pshfr_psh'             : 68,
+
+    # immediate operand, see imm_op_tbl.
+    'addi'   : 69,
+    'subi'   : 70,
+    'muli'   : 71,
+    'andi'   : 72,
+    'ori'    : 73,
+    'xori'   : 74,
+    'lshfti' : 75,
+    'rshfti' : 76,
+    'incr'   : 77,
+    'decr'   : 78,
+    'addir'  : 79,
+    'addrr'  : 80,
+    'jei'    : 81,
+    'jni'    : 82,
+    'jli'    : 83,
+    'jgi'    : 84,
+    'jlsi'   : 85,
+    'jgsi'   : 86
 }
 
 
@@ -148,7 +178,37 @@ mnemonic_tbl = {
     56 : 'lshfts',
     57 : 'rshfts',
     58 : 'lrots',
-    59 : 'rrots'
+    59 : 'rrots',
+
+    # fused, see fused_seq_tbl.
+    61 : 'pshfr_pshfr',
+    62 : 'pshfr_pshfr_add_poptr',
+    63 : 'psh_je',
+    64 : 'psh_jn',
+    65 : 'pshfr_inc_poptr',
+    66 : 'pshfr_inc_poptr_lcont',
+    67 : 'poptr_pop2',
+    68 : 'pshfr_psh',
+
+    # immediate operand, see imm_op_tbl.
+    69 : 'addi',
+    70 : 'subi',
+    71 : 'muli',
+    72 : 'andi',
+    73 : 'ori',
+    74 : 'xori',
+    75 : 'lshfti',
+    76 : 'rshfti',
+    77 : 'incr',
+    78 : 'decr',
+    79 : 'addir',
+    80 : 'addrr',
+    81 : 'jei',
+    82 : 'jni',
+    83 : 'jli',
+    84 : 'jgi',
+    85 : 'jlsi',
+    86 : 'jgsi'
 }
 
 
@@ -213,7 +273,37 @@ opsize_tbl = {
     56 : 1,  # 'lshfts'
     57 : 1,  # 'rshfts'
     58 : 1,  # 'lrots'
-    59 : 1   # 'rrots'
+    59 : 1,  # 'rrots'
+
+    # fused, see fused_seq_tbl.
+    61 : 9,   # 'pshfr_pshfr'
+    62 : 13,  # 'pshfr_pshfr_add_poptr'
+    63 : 9,   # 'psh_je'
+    64 : 9,   # 'psh_jn'
+    65 : 9,   # 'pshfr_inc_poptr'
+    66 : 9,   # 'pshfr_inc_poptr_lcont'
+    67 : 5,   # 'poptr_pop2'
+    68 : 9,   # 'pshfr_psh'
+
+    # immediate operand, see imm_op_tbl.
+    69 : 5,  # 'addi'
+    70 : 5,  # 'subi'
+    71 : 5,  # 'muli'
+    72 : 5,  # 'andi'
+    73 : 5,  # 'ori'
+    74 : 5,  # 'xori'
+    75 : 5,  # 'lshfti'
+    76 : 5,  # 'rshfti'
+    77 : 5,  # 'incr'
+    78 : 5,  # 'decr'
+    79 : 9,  # 'addir'
+    80 : 9,  # 'addrr'
+    81 : 9,  # 'jei'
+    82 : 9,  # 'jni'
+    83 : 9,  # 'jli'
+    84 : 9,  # 'jgi'
+    85 : 9,  # 'jlsi'
+    86 : 9   # 'jgsi'
 }
 
 
@@ -278,7 +368,37 @@ opargc_tbl = {
     56 : 0,  # 'lshfts'
     57 : 0,  # 'rshfts'
     58 : 0,  # 'lrots'
-    59 : 0   # 'rrots'
+    59 : 0,  # 'rrots'
+
+    # fused, see fused_seq_tbl.
+    61 : 2,  # 'pshfr_pshfr'
+    62 : 3,  # 'pshfr_pshfr_add_poptr'
+    63 : 2,  # 'psh_je'
+    64 : 2,  # 'psh_jn'
+    65 : 2,  # 'pshfr_inc_poptr'
+    66 : 2,  # 'pshfr_inc_poptr_lcont'
+    67 : 1,  # 'poptr_pop2'
+    68 : 2,  # 'pshfr_psh'
+
+    # immediate operand, see imm_op_tbl.
+    69 : 1, # 'addi'
+    70 : 1, # 'subi'
+    71 : 1, # 'muli'
+    72 : 1, # 'andi'
+    73 : 1, # 'ori'
+    74 : 1, # 'xori'
+    75 : 1, # 'lshfti'
+    76 : 1, # 'rshfti'
+    77 : 1, # 'incr'
+    78 : 1, # 'decr'
+    79 : 2, # 'addir'
+    80 : 2, # 'addrr'
+    81 : 2, # 'jei'
+    82 : 2, # 'jni'
+    83 : 2, # 'jli'
+    84 : 2, # 'jgi'
+    85 : 2, # 'jlsi'
+    86 : 2  # 'jgsi'
 }
 
 oprtype_tbl = { 
@@ -341,7 +461,77 @@ oprtype_tbl = {
     56 : 0,  # 'lshfts'
     57 : 0,  # 'rshfts'
     58 : 0,  # 'lrots'
-    59 : 0   # 'rrots'
+    59 : 0,  # 'rrots'
+
+    # fused, see fused_seq_tbl.
+    61 : ((ADDR_SIGNCODE, UNSIGNED_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'pshfr_pshfr'
+    62 : ((ADDR_SIGNCODE, UNSIGNED_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'pshfr_pshfr_add_poptr'
+    63 : ((UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'psh_je'
+    64 : ((UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'psh_jn'
+    65 : ((ADDR_SIGNCODE, UNSIGNED_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'pshfr_inc_poptr'
+    66 : ((ADDR_SIGNCODE, UNSIGNED_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'pshfr_inc_poptr_lcont'
+    67 : (ADDR_SIGNCODE, UNSIGNED_SIGNCODE),  # 'poptr_pop2'
+    68 : ((ADDR_SIGNCODE, UNSIGNED_SIGNCODE), (UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE)),  # 'pshfr_psh'
+
+    # immediate operand, see imm_op_tbl.
+    69 : (UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE),  # 'addi'
+    70 : (UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE),  # 'subi'
+    71 : (UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE),  # 'muli'
+    72 : (UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE),  # 'andi'
+    73 : (UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE),  # 'ori'
+    74 : (UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE),  # 'xori'
+    75 : (UNSIGNED_SIGNCODE),  # 'lshfti'
+    76 : (UNSIGNED_SIGNCODE),  # 'rshfti'
+    77 : (ADDR_SIGNCODE, UNSIGNED_SIGNCODE),  # 'incr'
+    78 : (ADDR_SIGNCODE, UNSIGNED_SIGNCODE),  # 'decr'
+    79 : ((ADDR_SIGNCODE, UNSIGNED_SIGNCODE), (UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE)),  # 'addir'
+    80 : ((ADDR_SIGNCODE, UNSIGNED_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'addrr'
+    81 : ((UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'jei'
+    82 : ((UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'jni'
+    83 : ((UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'jli'
+    84 : ((UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'jgi'
+    85 : ((UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE)),  # 'jlsi'
+    86 : ((UNSIGNED_SIGNCODE, SIGNED_SIGNCODE, ADDR_SIGNCODE), (ADDR_SIGNCODE, UNSIGNED_SIGNCODE))   # 'jgsi'
+}
+
+# superinstructions, each stands for a sequence of ops & takes their operands one after the
+# other. the assembler's peephole pass fuses the sequences into them, see Assembler() fuse
+# flag, & they do exactly what the sequence would. opcodes from 60 up to FIRST_FUSED_OPCODE
+# are left for vm.c's own ops. ngrams.py profiles programs for sequences worth fusing.
+FIRST_FUSED_OPCODE = 61
+
+fused_seq_tbl = {
+    61 : (optbl['pshfr'], optbl['pshfr']),
+    62 : (optbl['pshfr'], optbl['pshfr'], optbl['add'], optbl['poptr']),
+    63 : (optbl['psh'], optbl['je']),
+    64 : (optbl['psh'], optbl['jn']),
+    65 : (optbl['pshfr'], optbl['inc'], optbl['poptr']),
+    66 : (optbl['pshfr'], optbl['inc'], optbl['poptr'], optbl['lcont']),
+    67 : (optbl['poptr'], optbl['pop2']),
+    68 : (optbl['pshfr'], optbl['psh'])
+}
+
+# immediate operand ops, each does what the stack op it's mapped to does with the immediate
+# standing in for the second word. the arithmetic ops replace the top word with top OP imm
+# rather than pushing it & the branches compare top against imm, neither pops anything.
+# incr, decr, addir & addrr work on ram words without touching the stack so they aren't in
+# here: incr/decr addr, addir addr imm adds imm to ram[addr], addrr src dst adds ram[src]
+# to ram[dst]. the branches take the immediate then the target.
+imm_op_tbl = {
+    optbl['addi']   : optbl['add'],
+    optbl['subi']   : optbl['sub'],
+    optbl['muli']   : optbl['mul'],
+    optbl['andi']   : optbl['and'],
+    optbl['ori']    : optbl['or'],
+    optbl['xori']   : optbl['xor'],
+    optbl['lshfti'] : optbl['lshft'],
+    optbl['rshfti'] : optbl['rshft'],
+    optbl['jei']    : optbl['je'],
+    optbl['jni']    : optbl['jn'],
+    optbl['jli']    : optbl['jl'],
+    optbl['jgi']    : optbl['jg'],
+    optbl['jlsi']   : optbl['jls'],
+    optbl['jgsi']   : optbl['jgs']
 }
 
 def opcode_map_test():
@@ -1,6 +1,8 @@
 from collections import *
+from array import array
 
 import pickle
+import re
 import assembler
 
 def pickle_token_list(token_list):
@@ -145,8 +147,10 @@ operand_count_map = {
         31 : 2,
         32 : 2,
         33 : 2,
-        36 : 2,
-        37 : 2,
+        34 : 1,
+        35 : 1,
+        36 : 1,
+        37 : 1,
 } # codes 36 & 37 are reserved!!!!!! start from 38
 
 # Reversed version of the operator & keyword type code list, give it the code and
@@ -155,37 +159,63 @@ rev_op_list = {v: k for k, v in operator_list.items()}
 rev_kw_list = {v: k for k, v in keyword_list.items()}
 
 class Token:
-    def __init__(self, 
-                 _type, 
-                 subtype, 
-                 line, 
-                 col, 
-                 rawstr, 
-                 ndx, 
-                 value=None):
-        
-        self.type      = _type # master token type code.
-        self.subtype   = subtype # specifies what op, keyword ect token is.
-        self.type_set  = ((_type, subtype))
-        self.line      = line # line token is on source file.
-        self.col       = col # col token is on source file.
-        self.rawstr    = rawstr # raw string from source file, '+', 'sub', 'var_name' ect.
-        self.value     = value # used by integer tokens.
-        self.mnemonic  = token_mnemonic[subtype]
-        self.ndx       = ndx # position within token list.
-        self.print_str = self.build_print_str()
-        #self.oprcount  = operand_count_map[subtype] if _type == 503 else None
+# a view of one token within a TokenList(), made on demand by TokenList[ndx]. it holds
+# nothing but the list & the token's ndx, every field is read from, and modify() writes
+# to, the list's columns so any two views of a token always agree.
+
+    __slots__ = ('toklist', 'ndx')
+
+    def __init__(self, toklist, ndx):
+        self.toklist = toklist
+        self.ndx     = ndx # position within token list.
+
+    @property
+    def type(self): # master token type code.
+        return self.toklist.types[self.ndx]
+
+    @property
+    def subtype(self): # specifies what op, keyword ect token is.
+        return self.toklist.subtypes[self.ndx]
+
+    @property
+    def type_set(self):
+        return (self.type, self.subtype)
+
+    @property
+    def line(self): # line token is on source file.
+        return self.toklist.lines[self.ndx]
+
+    @property
+    def col(self): # col token is on source file.
+        return self.toklist.cols[self.ndx]
+
+    @property
+    def rawstr(self): # raw string from source file, '+', 'sub', 'var_name' ect.
+        return self.toklist.rawstr(self.ndx)
+
+    @property
+    def value(self): # used by integer tokens.
+        return self.toklist.value(self.ndx)
+
+    @property
+    def mnemonic(self):
+        return token_mnemonic[self.subtype]
+
+    @property
+    def oprcount(self):
+        return operand_count_map.get(self.subtype)
+
+    @property
+    def print_str(self):
+        return self.build_print_str()
 
     def modify(self, 
                _type, 
                subtype, 
                value=None):
         
-        self.mnemonic  = token_mnemonic[subtype]
-        self.type      = _type
-        self.subtype   = subtype
-        self.oprcount  = operand_count_map[subtype]
-        self.print_str = self.build_print_str()
+        self.toklist.types[self.ndx]    = _type
+        self.toklist.subtypes[self.ndx] = subtype
 
     def build_print_str(self):
         if self.type == 502: # 502 = integer token code.
@@ -199,23 +229,78 @@ class Token:
         return self.print_str
 
 class TokenList:
+# tokens are kept column by column rather than as an object each, Token() is only
+# a view made when one is asked for:
+#
+# types    -> master token type code of each token.
+# subtypes -> subtype code of each token.
+# lines    -> line each token is on in the source file.
+# cols     -> col each token is on in the source file.
+# str_ndxs -> index of each token's raw string within strs.
+#
+# each distinct raw string is kept once in strs, str_values holds the int value of
+# each string that's an integer token's raw string & None for the rest.
+
     def __init__(self):
-        self.list = []
-        self.code_list = [] # list of tuples pairs of each token's type and subtype.
-        self.tokcount = 0
+        self.types      = array('H')
+        self.subtypes   = array('H')
+        self.lines      = array('I')
+        self.cols       = array('I')
+        self.str_ndxs   = array('I')
+        self.strs       = []
+        self.str_values = []
+        self.str_map    = {} # maps raw string to its index in self.strs.
+        self.tokcount   = 0
 
     def print_token(self, ndx):
-        print(self.list[ndx])
+        print(self[ndx])
 
     def create(self, _type, subtype, line, col, rawstr, value=None):
-        self.list.append(Token(_type, subtype, line, col, rawstr, len(self.list), value))
-        self.code_list.append((_type, subtype))
+        str_ndx = self.str_map.get(rawstr)
+
+        if str_ndx is None:
+            str_ndx = len(self.strs)
+            self.str_map[rawstr] = str_ndx
+            self.strs.append(rawstr)
+            self.str_values.append(value)
+
+        self.types.append(_type)
+        self.subtypes.append(subtype)
+        self.lines.append(line)
+        self.cols.append(col)
+        self.str_ndxs.append(str_ndx)
         self.tokcount += 1
 
+    def has_tok(self, ndx):
+        return ndx < self.tokcount
+
+    def codes(self, ndx):
+        # type, subtype & line of the token at ndx.
+        return self.types[ndx], self.subtypes[ndx], self.lines[ndx]
+
+    def rawstr(self, ndx):
+        return self.strs[self.str_ndxs[ndx]]
+
+    def value(self, ndx):
+        return self.str_values[self.str_ndxs[ndx]]
+
+    def __getitem__(self, ndx):
+        if ndx < 0:
+            ndx += self.tokcount
+
+        if not 0 <= ndx < self.tokcount:
+            raise IndexError('token index out of range')
+
+        return Token(self, ndx)
+
+    def __iter__(self):
+        for ndx in range(self.tokcount):
+            yield Token(self, ndx)
+
     def __str__(self):
         string = ''
 
-        for token in self.list:
+        for token in self:
             string += '\n\n'
             string += token.__str__()
 
@@ -223,14 +308,93 @@ class TokenList:
     
     def __len__(self):
         # check if last token is end of stream token, if so chop it off the len.
-        if self.list[self.tokcount - 1].type == 999:
+        if self.types[self.tokcount - 1] == 999:
             return self.tokcount - 1
         else:
             return self.tokcount
 
+# tokens a TokenStream keeps, must be a power of 2. the verifier looks 2 tokens
+# behind & 1 ahead of the current token so anything past 4 is plenty.
+TOKEN_WINDOW      = 8
+TOKEN_WINDOW_MASK = TOKEN_WINDOW - 1
+
+# column values of the TOKEN_STREAM_END tokens a TokenStream reads once the lexer
+# is done & of any token before the first, as a TokenList's [-1] is it's last token.
+eof_token = (999, 999, 0, 0, '', None)
+
+class TokenColumn:
+# one column of a TokenStream, indexed by token ndx like a TokenList's array columns.
+# only the stream's window is kept, reading a token past the last one lexed lexes up
+# to it & reading one that's left the window raises an exception.
+
+    __slots__ = ('stream', 'items', 'eof_item')
+
+    def __init__(self, stream, eof_item):
+        self.stream   = stream
+        self.items    = [eof_item] * TOKEN_WINDOW
+        self.eof_item = eof_item
+
+    def __getitem__(self, ndx):
+        if ndx >= self.stream.tokcount:
+            self.stream.fill(ndx)
+
+        elif ndx <= self.stream.tokcount - TOKEN_WINDOW:
+            if ndx < 0: return self.eof_item
+            raise Exception('token %d has left the token stream window' % ndx)
+
+        return self.items[ndx & TOKEN_WINDOW_MASK]
+
+    def __setitem__(self, ndx, item):
+        self[ndx] # fills or raises as reading would.
+        self.items[ndx & TOKEN_WINDOW_MASK] = item
+
+class TokenStream:
+# reads the tokens Lexer.iter_tokens() yields as they're lexed, for the verifier
+# & ast generator to read like a TokenList: by ndx through the same columns, with
+# Token() views & rawstr()/value(). only the last TOKEN_WINDOW tokens are held so
+# memory doesn't grow with the source file, the lexer reads a line at a time.
+# once the lexer is done every ndx reads as a TOKEN_STREAM_END token.
+
+    def __init__(self, tokens):
+        self.tokens   = tokens
+        self.tokcount = 0 # tokens read from the lexer so far, counting stream ends.
+        self.columns  = [TokenColumn(self, eof_item) for eof_item in eof_token]
+
+        self.types, self.subtypes, self.lines, self.cols, self.rawstrs, self.values = self.columns
+
+    def fill(self, ndx):
+        # reads tokens from the lexer up to & including ndx.
+        types, subtypes, lines, cols, rawstrs, values = [column.items for column in self.columns]
+
+        while self.tokcount <= ndx:
+            slot = self.tokcount & TOKEN_WINDOW_MASK
+            types[slot], subtypes[slot], lines[slot], cols[slot], rawstrs[slot], values[slot] = next(self.tokens, eof_token)
+            self.tokcount += 1
+
+    def has_tok(self, ndx):
+        return True
+
+    def codes(self, ndx):
+        # type, subtype & line of the token at ndx, the window is only checked once.
+        _type = self.types[ndx] # fills or raises as reading any column would.
+        slot  = ndx & TOKEN_WINDOW_MASK
+
+        return _type, self.subtypes.items[slot], self.lines.items[slot]
+
+    def rawstr(self, ndx):
+        return self.rawstrs[ndx]
+
+    def value(self, ndx):
+        return self.values[ndx]
+
+    def __getitem__(self, ndx):
+        return Token(self, ndx)
+
 class BlockChecker:
     # Keeps a stack that is used to check curly braces, if/elif/else 
     # stmts are correct, handles nested stmts and blocks.
+    # the stack holds the mnemonics of the open tokens rather than the tokens, a
+    # token read from a TokenStream can leave it's window while it's block is open.
 
     def __init__(self):
         self.stack = deque()
@@ -238,18 +402,20 @@ class BlockChecker:
 
     def assert_top_tok(self, mnemonic):
         try:
-            if self.stack[-1].mnemonic == mnemonic:
+            if self.stack[-1] == mnemonic:
                 return True
         except Exception:
             return False
 
     def check(self, tok):
+        mnemonic = tok.mnemonic
+
         # if tok is if-stmt or { just push onto stack.
-        if tok.mnemonic == 'IF_STMT' or tok.mnemonic == 'L_CBRACE':
-            self.stack.append(tok)
+        if mnemonic == 'IF_STMT' or mnemonic == 'L_CBRACE':
+            self.stack.append(mnemonic)
             return
 
-        elif tok.mnemonic == 'R_CBRACE':
+        elif mnemonic == 'R_CBRACE':
             # is tok the closing brace of an opening brace on stack?
 
             if self.assert_top_tok("L_CBRACE"):
@@ -270,10 +436,10 @@ class BlockChecker:
                 return
 
         # if tok is else check can_elif_else is true push onto stack, if not raise exception.
-        elif tok.mnemonic == 'ELSE_STMT' or tok.mnemonic == 'ELIF_STMT':
+        elif mnemonic == 'ELSE_STMT' or mnemonic == 'ELIF_STMT':
             
             if self.can_elif_else:
-                self.stack.append(tok)
+                self.stack.append(mnemonic)
 
             else:
                 raise Exception('misplaced elif-stmt, no parent if-stmt')
@@ -282,43 +448,46 @@ class BlockChecker:
         # used for debugging purposes.
         string = ''
 
-        for tok in self.stack:
+        for mnemonic in self.stack:
             string += 'can-elif-else: %s' % str(self.can_elif_else)
-            string += '\n%s\n\n' % tok.__str__()
+            string += '\n<%s>\n\n' % mnemonic
 
         return string
 
 class TokenListVerifier:
 # Takes a TokenList() object verifies that the tokens are all where they
 # should be. Verifies the source code in .pys file is all correct.
-# Once TokenListVerifier() has verified the TokenList() it can then be used
-# to construct an AST. AstGenerator() object performs no token verification.
+# AstGenerator() verifies the tokens itself as it builds the AST, so this is
+# only needed to check a source file without building it's AST.
+# debug: prints each expr's first token & the operators it checks as it goes.
 
-    def __init__(self, toklist):
+    def __init__(self, toklist, debug=False):
         self.block_checker = BlockChecker()
         self.tokndx = -1
         self.toklist = toklist
-        self.tok = None
+        self.types = toklist.types # token columns are read directly, see TokenList.
+        self.subtypes = toklist.subtypes
+        self.lines = toklist.lines
         self.in_subdef = False
         self.tokens_verified = 0
+        self.debug = debug
         lparen_count = 0
         rparen_count = 0
 
     def advance_tok(self):
         self.tokndx += 1
-        self.tok = self.toklist.list[self.tokndx]
         self.tokens_verified += 1
 
     def recede_tok(self):
         self.tokndx -= 1
-        if (self.tokndx - 1) == -1:
-            self.tok = None
-        else:
-            self.tok = self.toklist.list[self.tokndx]
         self.tokens_verified -= 1
 
+    def curr_tok(self):
+        # returns a Token() view of the current token, for messages & the block-checker.
+        return self.toklist[self.tokndx]
+
     def linecol_str(self):
-        return 'line: %d col:%d' % (self.tok.line, self.tok.col)
+        return 'line: %d col:%d' % (self.lines[self.tokndx], self.toklist.cols[self.tokndx])
 
     def assert_next_tok(self, 
                         toktype, 
@@ -328,16 +497,16 @@ class TokenListVerifier:
         # depending on if the next token(based on tokndx) matches.
 
         # check if we're at last token meaning next token cannot be of toktype.
-        if (self.tokndx + 1) == len(self.toklist.list):
+        if not self.toklist.has_tok(self.tokndx + 1):
             return False
 
-        return self.assert_tok(self.toklist.list[self.tokndx + 1], toktype, subtype)
+        return self.assert_tok(self.tokndx + 1, toktype, subtype)
     
     def assert_curr_tok(self, 
                         toktype, 
                         subtype=None):
         
-        return self.assert_tok(self.tok, toktype, subtype)
+        return self.assert_tok(self.tokndx, toktype, subtype)
 
     def assert_last_tok(self, 
                         toktype, 
@@ -346,17 +515,18 @@ class TokenListVerifier:
         if self.tokndx == 0:
             return False
         
-        return self.assert_tok(self.toklist.list[self.tokndx - 1], toktype, subtype)
+        return self.assert_tok(self.tokndx - 1, toktype, subtype)
 
     def assert_tok(self, 
-                   tok, 
+                   ndx, 
                    toktype, 
                    subtype=None):
         
-        if tok.type != toktype:
+        # ndx: index of the token within toklist.
+        if self.types[ndx] != toktype:
             return False
         if subtype:
-            if tok.subtype != subtype:
+            if self.subtypes[ndx] != subtype:
                 return False
 
         return True
@@ -368,10 +538,12 @@ class TokenListVerifier:
         # expr_line: line number that expr is on in source file.
         # is_test_expr: tells this method if the expr being verified is a test expr or not.
 
-        # when this method is called self.tok is the first token of the expr.
+        # when this method is called the current tok is the first token of the expr.
         lparen_count = rparen_count = assign_count = 0
         lbracket_count = rbracket_count = 0
-        print("first tok in expr-> %s" % self.tok)
+        if self.debug:
+            print("first tok in expr-> %s" % self.curr_tok())
+
         # test_expr_errmsg is used when raising exceptions.
         if is_test_expr: 
             if not self.assert_curr_tok(503, 11): # 11: lparen op type code.
@@ -384,10 +556,7 @@ class TokenListVerifier:
         self.recede_tok()
         
         while True:
-            if (self.tokndx - 1) == -1:
-                last_tok = None
-            else:
-                last_tok = self.tok
+            last_ndx = self.tokndx
 
             self.advance_tok()
 
@@ -395,7 +564,7 @@ class TokenListVerifier:
             # otherwise check for l-curly brace, lastly check for last token in toklist.
             # for l-curlyb & tok on different line we must recede_tok() so this
             # method only eats the tokens within the expr nothing more.
-            if self.tok.line != expr_line: # eol check.
+            if self.lines[self.tokndx] != expr_line: # eol check.
                 self.recede_tok()
                 break
 
@@ -460,8 +629,8 @@ class TokenListVerifier:
                     if lbracket_count == 0:
                         raise Exception('%s r bracket misplaced in %s expr.' % (self.linecol_str(), test_expr_errmsg))
 
-                    lasttok  = self.toklist.list[self.tokndx - 1]
-                    lasttok2 = self.toklist.list[self.tokndx - 2]
+                    lasttok  = self.tokndx - 1
+                    lasttok2 = self.tokndx - 2
 
                             # check if last tok was int or id, then check if tok before that was l-bracket.
                             # if no id/int and no l-bracket then we have misplaced r-bracket.
@@ -478,15 +647,15 @@ class TokenListVerifier:
                 # check if curr op is ! operator being used incorrectly.
                 if self.assert_curr_tok(503, 17):
                     if not is_test_expr:
-                        raise Exception('%s misplaced %s oper3ator in %s expr.' % (self.linecol_str(), rev_op_list[self.tok.subtype], test_expr_errmsg))
+                        raise Exception('%s misplaced %s oper3ator in %s expr.' % (self.linecol_str(), rev_op_list[self.subtypes[self.tokndx]], test_expr_errmsg))
 
                     # check if last op was anything except l paren.
                     if not self.assert_last_tok(503, 11):
-                        raise Exception('%s misplaced %s ope2rator in %s expr.' % (self.linecol_str(), rev_op_list[self.tok.subtype], test_expr_errmsg))
+                        raise Exception('%s misplaced %s ope2rator in %s expr.' % (self.linecol_str(), rev_op_list[self.subtypes[self.tokndx]], test_expr_errmsg))
 
                     # check if next op is any operator.
                     if self.assert_next_tok(503):
-                        raise Exception('%s misplaced %s o1perator in %s expr.' % (self.linecol_str(), rev_op_list[self.tok.subtype], test_expr_errmsg))
+                        raise Exception('%s misplaced %s o1perator in %s expr.' % (self.linecol_str(), rev_op_list[self.subtypes[self.tokndx]], test_expr_errmsg))
                     
                     # ! op is valid so continue validating expr.
                     continue
@@ -494,7 +663,8 @@ class TokenListVerifier:
                 # check for any cases of invalidation where last tok was also an operator that is
                 # caught in the above if blocks.
                 if self.assert_last_tok(503):
-                    print(last_tok)
+                    if self.debug:
+                        print(self.toklist[last_ndx])
 
                     # check for last op being = and curr being [, which is valid.
                     if self.assert_last_tok(503, 24) and self.assert_curr_tok(503, 15):
@@ -513,12 +683,12 @@ class TokenListVerifier:
                     # unary add/sub op also get caught in this if block but fall thru it being caught below.
                     # in their processing code.
                     if self.assert_last_tok(503, 11):
-                        if self.tok.subtype in [15, 16, 17, 18, 24, 29]:
-                            raise Exception('%s misplaced %s oper4ator in %s expr.' % (self.linecol_str(), rev_op_list[self.tok.subtype], test_expr_errmsg))
+                        if self.subtypes[self.tokndx] in [15, 16, 17, 18, 24, 29]:
+                            raise Exception('%s misplaced %s oper4ator in %s expr.' % (self.linecol_str(), rev_op_list[self.subtypes[self.tokndx]], test_expr_errmsg))
 
                     # catch cases of non +/-/ ops to the right of ) ops.
                     if self.assert_last_tok(503, 12):
-                        if self.tok.subtype not in [19, 20]:
+                        if self.subtypes[self.tokndx] not in [19, 20]:
                             continue
 
                     # process unary add operator.
@@ -527,7 +697,7 @@ class TokenListVerifier:
                         # 501: id code., 502: int code
                         if self.assert_next_tok(501) or self.assert_next_tok(502):
                             # current token is unary-add operator, update the token.
-                            self.tok.modify(503, 36) # 36: unary add
+                            self.subtypes[self.tokndx] = 36 # 36: unary add
                             continue
 
                     # process unary sub operator.
@@ -537,7 +707,7 @@ class TokenListVerifier:
                         if self.assert_next_tok(501) or self.assert_next_tok(502):
 
                             # current token is unary-sub operator, update the token.
-                            self.tok.modify(503, 37) # 36: unary sub
+                            self.subtypes[self.tokndx] = 37 # 36: unary sub
                             continue
 
                     # check if last op was (.
@@ -548,19 +718,20 @@ class TokenListVerifier:
                             if is_test_expr: 
                                 continue
                             else:
-                                raise Exception('%s misplaced %s oper9ator in %s expr.' % (self.linecol_str(), rev_op_list[self.tok.subtype], test_expr_errmsg))
+                                raise Exception('%s misplaced %s oper9ator in %s expr.' % (self.linecol_str(), rev_op_list[self.subtypes[self.tokndx]], test_expr_errmsg))
                         
                         # check if curr op is & which is valid when not in test expr.
                         elif self.assert_curr_tok(503, 18):
                             if is_test_expr:
-                                raise Exception('%s misplaced %s opera99tor in %s expr.' % (self.linecol_str(), rev_op_list[self.tok.subtype], test_expr_errmsg))
+                                raise Exception('%s misplaced %s opera99tor in %s expr.' % (self.linecol_str(), rev_op_list[self.subtypes[self.tokndx]], test_expr_errmsg))
                             else:
                                 continue
                     
-                    print("DANIEL")
+                    if self.debug:
+                        print("operators misplaced in expr-> %s %s" % (self.toklist[last_ndx], self.curr_tok()))
 
                     # two operators next to each other in invalid fasion.
-                    raise Exception('%s misplaced %s oper66ator in %s expr.' % (self.linecol_str(), rev_op_list[self.tok.subtype], test_expr_errmsg))
+                    raise Exception('%s misplaced %s oper66ator in %s expr.' % (self.linecol_str(), rev_op_list[self.subtypes[self.tokndx]], test_expr_errmsg))
             
                 # last tok wasnt an operator, no error here.
                 continue
@@ -571,7 +742,7 @@ class TokenListVerifier:
 
                 if self.assert_last_tok(502):
                     # check if the two ints were on same line otherwise no error.
-                    if last_tok.line == self.tok.line:
+                    if self.lines[last_ndx] == self.lines[self.tokndx]:
                         raise Exception('%s integer misplaced in %s expr.' % (self.linecol_str(), test_expr_errmsg))
                 
                 continue
@@ -581,7 +752,7 @@ class TokenListVerifier:
     
                 if self.assert_last_tok(501):
                     # check if the two identifiers were on same line otherwise no error.
-                    if last_tok.line == self.tok.line:
+                    if self.lines[last_ndx] == self.lines[self.tokndx]:
                         raise Exception('%s identifier misplaced in %s expr.' % (self.linecol_str(), test_expr_errmsg))
                 
                 continue
@@ -611,19 +782,19 @@ class TokenListVerifier:
             self.advance_tok()
 
             # check that first tok isnt any of the tokens covered below.
-            first_tok = self.toklist.list[0]
+            first_tok = 0
 
             # all operators are invalid as the first token.
             if self.assert_tok(first_tok, 503):
-                raise Exception('Line: %d Col: %d misplaced %s operator' % (first_tok.line, first_tok.col))
+                raise Exception('Line: %d Col: %d misplaced %s operator' % (self.lines[0], self.toklist.cols[0], rev_op_list[self.subtypes[0]]))
             
             # identifiers cannot be first token.
             elif self.assert_tok(first_tok, 501):
-                raise Exception('Line: %d Col: %d misplaced identifier' % (first_tok.line, first_tok.col))
+                raise Exception('Line: %d Col: %d misplaced identifier' % (self.lines[0], self.toklist.cols[0]))
             
             # integers cannot be first token.
             elif self.assert_tok(first_tok, 502):
-                raise Exception('Line: %d Col: %d misplaced integer' % (first_tok.line, first_tok.col))
+                raise Exception('Line: %d Col: %d misplaced integer' % (self.lines[0], self.toklist.cols[0]))
 
 
         # deal with opening l-cbrace.
@@ -632,7 +803,7 @@ class TokenListVerifier:
             if confirm_cbraces:
                 
                 try:
-                    self.block_checker.check(self.tok)
+                    self.block_checker.check(self.curr_tok())
                 except Exception as e:
                     raise '%s %s' % (self.linecol_str(), e)
 
@@ -660,7 +831,7 @@ class TokenListVerifier:
             elif self.assert_curr_tok(503, 14): # 14: r-cbrace op token type code.
                 
                 try:
-                    self.block_checker.check(self.tok)
+                    self.block_checker.check(self.curr_tok())
                 except Exception as e:
                     raise Exception('%s %s' % (self.linecol_str(), e))
                 
@@ -686,19 +857,19 @@ class TokenListVerifier:
                 if not in_subdef:
                     raise Exception('%s return stmt must be within subroutine.' % (self.linecol_str()))
                 
-                rettok_line = self.tok.line
+                rettok_line = self.lines[self.tokndx]
                 self.advance_tok()
                 self.verify_expr(rettok_line)
 
             elif self.assert_curr_tok(500, 8): # check for print tok.
-                printtok_line = self.tok.line
+                printtok_line = self.lines[self.tokndx]
                 self.advance_tok()
                 self.verify_expr(printtok_line)
 
             elif self.assert_curr_tok(500, 37) or self.assert_curr_tok(500, 38): # 37/38: cont/break kw codes.
                 # if not a while block these keywords are misplaced.
                 if not is_while_block:
-                    raise Exception('%s %s stmt misplaced' % (self.linecol_str(), rev_kw_list[self.tok.subtype]))
+                    raise Exception('%s %s stmt misplaced' % (self.linecol_str(), rev_kw_list[self.subtypes[self.tokndx]]))
                 
             elif self.assert_curr_tok(500, 2): # 2: sub kw code.
                 # check if we're at global level, if not then sub stmt is misplaced.
@@ -721,7 +892,7 @@ class TokenListVerifier:
             else:
                 # if no matches for keywords or stmt only exprs are left.
                 try:
-                    self.verify_expr(self.tok.line)
+                    self.verify_expr(self.lines[self.tokndx])
                 except Exception as e:
                     raise Exception('%s' % e)
 
@@ -756,20 +927,20 @@ class TokenListVerifier:
 
         # next token must be valid expr.
         try:
-            self.verify_expr(self.tok.line)
+            self.verify_expr(self.lines[self.tokndx])
         except Exception as e:
             raise Exception('%s within var declaration.' % e)
         
     def verify_if_elif_stmt(self, is_elif=False):
         # NOTE: this method handles if AND elif stmts, not else stmts.
         # is_elif: when passed as True then method is verifying an elif stmt, otherwise if stmt.
-        # when this method is called self.tok is the if or elif token.
+        # when this method is called the current tok is the if or elif token.
 
         errstr = 'elif' if is_elif else 'if'
 
-        # send last tok to block-checker because self.tok is token proceeding if-stmt tok.
+        # send last tok to block-checker because the current tok is token proceeding if-stmt tok.
         try:
-            self.block_checker.check(self.tok)
+            self.block_checker.check(self.curr_tok())
         except Exception as e:
             raise Exception('%s in %s stmt.' % (e, errstr))
 
@@ -781,7 +952,7 @@ class TokenListVerifier:
 
         # verify if/elif stmt test expr.
         try:
-            self.verify_expr(self.tok.line, is_test_expr=True)
+            self.verify_expr(self.lines[self.tokndx], is_test_expr=True)
         except Exception as e:
             raise Exception('%s in %s stmt.' % (e, errstr))
 
@@ -792,7 +963,7 @@ class TokenListVerifier:
             raise Exception('%s in %s stmt.' % (e, errstr))
 
     def verify_else_stmt(self):
-        # when this method is called self.tok is the else token.
+        # when this method is called the current tok is the else token.
         # so we send the last tok to block-checker which is the else tok.
 
         # catch if else stmt is the first token and therefore misplaced.
@@ -800,7 +971,7 @@ class TokenListVerifier:
             raise Exception('%s else stmt must have parent if or elif stmt.' % self.linecol_str())
 
         try:
-            self.block_checker.check(self.tok)
+            self.block_checker.check(self.curr_tok())
         except Exception as e:
              raise Exception('%s %s in else stmt.' % (self.linecol_str(), e))
 
@@ -819,7 +990,7 @@ class TokenListVerifier:
             raise Exception('l-paren operator must proceed while stmt.')
         
         try:
-            self.verify_expr(self.tok.line, is_test_expr=True)
+            self.verify_expr(self.lines[self.tokndx], is_test_expr=True)
         except Exception as e:
             raise Exception('%s in while stmt.' % e)
 
@@ -843,7 +1014,7 @@ class TokenListVerifier:
             raise Exception('%s subroutine has invalid arg expr, missing l-paren' % self.linecol_str())
 
         try:
-            self.verify_expr(self.tok.line)
+            self.verify_expr(self.lines[self.tokndx])
         except Exception as e:
             raise Exception('%s %s in subroutine arg expr' % (self.linecol_str(), e))
         
@@ -866,302 +1037,110 @@ class TokenListVerifier:
         
         return result
 
+# operators the lexer matches, $+ & $- aren't in source, TokenListVerifier makes them from + & -.
+lexer_op_list = {op: code for op, code in operator_list.items() if op[0] != '$'}
+
+# chars ending an integer or identifier, see pys_token_pattern.
+lexer_delim_chars = ' \n#' + ''.join(sorted(set(op[0] for op in lexer_op_list)))
+
+# master pattern a .pys source is tokenized with in one pass, the named group that
+# matched gives the token's kind. spaces before a token are eaten with it & a comment
+# is eaten with the newline ending it, so each match is a token or a line end.
+# operators are tried longest first so '==' or '++' is one token rather than two.
+#
+# integers & identifiers run up to the next delimiter char. an integer running into
+# any other char is invalid, an identifier keeps going, see Lexer.strip_id_chars().
+# chars matching nothing else, tabs & the like, are skipped.
+pys_token_pattern = re.compile(r"""
+    [ ]*
+    (?: (?P<id>      [^\W\d] [^%s]* )
+      | (?P<op>      %s )
+      | (?P<newline> (?: \#[^\n]* )? \n )
+      | (?P<int>     \d+ (?P<int_end> [^%s] )? )
+      | (?P<comment> \#[^\n]* )
+      | (?P<other>   . ) )
+""" % (re.escape(lexer_delim_chars),
+       '|'.join(re.escape(op) for op in sorted(lexer_op_list, key=len, reverse=True)),
+       re.escape(lexer_delim_chars)), re.VERBOSE)
+
 class Lexer:
     def __init__(self):
         self.toklist   = TokenList()
-        self.col_num   = 0
         self.line_num  = 0
-        self.line_len  = 0
-        self.line_ndx  = -1
         self.ID_MAXLEN = 30
 
-    def is_operator(self, char):
-        # list of operators 1st chars, used by is_operator() for detecting operators.
-        op1stchars = ['(', 
-                      ')', 
-                    '{', 
-                    '}', 
-                    '[', 
-                    ']', 
-                    '!', 
-                    '&', 
-                    '+', 
-                    '-', 
-                    '*', 
-                    '/', 
-                    '%', 
-                    '=', 
-                    '<', 
-                    '>', 
-                    ',']
-        return char in op1stchars
-
-    # Determines if the passed char is an identifier or integer string delimiter.
-    def delimiter_reached(self, char):
-        if self.line_ndx > self.line_len: return 1 # EOL.
-        if char == '\n':                  return 1 # EOL.
-        if char == ' ':                   return 2 # whitespace.
-        if char == '#':                   return 3 # comment.
-        if self.is_operator(char):        return 4 # operator.
-        return 0 # no delimiter.
-
-    def next_char_is_delim(self):
-        # check if current char is last char of the line.
-        if (self.line_ndx + 1) == self.line_len: 
-            return 1 # EOL or EOF.
-
-        next_char = self.line[self.line_ndx + 1]
-
-        if next_char == '\n':            return 1 # EOL.
-        if next_char == ' ':             return 2 # whitespace.
-        if next_char == '#':             return 3 # comment.
-        if self.is_operator(next_char):  return 4 # operator.
-
-        return 0 # no delimiter.
-
-    def valid_id_char(self, char):
-        return char.isalnum() or char == '_'
+    def strip_id_chars(self, string, line_num, col):
+        # drops invalid chars from an identifier the way it's always been done, each is
+        # reported & skipped except the last char of the identifier which is kept.
+        chars = [string[0]]
 
-    def tokenize(self, pys_file_path):
-        str_start_col = 0
-        skip_line = False
+        for ndx in range(1, len(string) - 1):
+            if string[ndx].isalnum() or string[ndx] == '_':
+                chars.append(string[ndx])
+            else:
+                print('invalid identifier char [%s] on line: %d col: %d' % (string[ndx], line_num, col + ndx))
+
+        chars.append(string[-1])
+        return ''.join(chars)
 
+    def iter_tokens(self, pys_file_path):
+        # generator yielding each token of the source file as a tuple of it's
+        # (type, subtype, line, col, rawstr, value), lexing a line at a time so only
+        # the line being lexed is held. see TokenStream for reading it like a TokenList.
         try:
             file = open(pys_file_path, 'r')
         except FileNotFoundError:
             print("The file \"%s\" does not exist." % pys_file_path)
+            return
 
-        # iterate through source file lines one by one.
-        for self.line in file:
-            # skip empty lines.
-            if len(self.line) == 0: continue
-
-            self.line_len = len(self.line)
-            self.line_num += 1
-            self.line_ndx = -1
-
-            # skip empty lines.
-            #if self.line_len == 0: continue
-
-            # char processing loop.
-            # iterate through line's chars one by one, using while stmt because at times we must
-            # look one or more chars ahead ect. to process next char just continue this while stmt.
-            # when we are done with the line we just break from this while loop and the next cycle
-            # of <for line in file> executes.
-            while True:
-                self.line_ndx += 1
-
-                # for some mysterious reason this is how we must detect
-                # the EOL of the last line in the file.
-                # print(self.line_len)
-                if self.line_ndx == self.line_len: 
-                    break
-
-                # assign char we're processing to char variable.
-                char = self.line[self.line_ndx]
-
-                # deal with end of line, no idea why sometimes it's dealt with by the code below
-                # yet sometimes dealt with <if col_num > line_len: break> code above.
-                if char == '\n': break
-
-                # handle our whitespace and comments. if char is whitespace process next char.
-                if char == ' ': continue
-
-                # if char is comment the entire line is just skipped.
-                if char == '#': break
-
-                # are we dealing with an integer value?
-                if char.isdigit():
-                    num_str = char # buffer used to build multi-digit numbers(integers).
-                    str_start_col = self.line_ndx + 1 # hold the col of mumber.
-
-                    # is it a single digit number? check if next char is a delimiter.
-                    # check if we've reached end of the integer by finding a
-                    # delimiter at the next char after this current one being processed.
-                    if self.next_char_is_delim():
-                        # we have single digit int, create token then continue to next char.
-                        self.toklist.create(502, 502, self.line_num, str_start_col, char, int(num_str))
-                        continue
-
-                    # no delimiter found so we have multi-digit number, build it's string.
-                    while True:
-                        self.line_ndx += 1
-                        char = self.line[self.line_ndx]
-
-                        # check if we have an invalid char for an integer value.
-                        if not char.isdigit():
-                            raise Exception('invalid integer [%s] on line: %d col: %d' % (num_str + char, self.line_num, self.line_ndx + 1))
-
-                        # append to num string and continue building.
-                        num_str += char
-
-                        # check if we've reached end of the integer by finding a delimiter at the next 
-                        # char after this current one.
-                        if self.next_char_is_delim():
-                            # integer complete, tokenize that slut.
-                            self.toklist.create(502, 502, self.line_num, str_start_col, num_str, int(num_str))
-                            break
-
-                    # finished processing integer, so continue next iteration of char processing loop.
-                    continue
-
-                # check for all possible single char tokens before processing identifers & keywords.
-                # if found, create token and continue processing next char.
-                if char == '(':
-                    self.toklist.create(503, 11, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                elif char == ')':
-                    self.toklist.create(503, 12, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                elif char == '{':
-                    self.toklist.create(503, 13, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                elif char == '}':
-                    self.toklist.create(503, 14, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                # '!' char could be not operator or first char of not-equal operator.
-                # so we look ahead at next char to determine.
-                elif char == '!':
-                    # determine if we have not-equal operator by looking ahead to next char
-                    # and checking if it is a '=' character.
-                    if self.line[self.line_ndx + 1] == '=':
-                        self.toklist.create(503, 31, self.line_num, self.line_ndx + 1, '!=')
-                        # advance col_num past 2nd char of '!=' operator. so that next iteration of char 
-                        # processing loop is looking at the correct char.
-                        self.line_ndx += 1
-                        continue
-                    else:
-                        self.toklist.create(503, 17, self.line_num, self.line_ndx + 1, char)
-                        continue
-
-                elif char == '&':
-                    self.toklist.create(503, 18, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                elif char == '*':
-                    self.toklist.create(503, 21, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                elif char == '-':
-                    self.toklist.create(503, 20, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                elif char == '+':
-                    self.toklist.create(503, 19, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                elif char == '%':
-                    self.toklist.create(503, 23, self.line_num, self.line_ndx + 1, char)
-                    continue
-
-                elif char == "/":
-                    self.toklist.create(503, 22, self.line_num, self.line_ndx + 1, char)
-                    continue
+        with file:
+            for line in file:
+                self.line_num += 1
+                line_num = self.line_num
 
-                elif char == '=':
-                    # determine if we have equal operator by looking ahead to next char
-                    # and checking if it is a '=' character.
-                    if self.line[self.line_ndx + 1] == '=':
-                        self.toklist.create(503, 30, self.line_num, self.line_ndx + 1, '==')
-                        # advance col_num past 2nd char of '==' operator. so that next iteration of char 
-                        # processing loop is looking at the correct char.
-                        self.line_ndx += 1
-                        continue
-                    else:
-                        self.toklist.create(503, 24, self.line_num, self.line_ndx + 1, char)
-                        continue
+                for match in pys_token_pattern.finditer(line):
+                    kind = match.lastgroup
 
-                elif char == '<':
-                    # determine if we have less-than-or-equal operator by looking ahead to next char
-                    # and checking if it is a '=' character.
-                    if self.line[self.line_ndx + 1] == '=':
-                        self.toklist.create(503, 32, self.line_num, self.line_ndx + 1, '<=')
-                        # advance col_num past 2nd char of '<=' operator. so that next iteration of char 
-                        # processing loop is looking at the correct char.
-                        self.line_ndx += 1
-                        continue
-                    else:
-                        self.toklist.create(503, 27, self.line_num, self.line_ndx + 1, char)
-                        continue
+                    if kind == 'id':
+                        string = match['id']
+                        col    = match.start('id') + 1
 
-                elif char == '>':
-                    # determine if we have greater-than-or-equal operator by looking ahead to next char
-                    # and checking if it is a '=' character.
-                    if self.line[self.line_ndx + 1] == '=':
-                        self.toklist.create(503, 33, self.line_num, self.line_ndx + 1, '>=')
-                        # advance col_num past 2nd char of '>=' operator. so that next iteration of char 
-                        # processing loop is looking at the correct char.
-                        self.line_ndx += 1
-                        continue
-                    else:
-                        self.toklist.create(503, 28, self.line_num, self.line_ndx + 1, char)
-                        continue
+                        if len(string) > 1 and not assembler.identifier_pattern.fullmatch(string):
+                            string = self.strip_id_chars(string, line_num, col)
 
-                elif char == '[':
-                    self.toklist.create(503, 15, self.line_num, self.line_ndx + 1, char)
-                    continue
+                        if len(string) > self.ID_MAXLEN:
+                            raise Exception('invalid identifier [%s] exceeds maximum length on line: %d col: %d' % (string, line_num, match.end()))
 
-                elif char == ']':
-                    self.toklist.create(503, 16, self.line_num, self.line_ndx + 1, char)
-                    continue
+                        if string in keyword_list:
+                            yield (500, keyword_list[string], line_num, col, string, None)
+                        else:
+                            yield (501, 501, line_num, col, string, None)
 
-                elif char == ',':
-                    self.toklist.create(503, 29, self.line_num, self.line_ndx + 1, char)
-                    continue
+                    elif kind == 'op':
+                        string = match['op']
+                        yield (503, lexer_op_list[string], line_num, match.start('op') + 1, string, None)
 
-                # handle identifiers & keywords, check if char is valid starting character.
-                if self.valid_id_char(char):
-                    # we have valid start to our identifier or keyword so lets build the string.
-                    str_start_col = self.line_ndx + 1
-                    string = char
+                    elif kind == 'int':
+                        string = match['int']
 
-                    # check if string is only one char long, no need to enter string building loop below.
-                    if self.next_char_is_delim():
-                        self.toklist.create(501, 501, self.line_num, str_start_col, string)
-                        continue # continue next iteration of char processing loop.
-                    
-                    # string building loop.
-                    while True:
-                        self.line_ndx += 1
-                        char = self.line[self.line_ndx]
-
-                        # check if char is identifier delimiter of some kind.
-                        # if so break out of string building loop and tokenize it.
-                        if self.next_char_is_delim():
-                            string += char
-                            break
-
-                        # check if char is valid identifer char then add to string
-                        if self.valid_id_char(char):
-                            string += char
-                        else:
-                            print('invalid identifier char [%s] on line: %d col: %d' % (char, self.line_num, self.line_ndx + 1))
-                            #raise Exception(s)
+                        if match['int_end'] is not None:
+                            raise Exception('invalid integer [%s] on line: %d col: %d' % (string, line_num, match.end()))
 
-                    # confirm the string is valid identifier or keyword before tokenization.
-                    # check if it exceeds the maximum identifier length.
-                    if len(string) > self.ID_MAXLEN:
-                        raise Exception('invalid identifier [%s] exceeds maximum length on line: %d col: %d' % (string, self.line_num, self.line_ndx + 1))
+                        yield (502, 502, line_num, match.start('int') + 1, string, int(string))
 
-                    # is the string a keyword?
-                    if string in keyword_list.keys():
-                        self.toklist.create(500, keyword_list[string], self.line_num, str_start_col, string)
-                        continue
+    def stream(self, pys_file_path):
+        # returns a TokenStream of the source file's tokens, each lexed as it's read.
+        return TokenStream(self.iter_tokens(pys_file_path))
 
-                    # string is valid identifier, tokenize it. then
-                    # continue processing next char in line
-                    self.toklist.create(501, 501, self.line_num, str_start_col, string)
-                    continue
+    def tokenize(self, pys_file_path):
+        create = self.toklist.create
 
-        file.close() # close .pys file we just tokenized.
+        for tok in self.iter_tokens(pys_file_path):
+            create(*tok)
 
         # append TOKEN_STREAM_END token to signify the end of the stream.
         # we add two of these tokens due to weirdness in the verifier design....
         self.toklist.create(999, 999, 0, 0, '') # 999: tokstream end type+subtype code.
         self.toklist.create(999, 999, 0, 0, '')
 
-        # Tokenization complete.
\ No newline at end of file
+        # Tokenization complete.
@@ -0,0 +1,253 @@
+from concurrent.futures import ProcessPoolExecutor
+import struct
+import time
+import csv
+import sys
+import os
+
+from interpreter import *
+
+# runs many .fbin jobs across a pool of worker processes, from the yson_dev directory:
+#     python runbatch.py manifest results.csv [options]
+#     python assembler.py run-batch manifest results.csv [options]
+# yson.py run-batch works the same, it puts yson_dev on the python path itself.
+#
+# options:
+# -ram addrs    : comma separated ram addrs whose words are reported for each job, eg -ram 64,0x44.
+# -workers n    : number of worker processes, defaults to the number of cores.
+# -ref|-closure|-jit : the interpreter each job runs on, see interpreter.py. defaults to -ref.
+# -max-instrs n : instructions a job may run, one that hasn't reached die by then is stopped
+#                 & reported as an error so a job that never ends can't hang the batch.
+#
+# the manifest has a job per line, the path of a .fbin followed by any number of addr=value
+# ram patches written into ram after the program is loaded & before it runs:
+#     sum.fbin 64=10 68=0xFF
+# blank lines & lines starting with # are skipped, relative paths are relative to the manifest.
+#
+# each worker keeps every program it's loaded decoded & reuses it for later jobs running the
+# same .fbin, see Interpreter.reset(). jobs are sorted by path before being split into chunks
+# so a worker tends to get runs of jobs sharing a program.
+#
+# results are written a column per field: job, fbin, status(0 when the program died, 1 on
+# error), top(blank when the stack is empty), instr_count, a ram@addr column per -ram addr
+# & error. a results path ending in .npz is written with numpy.savez() instead of as csv.
+
+RUN_OK    = 0
+RUN_ERROR = 1
+
+CHUNKS_PER_WORKER = 4
+MAX_CHUNK_SIZE    = 256
+
+worker_state = {} # each worker's interpreter class, ram addrs & loaded programs, set by init_worker().
+
+def parse_manifest(manifest_path):
+# returns list of (job-ndx, fbin-path, [(addr, value), ...]) read from the manifest.
+    jobs     = []
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path, 'r') as manifest_file:
+        for line_num, line in enumerate(manifest_file, 1):
+            fields = line.split()
+
+            if not fields or fields[0].startswith('#'):
+                continue
+
+            patches = []
+
+            for field in fields[1:]:
+                addr, sep, value = field.partition('=')
+
+                try:
+                    if not sep:
+                        raise ValueError()
+
+                    patches.append((int(addr, 0), int(value, 0) & WORD_MASK))
+
+                except ValueError:
+                    raise Exception("yson: manifest line %d: invalid ram patch: %s, expected addr=value" % (line_num, field))
+
+            jobs.append((len(jobs), os.path.join(base_dir, fields[0]), patches))
+
+    return jobs
+
+def init_worker(mode, ram_addrs, max_instrs):
+    worker_state['interp_class'] = interpreter_map[mode]
+    worker_state['ram_addrs']    = ram_addrs
+    worker_state['max_instrs']   = max_instrs
+    worker_state['programs']     = {} # fbin path -> interpreter, or the error loading it raised.
+
+def load_program(fbin_path):
+# returns the worker's interpreter for fbin_path, loading & decoding it the first time.
+    programs = worker_state['programs']
+
+    if fbin_path not in programs:
+        try:
+            with open(fbin_path, 'rb') as fbin_file:
+                programs[fbin_path] = worker_state['interp_class'](fbin_file.read())
+
+        except Exception as e:
+            programs[fbin_path] = Exception("yson: unable to load [%s]: %s" % (fbin_path, e))
+
+    return programs[fbin_path]
+
+def run_job(job):
+# returns (job-ndx, status, top, instr-count, [ram words], error) for a job.
+    job_ndx, fbin_path, patches = job
+    ram_addrs = worker_state['ram_addrs']
+    interp    = load_program(fbin_path)
+
+    if isinstance(interp, Exception):
+        return (job_ndx, RUN_ERROR, None, 0, [0] * len(ram_addrs), str(interp))
+
+    interp.reset()
+
+    try:
+        for addr, value in patches:
+            if addr + WORDSIZE > len(interp.ram):
+                raise Exception("yson: ram patch addr %d is outside the program's %d bytes of ram" % (addr, len(interp.ram)))
+
+            struct.pack_into('<I', interp.ram, addr, value)
+
+        interp.run(worker_state['max_instrs'])
+        status = RUN_OK
+        error  = ''
+
+    except Exception as e:
+        status = RUN_ERROR
+        error  = str(e)
+
+    ram_words = [struct.unpack_from('<I', interp.ram, addr)[0] if addr + WORDSIZE <= len(interp.ram) else 0 for addr in ram_addrs]
+    top       = interp.top() if status == RUN_OK else None
+
+    return (job_ndx, status, top, interp.instr_count, ram_words, error)
+
+def run_job_chunk(chunk):
+    return [run_job(job) for job in chunk]
+
+def split_jobs(jobs, worker_count):
+# returns the jobs sorted by path & split into chunks, several per worker so they even out.
+    jobs       = sorted(jobs, key=lambda job: job[1])
+    chunk_size = max(1, min(MAX_CHUNK_SIZE, -(-len(jobs) // (worker_count * CHUNKS_PER_WORKER))))
+
+    return [jobs[i : i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+def run_batch(jobs, ram_addrs=(), worker_count=None, mode='-ref', max_instrs=None):
+# runs jobs across worker_count processes, returns the results as a list of (name, values)
+# columns in job order. max_instrs of None lets every job run until it dies.
+    worker_count = worker_count or os.cpu_count() or 1
+    ram_addrs    = list(ram_addrs)
+    results      = [None] * len(jobs)
+
+    with ProcessPoolExecutor(max_workers=worker_count, initializer=init_worker, initargs=(mode, ram_addrs, max_instrs)) as executor:
+        for chunk_results in executor.map(run_job_chunk, split_jobs(jobs, worker_count)):
+            for result in chunk_results:
+                results[result[0]] = result
+
+    columns = [('job',         [job[0] for job in jobs]),
+               ('fbin',        [job[1] for job in jobs]),
+               ('status',      [result[1] for result in results]),
+               ('top',         [result[2] for result in results]),
+               ('instr_count', [result[3] for result in results])]
+
+    for i, addr in enumerate(ram_addrs):
+        columns.append(('ram@%d' % addr, [result[4][i] for result in results]))
+
+    columns.append(('error', [result[5] for result in results]))
+
+    return columns
+
+def write_columns(results_path, columns):
+# writes columns to results_path as csv, or as a numpy .npz when the path ends with .npz.
+    if results_path.endswith('.npz'):
+        try:
+            import numpy as np
+        except ImportError:
+            raise Exception("yson: writing .npz results needs numpy, install it with pip install numpy")
+
+        arrays = {}
+
+        for name, values in columns:
+            if name == 'top':
+                arrays['top']       = np.array([value or 0 for value in values], dtype=np.uint32)
+                arrays['top_valid'] = np.array([value is not None for value in values])
+            elif name in ('fbin', 'error'):
+                arrays[name] = np.array(values, dtype=str)
+            else:
+                arrays[name] = np.array(values, dtype=np.uint32 if name.startswith('ram@') else np.int64)
+
+        np.savez(results_path, **arrays)
+        return
+
+    with open(results_path, 'w', newline='') as results_file:
+        writer = csv.writer(results_file)
+        writer.writerow([name for name, values in columns])
+        writer.writerows(zip(*[['' if value is None else value for value in values] for name, values in columns]))
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    ram_addrs    = []
+    worker_count = None
+    mode         = '-ref'
+    max_instrs   = None
+
+    if len(argv) < 2:
+        print("\nyson: usage: run-batch manifest results.csv [-ram addrs] [-workers n] [-max-instrs n] [%s]" % '|'.join(interpreter_map.keys()))
+        sys.exit()
+
+    manifest_path, results_path = argv[0], argv[1]
+    args = iter(argv[2:])
+
+    for arg in args:
+        try:
+            if arg == '-ram':
+                ram_addrs = [int(addr, 0) for addr in next(args).split(',')]
+            elif arg == '-workers':
+                worker_count = int(next(args))
+            elif arg == '-max-instrs':
+                max_instrs = int(next(args), 0)
+
+                if max_instrs < 0:
+                    raise ValueError()
+            elif arg in interpreter_map:
+                mode = arg
+            else:
+                print("\nyson: invalid optional arg: %s" % arg)
+                sys.exit()
+
+        except (StopIteration, ValueError):
+            print("\nyson: '%s' needs a valid value." % arg)
+            sys.exit()
+
+    try:
+        jobs = parse_manifest(manifest_path)
+
+    except FileNotFoundError:
+        print("\nError: Unable to open manifest: [%s], file does not exist!\n" % manifest_path)
+        sys.exit()
+    except OSError as e:
+        print("Error: An I/O error occurred while attempting to read manifest: [%s]\n    more info: %s" % (manifest_path, e))
+        sys.exit()
+    except Exception as e:
+        print('\n%s\n' % e)
+        sys.exit()
+
+    start   = time.perf_counter()
+    columns = run_batch(jobs, ram_addrs, worker_count, mode, max_instrs)
+    elapsed = time.perf_counter() - start
+
+    try:
+        write_columns(results_path, columns)
+
+    except OSError as e:
+        print("Error: An I/O error occurred while attempting to write results: [%s]\n    more info: %s" % (results_path, e))
+        sys.exit()
+    except Exception as e:
+        print('\n%s\n' % e)
+        sys.exit()
+
+    status = dict(columns)['status']
+    print("jobs: %d, errors: %d, %.3f sec, %.0f jobs/sec" % (len(jobs), status.count(RUN_ERROR), elapsed, len(jobs) / elapsed if elapsed else 0))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import struct
+import sys
+
+from assembler import *
+
+# reader for the ring-buffer trace fvm dumps on die when run with FVM_TRACE=1,
+# see dump_trace() in vm.c. fvm only traces when built with -DTRACE_MAX_LEVEL=1 or
+# higher, see vm.h. run from the yson_dev directory:
+#     python trace.py [trace_path]
+#
+# layout, all little-endian:
+#     header -> magic b'FVMT', version(u16), entry-size(u16), entry-count(u32), ops-recorded(u32)
+#     entry  -> ip(u32), top-of-stack(u32), opcode(u8), 3 bytes pad. oldest entry first.
+
+TRACE_MAGIC       = b'FVMT'
+TRACE_VERSION     = 1
+TRACE_DUMP_PATH   = 'fvm.trace'
+
+trace_header_decoder = struct.Struct('<4sHHII')
+trace_entry_decoder  = struct.Struct('<IIB3x')
+
+class TraceReader:
+# decodes a trace dump held in buf. self.entries is a list of (ip, tos, opcode)
+# tuples oldest first, self.ops_recorded is how many ops fvm traced in total
+# which is more than len(self.entries) once the ring has wrapped.
+
+    def __init__(self, buf):
+        if len(buf) < trace_header_decoder.size:
+            raise Exception("yson: trace dump is too small to hold a header!")
+
+        magic, self.version, entry_size, entry_count, self.ops_recorded = trace_header_decoder.unpack_from(buf, 0)
+
+        if magic != TRACE_MAGIC:
+            raise Exception("yson: trace dump has bad magic: %s" % magic)
+
+        if self.version != TRACE_VERSION:
+            raise Exception("yson: trace dump is version %d, expected %d" % (self.version, TRACE_VERSION))
+
+        if entry_size != trace_entry_decoder.size:
+            raise Exception("yson: trace dump entry size is %d, expected %d" % (entry_size, trace_entry_decoder.size))
+
+        end = trace_header_decoder.size + entry_count * entry_size
+
+        if end > len(buf):
+            raise Exception("yson: trace dump is truncated, %d entries declared" % entry_count)
+
+        self.entries = list(trace_entry_decoder.iter_unpack(buf[trace_header_decoder.size : end]))
+
+    def dropped_count(self):
+    # returns how many of the oldest ops were overwritten before the dump.
+        return self.ops_recorded - len(self.entries)
+
+    def lines(self):
+    # yields a line of text for each entry, the opcode's mnemonic from mnemonic_tbl.
+        for ndx, (ip, tos, opcode) in enumerate(self.entries, self.dropped_count()):
+            yield "%8d :: addr: %d :: op: %-8s :: tos: %d (%d)" % (ndx, ip, mnemonic_tbl.get(opcode, 'UNKNOWN'), tos, struct.unpack('<i', struct.pack('<I', tos))[0])
+
+def main():
+    trace_path = sys.argv[1] if len(sys.argv) > 1 else TRACE_DUMP_PATH
+
+    try:
+        with open(trace_path, 'rb') as trace_file:
+            buf = trace_file.read()
+
+    except FileNotFoundError:
+        print("\nError: Unable to open trace-file: [%s], file does not exist!\n" % trace_path)
+        sys.exit()
+    except OSError as e:
+        print("Error: An I/O error occurred while attempting to read trace-file: [%s]\n    more info: %s" % (trace_path, e))
+        sys.exit()
+
+    reader = TraceReader(buf)
+
+    print("\nTRACE: %s\n" % trace_path)
+    print("ops recorded: %d, entries: %d, dropped: %d\n" % (reader.ops_recorded, len(reader.entries), reader.dropped_count()))
+
+    for line in reader.lines():
+        print(line)
+
+if __name__ == "__main__":
+    main()